@@ -3,31 +3,776 @@ Vero Template Generator Backend
 Flask API for generating professional documents using Gemini AI
 """
 
+import gc
+import hmac
 import io
 import os
 import sys
+import time
 from datetime import datetime
 
-from flask import Flask, jsonify, request, send_file
+from flask import Flask, Response, g, jsonify, request
 from flask_cors import CORS
-from utils.docx_generator import get_docx_generator
+from utils.ai_jobs import AIJob, get_ai_job_runner
+from utils.ai_scheduler import (
+    DEFAULT_PRIORITY,
+    get_ai_scheduler,
+    reset_call_context,
+    set_call_context,
+)
+from utils.bulkhead import get_bulkheads
+from utils.cache_backend import CacheUnavailable
+from utils.cancellation import (
+    CancelToken,
+    DeadlineExceeded,
+    RequestCancelled,
+    current_cancel_token,
+    get_cancellation_stats,
+    reset_cancel_token,
+    set_cancel_token,
+)
+from utils.clause_library import get_clause_library
+from utils.document_store import get_document_store
 from utils.gemini_client import get_gemini_client
-from utils.pdf_generator import get_pdf_generator
+from utils.idempotency import get_idempotency_store
+from utils.load_shedder import get_load_shedder
+from utils.output_validation import OutputRejected
+from utils.pdf_signer import (
+    POSITIONS,
+    IncrementalStamper,
+    get_signature_cache,
+    parse_pages,
+    sign_docx,
+)
+from utils.profiler import get_request_profiler
+from utils.rule_enhancer import get_rule_enhancer
+from utils.schemas import validate_payload
+from utils.spool import STREAM_CHUNK_SIZE, new_spool, spool_size
+from utils.startup import LazyService, get_warmup
+from utils.tenant_quota import QuotaExceeded, get_tenant_quota
+from werkzeug.wsgi import FileWrapper
 
 # Initialize Flask app
 app = Flask(__name__)
+app.config["MAX_CONTENT_LENGTH"] = int(os.environ.get("MAX_CONTENT_LENGTH", 16777216))
 CORS(app)
 
+
+def _load_docx_generator():
+    from utils.docx_generator import get_docx_generator
+
+    return get_docx_generator()
+
+
+def _load_pdf_generator():
+    from utils.pdf_generator import get_pdf_generator
+
+    return get_pdf_generator()
+
+
+def _load_document_enhancer():
+    from utils.document_enhancer import get_document_enhancer
+
+    return get_document_enhancer()
+
+
 # Initialize services
+# Generators (python-docx, reportlab) and the Gemini SDK are imported on
+# first use; run_warmup() loads them before a worker takes traffic.
 try:
     gemini_client = get_gemini_client()
-    docx_generator = get_docx_generator()
-    pdf_generator = get_pdf_generator()
+    docx_generator = LazyService("docx_generator", _load_docx_generator)
+    pdf_generator = LazyService("pdf_generator", _load_pdf_generator)
+    document_enhancer = LazyService("document_enhancer", _load_document_enhancer)
     print("✓ All services initialized successfully", file=sys.stderr)
 except Exception as e:
     print(f"✗ Error initializing services: {str(e)}", file=sys.stderr)
     sys.exit(1)
 
+warmup = get_warmup()
+
+
+def run_warmup():
+    """
+    Render each document type once and connect to Gemini
+
+    Called from gunicorn's post_worker_init hook (see gunicorn.conf.py),
+    so each worker only accepts requests once it is warm.
+    """
+    warmup.run(docx_generator, pdf_generator, gemini_client)
+
+
+def preload_for_fork():
+    """
+    Build shared, immutable state in the gunicorn master (preload mode)
+
+    Imports the heavy modules, builds the generators (PDF stylesheet
+    included) and renders each document type once, then freezes
+    everything into the permanent GC generation so workers share those
+    pages copy-on-write instead of each building their own.
+    """
+    gemini_client.load_sdk()
+    warmup.render_all(docx_generator, pdf_generator)
+    warmup.preloaded = True
+    gc.collect()
+    gc.freeze()
+    print(
+        f"✓ Preloaded shared state ({gc.get_freeze_count()} objects frozen)",
+        file=sys.stderr,
+    )
+
+
+def reinit_after_fork():
+    """Rebuild state that must not be shared across fork"""
+    gemini_client.reset()
+    ai_job_runner.reset()
+
+
+request_profiler = get_request_profiler()
+bulkheads = get_bulkheads()
+load_shedder = get_load_shedder()
+document_store = get_document_store()
+idempotency_store = get_idempotency_store()
+signature_cache = get_signature_cache()
+# Standard contract clauses, loaded before fork so workers share them
+clause_library = get_clause_library()
+rule_enhancer = get_rule_enhancer()
+ai_scheduler = get_ai_scheduler()
+ai_job_runner = get_ai_job_runner()
+cancellation_stats = get_cancellation_stats()
+tenant_quota = get_tenant_quota()
+
+
+# ============================================================================
+# DOCUMENT RESPONSES
+# ============================================================================
+
+
+def send_document(
+    spool, mimetype: str, download_name: str, etag: str = None
+) -> Response:
+    """
+    Stream a rendered document to the client in chunks
+
+    Sets Content-Length and, for GET/HEAD, answers Range requests; only
+    one chunk is held in memory at a time. The spool (and its temp file, if it spilled
+    to disk) is closed when the response is closed.
+
+    Args:
+        spool: Rewound file returned by a generator
+        mimetype: Response content type
+        download_name: Attachment filename
+        etag: Strong ETag for conditional and If-Range requests (optional)
+
+    Returns:
+        Streaming response (206 for a satisfiable Range request)
+    """
+    size = spool_size(spool)
+    response = Response(
+        FileWrapper(spool, STREAM_CHUNK_SIZE),
+        mimetype=mimetype,
+        direct_passthrough=True,
+    )
+    response.headers.set("Content-Disposition", "attachment", filename=download_name)
+    response.content_length = size
+    if etag:
+        response.set_etag(etag)
+    return response.make_conditional(
+        request.environ, accept_ranges=True, complete_length=size
+    )
+
+
+def request_tenant() -> str:
+    """Tenant a request is accounted to (see TenantQuota.tenant_for)"""
+    return tenant_quota.tenant_for(
+        request.headers.get("X-API-Key"),
+        request.headers.get("X-Tenant-Id"),
+        request.remote_addr,
+    )
+
+
+def deliver_document(spool, mimetype: str, download_name: str) -> Response:
+    """
+    Return a generated document inline, or as a download URL when the
+    client asks for one with ?delivery=url
+
+    URL delivery stores the document in the local document store so
+    re-downloads and retries are static file reads. Falls back to inline
+    bytes if the document does not fit the tenant's quota.
+    """
+    if request.args.get("delivery") != "url":
+        return send_document(spool, mimetype, download_name)
+
+    try:
+        meta = document_store.put(spool, request_tenant(), download_name, mimetype)
+    except OSError as e:
+        print(f"Document store unavailable: {str(e)}", file=sys.stderr)
+        meta = None
+
+    if meta is None:
+        spool.seek(0)
+        return send_document(spool, mimetype, download_name)
+
+    spool.close()
+    return jsonify(
+        {
+            "download_url": f"/documents/{meta['token']}",
+            "filename": meta["filename"],
+            "size": meta["size"],
+            "sha256": meta["sha256"],
+            "expires_at": datetime.fromtimestamp(meta["expires_at"]).isoformat(),
+        }
+    )
+
+
+@app.route("/documents/<token>", methods=["GET"])
+def download_document(token):
+    """Serve a stored document by download token (supports Range)"""
+    document, meta = document_store.open(token)
+    if meta is None:
+        return jsonify({"error": "Document not found"}), 404
+    if document is None:
+        return jsonify({"error": "Download link expired"}), 410
+
+    response = send_document(
+        document, meta["mimetype"], meta["filename"], etag=meta["sha256"]
+    )
+    response.headers["Cache-Control"] = "private, max-age=60"
+    return response
+
+
+# ============================================================================
+# ON-DEMAND PROFILING
+# ============================================================================
+
+
+@app.before_request
+def start_request_profile():
+    """Profile /generate-* requests that carry the profiling secret"""
+    if not request.path.startswith("/generate-"):
+        return
+    if not request_profiler.is_authorized(
+        request.headers.get(request_profiler.HEADER)
+    ):
+        return
+    g.profile_session = request_profiler.start(
+        request.headers.get(request_profiler.MODE_HEADER, "sampling")
+    )
+
+
+@app.after_request
+def finish_request_profile(response):
+    """Write the profile and return its id in a response header"""
+    session = g.pop("profile_session", None)
+    if session:
+        request_profiler.stop(
+            session,
+            {
+                "path": request.path,
+                "status": response.status_code,
+                "request_bytes": request.content_length or 0,
+            },
+        )
+        response.headers[request_profiler.ID_HEADER] = session["id"]
+    return response
+
+
+@app.teardown_request
+def abort_request_profile(error=None):
+    """Release the profiler if the request failed before after_request"""
+    session = g.pop("profile_session", None)
+    if session:
+        request_profiler.stop(session, {"path": request.path, "error": str(error)})
+
+
+# ============================================================================
+# IDEMPOTENCY KEYS
+# ============================================================================
+
+# Statuses worth replaying: the result, or a deterministic rejection.
+# Busy, quota and cancelled responses are retried for real, and so are
+# documents served without (some of) their AI content (see is_reduced()).
+IDEMPOTENT_STATUSES = {200, 400, 413, 422}
+
+# Response headers that describe the original exchange, not the result
+UNREPLAYED_HEADERS = {"content-length", "date", "server", request_profiler.ID_HEADER.lower()}
+
+
+def is_idempotent_request() -> bool:
+    return (
+        request.method == "POST"
+        and request.path.startswith("/generate-")
+        and idempotency_store.HEADER in request.headers
+    )
+
+
+def replay_response(meta: dict, body) -> Response:
+    """Stream a stored response back to a retry"""
+    response = Response(
+        FileWrapper(body, STREAM_CHUNK_SIZE),
+        status=meta["status"],
+        headers=meta["headers"],
+        direct_passthrough=True,
+    )
+    response.content_length = meta["size"]
+    response.headers[idempotency_store.REPLAY_HEADER] = "true"
+    return response
+
+
+@app.before_request
+def check_idempotency_key():
+    """
+    Run a /generate-* POST with an Idempotency-Key once per tenant and key
+
+    Retries replay the stored response, and duplicates that arrive while
+    the first request is running (in any worker) get 409 with Retry-After
+    straight away. Runs before admission, so neither holds a thread
+    outside the bulkheads or takes Gemini quota.
+    """
+    if not is_idempotent_request():
+        return
+    key = request.headers[idempotency_store.HEADER]
+    if not idempotency_store.valid_key(key):
+        return jsonify({"error": "Invalid Idempotency-Key"}), 400
+
+    fingerprint = idempotency_store.fingerprint(
+        request.method, request.full_path, request.get_data(cache=True)
+    )
+    try:
+        outcome, value = idempotency_store.begin(request_tenant(), key, fingerprint)
+    except CacheUnavailable as e:
+        # Running the request beats refusing it; a retry may run it twice
+        print(f"Idempotency store unavailable, running without key: {str(e)}", file=sys.stderr)
+        return
+    if outcome == "run":
+        g.idempotency_claim = value
+        return
+    if outcome == "replay":
+        print(f"Replaying {request.path} for Idempotency-Key", file=sys.stderr)
+        return replay_response(*value)
+    if outcome == "mismatch":
+        return (
+            jsonify({"error": "Idempotency-Key was already used for a different request"}),
+            422,
+        )
+    response = jsonify({"error": "A request with this Idempotency-Key is still running"})
+    response.status_code = 409
+    response.headers["Retry-After"] = str(load_shedder.retry_after(classify_request()))
+    return response
+
+
+def is_reduced() -> bool:
+    """Whether the response was degraded (quota, load) or cut short by its deadline"""
+    return bool(g.get("degraded") or g.get("ai_items", {}).get("skipped"))
+
+
+@app.after_request
+def store_idempotent_response(response):
+    """Store the first response for the request's Idempotency-Key"""
+    claim = g.pop("idempotency_claim", None)
+    if claim is None:
+        return response
+    if response.status_code not in IDEMPOTENT_STATUSES or is_reduced():
+        idempotency_store.abandon(claim)
+        return response
+
+    headers = [
+        (name, value)
+        for name, value in response.headers.items()
+        if name.lower() not in UNREPLAYED_HEADERS
+    ]
+    # Download links die with their token, so replay them no longer than that
+    ttl = document_store.url_ttl if request.args.get("delivery") == "url" else None
+    try:
+        if response.direct_passthrough and isinstance(response.response, FileWrapper):
+            document = response.response.file
+            idempotency_store.complete(claim, response.status_code, headers, document, ttl)
+            document.seek(0)
+        else:
+            body = io.BytesIO(response.get_data())
+            idempotency_store.complete(claim, response.status_code, headers, body, ttl)
+    except OSError as e:
+        print(f"Idempotency store unavailable: {str(e)}", file=sys.stderr)
+    return response
+
+
+@app.teardown_request
+def release_idempotency_key(error=None):
+    """Release the key if the request failed before after_request"""
+    claim = g.pop("idempotency_claim", None)
+    if claim:
+        idempotency_store.abandon(claim)
+
+
+# ============================================================================
+# BULKHEADS AND LOAD SHEDDING
+# ============================================================================
+
+AI_LIGHT_ROUTES = {"/enhance-description", "/enhance-skills-summary"}
+AI_OPTIONAL_ROUTES = {"/generate-resume", "/generate-portfolio-pdf"}
+
+# Upload routes that always fan out to several Gemini calls
+AI_UPLOAD_ROUTES = {"/enhance"}
+
+# Upload routes that only render
+RENDER_UPLOAD_ROUTES = {"/add-signature"}
+
+# Stop an AI request's remaining Gemini calls and its render once the
+# client has disconnected
+CANCEL_ON_DISCONNECT = os.getenv("CANCEL_ON_DISCONNECT", "true").lower() == "true"
+
+# What happens to AI requests from a tenant over its AI budget (see
+# utils/tenant_quota.py): "degrade" renders without AI where the route
+# supports it and throttles otherwise; "throttle" always answers 429
+TENANT_QUOTA_ACTION = os.getenv("TENANT_QUOTA_ACTION", "degrade")
+
+# Latency budget of an AI request (header, or a deadline_ms payload/form
+# field): AI work stops this long before it so the document still renders
+DEADLINE_HEADER = "X-Deadline-Ms"
+DEADLINE_RENDER_RESERVE_MS = float(os.getenv("DEADLINE_RENDER_RESERVE_MS", "500"))
+
+# Scheduling class of each route's Gemini calls; others are "standard"
+AI_PRIORITIES = {
+    "/enhance-description": "interactive",
+    "/enhance-skills-summary": "interactive",
+    "/generate-resume": "bulk",
+    "/enhance": "bulk",
+}
+
+# AI routes that still produce a useful result without Gemini, and the
+# payload changes that take them off the AI path
+DEGRADABLE_ROUTES = {
+    "/generate-resume": {"enhancer": "rules"},
+    "/generate-portfolio-pdf": {"enhance_with_ai": False},
+    "/generate-proposal": {"generate_with_ai": False},
+    "/enhance-description": {"enhancer": "rules"},
+    "/enhance-skills-summary": {"enhancer": "rules"},
+}
+
+
+def classify_request():
+    """
+    Map a request to its bulkhead class
+
+    Returns:
+        'render', 'ai_light', 'ai_heavy', or None for unguarded routes
+    """
+    if request.path in AI_LIGHT_ROUTES:
+        data = request.get_json(silent=True)
+        rules = isinstance(data, dict) and data.get("enhancer") == "rules"
+        return "render" if rules else "ai_light"
+    if request.path in AI_UPLOAD_ROUTES:
+        return "ai_heavy"
+    if request.path in RENDER_UPLOAD_ROUTES:
+        return "render"
+    if not request.path.startswith("/generate-"):
+        return None
+
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict) or request.path == "/generate-invoice":
+        return "render"
+
+    if request.path in AI_OPTIONAL_ROUTES:
+        uses_ai = data.get("enhance_with_ai", False) and data.get("enhancer") != "rules"
+    else:
+        uses_ai = data.get("generate_with_ai", True) and not data.get(
+            "custom_content"
+        )
+    if uses_ai and request.path == "/generate-contract" and not data.get("custom_terms"):
+        # Standard contracts are spliced from the clause library without AI
+        uses_ai = not clause_library.covers(data.get("contract_type", "Service Agreement"))
+    return "ai_heavy" if uses_ai else "render"
+
+
+def degrade_to_render() -> bool:
+    """
+    Switch AI off in the (cached) request payload so the route renders
+    without calling Gemini
+
+    Returns:
+        True if the route supports running without AI
+    """
+    overrides = DEGRADABLE_ROUTES.get(request.path)
+    data = request.get_json(silent=True)
+    if not overrides or not isinstance(data, dict):
+        return False
+    data.update(overrides)
+    return True
+
+
+def client_socket():
+    """The connection's socket under gunicorn or the werkzeug dev server"""
+    return request.environ.get("gunicorn.socket") or request.environ.get(
+        "werkzeug.socket"
+    )
+
+
+def ai_deadline(arrived: float):
+    """
+    time.monotonic() at which the request's AI work must stop
+
+    Args:
+        arrived: time.monotonic() when the request was admitted
+
+    Returns:
+        Deadline, or None if the client sent no (valid) budget
+    """
+    budget = request.headers.get(DEADLINE_HEADER)
+    if budget is None:
+        data = request.get_json(silent=True)
+        if isinstance(data, dict):
+            budget = data.get("deadline_ms")
+        elif request.path in AI_UPLOAD_ROUTES:
+            budget = request.form.get("deadline_ms")
+    try:
+        budget = float(budget)
+    except (TypeError, ValueError):
+        return None
+    if budget <= 0:
+        return None
+    return arrived + (budget - DEADLINE_RENDER_RESERVE_MS) / 1000
+
+
+def cancelled_response() -> Response:
+    """Count a request whose client went away; nobody reads the response"""
+    print(f"Client disconnected, cancelled {request.path}", file=sys.stderr)
+    cancellation_stats.record_request(request.path)
+    # 499 Client Closed Request (nginx convention)
+    return Response(status=499)
+
+
+def quota_response():
+    """429 until the tenant's AI budget window resets"""
+    response = jsonify({"error": "AI quota exhausted, please retry later"})
+    response.status_code = 429
+    response.headers["Retry-After"] = str(tenant_quota.retry_after())
+    return response
+
+
+def busy_response(endpoint_class: str, expected_wait: float = 0.0):
+    """503 with a Retry-After hint derived from recent latency"""
+    response = jsonify({"error": "Service busy, please retry shortly"})
+    response.status_code = 503
+    response.headers["Retry-After"] = str(
+        load_shedder.retry_after(endpoint_class, expected_wait)
+    )
+    return response
+
+
+@app.before_request
+def admit_request():
+    """
+    Run each request in its class's pool
+
+    A request whose expected queue wait exceeds the SLO is degraded to a
+    non-AI render where possible, otherwise shed with 503 + Retry-After
+    before it spends any Gemini quota. AI requests from a tenant over its
+    AI budget are degraded or throttled with 429 the same way.
+    """
+    arrived = time.monotonic()
+    endpoint_class = classify_request()
+    if endpoint_class is None:
+        return
+
+    if endpoint_class in ("ai_heavy", "ai_light") and tenant_quota.over_budget(
+        request_tenant()
+    ):
+        tenant_quota.record_over_budget()
+        if TENANT_QUOTA_ACTION != "degrade" or not degrade_to_render():
+            print(f"Tenant over AI budget, throttling {request.path}", file=sys.stderr)
+            return quota_response()
+        print(f"Tenant over AI budget, degrading {request.path}", file=sys.stderr)
+        g.degraded = "ai-quota"
+        endpoint_class = "render"
+
+    bulkhead = bulkheads[endpoint_class]
+    expected_wait = load_shedder.expected_wait(endpoint_class, bulkhead, request.path)
+
+    if load_shedder.over_slo(expected_wait):
+        if (
+            endpoint_class in ("ai_heavy", "ai_light")
+            and load_shedder.degrade_ai
+            and degrade_to_render()
+        ):
+            print(f"Degrading {request.path} to non-AI render", file=sys.stderr)
+            load_shedder.record_degraded(request.path)
+            g.degraded = "ai-skipped"
+            endpoint_class = "render"
+            bulkhead = bulkheads[endpoint_class]
+            expected_wait = load_shedder.expected_wait(endpoint_class, bulkhead, request.path)
+
+        if load_shedder.over_slo(expected_wait):
+            print(f"Shedding {request.path} ({endpoint_class})", file=sys.stderr)
+            load_shedder.record_shed(endpoint_class)
+            return busy_response(endpoint_class, expected_wait)
+
+    if not bulkhead.acquire():
+        print(f"Bulkhead {endpoint_class} full, rejecting request", file=sys.stderr)
+        return busy_response(endpoint_class)
+
+    g.bulkhead = bulkhead
+    g.endpoint_class = endpoint_class
+    g.admitted_at = time.perf_counter()
+    if endpoint_class != "render":
+        # Gemini calls queue by priority class, tenant and route
+        g.ai_context = set_call_context(
+            AI_PRIORITIES.get(request.path, DEFAULT_PRIORITY),
+            request_tenant(),
+            request.path,
+        )
+        deadline = ai_deadline(arrived)
+        if CANCEL_ON_DISCONNECT or deadline is not None:
+            g.cancel_context = set_cancel_token(
+                CancelToken(
+                    client_socket() if CANCEL_ON_DISCONNECT else None,
+                    deadline=deadline,
+                )
+            )
+
+
+@app.after_request
+def mark_degraded(response):
+    """Tell the client when AI was skipped to protect latency or quota"""
+    if g.get("degraded"):
+        response.headers["X-Degraded"] = g.degraded
+    return response
+
+
+@app.after_request
+def report_ai_items(response):
+    """Tell the client how many items AI enhanced and how many kept their original text"""
+    items = g.get("ai_items")
+    if items:
+        response.headers["X-Enhanced-Items"] = f"{items['enhanced']}/{items['items']}"
+        response.headers["X-Skipped-Items"] = str(items["skipped"])
+        if current_cancel_token().deadline is not None:
+            cancellation_stats.record_deadline(items["enhanced"], items["skipped"])
+    return response
+
+
+@app.teardown_request
+def release_request(error=None):
+    """Free the pool slot taken in admit_request and record its latency"""
+    ai_context = g.pop("ai_context", None)
+    if ai_context:
+        reset_call_context(ai_context)
+    cancel_context = g.pop("cancel_context", None)
+    if cancel_context:
+        reset_cancel_token(cancel_context)
+    bulkhead = g.pop("bulkhead", None)
+    if bulkhead:
+        bulkhead.release()
+        load_shedder.observe(
+            request.path,
+            g.endpoint_class,
+            time.perf_counter() - g.admitted_at,
+        )
+
+
+# ============================================================================
+# ENHANCEMENT TIERS
+# ============================================================================
+
+
+def enhance_with_tier(tier: str, method: str, *args):
+    """
+    Run one enhancement on the requested tier
+
+    "ai" calls Gemini and "rules" the local rule enhancer; "auto" (the
+    default) calls Gemini and falls back to the rules if the call fails
+    or its output is rejected.
+
+    Args:
+        tier: "auto", "ai" or "rules" (None means "auto")
+        method: Method name shared by GeminiClient and RuleEnhancer
+        *args: Method arguments
+
+    Returns:
+        (text, "ai" or "rules" - the tier that produced it)
+
+    Raises:
+        Exception: The AI error, when tier is "ai"
+        DeadlineExceeded: If the request's AI deadline passed (the caller
+            decides what to keep)
+    """
+    if tier != "rules":
+        try:
+            return getattr(gemini_client, method)(*args), "ai"
+        except (RequestCancelled, DeadlineExceeded):
+            raise
+        except Exception as e:
+            if tier == "ai":
+                raise
+            print(f"AI {method} failed, using rules: {str(e)}", file=sys.stderr)
+            rule_enhancer.record_fallback(method)
+    return getattr(rule_enhancer, method)(*args), "rules"
+
+
+def tier_job(target, key, tier: str, method: str, *args) -> AIJob:
+    """
+    Job writing one enhance_with_tier result to target[key]
+
+    Under "auto", an item skipped at the AI deadline gets the rule tier
+    instead of keeping its original text.
+    """
+    return AIJob(
+        target,
+        key,
+        lambda *job_args: enhance_with_tier(tier, method, *job_args)[0],
+        args,
+        fallback=getattr(rule_enhancer, method) if tier in (None, "auto") else None,
+    )
+
+
+def enhance_in_time(tier: str, method: str, *args):
+    """
+    enhance_with_tier, bounded by the request's AI deadline if it has one
+
+    A call still running at the deadline is abandoned; "auto" then
+    answers from the rule tier.
+
+    Returns:
+        (text, tier used), or (None, None) if the AI tier missed the deadline
+    """
+    if current_cancel_token().deadline is None:
+        return enhance_with_tier(tier, method, *args)
+    result = {}
+    fallback = None
+    if tier in (None, "auto"):
+        fallback = lambda *job_args: (getattr(rule_enhancer, method)(*args), "rules")
+    run_ai_jobs([AIJob(result, "value", enhance_with_tier, (tier, method, *args), fallback)])
+    return result.get("value", (None, None))
+
+
+def run_ai_jobs(jobs) -> dict:
+    """
+    Run a route's AI jobs (see utils/ai_jobs.py), tallying them for the
+    X-Enhanced-Items / X-Skipped-Items headers
+
+    Returns:
+        Counts of items, enhanced items and skipped items
+    """
+    counts = ai_job_runner.run(jobs)
+    tally = g.setdefault("ai_items", {"items": 0, "enhanced": 0, "skipped": 0})
+    for name in tally:
+        tally[name] += counts[name]
+    return counts
+
+
+def stream_ai_item(func, *args):
+    """
+    Chunks of a streaming AI call, func(*args), tallied as one item for
+    the X-Enhanced-Items / X-Skipped-Items headers once it ends
+    """
+    tally = g.setdefault("ai_items", {"items": 0, "enhanced": 0, "skipped": 0})
+    tally["items"] += 1
+    try:
+        yield from func(*args)
+    except Exception:
+        tally["skipped"] += 1
+        raise
+    tally["enhanced"] += 1
+
 
 # ============================================================================
 # HEALTH CHECK
@@ -43,6 +788,8 @@ def health_check():
             "service": "Vero Template Generator",
             "version": "1.0.0",
             "timestamp": datetime.now().isoformat(),
+            "ready": warmup.ready,
+            "warmup": warmup.status(),
             "endpoints": [
                 "/generate-resume",
                 "/generate-cover-letter",
@@ -52,11 +799,91 @@ def health_check():
                 "/generate-portfolio-pdf",
                 "/enhance-description",
                 "/enhance-skills-summary",
+                "/enhance",
+                "/add-signature",
+                "/documents/<token>",
+                "/admin/ai-output",
+                "/admin/tenants",
             ],
         }
     )
 
 
+@app.route("/metrics", methods=["GET"])
+def metrics():
+    """Per-worker runtime metrics"""
+    return jsonify(
+        {
+            "pid": os.getpid(),
+            "timestamp": datetime.now().isoformat(),
+            "bulkheads": {
+                name: bulkhead.stats() for name, bulkhead in bulkheads.items()
+            },
+            "load_shedding": load_shedder.stats(),
+            "document_store": document_store.stats(),
+            "idempotency": idempotency_store.stats(),
+            "signature_cache": signature_cache.stats(),
+            "clause_library": clause_library.stats(),
+            "rule_enhancer": rule_enhancer.stats(),
+            "ai_scheduler": ai_scheduler.stats(),
+            "cancellations": cancellation_stats.stats(),
+            "ai_output_validation": gemini_client.output_validator.stats(),
+            "tenant_quota": tenant_quota.stats(),
+        }
+    )
+
+
+# ============================================================================
+# ADMIN
+# ============================================================================
+
+# Admin endpoints require this token (X-Admin-Token header); unset disables them
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN", "")
+
+
+def admin_denied():
+    """403 response unless the request carries the admin token (always, if none is set)"""
+    if not ADMIN_TOKEN or not hmac.compare_digest(
+        request.headers.get("X-Admin-Token", ""), ADMIN_TOKEN
+    ):
+        return jsonify({"error": "Forbidden"}), 403
+    return None
+
+
+@app.route("/admin/ai-output", methods=["GET", "DELETE"])
+def ai_output_stats():
+    """
+    Per-task AI response lengths, truncations and adaptive output caps
+    for this worker; DELETE resets the statistics to the default caps
+    """
+    denied = admin_denied()
+    if denied:
+        return denied
+    if request.method == "DELETE":
+        gemini_client.output_budget.reset()
+    return jsonify({"pid": os.getpid(), **gemini_client.output_budget.stats()})
+
+
+@app.route("/admin/tenants", methods=["GET", "DELETE"])
+def tenant_usage():
+    """
+    AI calls, tokens and budget of every tenant in the current quota
+    window, across all workers; DELETE ?tenant=<id> clears one tenant's usage
+    """
+    denied = admin_denied()
+    if denied:
+        return denied
+    if request.method == "DELETE":
+        tenant = request.args.get("tenant")
+        if not tenant:
+            return jsonify({"error": "tenant is required"}), 400
+        tenant_quota.reset(tenant)
+    try:
+        return jsonify(tenant_quota.report())
+    except CacheUnavailable as e:
+        return jsonify({"error": f"Quota counters unavailable: {str(e)}"}), 503
+
+
 # ============================================================================
 # RESUME GENERATOR
 # ============================================================================
@@ -112,7 +939,8 @@ def generate_resume():
                 "technologies": ["Tech1", "Tech2"]
             }
         ],
-        "enhance_with_ai": true
+        "enhance_with_ai": true,
+        "enhancer": "auto"
     }
     """
     try:
@@ -121,6 +949,10 @@ def generate_resume():
         if not data:
             return jsonify({"error": "No data provided"}), 400
 
+        error = validate_payload("resume", data)
+        if error:
+            return jsonify({"error": error}), 400
+
         # Debug logging
         print("=" * 80, file=sys.stderr)
         print("RESUME GENERATION REQUEST", file=sys.stderr)
@@ -155,109 +987,57 @@ def generate_resume():
 
         # Optional: Enhance descriptions with AI
         if data.get("enhance_with_ai", False):
-            print("Enhancing resume content with AI...", file=sys.stderr)
+            tier = data.get("enhancer")
+            print(f"Enhancing resume content ({tier or 'auto'})...", file=sys.stderr)
+
+            jobs = []
 
             # Enhance professional summary
             if data.get("summary"):
-                original_summary = data.get("summary")
                 skills = data.get("skills", [])
                 if isinstance(skills, dict):
                     skills = [s for skill_list in skills.values() for s in skill_list]
-                try:
-                    enhanced_summary = gemini_client.generate_skills_summary(
-                        skills, data.get("years_experience", 0)
+                # Output is validated by the client; rejection keeps the original
+                jobs.append(
+                    tier_job(
+                        data,
+                        "summary",
+                        tier,
+                        "generate_skills_summary",
+                        skills,
+                        data.get("years_experience") or 0,
                     )
-                    # Validate AI response
-                    if (
-                        enhanced_summary
-                        and len(enhanced_summary) > 20
-                        and "option" not in enhanced_summary.lower()
-                    ):
-                        data["summary"] = enhanced_summary
-                    else:
-                        print(
-                            f"Warning: Invalid AI summary, keeping original",
-                            file=sys.stderr,
-                        )
-                        data["summary"] = original_summary
-                except Exception as e:
-                    print(f"Error enhancing summary: {str(e)}", file=sys.stderr)
-                    data["summary"] = original_summary
+                )
 
             # Enhance work experience descriptions
-            if data.get("experience"):
-                for exp in data["experience"]:
-                    if exp.get("responsibilities"):
-                        enhanced_resps = []
-                        for resp in exp["responsibilities"]:
-                            try:
-                                enhanced = gemini_client.enhance_resume_description(
-                                    resp, exp.get("title", "")
-                                )
-                                # Validate AI response
-                                if (
-                                    enhanced
-                                    and len(enhanced) > 10
-                                    and "option" not in enhanced.lower()
-                                ):
-                                    enhanced_resps.append(enhanced)
-                                else:
-                                    enhanced_resps.append(resp)
-                            except Exception as e:
-                                print(
-                                    f"Error enhancing responsibility: {str(e)}",
-                                    file=sys.stderr,
-                                )
-                                enhanced_resps.append(resp)
-                        exp["responsibilities"] = enhanced_resps
+            for exp in data.get("experience") or []:
+                responsibilities = exp.get("responsibilities")
+                for index, resp in enumerate(responsibilities or []):
+                    jobs.append(
+                        tier_job(
+                            responsibilities,
+                            index,
+                            tier,
+                            "enhance_resume_description",
+                            resp,
+                            exp.get("title", ""),
+                        )
+                    )
 
             # Enhance project descriptions
-            if data.get("projects"):
-                for proj in data["projects"]:
-                    if proj.get("description"):
-                        try:
-                            original_desc = proj.get("description")
-                            print(
-                                f"Enhancing project: {proj.get('name', 'Unknown')}",
-                                file=sys.stderr,
-                            )
-                            print(
-                                f"Original description: {original_desc[:100]}...",
-                                file=sys.stderr,
-                            )
-                            enhanced = gemini_client.enhance_portfolio_description(proj)
-
-                            # Validate AI response
-                            if not enhanced or len(enhanced) < 20:
-                                print(
-                                    f"Warning: AI returned short/empty response, keeping original",
-                                    file=sys.stderr,
-                                )
-                                enhanced = original_desc
-                            elif (
-                                "option" in enhanced.lower()
-                                or "choose" in enhanced.lower()
-                            ):
-                                print(
-                                    f"Warning: AI returned multiple options, keeping original",
-                                    file=sys.stderr,
-                                )
-                                enhanced = original_desc
-                            elif enhanced.count("\n\n") > 2:
-                                print(
-                                    f"Warning: AI returned multiple paragraphs, keeping original",
-                                    file=sys.stderr,
-                                )
-                                enhanced = original_desc
-
-                            proj["description"] = enhanced
-                            print(
-                                f"Enhanced description: {enhanced[:100]}...",
-                                file=sys.stderr,
-                            )
-                        except Exception as e:
-                            print(f"Error enhancing project: {str(e)}", file=sys.stderr)
-                            # Keep original description on error
+            for proj in data.get("projects") or []:
+                if proj.get("description"):
+                    jobs.append(
+                        tier_job(
+                            proj, "description", tier, "enhance_portfolio_description", proj
+                        )
+                    )
+
+            counts = run_ai_jobs(jobs)
+            print(
+                f"Enhanced {counts['enhanced']}/{counts['items']} resume items",
+                file=sys.stderr,
+            )
 
         # Debug: Log final data before DOCX generation
         print("-" * 80, file=sys.stderr)
@@ -282,6 +1062,9 @@ def generate_resume():
             )
         print("-" * 80, file=sys.stderr)
 
+        # Skip the render if the client is gone
+        current_cancel_token().raise_if_cancelled()
+
         # Generate DOCX
         print("Generating resume document...", file=sys.stderr)
         docx_buffer = docx_generator.generate_resume(data)
@@ -290,13 +1073,14 @@ def generate_resume():
         name = data.get("personal_info", {}).get("name", "Resume")
         filename = f"{name.replace(' ', '_')}_Resume.docx"
 
-        return send_file(
+        return deliver_document(
             docx_buffer,
             mimetype="application/vnd.openxmlformats-officedocument.wordprocessingml.document",
-            as_attachment=True,
             download_name=filename,
         )
 
+    except RequestCancelled:
+        return cancelled_response()
     except Exception as e:
         print(f"Error generating resume: {str(e)}", file=sys.stderr)
         return jsonify({"error": str(e)}), 500
@@ -334,11 +1118,25 @@ def generate_cover_letter():
         if not data:
             return jsonify({"error": "No data provided"}), 400
 
+        error = validate_payload("cover_letter", data)
+        if error:
+            return jsonify({"error": error}), 400
+
         # Generate content with AI if requested
         if data.get("generate_with_ai", True) and not data.get("custom_content"):
             print("Generating cover letter content with AI...", file=sys.stderr)
-            content = gemini_client.generate_cover_letter(data)
-            data["content"] = content
+            # Past the AI deadline the letter gets the templated body
+            run_ai_jobs(
+                [
+                    AIJob(
+                        data,
+                        "content",
+                        gemini_client.generate_cover_letter,
+                        (data,),
+                        fallback=rule_enhancer.generate_cover_letter,
+                    )
+                ]
+            )
         elif data.get("custom_content"):
             data["content"] = data["custom_content"]
         else:
@@ -351,6 +1149,9 @@ def generate_cover_letter():
                 400,
             )
 
+        # Skip the render if the client is gone
+        current_cancel_token().raise_if_cancelled()
+
         # Generate DOCX
         print("Generating cover letter document...", file=sys.stderr)
         docx_buffer = docx_generator.generate_cover_letter(data)
@@ -360,13 +1161,14 @@ def generate_cover_letter():
         company = data.get("company", "Company").replace(" ", "_")
         filename = f"{name}_CoverLetter_{company}.docx"
 
-        return send_file(
+        return deliver_document(
             docx_buffer,
             mimetype="application/vnd.openxmlformats-officedocument.wordprocessingml.document",
-            as_attachment=True,
             download_name=filename,
         )
 
+    except RequestCancelled:
+        return cancelled_response()
     except Exception as e:
         print(f"Error generating cover letter: {str(e)}", file=sys.stderr)
         return jsonify({"error": str(e)}), 500
@@ -402,14 +1204,27 @@ def generate_proposal():
         if not data:
             return jsonify({"error": "No data provided"}), 400
 
+        error = validate_payload("proposal", data)
+        if error:
+            return jsonify({"error": error}), 400
+
         # Generate proposal content with AI if requested
         if data.get("generate_with_ai", True) and not data.get("custom_content"):
             print("Generating proposal content with AI...", file=sys.stderr)
-            content = gemini_client.generate_proposal(data)
-            data["content"] = content
+            # Without content the proposal renders its manual sections
+            if current_cancel_token().deadline is None:
+                # Written into the document as it arrives; a stream that
+                # fails midway is dropped
+                data["content"] = stream_ai_item(gemini_client.stream_proposal, data)
+            else:
+                # The deadline can only cut a whole call short, not a stream
+                run_ai_jobs([AIJob(data, "content", gemini_client.generate_proposal, (data,))])
         elif data.get("custom_content"):
             data["content"] = data["custom_content"]
 
+        # Skip the render if the client is gone
+        current_cancel_token().raise_if_cancelled()
+
         # Generate DOCX
         print("Generating proposal document...", file=sys.stderr)
         docx_buffer = docx_generator.generate_proposal(data)
@@ -419,13 +1234,14 @@ def generate_proposal():
         title = data.get("project_title", "Proposal").replace(" ", "_")
         filename = f"Proposal_{client}_{title}.docx"
 
-        return send_file(
+        return deliver_document(
             docx_buffer,
             mimetype="application/vnd.openxmlformats-officedocument.wordprocessingml.document",
-            as_attachment=True,
             download_name=filename,
         )
 
+    except RequestCancelled:
+        return cancelled_response()
     except Exception as e:
         print(f"Error generating proposal: {str(e)}", file=sys.stderr)
         return jsonify({"error": str(e)}), 500
@@ -476,6 +1292,10 @@ def generate_invoice():
         if not data:
             return jsonify({"error": "No data provided"}), 400
 
+        error = validate_payload("invoice", data)
+        if error:
+            return jsonify({"error": error}), 400
+
         # Validate required fields
         if not data.get("items"):
             return jsonify({"error": "Invoice items are required"}), 400
@@ -488,10 +1308,9 @@ def generate_invoice():
         invoice_num = data.get("invoice_number", "INV-001").replace("/", "-")
         filename = f"Invoice_{invoice_num}.docx"
 
-        return send_file(
+        return deliver_document(
             docx_buffer,
             mimetype="application/vnd.openxmlformats-officedocument.wordprocessingml.document",
-            as_attachment=True,
             download_name=filename,
         )
 
@@ -505,6 +1324,24 @@ def generate_invoice():
 # ============================================================================
 
 
+def library_terms(contract_type: str, custom_terms: str = ""):
+    """
+    Contract terms without AI: library clauses verbatim, custom terms
+    appended as written
+
+    Returns:
+        Terms text, or None if the library has no clauses for the type
+    """
+    clause_set = clause_library.match(contract_type)
+    if clause_set is None:
+        return None
+    terms = clause_library.render(clause_set, {})
+    clause_library.record(verbatim=len(clause_set.clauses), adapted=0)
+    if custom_terms.strip():
+        terms += f"\n\nAdditional Terms:\n{custom_terms.strip()}"
+    return terms
+
+
 @app.route("/generate-contract", methods=["POST"])
 def generate_contract():
     """
@@ -534,16 +1371,38 @@ def generate_contract():
         if not data:
             return jsonify({"error": "No data provided"}), 400
 
+        error = validate_payload("contract", data)
+        if error:
+            return jsonify({"error": error}), 400
+
         # Generate contract terms with AI if requested
+        contract_type = data.get("contract_type", "Service Agreement")
+        custom_terms = data.get("custom_terms", "")
         if data.get("generate_with_ai", True) and not data.get("custom_content"):
-            print("Generating contract terms with AI...", file=sys.stderr)
-            contract_type = data.get("contract_type", "Service Agreement")
-            custom_terms = data.get("custom_terms", "")
-            terms = gemini_client.enhance_contract_terms(contract_type, custom_terms)
-            data["terms"] = terms
+            if not custom_terms and clause_library.covers(contract_type):
+                # Standard terms are spliced from the clause library; no AI
+                # (classify_request already sent this request to "render")
+                print(f"Contract terms from clause library: {contract_type}", file=sys.stderr)
+                data["terms"] = library_terms(contract_type)
+            else:
+                print("Generating contract terms with AI...", file=sys.stderr)
+                run_ai_jobs(
+                    [
+                        AIJob(
+                            data,
+                            "terms",
+                            gemini_client.enhance_contract_terms,
+                            (contract_type, custom_terms),
+                            fallback=library_terms,
+                        )
+                    ]
+                )
         elif data.get("custom_content"):
             data["terms"] = data["custom_content"]
 
+        # Skip the render if the client is gone
+        current_cancel_token().raise_if_cancelled()
+
         # Generate DOCX
         print("Generating contract document...", file=sys.stderr)
         docx_buffer = docx_generator.generate_contract(data)
@@ -552,13 +1411,14 @@ def generate_contract():
         contract_type = data.get("contract_type", "Contract").replace(" ", "_")
         filename = f"{contract_type}_Contract.docx"
 
-        return send_file(
+        return deliver_document(
             docx_buffer,
             mimetype="application/vnd.openxmlformats-officedocument.wordprocessingml.document",
-            as_attachment=True,
             download_name=filename,
         )
 
+    except RequestCancelled:
+        return cancelled_response()
     except Exception as e:
         print(f"Error generating contract: {str(e)}", file=sys.stderr)
         return jsonify({"error": str(e)}), 500
@@ -598,25 +1458,43 @@ def generate_portfolio_pdf():
         if not data:
             return jsonify({"error": "No data provided"}), 400
 
+        error = validate_payload("portfolio", data)
+        if error:
+            return jsonify({"error": error}), 400
+
         # Optional AI enhancement
         if data.get("enhance_with_ai", False):
             print("Enhancing portfolio content with AI...", file=sys.stderr)
 
+            jobs = []
+
             # Enhance bio
             if data.get("bio"):
-                data["bio"] = gemini_client.improve_text_quality(
-                    data["bio"], "professional"
+                jobs.append(
+                    AIJob(
+                        data,
+                        "bio",
+                        gemini_client.improve_text_quality,
+                        (data["bio"], "professional"),
+                    )
                 )
 
             # Enhance project descriptions
-            if data.get("projects"):
-                for proj in data["projects"]:
-                    if proj.get("description"):
-                        try:
-                            enhanced = gemini_client.enhance_portfolio_description(proj)
-                            proj["description"] = enhanced
-                        except Exception as e:
-                            print(f"Error enhancing project: {str(e)}", file=sys.stderr)
+            for proj in data.get("projects") or []:
+                if proj.get("description"):
+                    jobs.append(
+                        AIJob(
+                            proj,
+                            "description",
+                            gemini_client.enhance_portfolio_description,
+                            (proj,),
+                        )
+                    )
+
+            run_ai_jobs(jobs)
+
+        # Skip the render if the client is gone
+        current_cancel_token().raise_if_cancelled()
 
         # Generate PDF
         print("Generating portfolio PDF...", file=sys.stderr)
@@ -626,13 +1504,14 @@ def generate_portfolio_pdf():
         name = data.get("name", "Portfolio").replace(" ", "_")
         filename = f"{name}_Portfolio.pdf"
 
-        return send_file(
+        return deliver_document(
             pdf_buffer,
             mimetype="application/pdf",
-            as_attachment=True,
             download_name=filename,
         )
 
+    except RequestCancelled:
+        return cancelled_response()
     except Exception as e:
         print(f"Error generating portfolio PDF: {str(e)}", file=sys.stderr)
         return jsonify({"error": str(e)}), 500
@@ -651,21 +1530,32 @@ def enhance_description():
     {
         "text": "Original text to enhance",
         "context": "resume/portfolio/proposal",
-        "role": "Optional job role for context"
+        "role": "Optional job role for context",
+        "enhancer": "auto"
     }
     """
     try:
         data = request.get_json()
 
-        if not data or not data.get("text"):
+        if not data:
+            return jsonify({"error": "Text is required"}), 400
+
+        error = validate_payload("enhance_description", data)
+        if error:
+            return jsonify({"error": error}), 400
+
+        if not data.get("text"):
             return jsonify({"error": "Text is required"}), 400
 
         text = data["text"]
         context = data.get("context", "general")
         role = data.get("role", "")
+        tier = data.get("enhancer")
 
         if context == "resume":
-            enhanced = gemini_client.enhance_resume_description(text, role)
+            enhanced, used = enhance_in_time(
+                tier, "enhance_resume_description", text, role
+            )
         elif context == "portfolio":
             project_data = {
                 "title": role,
@@ -673,12 +1563,28 @@ def enhance_description():
                 "technologies": data.get("technologies", []),
                 "role": data.get("your_role", "Developer"),
             }
-            enhanced = gemini_client.enhance_portfolio_description(project_data)
+            enhanced, used = enhance_in_time(
+                tier, "enhance_portfolio_description", project_data
+            )
         else:
-            enhanced = gemini_client.improve_text_quality(text, "professional")
+            enhanced, used = enhance_in_time(
+                tier, "improve_text_quality", text, "professional"
+            )
+        if enhanced is None:
+            # Missed the deadline on the AI-only tier: hand back the text unchanged
+            enhanced, used = text, "none"
 
-        return jsonify({"original": text, "enhanced": enhanced, "success": True})
+        return jsonify(
+            {"original": text, "enhanced": enhanced, "enhancer": used, "success": True}
+        )
 
+    except RequestCancelled:
+        return cancelled_response()
+    except QuotaExceeded:
+        return quota_response()
+    except OutputRejected as e:
+        print(f"Error enhancing description: {str(e)}", file=sys.stderr)
+        return jsonify({"error": "AI returned unusable output, please retry"}), 502
     except Exception as e:
         print(f"Error enhancing description: {str(e)}", file=sys.stderr)
         return jsonify({"error": str(e)}), 500
@@ -691,27 +1597,224 @@ def enhance_skills_summary():
     Expected JSON:
     {
         "skills": ["Python", "React", "AWS"],
-        "experience_years": 5
+        "experience_years": 5,
+        "enhancer": "auto"
     }
     """
     try:
         data = request.get_json()
 
-        if not data or not data.get("skills"):
+        if not data:
+            return jsonify({"error": "Skills list is required"}), 400
+
+        error = validate_payload("skills_summary", data)
+        if error:
+            return jsonify({"error": error}), 400
+
+        if not data.get("skills"):
             return jsonify({"error": "Skills list is required"}), 400
 
         skills = data["skills"]
-        years = data.get("experience_years", 0)
+        years = data.get("experience_years") or 0
 
-        summary = gemini_client.generate_skills_summary(skills, years)
+        summary, used = enhance_in_time(
+            data.get("enhancer"), "generate_skills_summary", skills, years
+        )
+        if summary is None:
+            # Missed the deadline on the AI-only tier: there is no original
+            # summary to hand back, so answer from the rules
+            summary, used = rule_enhancer.generate_skills_summary(skills, years), "rules"
 
-        return jsonify({"skills": skills, "summary": summary, "success": True})
+        return jsonify(
+            {"skills": skills, "summary": summary, "enhancer": used, "success": True}
+        )
 
+    except RequestCancelled:
+        return cancelled_response()
+    except QuotaExceeded:
+        return quota_response()
+    except OutputRejected as e:
+        print(f"Error generating skills summary: {str(e)}", file=sys.stderr)
+        return jsonify({"error": "AI returned unusable output, please retry"}), 502
     except Exception as e:
         print(f"Error generating skills summary: {str(e)}", file=sys.stderr)
         return jsonify({"error": str(e)}), 500
 
 
+# ============================================================================
+# DOCUMENT ENHANCEMENT
+# ============================================================================
+
+
+@app.route("/enhance", methods=["POST"])
+def enhance_document():
+    """
+    Enhance an uploaded document with AI and return it as DOCX
+    Expected multipart form:
+        file: .docx, .pdf or .txt document
+        prompt: Optional user instructions
+        doc_type: auto, academic, technical or business (optional)
+
+    The upload is parsed from werkzeug's spooled stream, split into
+    paragraph-aligned chunks and the chunks are enhanced concurrently.
+    Paragraph order and (for .docx) styles are preserved; chunks whose
+    AI call fails, or that miss the deadline_ms budget, keep their
+    original text.
+    """
+    try:
+        upload = request.files.get("file")
+        if upload is None or not upload.filename:
+            return jsonify({"error": "No file provided"}), 400
+
+        error = validate_payload("enhance_document", request.form.to_dict())
+        if error:
+            return jsonify({"error": error}), 400
+
+        stem, extension = os.path.splitext(upload.filename)
+        extension = extension.lower()
+        if extension == ".doc":
+            return (
+                jsonify({"error": "Legacy .doc files are not supported, save as .docx"}),
+                400,
+            )
+        if extension not in (".docx", ".pdf", ".txt"):
+            return jsonify({"error": "Unsupported file format"}), 400
+
+        print(f"Enhancing uploaded document {upload.filename}...", file=sys.stderr)
+        try:
+            source = document_enhancer.parse(upload.stream, extension)
+        except Exception as e:
+            print(f"Error parsing upload: {str(e)}", file=sys.stderr)
+            return jsonify({"error": "Could not read the uploaded document"}), 400
+
+        if not source.texts:
+            return jsonify({"error": "No text found to enhance"}), 400
+
+        counts = document_enhancer.enhance(
+            source,
+            doc_type=request.form.get("doc_type", "auto"),
+            instructions=request.form.get("prompt", ""),
+        )
+        print(
+            f"Enhanced {counts['enhanced_paragraphs']}/{counts['paragraphs']} "
+            f"paragraphs in {counts['chunks']} chunks",
+            file=sys.stderr,
+        )
+        current_cancel_token().raise_if_cancelled()
+        if counts["enhanced_chunks"] == 0 and not counts["skipped_chunks"]:
+            return jsonify({"error": "AI enhancement failed, please retry"}), 502
+
+        # Chunks unfinished at the deadline go back unchanged
+        g.ai_items = {
+            "items": counts["chunks"],
+            "enhanced": counts["enhanced_chunks"],
+            "skipped": counts["chunks"] - counts["enhanced_chunks"],
+        }
+
+        response = deliver_document(
+            document_enhancer.save(source),
+            mimetype="application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+            download_name=f"enhanced_{stem}.docx",
+        )
+        response.headers["X-Enhanced-Chunks"] = (
+            f"{counts['enhanced_chunks']}/{counts['chunks']}"
+        )
+        return response
+
+    except RequestCancelled:
+        return cancelled_response()
+    except Exception as e:
+        print(f"Error enhancing document: {str(e)}", file=sys.stderr)
+        return jsonify({"error": str(e)}), 500
+
+
+# ============================================================================
+# DOCUMENT SIGNING
+# ============================================================================
+
+
+@app.route("/add-signature", methods=["POST"])
+def add_signature():
+    """
+    Stamp a signature onto an uploaded PDF or DOCX
+    Expected multipart form:
+        file: .pdf or .docx document
+        signature: Base64 image data URL, or typed signature text
+        position: bottom-right (default), bottom-left, top-right, top-left
+            or center
+        signer_name: Optional name for the "Signed by" caption
+        pages: PDF pages to sign: last (default), first, all or e.g. 1,3-5
+
+    PDFs get an incremental update appended after the original bytes,
+    so the work done depends on the pages signed, not the document size.
+    The decoded, scaled signature is cached per tenant.
+    """
+    try:
+        upload = request.files.get("file")
+        if upload is None or not upload.filename:
+            return jsonify({"error": "No file provided"}), 400
+
+        form = request.form.to_dict()
+        error = validate_payload("add_signature", form)
+        if error:
+            return jsonify({"error": error}), 400
+
+        position = form.get("position") or "bottom-right"
+        if position not in POSITIONS:
+            return (
+                jsonify({"error": f"position must be one of {', '.join(POSITIONS)}"}),
+                400,
+            )
+
+        stem, extension = os.path.splitext(upload.filename)
+        extension = extension.lower()
+        if extension not in (".pdf", ".docx"):
+            return jsonify({"error": "Unsupported file format"}), 400
+
+        try:
+            signature = signature_cache.get(request_tenant(), form["signature"])
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        signer_name = form.get("signer_name") or ""
+
+        if extension == ".docx":
+            try:
+                signed = sign_docx(upload.stream, signature, position, signer_name)
+            except Exception as e:
+                print(f"Error reading DOCX upload: {str(e)}", file=sys.stderr)
+                return jsonify({"error": "Could not read the uploaded document"}), 400
+            return deliver_document(
+                signed,
+                mimetype="application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+                download_name=f"Signed_{stem}.docx",
+            )
+
+        try:
+            stamper = IncrementalStamper(upload.stream)
+            pages = parse_pages(form.get("pages"), stamper.page_count)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        except Exception as e:
+            print(f"Error reading PDF upload: {str(e)}", file=sys.stderr)
+            return jsonify({"error": "Could not read the uploaded document"}), 400
+
+        stamper.stamp(signature, pages, position, signer_name)
+        signed = new_spool()
+        stamper.write(signed)
+        signed.seek(0)
+        print(f"Signed {len(pages)} page(s) of {upload.filename}", file=sys.stderr)
+
+        response = deliver_document(
+            signed, mimetype="application/pdf", download_name=f"Signed_{stem}.pdf"
+        )
+        response.headers["X-Signed-Pages"] = str(len(pages))
+        return response
+
+    except Exception as e:
+        print(f"Error signing document: {str(e)}", file=sys.stderr)
+        return jsonify({"error": str(e)}), 500
+
+
 # ============================================================================
 # ERROR HANDLERS
 # ============================================================================
@@ -723,6 +1826,12 @@ def not_found(error):
     return jsonify({"error": "Endpoint not found"}), 404
 
 
+@app.errorhandler(413)
+def payload_too_large(error):
+    """Handle request bodies over MAX_CONTENT_LENGTH"""
+    return jsonify({"error": "Request payload too large"}), 413
+
+
 @app.errorhandler(500)
 def internal_error(error):
     """Handle 500 errors"""
@@ -734,5 +1843,6 @@ def internal_error(error):
 # ============================================================================
 
 if __name__ == "__main__":
+    run_warmup()
     port = int(os.environ.get("PORT", 7860))
     app.run(host="0.0.0.0", port=port, debug=False)
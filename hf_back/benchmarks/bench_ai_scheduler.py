@@ -0,0 +1,136 @@
+"""
+AI Scheduler Benchmark
+Measures interactive queue wait for Gemini calls during a bulk burst, FIFO vs weighted fair
+
+Bulk tenants each fan a batch of calls out over several threads (like a
+large resume or /enhance upload) while interactive calls arrive at a
+steady rate. Calls sleep for a fixed latency instead of calling Gemini,
+so the numbers isolate scheduling. FIFO runs every call as one flow.
+
+Usage (from hf_back/):
+    python benchmarks/bench_ai_scheduler.py [--concurrency 6] [--latency-ms 200] \\
+        [--bulk-tenants 4] [--bulk-calls 30] [--interactive 40]
+"""
+
+import argparse
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.ai_scheduler import (  # noqa: E402
+    AIScheduler,
+    in_context,
+    reset_call_context,
+    set_call_context,
+)
+
+
+def run(args, fair: bool) -> dict:
+    """One burst; per-class queue wait percentiles and bulk completion time"""
+    scheduler = AIScheduler(concurrency=args.concurrency, max_wait_ms=args.max_wait_ms)
+    latency = args.latency_ms / 1000
+    waits = {"bulk": [], "interactive": []}
+
+    def call(priority: str):
+        queued = time.perf_counter()
+        waiter = scheduler.acquire()
+        waits[priority].append(time.perf_counter() - queued)
+        try:
+            time.sleep(latency)
+        finally:
+            scheduler.release(waiter)
+
+    def request(priority: str, tenant: str, route: str, calls: int, fanout: int):
+        if fair:
+            token = set_call_context(priority, tenant, route)
+        else:
+            token = set_call_context("standard", "all", "all")
+        try:
+            with ThreadPoolExecutor(max_workers=fanout) as pool:
+                futures = [pool.submit(in_context(call), priority) for _ in range(calls)]
+                for future in futures:
+                    future.result()
+        finally:
+            reset_call_context(token)
+
+    started = time.perf_counter()
+    bulk = [
+        threading.Thread(
+            target=request,
+            args=("bulk", f"tenant-{i}", "/enhance", args.bulk_calls, 4),
+        )
+        for i in range(args.bulk_tenants)
+    ]
+    for thread in bulk:
+        thread.start()
+
+    interactive = []
+    for i in range(args.interactive):
+        time.sleep(args.interval_ms / 1000)
+        thread = threading.Thread(
+            target=request,
+            args=("interactive", f"user-{i % 5}", "/enhance-description", 1, 1),
+        )
+        thread.start()
+        interactive.append(thread)
+
+    for thread in bulk:
+        thread.join()
+    bulk_done = time.perf_counter() - started
+    for thread in interactive:
+        thread.join()
+
+    result = {
+        name: {
+            "p50_ms": percentile(samples, 0.5),
+            "p95_ms": percentile(samples, 0.95),
+            "max_ms": max(samples) * 1000,
+        }
+        for name, samples in waits.items()
+    }
+    result["bulk_done_s"] = bulk_done
+    return result
+
+
+def percentile(samples: list, fraction: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))] * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--concurrency", type=int, default=6)
+    parser.add_argument("--latency-ms", type=float, default=200)
+    parser.add_argument("--max-wait-ms", type=float, default=10000)
+    parser.add_argument("--bulk-tenants", type=int, default=4)
+    parser.add_argument("--bulk-calls", type=int, default=30)
+    parser.add_argument("--interactive", type=int, default=40)
+    parser.add_argument("--interval-ms", type=float, default=50)
+    args = parser.parse_args()
+
+    print(
+        f"{args.bulk_tenants} bulk tenants x {args.bulk_calls} calls, "
+        f"{args.interactive} interactive calls every {args.interval_ms:.0f} ms, "
+        f"{args.concurrency} slots, {args.latency_ms:.0f} ms per call\n"
+    )
+    print(
+        f"{'mode':<6} {'class':<12} {'wait p50 ms':>12} {'p95 ms':>8} {'max ms':>8}"
+        f" {'bulk done s':>12}"
+    )
+    for fair in (False, True):
+        result = run(args, fair)
+        for name in ("interactive", "bulk"):
+            waits = result[name]
+            print(
+                f"{'fair' if fair else 'fifo':<6} {name:<12} {waits['p50_ms']:>12.0f}"
+                f" {waits['p95_ms']:>8.0f} {waits['max_ms']:>8.0f}"
+                f" {result['bulk_done_s']:>12.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,179 @@
+"""
+Cache Backend Benchmark
+Measures get/set throughput and latency per cache backend as worker processes are added
+
+Each worker process runs cache-aside traffic over a shared key space:
+a get, and a set of a fresh value on a miss or (1 - read ratio) of the
+time. A second phase has every worker increment one hot counter, which
+exercises the locking add/incr use for claims and quotas, and checks
+that no increment was lost. "memory" is per process (nothing shared),
+so it is the no-coordination baseline; "redis" runs against the
+loadtest/fake_kv.py stand-in, whose single Python process, not the
+client, bounds its throughput.
+
+Usage (from hf_back/):
+    python benchmarks/bench_cache_backend.py [--backends memory,file,redis] \\
+        [--workers 1,8,16] [--ops 3000] [--value-bytes 4096] [--keys 2000] \\
+        [--max-bytes 4194304]
+"""
+
+import argparse
+import multiprocessing
+import os
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from loadtest.fake_kv import FakeKVServer  # noqa: E402
+from utils.cache_backend import create_cache_backend  # noqa: E402
+
+
+def percentile(samples: list, fraction: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def worker(kind: str, args, seed: int, start, phase, results):
+    """Cache-aside traffic, then hot-counter increments; results to the queue"""
+    backend = create_cache_backend("bench", kind=kind, max_bytes=args.max_bytes)
+    rng = random.Random(seed)
+    value = os.urandom(args.value_bytes)
+    gets, sets, hits = [], [], 0
+    start.wait()
+
+    began = time.perf_counter()
+    for _ in range(args.ops):
+        # Skewed toward low ids, but touching most of the key space
+        key = f"doc:{int(args.keys * rng.random() ** 2)}"
+        t0 = time.perf_counter()
+        found = backend.get(key)
+        gets.append(time.perf_counter() - t0)
+        if found is not None:
+            hits += 1
+        if found is None or rng.random() > args.read_ratio:
+            t0 = time.perf_counter()
+            backend.set(key, value, ttl=600)
+            sets.append(time.perf_counter() - t0)
+    traffic_seconds = time.perf_counter() - began
+
+    # Let every worker finish its sets, so eviction cannot take the counter
+    phase.wait()
+    began = time.perf_counter()
+    for _ in range(args.incr_ops):
+        backend.incr("hot-counter", 1, ttl=600)
+    incr_seconds = time.perf_counter() - began
+
+    results.put(
+        {
+            "gets": gets,
+            "sets": sets,
+            "hits": hits,
+            "traffic_seconds": traffic_seconds,
+            "incr_seconds": incr_seconds,
+            "stats": backend.stats(),
+        }
+    )
+
+
+def run(kind: str, workers: int, args) -> dict:
+    """One backend at one worker count"""
+    context = multiprocessing.get_context("fork")
+    start = context.Event()
+    phase = context.Barrier(workers)
+    results = context.Queue()
+    processes = [
+        context.Process(target=worker, args=(kind, args, seed, start, phase, results))
+        for seed in range(workers)
+    ]
+    for process in processes:
+        process.start()
+    time.sleep(0.2)
+    start.set()
+    outcomes = [results.get() for _ in processes]
+    for process in processes:
+        process.join()
+
+    gets = [s for o in outcomes for s in o["gets"]]
+    sets = [s for o in outcomes for s in o["sets"]]
+    traffic = max(o["traffic_seconds"] for o in outcomes)
+    incr = max(o["incr_seconds"] for o in outcomes)
+    backend = create_cache_backend("bench", kind=kind, max_bytes=args.max_bytes)
+    counter = backend.get("hot-counter")
+    stats = backend.stats()
+    backend.delete("hot-counter")
+    return {
+        "ops_per_s": (len(gets) + len(sets)) / traffic,
+        "get_p50_us": statistics.median(gets) * 1e6,
+        "get_p99_us": percentile(gets, 0.99) * 1e6,
+        "set_p50_us": statistics.median(sets) * 1e6 if sets else 0.0,
+        "set_p99_us": percentile(sets, 0.99) * 1e6,
+        "hit_rate": sum(o["hits"] for o in outcomes) / len(gets),
+        "incr_per_s": workers * args.incr_ops / incr if incr else 0.0,
+        "incr_lost": workers * args.incr_ops - int(counter or 0) if kind != "memory" else 0,
+        # Memory caches are per process: report the largest
+        "stored_bytes": max(o["stats"]["bytes"] for o in outcomes)
+        if kind == "memory"
+        else stats.get("bytes", stats.get("server", {}).get("used_memory", 0)),
+        "evictions": sum(o["stats"]["evictions"] for o in outcomes)
+        + stats.get("server", {}).get("evicted_keys", 0),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--backends", default="memory,file,redis")
+    parser.add_argument("--workers", default="1,8,16")
+    parser.add_argument("--ops", type=int, default=3000, help="Gets per worker")
+    parser.add_argument("--incr-ops", type=int, default=500, help="Increments per worker")
+    parser.add_argument("--value-bytes", type=int, default=4096)
+    parser.add_argument("--keys", type=int, default=2000)
+    parser.add_argument("--read-ratio", type=float, default=0.9)
+    parser.add_argument(
+        "--max-bytes",
+        type=int,
+        default=4 * 1024 * 1024,
+        help="Cache budget; below keys * value size to exercise eviction",
+    )
+    parser.add_argument("--kv-latency-ms", type=float, default=0.0)
+    args = parser.parse_args()
+
+    root = tempfile.mkdtemp(prefix="bench_cache_")
+    os.environ["CACHE_DIR"] = root
+    kv = FakeKVServer(port=0, max_bytes=args.max_bytes, latency_ms=args.kv_latency_ms)
+    kv.start()
+    os.environ["CACHE_URL"] = kv.url
+
+    print(
+        f"{'backend':<8} {'workers':>7} {'ops/s':>9} {'get p50':>8} {'get p99':>8} "
+        f"{'set p50':>8} {'set p99':>8} {'hit':>5} {'incr/s':>8} {'lost':>5} "
+        f"{'bytes':>9} {'evicted':>8}"
+    )
+    try:
+        for kind in args.backends.split(","):
+            for workers in (int(n) for n in args.workers.split(",")):
+                result = run(kind, workers, args)
+                print(
+                    f"{kind:<8} {workers:>7} {result['ops_per_s']:>9.0f} "
+                    f"{result['get_p50_us']:>6.0f}us {result['get_p99_us']:>6.0f}us "
+                    f"{result['set_p50_us']:>6.0f}us {result['set_p99_us']:>6.0f}us "
+                    f"{result['hit_rate']:>5.2f} {result['incr_per_s']:>8.0f} "
+                    f"{result['incr_lost']:>5} {result['stored_bytes']:>9} "
+                    f"{result['evictions']:>8}"
+                )
+                # Start each run from an empty cache
+                shutil.rmtree(os.path.join(root, "bench"), ignore_errors=True)
+                kv.execute([b"FLUSHDB"])
+    finally:
+        kv.stop()
+        shutil.rmtree(root, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
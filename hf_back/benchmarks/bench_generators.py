@@ -0,0 +1,309 @@
+"""
+Generator Benchmark
+Times every DocxGenerator and PDFGenerator method on payloads of growing size
+
+For each case and size it records wall time (best of --repeat), peak
+Python memory via tracemalloc (lxml trees behind python-docx live in C
+memory and are not counted), and the output size in bytes, and prints
+the per-unit cost and the growth exponent between sizes so non-linear
+scaling stands out. Sizes whose predicted time exceeds --budget are
+skipped.
+
+Results can be saved as a baseline and later runs compared against it;
+a case that is slower than the baseline by more than --threshold is
+flagged and the script exits non-zero. Baselines are machine specific,
+so regenerate one before comparing on a different host.
+
+Usage (from hf_back/):
+    python benchmarks/bench_generators.py [--case invoice_items] [--budget 10]
+    python benchmarks/bench_generators.py --save-baseline
+    python benchmarks/bench_generators.py --compare [--threshold 0.25]
+"""
+
+import argparse
+import json
+import math
+import os
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.docx_generator import DocxGenerator  # noqa: E402
+from utils.pdf_generator import PDFGenerator  # noqa: E402
+from utils.spool import spool_size  # noqa: E402
+
+BASELINE_PATH = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "baselines", "generators.json"
+)
+
+# Timings below this are dominated by noise and never flagged
+NOISE_FLOOR_S = 0.005
+
+SENTENCE = "Designed and shipped a service that cut checkout latency by 40 percent"
+
+
+def _jobs(count: int, bullets: int) -> list:
+    return [
+        {
+            "title": "Senior Engineer",
+            "company": f"Company {i}",
+            "location": "Remote",
+            "start_date": "Jan 2020",
+            "end_date": "Present",
+            "responsibilities": [f"{SENTENCE} ({j})" for j in range(bullets)],
+        }
+        for i in range(count)
+    ]
+
+
+def _projects(count: int) -> list:
+    return [
+        {
+            "name": f"Project {i}",
+            "description": f"{SENTENCE}. " * 3,
+            "technologies": ["Python", "React", "Postgres"],
+        }
+        for i in range(count)
+    ]
+
+
+def _resume(jobs: int = 3, bullets: int = 4, projects: int = 2) -> dict:
+    return {
+        "personal_info": {
+            "name": "Jane Doe",
+            "email": "jane@example.com",
+            "phone": "+1 555 0100",
+            "location": "Berlin",
+        },
+        "summary": f"{SENTENCE}. " * 3,
+        "experience": _jobs(jobs, bullets),
+        "education": [{"degree": "BSc", "field": "CS", "school": "State U"}],
+        "skills": {"Languages": ["Python", "Go"], "Cloud": ["AWS", "GCP"]},
+        "projects": _projects(projects),
+    }
+
+
+def _sections(count: int, heading: str) -> str:
+    """Headed sections separated by blank lines, about 400 bytes each"""
+    return "\n\n".join(
+        f"{heading} {i}:\n" + f"{SENTENCE}. " * 5 for i in range(count)
+    )
+
+
+def _portfolio(jobs: int = 2, projects: int = 3) -> dict:
+    return {
+        "name": "Jane Doe",
+        "title": "Engineer",
+        "contact": {"email": "jane@example.com"},
+        "bio": f"{SENTENCE}. " * 3,
+        "skills": {"Languages": ["Python", "Go"], "Tools": ["Docker"]},
+        "experience": _jobs(jobs, 4),
+        "projects": _projects(projects),
+    }
+
+
+def _invoice(items: int) -> dict:
+    return {
+        "invoice_number": "INV-001",
+        "from_info": {"name": "Vero Ltd", "email": "billing@example.com"},
+        "to_info": {"name": "Acme"},
+        "items": [
+            {"description": f"Consulting, line {i}", "quantity": 2, "rate": 125.0}
+            for i in range(items)
+        ],
+        "tax_rate": 8.5,
+        "discount": 50,
+    }
+
+
+# Case name -> (generator, method, unit, sizes, payload builder)
+CASES = {
+    "resume_experience": (
+        "docx", "generate_resume", "jobs", [1, 5, 20, 50, 100],
+        lambda n: (_resume(jobs=n),),
+    ),
+    "resume_bullets": (
+        "docx", "generate_resume", "bullets/job", [2, 10, 50, 200],
+        lambda n: (_resume(bullets=n),),
+    ),
+    "resume_projects": (
+        "docx", "generate_resume", "projects", [1, 10, 50, 200],
+        lambda n: (_resume(projects=n),),
+    ),
+    "cover_letter_content": (
+        "docx", "generate_cover_letter", "KB", [2, 20, 200],
+        lambda n: ({"name": "Jane", "content": _sections(n * 5 // 2, "Para")},),
+    ),
+    "proposal_content": (
+        "docx", "generate_proposal", "KB", [3, 30, 300],
+        lambda n: ({"title": "Rebuild", "content": _sections(n * 5 // 2, "Phase")},),
+    ),
+    "invoice_items": (
+        "docx", "generate_invoice", "items", [10, 100, 1000, 10000, 50000],
+        lambda n: (_invoice(n),),
+    ),
+    "contract_terms": (
+        "docx", "generate_contract", "KB", [3, 30, 300],
+        lambda n: (
+            {
+                "contract_type": "Service Agreement",
+                "party1": {"name": "Provider"},
+                "party2": {"name": "Client"},
+                "terms": _sections(n * 5 // 2, "Clause"),
+            },
+        ),
+    ),
+    "portfolio_experience": (
+        "pdf", "generate_portfolio_pdf", "jobs", [1, 10, 50, 200],
+        lambda n: (_portfolio(jobs=n),),
+    ),
+    "portfolio_projects": (
+        "pdf", "generate_portfolio_pdf", "projects", [1, 10, 50, 200],
+        lambda n: (_portfolio(projects=n),),
+    ),
+    "simple_pdf_content": (
+        "pdf", "generate_simple_pdf", "KB", [2, 20, 200, 2000],
+        lambda n: (_sections(n * 5 // 2, "Section"), "Benchmark"),
+    ),
+}
+
+
+def _measure(method, args: tuple, repeat: int) -> dict:
+    """Best wall time over `repeat` runs, then one traced run for peak memory"""
+    best = math.inf
+    size = 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        buffer = method(*args)
+        best = min(best, time.perf_counter() - start)
+        size = spool_size(buffer)
+        buffer.close()
+        # A slow case gains nothing from more repeats
+        if best > 1.0:
+            break
+
+    tracemalloc.start()
+    method(*args).close()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {"seconds": best, "peak_kb": peak // 1024, "bytes": size}
+
+
+def run_case(name: str, generators: dict, repeat: int, budget: float) -> list:
+    """Measure a case at each size, skipping sizes predicted to exceed budget"""
+    kind, method_name, unit, sizes, build = CASES[name]
+    method = getattr(generators[kind], method_name)
+    rows = []
+    exponent = 1.0
+
+    # Warm code paths and caches specific to this method
+    method(*build(sizes[0]))
+
+    for size in sizes:
+        if rows:
+            previous = rows[-1]
+            predicted = previous["seconds"] * (size / previous["size"]) ** exponent
+            if predicted > budget:
+                rows.append({"size": size, "skipped": round(predicted, 1)})
+                break
+
+        result = _measure(method, build(size), repeat)
+        result["size"] = size
+        if rows and rows[-1]["seconds"] > 0:
+            growth = math.log(result["seconds"] / rows[-1]["seconds"]) / math.log(
+                size / rows[-1]["size"]
+            )
+            result["exponent"] = round(growth, 2)
+            # Fixed overhead makes small sizes look sub-linear; never
+            # predict better than linear
+            exponent = max(1.0, growth)
+        rows.append(result)
+
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--case", action="append", choices=list(CASES))
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument(
+        "--budget", type=float, default=10.0, help="Max predicted seconds per size"
+    )
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--compare", action="store_true")
+    parser.add_argument(
+        "--threshold", type=float, default=0.25, help="Allowed slowdown (0.25 = 25%%)"
+    )
+    args = parser.parse_args()
+
+    baseline = {}
+    if args.compare:
+        with open(args.baseline) as f:
+            baseline = json.load(f)["results"]
+
+    generators = {"docx": DocxGenerator(), "pdf": PDFGenerator()}
+
+    results = {}
+    regressions = []
+    print(
+        f"{'case':<22} {'size':>7} {'time ms':>10} {'µs/unit':>10} {'growth':>7}"
+        f" {'peak KB':>9} {'bytes':>10}"
+    )
+    for name in args.case or CASES:
+        unit = CASES[name][2]
+        for row in run_case(name, generators, args.repeat, args.budget):
+            key = f"{name}@{row['size']}"
+            if "skipped" in row:
+                print(
+                    f"{name:<22} {row['size']:>7} skipped, predicted {row['skipped']}s"
+                    f" > budget"
+                )
+                continue
+
+            results[key] = row
+            line = (
+                f"{name:<22} {row['size']:>7} {row['seconds'] * 1000:>10.1f}"
+                f" {row['seconds'] / row['size'] * 1e6:>10.1f}"
+                f" {row.get('exponent', ''):>7} {row['peak_kb']:>9} {row['bytes']:>10}"
+            )
+            base = baseline.get(key)
+            if base:
+                delta = row["seconds"] / base["seconds"] - 1
+                line += f"  {delta:+.0%}"
+                if (
+                    delta > args.threshold
+                    and row["seconds"] - base["seconds"] > NOISE_FLOOR_S
+                ):
+                    line += " REGRESSION"
+                    regressions.append(key)
+            print(line)
+        print(f"{'':<22} (unit: {unit})")
+
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(args.baseline), exist_ok=True)
+        with open(args.baseline, "w") as f:
+            json.dump(
+                {
+                    "created_at": datetime.now().isoformat(timespec="seconds"),
+                    "python": sys.version.split()[0],
+                    "results": results,
+                },
+                f,
+                indent=2,
+            )
+        print(f"\nBaseline saved to {args.baseline}")
+
+    if regressions:
+        print(f"\n{len(regressions)} regression(s) over {args.threshold:.0%}:")
+        for key in regressions:
+            print(f"  {key}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+Long Input Benchmark
+Measures AI text improvement latency as input grows, with and without splitting
+
+Runs GeminiClient against the local fake Gemini server (loadtest/) with a
+per-output-token latency, so one call on a long input is slow the way the
+real model is. With splitting, pieces under the token budget run
+concurrently and latency should stay roughly flat.
+
+Usage (from hf_back/):
+    python benchmarks/bench_long_inputs.py [--chars 2000 8000 32000] \\
+        [--latency fixed:300] [--ms-per-token 2]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from loadtest.fake_gemini import FakeGeminiServer  # noqa: E402
+
+SENTENCE = "The contractor shall deliver each milestone on the agreed date. "
+
+
+def build_text(chars: int) -> str:
+    """Prose of about `chars` characters in ~600-character paragraphs"""
+    paragraph = SENTENCE * 10
+    count = max(1, chars // len(paragraph))
+    return "\n\n".join(paragraph.strip() for _ in range(count))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--chars", type=int, nargs="+", default=[2000, 8000, 32000])
+    parser.add_argument("--latency", default="fixed:300", help="Fake Gemini latency")
+    parser.add_argument("--ms-per-token", type=float, default=2.0)
+    parser.add_argument("--parallel", type=int, default=4)
+    args = parser.parse_args()
+
+    fake = FakeGeminiServer(
+        port=0, latency=args.latency, ms_per_token=args.ms_per_token
+    ).start()
+    os.environ.setdefault("GEMINI_API_KEY", "benchmark")
+    os.environ["GEMINI_API_ENDPOINT"] = fake.url
+
+    from utils.gemini_client import GeminiClient
+    from utils.token_budget import estimate_tokens
+
+    client = GeminiClient()
+    client.max_parallel = args.parallel
+    client.connect()
+    budget = client.input_chunk_tokens
+
+    print(
+        f"fake latency {args.latency} + {args.ms_per_token} ms/token,"
+        f" budget {budget} tokens, {args.parallel} parallel\n"
+    )
+    print(f"{'chars':>7} {'tokens':>7} {'pieces':>7} {'single ms':>10} {'split ms':>9}")
+    for chars in args.chars:
+        text = build_text(chars)
+        timings = []
+        for chunk_tokens in (10**9, budget):
+            client.input_chunk_tokens = chunk_tokens
+            started = time.perf_counter()
+            improved = client.improve_text_quality(text)
+            timings.append((time.perf_counter() - started) * 1000)
+            assert improved.split() == text.split(), "pieces out of order"
+        print(
+            f"{len(text):>7} {estimate_tokens(text):>7} {len(client.split_input(text)):>7}"
+            f" {timings[0]:>10.0f} {timings[1]:>9.0f}"
+        )
+
+    fake.stop()
+
+
+if __name__ == "__main__":
+    main()
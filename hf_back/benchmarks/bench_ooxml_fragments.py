@@ -0,0 +1,189 @@
+"""
+OOXML Fragment Benchmark
+Per-element cost of styling through python-docx proxies versus copying cached fragments
+
+For each repeated structure the generators write (styled paragraphs,
+headings, list items, cell borders, table rows and signature blocks)
+it appends --count elements to a fresh document both ways: "proxy" is
+how the generators built them before utils/ooxml_fragments.py, and
+"fragment" is the DocxGenerator helper that now copies a prototype.
+Both must produce the same body XML; the script exits non-zero if not.
+Proxy costs include python-docx's search for the body's sectPr on every
+append, which grows with the document, and the per-row cell grid that
+made pre-sized invoice tables quadratic, hence the smaller --rows.
+
+Usage (from hf_back/):
+    python benchmarks/bench_ooxml_fragments.py [--count 500] [--rows 200] [--repeat 3] \\
+        [--kinds heading,row]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from docx.oxml import OxmlElement  # noqa: E402
+from docx.oxml.ns import qn  # noqa: E402
+from docx.shared import Inches, Pt, RGBColor  # noqa: E402
+
+from utils.docx_generator import DocxGenerator  # noqa: E402
+from utils.ooxml_fragments import append_rows  # noqa: E402
+
+TEXT = "Designed and shipped a service that cut checkout latency by 40 percent"
+
+
+def _proxy_paragraph(gen, doc, i):
+    para = doc.add_paragraph()
+    run = para.add_run(f"{TEXT} ({i})")
+    run.font.name = gen.default_font
+    run.font.size = Pt(11)
+    run.bold = False
+    run.italic = False
+
+
+def _proxy_heading(gen, doc, i):
+    heading = doc.add_heading(f"Section {i}", level=1)
+    heading.style.font.name = gen.heading_font
+    heading.style.font.color.rgb = RGBColor(0, 51, 102)
+
+
+def _proxy_list_item(gen, doc, i):
+    para = doc.add_paragraph(f"{TEXT} ({i})", style="List Bullet")
+    para.paragraph_format.left_indent = Inches(0.25)
+
+
+def _proxy_cell_border(gen, cells, i):
+    # Cells are revisited, so drop the previous set as _set_cell_border now does
+    tcPr = cells[i % len(cells)]._tc.get_or_add_tcPr()
+    for existing in tcPr.findall(qn("w:tcBorders")):
+        tcPr.remove(existing)
+    tcBorders = OxmlElement("w:tcBorders")
+    for edge in ("left", "top", "right", "bottom"):
+        edge_el = OxmlElement(f"w:{edge}")
+        edge_el.set(qn("w:val"), "single")
+        edge_el.set(qn("w:sz"), "4")
+        edge_el.set(qn("w:space"), "0")
+        edge_el.set(qn("w:color"), "000000")
+        tcBorders.append(edge_el)
+    tcPr.append(tcBorders)
+
+
+def _proxy_signature(gen, doc, i):
+    _styled(gen, doc, f"Party {i}:", True)
+    doc.add_paragraph()
+    doc.add_paragraph("_" * 50)
+    _styled(gen, doc, f"Signature: Name {i}", False)
+    doc.add_paragraph()
+    doc.add_paragraph("_" * 50)
+    _styled(gen, doc, "Date:", False)
+
+
+def _styled(gen, doc, text, bold):
+    para = doc.add_paragraph()
+    run = para.add_run(text)
+    run.font.name = gen.default_font
+    run.font.size = Pt(11)
+    run.bold = bold
+    run.italic = False
+
+
+def _row_values(i):
+    return (f"Consulting, line {i}", 2, "$125.00", "$250.00")
+
+
+# Kind -> (target, proxy(gen, target, i), fragment(gen, target, i))
+# Table rows are appended in bulk, so build() handles them itself
+KINDS = {
+    "paragraph": (
+        "doc",
+        _proxy_paragraph,
+        lambda gen, doc, i: gen._add_paragraph(doc, f"{TEXT} ({i})"),
+    ),
+    "heading": (
+        "doc",
+        _proxy_heading,
+        lambda gen, doc, i: gen._add_heading(doc, f"Section {i}", level=1),
+    ),
+    "list_item": (
+        "doc",
+        _proxy_list_item,
+        lambda gen, doc, i: gen._add_list_item(doc, f"{TEXT} ({i})", indent=Inches(0.25)),
+    ),
+    "cell_border": (
+        "cells",
+        _proxy_cell_border,
+        lambda gen, cells, i: gen._set_cell_border(
+            cells[i % len(cells)],
+            **{edge: {"color": "000000"} for edge in ("top", "bottom", "left", "right")},
+        ),
+    ),
+    "signature": (
+        "doc",
+        _proxy_signature,
+        lambda gen, doc, i: gen._add_signature_block(doc, f"Party {i}:", f"Name {i}"),
+    ),
+    "row": ("rows", None, None),
+}
+
+
+def build(gen: DocxGenerator, kind: str, way: str, count: int):
+    """Document with `count` elements of `kind`; returns (seconds, body XML)"""
+    target, proxy, fragment = KINDS[kind]
+    doc = gen._new_document()
+    if target == "cells":
+        subject = doc.add_table(rows=50, cols=1).columns[0].cells
+    elif target == "rows":
+        subject = doc.add_table(rows=1, cols=4)
+        subject.style = "Light Grid Accent 1"
+    else:
+        subject = doc
+
+    began = time.perf_counter()
+    if kind == "row" and way == "proxy":
+        # As generate_invoice did: pre-sized table, text set per cell
+        for _ in range(count):
+            subject.add_row()
+        for i in range(count):
+            cells = subject.rows[i + 1].cells
+            for cell, value in zip(cells, _row_values(i)):
+                cell.text = str(value)
+    elif kind == "row":
+        append_rows(subject, (_row_values(i) for i in range(count)))
+    else:
+        add = proxy if way == "proxy" else fragment
+        for i in range(count):
+            add(gen, subject, i)
+    seconds = time.perf_counter() - began
+    return seconds, doc.element.body.xml
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--count", type=int, default=500, help="Elements per run")
+    parser.add_argument("--rows", type=int, default=200, help="Table rows per run")
+    parser.add_argument("--repeat", type=int, default=3, help="Best of this many runs")
+    parser.add_argument("--kinds", default=",".join(KINDS))
+    args = parser.parse_args()
+
+    gen = DocxGenerator()
+    print(f"{'kind':<12} {'proxy':>10} {'fragment':>10} {'speedup':>8}  same XML")
+    for kind in args.kinds.split(","):
+        count = args.rows if kind == "row" else args.count
+        timings, bodies = {}, {}
+        for way in ("proxy", "fragment"):
+            runs = [build(gen, kind, way, count) for _ in range(args.repeat)]
+            timings[way] = min(seconds for seconds, _ in runs) / count
+            bodies[way] = runs[0][1]
+        same = bodies["proxy"] == bodies["fragment"]
+        print(
+            f"{kind:<12} {timings['proxy'] * 1e6:>8.1f}us {timings['fragment'] * 1e6:>8.1f}us "
+            f"{timings['proxy'] / timings['fragment']:>7.1f}x  {'yes' if same else 'NO'}"
+        )
+        if not same:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
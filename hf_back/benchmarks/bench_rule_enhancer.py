@@ -0,0 +1,78 @@
+"""
+Rule Enhancer Benchmark
+Measures offline bullet and skills-summary enhancement throughput and latency
+
+The rule tier is the fallback when Gemini is skipped or fails, so its
+worst-case latency bounds how long an enhanced resume can take.
+
+Usage (from hf_back/):
+    python benchmarks/bench_rule_enhancer.py [--count 20000]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.rule_enhancer import RuleEnhancer  # noqa: E402
+
+BULLETS = [
+    "responsible for managing a team of 5 engineers",
+    "- worked on the billing API ,  reducing errors by 20%",
+    "develops new features for the mobile app",
+    "helped with onboarding new hires",
+    "Optimizing SQL queries for the reporting service",
+    "was in charge of the release process",
+    "made dashboards for the sales team",
+    "API design and documentation",
+]
+SKILLS = ["Python", "React", "AWS", "Docker", "PostgreSQL", "Kubernetes", "Go"]
+
+
+def measure(func, count: int) -> dict:
+    """Run func(i) count times; throughput and latency percentiles"""
+    samples = []
+    started = time.perf_counter()
+    for i in range(count):
+        call_started = time.perf_counter()
+        func(i)
+        samples.append(time.perf_counter() - call_started)
+    elapsed = time.perf_counter() - started
+    samples.sort()
+    return {
+        "per_s": count / elapsed,
+        "p50_us": samples[len(samples) // 2] * 1e6,
+        "p99_us": samples[int(len(samples) * 0.99)] * 1e6,
+        "max_us": samples[-1] * 1e6,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--count", type=int, default=20000)
+    args = parser.parse_args()
+
+    enhancer = RuleEnhancer()
+    cases = {
+        "resume bullet": lambda i: enhancer.enhance_resume_description(
+            BULLETS[i % len(BULLETS)]
+        ),
+        "skills summary": lambda i: enhancer.generate_skills_summary(
+            SKILLS[: 1 + i % len(SKILLS)], i % 15
+        ),
+    }
+
+    print(f"{args.count} calls per case\n")
+    print(f"{'case':<16} {'calls/s':>10} {'p50 us':>8} {'p99 us':>8} {'max us':>8}")
+    for name, func in cases.items():
+        result = measure(func, args.count)
+        print(
+            f"{name:<16} {result['per_s']:>10.0f} {result['p50_us']:>8.1f}"
+            f" {result['p99_us']:>8.1f} {result['max_us']:>8.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
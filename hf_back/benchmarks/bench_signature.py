@@ -0,0 +1,121 @@
+"""
+Signature Stamping Benchmark
+Compares incremental PDF signing with a full PyPDF2 rewrite as documents grow
+
+Stamps one page of synthetic contracts of increasing length. The
+incremental path appends an update section and should stay flat apart
+from copying the original bytes; the rewrite baseline re-serialises
+every page.
+
+Usage (from hf_back/):
+    python benchmarks/bench_signature.py [--pages 20 200 2000] [--repeat 5]
+"""
+
+import argparse
+import base64
+import io
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.pdf_signer import IncrementalStamper, SignatureCache  # noqa: E402
+
+
+def build_pdf(pages: int) -> bytes:
+    """A contract-like PDF with a few lines of text per page"""
+    from reportlab.lib.pagesizes import letter
+    from reportlab.pdfgen import canvas
+
+    buffer = io.BytesIO()
+    pdf = canvas.Canvas(buffer, pagesize=letter)
+    for page in range(pages):
+        for line in range(40):
+            pdf.drawString(72, 720 - line * 16, f"Clause {page}.{line}: the parties agree")
+        pdf.showPage()
+    pdf.save()
+    return buffer.getvalue()
+
+
+def build_signature() -> str:
+    """A transparent pen-stroke PNG as the frontend's signature pad sends it"""
+    from PIL import Image, ImageDraw
+
+    image = Image.new("RGBA", (800, 240), (0, 0, 0, 0))
+    ImageDraw.Draw(image).line((20, 200, 400, 40, 780, 180), fill=(0, 0, 90, 255), width=6)
+    png = io.BytesIO()
+    image.save(png, format="PNG")
+    return "data:image/png;base64," + base64.b64encode(png.getvalue()).decode()
+
+
+def best_of(repeat: int, func) -> float:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+    return min(timings) * 1000
+
+
+def rewrite(data: bytes, signature) -> bytes:
+    """Baseline: overlay a one-page stamp PDF and re-serialise everything"""
+    from PyPDF2 import PdfReader, PdfWriter
+    from reportlab.lib.utils import ImageReader
+    from reportlab.pdfgen import canvas
+
+    overlay = io.BytesIO()
+    stamp = canvas.Canvas(overlay)
+    stamp.drawImage(
+        ImageReader(io.BytesIO(signature.png)), 400, 36, 150, 45, mask="auto"
+    )
+    stamp.save()
+
+    writer = PdfWriter()
+    reader = PdfReader(io.BytesIO(data))
+    for page in reader.pages:
+        writer.add_page(page)
+    writer.pages[-1].merge_page(PdfReader(overlay).pages[0])
+    output = io.BytesIO()
+    writer.write(output)
+    return output.getvalue()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--pages", type=int, nargs="+", default=[20, 200, 2000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    cache = SignatureCache()
+    signature_data = build_signature()
+    decode_ms = best_of(1, lambda: cache.get("bench", signature_data))
+    cached_ms = best_of(args.repeat, lambda: cache.get("bench", signature_data))
+    signature = cache.get("bench", signature_data)
+    print(f"signature decode {decode_ms:.1f} ms, cached {cached_ms:.3f} ms\n")
+
+    print(
+        f"{'pages':>6} {'size KB':>8} {'stamp ms':>9} {'copy ms':>8}"
+        f" {'added KB':>9} {'rewrite ms':>11}"
+    )
+    for pages in args.pages:
+        data = build_pdf(pages)
+
+        def stamp():
+            stamper = IncrementalStamper(io.BytesIO(data))
+            stamper.stamp(signature, [stamper.page_count - 1], "bottom-right", "Bench")
+            return stamper
+
+        stamper = stamp()
+        added = len(stamper.update_section(len(data)))
+        stamp_ms = best_of(args.repeat, stamp)
+        copy_ms = best_of(args.repeat, lambda: stamper.write(io.BytesIO()))
+        rewrite_ms = best_of(args.repeat, lambda: rewrite(data, signature))
+        print(
+            f"{pages:>6} {len(data) // 1024:>8} {stamp_ms:>9.1f} {copy_ms:>8.1f}"
+            f" {added // 1024:>9} {rewrite_ms:>11.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+Startup Benchmark
+Measures import time of app.py and the cost of each warm-up step
+
+Usage (from hf_back/):
+    python benchmarks/bench_startup.py [--top 15]
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+HF_BACK = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+WARMUP_SCRIPT = """
+import json, time
+started = time.perf_counter()
+import app
+imported = time.perf_counter()
+app.run_warmup()
+print(json.dumps({
+    "import_app_ms": round((imported - started) * 1000, 1),
+    "warmup": app.warmup.status(),
+}))
+"""
+
+
+def _import_profile(env: dict) -> list:
+    """Return (cumulative µs, module) pairs from python -X importtime"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import app"],
+        cwd=HF_BACK,
+        env=env,
+        capture_output=True,
+        text=True,
+    )
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, module = line[len("import time:") :].split("|")
+        rows.append((int(cumulative), module.rstrip()))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--top", type=int, default=15)
+    args = parser.parse_args()
+
+    env = dict(os.environ)
+    env.setdefault("GEMINI_API_KEY", "benchmark")
+    env.setdefault("WARMUP_GEMINI_TIMEOUT", "5")
+
+    rows = _import_profile(env)
+    total = next((us for us, module in rows if module.strip() == "app"), 0)
+    print(f"import app: {total / 1000:.1f} ms")
+    print(f"\nTop {args.top} imports by cumulative time:")
+    for us, module in sorted(rows, reverse=True)[1 : args.top + 1]:
+        print(f"  {us / 1000:>8.1f} ms  {module.strip()}")
+
+    result = subprocess.run(
+        [sys.executable, "-c", WARMUP_SCRIPT],
+        cwd=HF_BACK,
+        env=env,
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        print(result.stderr, file=sys.stderr)
+        sys.exit(1)
+
+    report = json.loads(result.stdout.strip().splitlines()[-1])
+    status = report["warmup"]
+    print(f"\nWarm-up ({status['state']}):")
+    for step, ms in status["timings_ms"].items():
+        print(f"  {ms:>8.1f} ms  {step}")
+    for step, error in status["errors"].items():
+        print(f"  failed: {step}: {error}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Validation Benchmark
+Measures per-request overhead of the compiled payload schemas
+
+Usage (from hf_back/):
+    python benchmarks/bench_validation.py [--iterations 2000]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.schemas import validate_payload  # noqa: E402
+
+
+def _resume(jobs: int, bullets: int) -> dict:
+    return {
+        "personal_info": {"name": "Jane Doe", "email": "jane@example.com"},
+        "summary": "Engineer with a decade of experience. " * 5,
+        "experience": [
+            {
+                "title": "Senior Developer",
+                "company": f"Company {i}",
+                "start_date": "Jan 2020",
+                "end_date": "Present",
+                "responsibilities": [f"Built feature {j}" for j in range(bullets)],
+            }
+            for i in range(jobs)
+        ],
+        "skills": {"Languages": ["Python", "Go"], "Cloud": ["AWS", "GCP"]},
+        "projects": [{"name": "Vero", "description": "Doc tool", "technologies": []}],
+        "enhance_with_ai": True,
+    }
+
+
+def _invoice(items: int) -> dict:
+    return {
+        "invoice_number": "INV-001",
+        "items": [
+            {"description": f"Line {i}", "quantity": 1, "rate": 10.0}
+            for i in range(items)
+        ],
+        "tax_rate": 8.5,
+    }
+
+
+CASES = [
+    ("resume (3 jobs x 5 bullets)", "resume", _resume(3, 5)),
+    ("resume (10 jobs x 20 bullets)", "resume", _resume(10, 20)),
+    ("invoice (10 items)", "invoice", _invoice(10)),
+    ("invoice (5,000 items)", "invoice", _invoice(5000)),
+    ("enhance-description", "enhance_description", {"text": "Led a team"}),
+    ("reject: invoice (1,000,000 items)", "invoice", _invoice(1_000_000)),
+    ("reject: summary 1 MB", "resume", {"summary": "x" * 1_000_000}),
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--iterations", type=int, default=2000)
+    args = parser.parse_args()
+
+    print(f"{'case':<36} {'result':<8} {'per call':>12}")
+    for label, schema, payload in CASES:
+        # Scale iterations down for the large payloads
+        size = len(payload.get("items", [])) + len(payload.get("experience", []))
+        iterations = max(5, args.iterations // max(1, size // 100))
+
+        error = validate_payload(schema, payload)
+        start = time.perf_counter()
+        for _ in range(iterations):
+            validate_payload(schema, payload)
+        elapsed = (time.perf_counter() - start) / iterations
+
+        result = "reject" if error else "ok"
+        print(f"{label:<36} {result:<8} {elapsed * 1e6:>9.1f} µs")
+
+
+if __name__ == "__main__":
+    main()
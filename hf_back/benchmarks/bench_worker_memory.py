@@ -0,0 +1,113 @@
+"""
+Worker Memory Benchmark
+Compares per-worker RSS / PSS / private memory with and without preload
+
+Starts gunicorn twice (GUNICORN_PRELOAD=false, then true), waits for every
+worker to finish warm-up, and reads /proc/<pid>/smaps_rollup. PSS splits
+shared pages between the processes mapping them, so it is the number that
+shows copy-on-write sharing. Linux only.
+
+Usage (from hf_back/):
+    python benchmarks/bench_worker_memory.py [--workers 2] [--port 7870]
+"""
+
+import argparse
+import os
+import signal
+import subprocess
+import sys
+import time
+
+HF_BACK = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _memory_kb(pid: int) -> dict:
+    """Read Rss, Pss and private memory of a process in kB"""
+    values = {}
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) >= 2 and parts[0].endswith(":"):
+                values[parts[0][:-1]] = int(parts[1])
+    return {
+        "rss": values.get("Rss", 0),
+        "pss": values.get("Pss", 0),
+        "private": values.get("Private_Clean", 0) + values.get("Private_Dirty", 0),
+    }
+
+
+def _children(pid: int) -> list:
+    with open(f"/proc/{pid}/task/{pid}/children") as f:
+        return [int(p) for p in f.read().split()]
+
+
+def _measure(preload: bool, workers: int, port: int, timeout: float) -> dict:
+    env = dict(os.environ)
+    env.setdefault("GEMINI_API_KEY", "benchmark")
+    env.setdefault("WARMUP_GEMINI_TIMEOUT", "3")
+    env.update(
+        {
+            "GUNICORN_PRELOAD": "true" if preload else "false",
+            "WEB_CONCURRENCY": str(workers),
+            "PORT": str(port),
+        }
+    )
+
+    log_path = os.path.join("/tmp", f"bench_worker_memory_{port}.log")
+    with open(log_path, "w") as log:
+        master = subprocess.Popen(
+            [sys.executable, "-m", "gunicorn", "app:app"],
+            cwd=HF_BACK,
+            env=env,
+            stdout=log,
+            stderr=subprocess.STDOUT,
+        )
+
+    try:
+        deadline = time.time() + timeout
+        while time.time() < deadline:
+            with open(log_path) as f:
+                if f.read().count("✓ Warm-up") >= workers:
+                    break
+            time.sleep(0.5)
+        else:
+            raise RuntimeError(f"workers not ready after {timeout}s, see {log_path}")
+
+        master_mem = _memory_kb(master.pid)
+        worker_mem = [_memory_kb(pid) for pid in _children(master.pid)]
+    finally:
+        master.send_signal(signal.SIGTERM)
+        master.wait(timeout=30)
+
+    return {"master": master_mem, "workers": worker_mem}
+
+
+def _print(label: str, result: dict):
+    print(f"\n{label}")
+    print(f"  {'process':<10} {'RSS MB':>8} {'PSS MB':>8} {'private MB':>11}")
+    rows = [("master", result["master"])] + [
+        (f"worker {i}", mem) for i, mem in enumerate(result["workers"])
+    ]
+    for name, mem in rows:
+        print(
+            f"  {name:<10} {mem['rss'] / 1024:>8.1f} {mem['pss'] / 1024:>8.1f} "
+            f"{mem['private'] / 1024:>11.1f}"
+        )
+    total_pss = sum(mem["pss"] for _, mem in rows) / 1024
+    print(f"  total PSS: {total_pss:.1f} MB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--port", type=int, default=7870)
+    parser.add_argument("--timeout", type=float, default=90)
+    args = parser.parse_args()
+
+    for preload in (False, True):
+        result = _measure(preload, args.workers, args.port, args.timeout)
+        _print(f"GUNICORN_PRELOAD={str(preload).lower()}", result)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+"""
+Gunicorn configuration
+Loaded automatically when gunicorn is started from this directory
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from utils.bulkhead import thread_budget  # noqa: E402
+
+bind = f"0.0.0.0:{os.environ.get('PORT', 7860)}"
+workers = int(os.environ.get("WEB_CONCURRENCY", 2))
+# Enough threads for every bulkhead to fill its pool and queue at once
+threads = int(os.environ.get("GUNICORN_THREADS", thread_budget()))
+timeout = 120
+
+# Preload mode: build heavy modules and immutable caches once in the master
+# and share them copy-on-write (see app.preload_for_fork)
+preload_app = os.environ.get("GUNICORN_PRELOAD", "false").lower() == "true"
+
+
+def when_ready(server):
+    """Runs in the master before the first worker is forked"""
+    if preload_app:
+        from app import preload_for_fork
+
+        preload_for_fork()
+
+
+def post_fork(server, worker):
+    """Runs in each worker straight after fork"""
+    if preload_app:
+        from app import reinit_after_fork
+
+        reinit_after_fork()
+
+
+def post_worker_init(worker):
+    """Warm the worker up before it accepts its first request"""
+    if os.environ.get("WARMUP_ON_START", "true").lower() == "true":
+        from app import run_warmup
+
+        run_warmup()
@@ -0,0 +1,4 @@
+"""
+Load-test harness
+Drives every /generate-* and /enhance-* route against a local fake Gemini
+"""
@@ -0,0 +1,442 @@
+"""
+Fake Gemini Server
+Local stand-in for the Gemini REST API so load tests spend no real quota
+
+Serves generateContent, streamGenerateContent and countTokens for any model with configurable
+latency, error and 429 rates, and canned or templated responses. Point
+the backend at it with:
+    GEMINI_API_ENDPOINT=http://127.0.0.1:8765
+
+Usage (from hf_back/):
+    python -m loadtest.fake_gemini --port 8765 \\
+        --gemini-latency lognormal:800:3000 --gemini-error-rate 0.01 \\
+        --gemini-429-rate 0.02 [--gemini-responses responses.json]
+"""
+
+import argparse
+import json
+import math
+import random
+import re
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, List, Optional
+
+# Canned responses per task; {original} is replaced with the text being
+# enhanced when the prompt contains one
+DEFAULT_RESPONSES: Dict[str, List[str]] = {
+    "resume_bullet": [
+        "{original}, improving delivery speed and reliability for the team.",
+        "{original} end to end, reducing manual effort across releases.",
+    ],
+    "portfolio": [
+        "Engineered {original}. Designed the architecture, built the core "
+        "features and shipped a maintainable, well-tested codebase.",
+    ],
+    "skills_summary": [
+        "Versatile engineer with hands-on experience across the full stack. "
+        "Delivers reliable, well-structured software and collaborates closely "
+        "with product teams to ship measurable results.",
+    ],
+    "improve": ["{original}"],
+    "cover_letter": [
+        "I am excited to apply for this position.\n\n"
+        + "My background has prepared me to contribute from day one. " * 6
+        + "\n\nThank you for your time and consideration.",
+    ],
+    "proposal": [
+        "\n\n".join(
+            f"{heading}\n" + "We will deliver this phase with clear milestones. " * 5
+            for heading in (
+                "Executive Summary",
+                "Project Overview",
+                "Scope of Work",
+                "Deliverables",
+                "Timeline",
+                "Investment",
+                "Next Steps",
+            )
+        ),
+    ],
+    "contract": [
+        "\n\n".join(
+            f"{heading}:\n" + "The parties agree to the terms set out here. " * 4
+            for heading in (
+                "Scope of Services",
+                "Payment Terms",
+                "Timeline and Deadlines",
+                "Intellectual Property Rights",
+                "Confidentiality",
+                "Termination Clause",
+                "Liability and Warranties",
+            )
+        ),
+    ],
+    "document_chunk": ["[[1]] This paragraph was improved by the fake server."],
+    "contract_clauses": ["The parties agree to the custom provisions requested."],
+    "generic": ["This is a response from the local fake Gemini server."],
+}
+
+# Prompt fragment -> task, checked in order
+TASK_MARKERS = [
+    ("job responsibility", "resume_bullet"),
+    ("project description", "portfolio"),
+    ("professional summary", "skills_summary"),
+    ("cover letter", "cover_letter"),
+    ("business proposal", "proposal"),
+    ("as contract clauses", "contract_clauses"),
+    ("clause of a", "contract_clause"),
+    ("contract terms", "contract"),
+    ("improve each paragraph", "document_chunk"),
+    ("improve the following text", "improve"),
+]
+
+# Longest text in one streamGenerateContent chunk (about 16 tokens)
+STREAM_CHUNK_CHARS = 64
+
+# Marked paragraphs of a document chunk, echoed back unchanged
+CHUNK_PATTERN = re.compile(r"\nParagraphs:\n(.*)\n\nImproved Paragraphs:", re.DOTALL)
+
+# Tasks whose whole (possibly multi-paragraph) input is echoed back, so
+# response length tracks input length as it does with the real model
+ECHO_PATTERNS = {
+    "document_chunk": CHUNK_PATTERN,
+    "improve": re.compile(r"\nOriginal: (.*)\n\nRequirements:", re.DOTALL),
+    "contract_clauses": re.compile(r"\nRequirements:\n(.*)\n\nRules:", re.DOTALL),
+    "contract_clause": re.compile(r"\nStandard clause:\n(.*)\n\nRules:", re.DOTALL),
+}
+
+# Structured calls ask for {"text": ...}; junk answers imitate the option
+# menus the real model sometimes returns instead
+STRUCTURED_MARKER = 'respond with json only, exactly {"text"'
+JUNK_RESPONSE = (
+    "Here are a few options:\n\nOption 1: {original}.\n\n"
+    "Option 2: Delivered {original}."
+)
+
+ORIGINAL_PATTERN = re.compile(
+    r"^(?:Original Description|Current Description|Original):\s*(.+)$",
+    re.MULTILINE,
+)
+
+
+def parse_latency(spec: str) -> Callable[[], float]:
+    """
+    Build a latency sampler from a spec string (milliseconds)
+
+    Specs:
+        fixed:MS
+        uniform:MIN:MAX
+        lognormal:MEDIAN:P99
+
+    Returns:
+        Function returning a delay in seconds
+    """
+    kind, *values = spec.split(":")
+    numbers = [float(v) / 1000 for v in values]
+
+    if kind == "fixed" and len(numbers) == 1:
+        return lambda: numbers[0]
+    if kind == "uniform" and len(numbers) == 2:
+        return lambda: random.uniform(numbers[0], numbers[1])
+    if kind == "lognormal" and len(numbers) == 2:
+        median, p99 = numbers
+        sigma = math.log(p99 / median) / 2.326
+        return lambda: random.lognormvariate(math.log(median), sigma)
+
+    raise ValueError(f"Invalid latency spec: {spec}")
+
+
+class FakeGeminiServer:
+    """Threaded HTTP server imitating the Gemini REST API"""
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 8765,
+        latency: str = "lognormal:800:3000",
+        error_rate: float = 0.0,
+        rate_limit_rate: float = 0.0,
+        responses: Optional[Dict[str, List[str]]] = None,
+        ms_per_token: float = 0.0,
+        junk_rate: float = 0.0,
+    ):
+        """
+        Initialize fake server
+
+        Args:
+            host: Interface to bind
+            port: Port to bind (0 picks a free port)
+            latency: Latency spec, see parse_latency()
+            error_rate: Fraction of calls answered with HTTP 500
+            rate_limit_rate: Fraction of calls answered with HTTP 429
+            responses: Task -> response templates, merged over DEFAULT_RESPONSES
+            ms_per_token: Extra latency per output token, as generation
+                time grows with response length
+            junk_rate: Fraction of text responses replaced by an option menu
+        """
+        self.sample_latency = parse_latency(latency)
+        self.latency_spec = latency
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.ms_per_token = ms_per_token
+        self.junk_rate = junk_rate
+        self.responses = {**DEFAULT_RESPONSES, **(responses or {})}
+        self.counts: Dict[str, int] = {}
+        self._counts_lock = threading.Lock()
+
+        self._server = ThreadingHTTPServer((host, port), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def _count(self, key: str):
+        with self._counts_lock:
+            self.counts[key] = self.counts.get(key, 0) + 1
+
+    def respond_to(self, prompt: str, max_output_tokens: int = 0) -> Dict[str, Any]:
+        """
+        Build a generateContent response body for a prompt
+
+        Responses longer than max_output_tokens are cut off with
+        finishReason MAX_TOKENS, as the real API does.
+        """
+        lowered = prompt.lower()
+        task = next(
+            (task for marker, task in TASK_MARKERS if marker in lowered), "generic"
+        )
+        self._count(f"task:{task}")
+
+        echo = ECHO_PATTERNS[task].search(prompt) if task in ECHO_PATTERNS else None
+        if echo:
+            text = echo.group(1)
+        else:
+            match = ORIGINAL_PATTERN.search(prompt)
+            original = match.group(1).strip().rstrip(".") if match else "the project"
+            template = random.choice(self.responses[task])
+            if random.random() < self.junk_rate:
+                self._count("junk")
+                template = JUNK_RESPONSE
+            text = template.replace("{original}", original)
+
+        if STRUCTURED_MARKER in lowered:
+            text = json.dumps({"text": text})
+
+        finish_reason = "STOP"
+        if max_output_tokens and len(text) // 4 > max_output_tokens:
+            self._count("truncated")
+            text = text[: max_output_tokens * 4]
+            finish_reason = "MAX_TOKENS"
+
+        prompt_tokens = max(1, len(prompt) // 4)
+        output_tokens = max(1, len(text) // 4)
+        return {
+            "candidates": [
+                {
+                    "content": {"parts": [{"text": text}], "role": "model"},
+                    "finishReason": finish_reason,
+                    "index": 0,
+                    "tokenCount": output_tokens,
+                }
+            ],
+            "usageMetadata": {
+                "promptTokenCount": prompt_tokens,
+                "candidatesTokenCount": output_tokens,
+                "totalTokenCount": prompt_tokens + output_tokens,
+            },
+        }
+
+    @staticmethod
+    def stream_chunks(response: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """
+        Split a generateContent response into streamGenerateContent chunks
+
+        Chunks end at line breaks or after STREAM_CHUNK_CHARS; the last
+        one carries the finish reason and usage, as the real API's does.
+        """
+        candidate = response["candidates"][0]
+        text = candidate["content"]["parts"][0]["text"]
+        pieces = re.findall(rf"[^\n]{{1,{STREAM_CHUNK_CHARS}}}\n?|\n", text) or [""]
+        chunks = [
+            {
+                "candidates": [
+                    {"content": {"parts": [{"text": piece}], "role": "model"}, "index": 0}
+                ]
+            }
+            for piece in pieces
+        ]
+        chunks[-1]["candidates"][0]["finishReason"] = candidate["finishReason"]
+        chunks[-1]["usageMetadata"] = response["usageMetadata"]
+        return chunks
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                pass
+
+            def _send(self, status: int, body: Dict[str, Any]):
+                payload = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def do_GET(self):
+                if self.path.startswith("/stats"):
+                    return self._send(200, {"counts": server.counts})
+                self._send(404, {"error": {"code": 404, "status": "NOT_FOUND"}})
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                body = json.loads(self.rfile.read(length) or b"{}")
+                prompt = " ".join(
+                    part.get("text", "")
+                    for content in body.get("contents", [])
+                    for part in content.get("parts", [])
+                )
+
+                if self.path.split("?")[0].endswith(":countTokens"):
+                    server._count("countTokens")
+                    return self._send(200, {"totalTokens": max(1, len(prompt) // 4)})
+
+                method = self.path.split("?")[0].rsplit(":", 1)[-1]
+                if method not in ("generateContent", "streamGenerateContent"):
+                    return self._send(
+                        404, {"error": {"code": 404, "status": "NOT_FOUND"}}
+                    )
+
+                config = body.get("generationConfig", {})
+                response = server.respond_to(
+                    prompt,
+                    config.get("maxOutputTokens") or config.get("max_output_tokens", 0),
+                )
+                output_tokens = response["usageMetadata"]["candidatesTokenCount"]
+                if method == "streamGenerateContent":
+                    # Generation time is spread over the chunks instead
+                    output_tokens = 0
+                time.sleep(
+                    server.sample_latency() + output_tokens * server.ms_per_token / 1000
+                )
+
+                roll = random.random()
+                if roll < server.rate_limit_rate:
+                    server._count("status:429")
+                    return self._send(
+                        429,
+                        {
+                            "error": {
+                                "code": 429,
+                                "message": "Resource has been exhausted",
+                                "status": "RESOURCE_EXHAUSTED",
+                            }
+                        },
+                    )
+                if roll < server.rate_limit_rate + server.error_rate:
+                    server._count("status:500")
+                    return self._send(
+                        500,
+                        {
+                            "error": {
+                                "code": 500,
+                                "message": "Internal error",
+                                "status": "INTERNAL",
+                            }
+                        },
+                    )
+
+                server._count("status:200")
+                if method == "streamGenerateContent":
+                    return self._stream(response)
+                self._send(200, response)
+
+            def _stream(self, response: Dict[str, Any]):
+                """Send the response as a JSON array of chunks, paced by ms_per_token"""
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.end_headers()
+                for i, chunk in enumerate(server.stream_chunks(response)):
+                    if i:
+                        text = chunk["candidates"][0]["content"]["parts"][0]["text"]
+                        time.sleep(max(1, len(text) // 4) * server.ms_per_token / 1000)
+                    self.wfile.write((b"[" if i == 0 else b",\r\n") + json.dumps(chunk).encode())
+                    self.wfile.flush()
+                self.wfile.write(b"]")
+
+        return Handler
+
+    def start(self) -> "FakeGeminiServer":
+        """Serve on a background thread"""
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, name="fake-gemini", daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+
+def add_arguments(parser: argparse.ArgumentParser):
+    """Fake server options, shared with the load-test runner"""
+    parser.add_argument("--gemini-latency", default="lognormal:800:3000")
+    parser.add_argument("--gemini-error-rate", type=float, default=0.0)
+    parser.add_argument("--gemini-429-rate", type=float, default=0.0)
+    parser.add_argument(
+        "--gemini-ms-per-token",
+        type=float,
+        default=0.0,
+        help="Extra latency per output token",
+    )
+    parser.add_argument(
+        "--gemini-junk-rate",
+        type=float,
+        default=0.0,
+        help="Fraction of text responses that are option menus",
+    )
+    parser.add_argument(
+        "--gemini-responses", help="JSON file of task -> response templates"
+    )
+
+
+def from_arguments(args, port: int) -> FakeGeminiServer:
+    responses = None
+    if args.gemini_responses:
+        with open(args.gemini_responses) as f:
+            responses = json.load(f)
+    return FakeGeminiServer(
+        port=port,
+        latency=args.gemini_latency,
+        error_rate=args.gemini_error_rate,
+        rate_limit_rate=args.gemini_429_rate,
+        responses=responses,
+        ms_per_token=args.gemini_ms_per_token,
+        junk_rate=args.gemini_junk_rate,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--port", type=int, default=8765)
+    add_arguments(parser)
+    args = parser.parse_args()
+
+    server = from_arguments(args, args.port)
+    print(f"Fake Gemini listening on {server.url}", file=sys.stderr)
+    try:
+        server._server.serve_forever()
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
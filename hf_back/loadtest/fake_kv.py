@@ -0,0 +1,263 @@
+"""
+Fake KV Server
+Local stand-in for a Redis server so the shared cache backend runs without one
+
+Speaks the subset of the Redis protocol that utils/cache_backend.RedisCache
+uses (GET, SET with PX/EX/NX, DEL, INCRBY, PEXPIRE, SCAN, INFO, DBSIZE,
+FLUSHDB, PING, AUTH, SELECT, and EVAL of its compare-and-delete script), keeping entries in one LRU bounded by
+--max-bytes, as a server with maxmemory-policy allkeys-lru would. Point the
+backend at it with:
+    CACHE_BACKEND=redis CACHE_URL=redis://127.0.0.1:6390/0
+
+Usage (from hf_back/):
+    python -m loadtest.fake_kv --port 6390 --max-bytes 67108864 [--latency-ms 0.5]
+"""
+
+import argparse
+import fnmatch
+import socket
+import socketserver
+import sys
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from utils.cache_backend import DELETE_IF_EQUAL_SCRIPT
+
+
+class FakeKVServer:
+    """Threaded TCP server imitating a single-database Redis"""
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 6390,
+        max_bytes: int = 64 * 1024 * 1024,
+        latency_ms: float = 0.0,
+    ):
+        """
+        Initialize fake server
+
+        Args:
+            host: Interface to bind
+            port: Port to bind (0 picks a free port)
+            max_bytes: Budget for keys plus values; least recently used
+                entries are evicted past it
+            latency_ms: Delay added to every reply, for a network round trip
+        """
+        self.max_bytes = max_bytes
+        self.latency = latency_ms / 1000
+        self.size = 0
+        self.counts: Dict[str, int] = {"evicted_keys": 0}
+        self._entries: "OrderedDict[bytes, Tuple[bytes, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        self._server = socketserver.ThreadingTCPServer((host, port), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"redis://{host}:{port}/0"
+
+    # ------------------------------------------------------------------
+    # Store (all under self._lock)
+    # ------------------------------------------------------------------
+
+    def _live(self, key: bytes) -> Optional[bytes]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry[1] and entry[1] < time.time():
+            self._remove(key)
+            return None
+        self._entries.move_to_end(key)
+        return entry[0]
+
+    def _store(self, key: bytes, value: bytes, expires_at: float):
+        self._remove(key)
+        self._entries[key] = (value, expires_at)
+        self.size += len(key) + len(value)
+        while self.size > self.max_bytes and len(self._entries) > 1:
+            self._remove(next(iter(self._entries)))
+            self.counts["evicted_keys"] += 1
+
+    def _remove(self, key: bytes) -> bool:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return False
+        self.size -= len(key) + len(entry[0])
+        return True
+
+    def execute(self, args: List[bytes]) -> Any:
+        """Run one command; returns the reply, or an Exception for an error reply"""
+        name = args[0].decode().upper()
+        with self._lock:
+            self.counts[name] = self.counts.get(name, 0) + 1
+            if name in ("PING", "AUTH", "SELECT"):
+                return "PONG" if name == "PING" else "OK"
+            if name == "GET":
+                return self._live(args[1])
+            if name == "SET":
+                return self._set(args)
+            if name == "DEL":
+                return sum(self._remove(key) for key in args[1:])
+            if name == "EVAL":
+                # No Lua here; only the script RedisCache.delete_if sends
+                if args[1].decode() != DELETE_IF_EQUAL_SCRIPT or args[2] != b"1":
+                    return ValueError("ERR only RedisCache.delete_if's script is supported")
+                if self._live(args[3]) != args[4]:
+                    return 0
+                return int(self._remove(args[3]))
+            if name == "INCRBY":
+                current = self._live(args[1])
+                expires_at = self._entries[args[1]][1] if current is not None else 0.0
+                try:
+                    total = int(current or 0) + int(args[2])
+                except ValueError:
+                    return ValueError("ERR value is not an integer or out of range")
+                self._store(args[1], str(total).encode(), expires_at)
+                return total
+            if name == "PEXPIRE":
+                value = self._live(args[1])
+                if value is None:
+                    return 0
+                self._entries[args[1]] = (value, time.time() + int(args[2]) / 1000)
+                return 1
+            if name == "SCAN":
+                # One pass returns everything, with cursor 0
+                options = {
+                    args[i].decode().upper(): args[i + 1] for i in range(2, len(args) - 1, 2)
+                }
+                pattern = options.get("MATCH", b"*").decode()
+                keys = [
+                    key
+                    for key in list(self._entries)
+                    if self._live(key) is not None
+                    and fnmatch.fnmatchcase(key.decode(), pattern)
+                ]
+                return [b"0", keys]
+            if name == "DBSIZE":
+                return len(self._entries)
+            if name == "FLUSHDB":
+                self._entries.clear()
+                self.size = 0
+                return "OK"
+            if name == "INFO":
+                info = (
+                    f"# Memory\r\nused_memory:{self.size}\r\n"
+                    f"maxmemory:{self.max_bytes}\r\n"
+                    f"evicted_keys:{self.counts['evicted_keys']}\r\n"
+                )
+                return info.encode()
+        return ValueError(f"ERR unknown command '{name}'")
+
+    def _set(self, args: List[bytes]) -> Any:
+        expires_at, only_new = 0.0, False
+        i = 3
+        while i < len(args):
+            option = args[i].decode().upper()
+            if option == "NX":
+                only_new = True
+            elif option in ("PX", "EX"):
+                i += 1
+                scale = 1000 if option == "PX" else 1
+                expires_at = time.time() + int(args[i]) / scale
+            i += 1
+        if only_new and self._live(args[1]) is not None:
+            return None
+        self._store(args[1], args[2], expires_at)
+        return "OK"
+
+    # ------------------------------------------------------------------
+    # Protocol
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def encode(reply: Any) -> bytes:
+        if reply is None:
+            return b"$-1\r\n"
+        if isinstance(reply, Exception):
+            return f"-{reply}\r\n".encode()
+        if isinstance(reply, str):
+            return f"+{reply}\r\n".encode()
+        if isinstance(reply, int):
+            return b":%d\r\n" % reply
+        if isinstance(reply, bytes):
+            return b"$%d\r\n%s\r\n" % (len(reply), reply)
+        return b"*%d\r\n" % len(reply) + b"".join(FakeKVServer.encode(r) for r in reply)
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def setup(self):
+                super().setup()
+                self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+            def _read_command(self) -> Optional[List[bytes]]:
+                line = self.rfile.readline()
+                if not line:
+                    return None
+                if not line.startswith(b"*"):
+                    # Inline command, as sent by redis-cli and telnet
+                    return line.split()
+                args = []
+                for _ in range(int(line[1:])):
+                    length = int(self.rfile.readline()[1:])
+                    args.append(self.rfile.read(length + 2)[:-2])
+                return args
+
+            def handle(self):
+                while True:
+                    try:
+                        args = self._read_command()
+                    except (OSError, ValueError):
+                        return
+                    if not args:
+                        return
+                    reply = server.execute(args)
+                    if server.latency:
+                        time.sleep(server.latency)
+                    try:
+                        self.wfile.write(server.encode(reply))
+                        self.wfile.flush()
+                    except OSError:
+                        return
+
+        return Handler
+
+    def start(self) -> "FakeKVServer":
+        """Serve on a background thread"""
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, name="fake-kv", daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--port", type=int, default=6390)
+    parser.add_argument("--max-bytes", type=int, default=64 * 1024 * 1024)
+    parser.add_argument(
+        "--latency-ms", type=float, default=0.0, help="Delay added to every reply"
+    )
+    args = parser.parse_args()
+
+    server = FakeKVServer(port=args.port, max_bytes=args.max_bytes, latency_ms=args.latency_ms)
+    print(f"Fake KV listening on {server.url}", file=sys.stderr)
+    try:
+        server._server.serve_forever()
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
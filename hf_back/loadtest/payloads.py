@@ -0,0 +1,162 @@
+"""
+Load-Test Payloads
+Realistic, randomly sized request bodies for every route
+"""
+
+import random
+from typing import Any, Callable, Dict, List, Tuple
+
+WORDS = (
+    "built designed migrated optimized automated scaled refactored launched "
+    "api pipeline dashboard service platform billing search checkout cache "
+    "postgres kafka react python kubernetes latency throughput reliability"
+).split()
+
+
+def _sentence(rng: random.Random, low: int = 6, high: int = 18) -> str:
+    words = rng.choices(WORDS, k=rng.randint(low, high))
+    return " ".join(words).capitalize()
+
+
+def _paragraph(rng: random.Random, sentences: int) -> str:
+    return ". ".join(_sentence(rng) for _ in range(sentences)) + "."
+
+
+def _experience(rng: random.Random, jobs: int, bullets: int) -> List[Dict]:
+    return [
+        {
+            "title": rng.choice(["Software Engineer", "Data Engineer", "Tech Lead"]),
+            "company": f"Company {i}",
+            "location": "Remote",
+            "start_date": f"Jan {2015 + i}",
+            "end_date": "Present" if i == 0 else f"Dec {2016 + i}",
+            "responsibilities": [_sentence(rng) for _ in range(bullets)],
+        }
+        for i in range(jobs)
+    ]
+
+
+def _projects(rng: random.Random, count: int) -> List[Dict]:
+    return [
+        {
+            "name": f"Project {i}",
+            "description": _paragraph(rng, rng.randint(1, 3)),
+            "technologies": rng.sample(WORDS[12:], 3),
+        }
+        for i in range(count)
+    ]
+
+
+def resume(rng: random.Random, ai: bool) -> Dict[str, Any]:
+    return {
+        "personal_info": {"name": "Load Test", "email": "load@example.com"},
+        "summary": _paragraph(rng, 2),
+        "experience": _experience(rng, rng.randint(1, 4), rng.randint(2, 6)),
+        "education": [{"degree": "BSc", "field": "CS", "school": "State U"}],
+        "skills": rng.sample(WORDS, rng.randint(5, 15)),
+        "projects": _projects(rng, rng.randint(0, 3)),
+        "enhance_with_ai": ai,
+    }
+
+
+def cover_letter(rng: random.Random, ai: bool) -> Dict[str, Any]:
+    payload = {
+        "name": "Load Test",
+        "company": "Acme",
+        "position": "Engineer",
+        "skills": rng.sample(WORDS, 5),
+        "experience": _sentence(rng),
+        "generate_with_ai": ai,
+    }
+    if not ai:
+        payload["custom_content"] = "\n\n".join(
+            _paragraph(rng, 4) for _ in range(3)
+        )
+    return payload
+
+
+def proposal(rng: random.Random, ai: bool) -> Dict[str, Any]:
+    return {
+        "client_name": "Acme",
+        "project_title": "Platform Rebuild",
+        "scope": _paragraph(rng, 3),
+        "deliverables": [_sentence(rng, 2, 5) for _ in range(rng.randint(2, 6))],
+        "timeline": "3 months",
+        "budget": "$50,000",
+        "generate_with_ai": ai,
+    }
+
+
+def invoice(rng: random.Random, ai: bool) -> Dict[str, Any]:
+    # Mostly small invoices with a long tail of large ones
+    count = rng.choice([3, 5, 10, 20, 50, 200])
+    return {
+        "invoice_number": f"INV-{rng.randint(1, 99999)}",
+        "from_info": {"name": "Vero Ltd", "email": "billing@example.com"},
+        "to_info": {"name": "Acme"},
+        "items": [
+            {
+                "description": _sentence(rng, 2, 6),
+                "quantity": rng.randint(1, 10),
+                "rate": round(rng.uniform(10, 500), 2),
+            }
+            for _ in range(count)
+        ],
+        "tax_rate": 8.5,
+    }
+
+
+def contract(rng: random.Random, ai: bool) -> Dict[str, Any]:
+    payload = {
+        "contract_type": rng.choice(["Freelance Service Agreement", "NDA"]),
+        "party1": {"name": "Provider"},
+        "party2": {"name": "Client"},
+        "effective_date": "January 20, 2024",
+        "custom_terms": _sentence(rng) if rng.random() < 0.5 else "",
+        "generate_with_ai": ai,
+    }
+    if not ai:
+        payload["custom_content"] = _paragraph(rng, 8)
+    return payload
+
+
+def portfolio(rng: random.Random, ai: bool) -> Dict[str, Any]:
+    return {
+        "name": "Load Test",
+        "title": "Engineer",
+        "bio": _paragraph(rng, 3),
+        "skills": {"Languages": rng.sample(WORDS, 4), "Tools": rng.sample(WORDS, 4)},
+        "experience": _experience(rng, rng.randint(1, 3), rng.randint(2, 4)),
+        "projects": _projects(rng, rng.randint(1, 4)),
+        "enhance_with_ai": ai,
+    }
+
+
+def enhance_description(rng: random.Random, ai: bool) -> Dict[str, Any]:
+    return {
+        "text": _sentence(rng),
+        "context": rng.choice(["resume", "portfolio", "general"]),
+        "role": "Software Engineer",
+    }
+
+
+def skills_summary(rng: random.Random, ai: bool) -> Dict[str, Any]:
+    return {"skills": rng.sample(WORDS, rng.randint(3, 12)), "experience_years": 5}
+
+
+# Scenario name -> (route, payload builder, uses AI, default weight)
+SCENARIOS: Dict[str, Tuple[str, Callable, bool, float]] = {
+    "resume": ("/generate-resume", resume, False, 10),
+    "resume_ai": ("/generate-resume", resume, True, 10),
+    "cover_letter": ("/generate-cover-letter", cover_letter, False, 3),
+    "cover_letter_ai": ("/generate-cover-letter", cover_letter, True, 7),
+    "proposal": ("/generate-proposal", proposal, False, 2),
+    "proposal_ai": ("/generate-proposal", proposal, True, 5),
+    "invoice": ("/generate-invoice", invoice, False, 20),
+    "contract": ("/generate-contract", contract, False, 2),
+    "contract_ai": ("/generate-contract", contract, True, 5),
+    "portfolio": ("/generate-portfolio-pdf", portfolio, False, 6),
+    "portfolio_ai": ("/generate-portfolio-pdf", portfolio, True, 4),
+    "enhance_description": ("/enhance-description", enhance_description, True, 20),
+    "skills_summary": ("/enhance-skills-summary", skills_summary, True, 6),
+}
@@ -0,0 +1,338 @@
+"""
+Load-Test Runner
+Drives a weighted mix of every /generate-* and /enhance-* route and
+reports throughput plus p50/p95/p99 latency per scenario
+
+Results are written as JSON to loadtest/results/ so runs can be compared
+over time with --compare.
+
+Usage (from hf_back/):
+    # Start a fake Gemini and gunicorn locally, then run for 60s
+    python -m loadtest.run --spawn --duration 60 --concurrency 16
+
+    # Against an already running service
+    python -m loadtest.run --base-url http://localhost:7860 --requests 500
+
+    # Only invoices and AI resumes, compared with an earlier run
+    python -m loadtest.run --spawn --mix invoice=3,resume_ai=1 \\
+        --compare loadtest/results/20240101-120000.json
+"""
+
+import argparse
+import json
+import os
+import random
+import signal
+import subprocess
+import sys
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+import requests
+
+from loadtest import fake_gemini
+from loadtest.payloads import SCENARIOS
+
+HF_BACK = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(HF_BACK, "loadtest", "results")
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(pct / 100 * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+
+def parse_mix(spec: Optional[str]) -> Dict[str, float]:
+    """Parse 'name=weight,...' into scenario weights (defaults if empty)"""
+    if not spec:
+        return {name: scenario[3] for name, scenario in SCENARIOS.items()}
+    weights = {}
+    for part in spec.split(","):
+        name, _, weight = part.partition("=")
+        if name not in SCENARIOS:
+            raise SystemExit(f"Unknown scenario '{name}', choose from {list(SCENARIOS)}")
+        weights[name] = float(weight or 1)
+    return weights
+
+
+class LoadTest:
+    """Closed-loop load generator: each worker thread sends one request at a time"""
+
+    def __init__(
+        self,
+        base_url: str,
+        weights: Dict[str, float],
+        concurrency: int,
+        duration: Optional[float],
+        total_requests: Optional[int],
+        seed: int,
+        timeout: float,
+    ):
+        self.base_url = base_url.rstrip("/")
+        self.names = list(weights)
+        self.weights = [weights[name] for name in self.names]
+        self.concurrency = concurrency
+        self.duration = duration
+        self.total_requests = total_requests
+        self.seed = seed
+        self.timeout = timeout
+
+        self.samples: Dict[str, List[Dict[str, Any]]] = {name: [] for name in self.names}
+        self._issued = 0
+        self._lock = threading.Lock()
+
+    def _next_ticket(self) -> bool:
+        with self._lock:
+            if self.total_requests is not None and self._issued >= self.total_requests:
+                return False
+            self._issued += 1
+            return True
+
+    def _worker(self, index: int, deadline: float):
+        rng = random.Random(self.seed + index)
+        session = requests.Session()
+        while time.time() < deadline and self._next_ticket():
+            name = rng.choices(self.names, weights=self.weights)[0]
+            route, build, ai, _ = SCENARIOS[name]
+            payload = build(rng, ai)
+
+            started = time.perf_counter()
+            try:
+                response = session.post(
+                    f"{self.base_url}{route}", json=payload, timeout=self.timeout
+                )
+                status = response.status_code
+                size = len(response.content)
+                degraded = response.headers.get("X-Degraded") is not None
+            except requests.RequestException as e:
+                status, size, degraded = f"error:{type(e).__name__}", 0, False
+            elapsed = time.perf_counter() - started
+
+            with self._lock:
+                self.samples[name].append(
+                    {
+                        "status": status,
+                        "latency": elapsed,
+                        "bytes": size,
+                        "degraded": degraded,
+                    }
+                )
+
+    def run(self) -> Dict[str, Any]:
+        deadline = time.time() + (self.duration or 10**9)
+        started = time.perf_counter()
+        threads = [
+            threading.Thread(target=self._worker, args=(i, deadline), daemon=True)
+            for i in range(self.concurrency)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        wall = time.perf_counter() - started
+
+        scenarios = {
+            name: self._summarize(samples, wall)
+            for name, samples in self.samples.items()
+            if samples
+        }
+        overall = self._summarize(
+            [s for samples in self.samples.values() for s in samples], wall
+        )
+        return {"wall_time_s": round(wall, 2), "overall": overall, "scenarios": scenarios}
+
+    @staticmethod
+    def _summarize(samples: List[Dict[str, Any]], wall: float) -> Dict[str, Any]:
+        ok = sorted(s["latency"] for s in samples if s["status"] == 200)
+        statuses: Dict[str, int] = {}
+        for s in samples:
+            statuses[str(s["status"])] = statuses.get(str(s["status"]), 0) + 1
+        return {
+            "requests": len(samples),
+            "ok": len(ok),
+            "statuses": statuses,
+            "degraded": sum(1 for s in samples if s["degraded"]),
+            "throughput_rps": round(len(ok) / wall, 2) if wall else 0.0,
+            "p50_ms": round(percentile(ok, 50) * 1000, 1),
+            "p95_ms": round(percentile(ok, 95) * 1000, 1),
+            "p99_ms": round(percentile(ok, 99) * 1000, 1),
+            "mean_ms": round(sum(ok) / len(ok) * 1000, 1) if ok else 0.0,
+            "mean_bytes": (
+                round(sum(s["bytes"] for s in samples) / len(samples)) if samples else 0
+            ),
+        }
+
+
+def spawn_service(args) -> Dict[str, Any]:
+    """Start a fake Gemini and a gunicorn instance pointed at it"""
+    gemini = fake_gemini.from_arguments(args, port=0).start()
+
+    env = dict(os.environ)
+    env.setdefault("GEMINI_API_KEY", "loadtest")
+    env.update({"GEMINI_API_ENDPOINT": gemini.url, "PORT": str(args.port)})
+
+    log_path = os.path.join("/tmp", f"loadtest_gunicorn_{args.port}.log")
+    log = open(log_path, "w")
+    server = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "app:app"],
+        cwd=HF_BACK,
+        env=env,
+        stdout=log,
+        stderr=subprocess.STDOUT,
+    )
+
+    base_url = f"http://127.0.0.1:{args.port}"
+    deadline = time.time() + 120
+    while time.time() < deadline:
+        if server.poll() is not None:
+            raise SystemExit(f"gunicorn exited early, see {log_path}")
+        try:
+            if requests.get(f"{base_url}/health", timeout=2).json().get("ready"):
+                break
+        except requests.RequestException:
+            pass
+        time.sleep(0.5)
+    else:
+        raise SystemExit(f"service not ready after 120s, see {log_path}")
+
+    print(f"Spawned service at {base_url} (fake Gemini {gemini.url})", file=sys.stderr)
+    return {"gemini": gemini, "server": server, "log": log, "base_url": base_url}
+
+
+def stop_service(spawned: Dict[str, Any]):
+    spawned["server"].send_signal(signal.SIGTERM)
+    spawned["server"].wait(timeout=30)
+    spawned["log"].close()
+    spawned["gemini"].stop()
+
+
+def print_report(result: Dict[str, Any], baseline: Optional[Dict[str, Any]] = None):
+    header = f"{'scenario':<22} {'reqs':>6} {'ok':>6} {'rps':>7} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}"
+    print(header)
+    print("-" * len(header))
+    rows = list(result["scenarios"].items()) + [("OVERALL", result["overall"])]
+    for name, stats in rows:
+        line = (
+            f"{name:<22} {stats['requests']:>6} {stats['ok']:>6} "
+            f"{stats['throughput_rps']:>7.2f} {stats['p50_ms']:>9.1f} "
+            f"{stats['p95_ms']:>9.1f} {stats['p99_ms']:>9.1f}"
+        )
+        base = None
+        if baseline:
+            base = (
+                baseline["overall"]
+                if name == "OVERALL"
+                else baseline["scenarios"].get(name)
+            )
+        if base and base["p99_ms"]:
+            delta = (stats["p99_ms"] - base["p99_ms"]) / base["p99_ms"] * 100
+            line += f"   p99 {delta:+.1f}% vs baseline"
+        print(line)
+
+    non_ok = {
+        status: count
+        for status, count in result["overall"]["statuses"].items()
+        if status != "200"
+    }
+    if non_ok:
+        print(f"\nNon-200 responses: {non_ok}")
+    if result["overall"]["degraded"]:
+        print(f"Degraded (AI skipped): {result['overall']['degraded']}")
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=HF_BACK,
+            capture_output=True,
+            text=True,
+        ).stdout.strip()
+    except OSError:
+        return ""
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument("--base-url", help="Run against an existing service")
+    target.add_argument(
+        "--spawn", action="store_true", help="Start fake Gemini + gunicorn locally"
+    )
+    parser.add_argument("--port", type=int, default=7880, help="Port for --spawn")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--duration", type=float, help="Seconds to run")
+    parser.add_argument("--requests", type=int, help="Total requests to send")
+    parser.add_argument("--mix", help="Scenario weights, e.g. invoice=3,resume_ai=1")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--timeout", type=float, default=130)
+    parser.add_argument("--label", default="", help="Free-form note saved with results")
+    parser.add_argument("--out", default=RESULTS_DIR)
+    parser.add_argument("--compare", help="Earlier result JSON to compare against")
+    fake_gemini.add_arguments(parser)
+    args = parser.parse_args()
+
+    if args.duration is None and args.requests is None:
+        args.duration = 30
+
+    spawned = spawn_service(args) if args.spawn else None
+    base_url = spawned["base_url"] if spawned else args.base_url
+
+    try:
+        test = LoadTest(
+            base_url,
+            parse_mix(args.mix),
+            args.concurrency,
+            args.duration,
+            args.requests,
+            args.seed,
+            args.timeout,
+        )
+        result = test.run()
+        if spawned:
+            result["fake_gemini_counts"] = spawned["gemini"].counts
+            result["service_metrics"] = requests.get(f"{base_url}/metrics").json()
+    finally:
+        if spawned:
+            stop_service(spawned)
+
+    result.update(
+        {
+            "label": args.label,
+            "started_at": datetime.now().isoformat(),
+            "git_commit": git_commit(),
+            "config": {
+                "base_url": base_url,
+                "spawned": bool(spawned),
+                "concurrency": args.concurrency,
+                "duration": args.duration,
+                "requests": args.requests,
+                "mix": parse_mix(args.mix),
+                "seed": args.seed,
+                "gemini_latency": args.gemini_latency if spawned else None,
+                "gemini_error_rate": args.gemini_error_rate if spawned else None,
+                "gemini_429_rate": args.gemini_429_rate if spawned else None,
+            },
+        }
+    )
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+    print_report(result, baseline)
+
+    os.makedirs(args.out, exist_ok=True)
+    path = os.path.join(args.out, f"{datetime.now().strftime('%Y%m%d-%H%M%S')}.json")
+    with open(path, "w") as f:
+        json.dump(result, f, indent=2)
+    print(f"\nResults saved to {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""
+Cache Backend Tests
+The memory, file and redis backends behave alike
+
+Run (from hf_back/):
+    python -m pytest tests
+"""
+
+import io
+import os
+import time
+import uuid
+
+import pytest
+
+from loadtest.fake_kv import FakeKVServer
+from utils.cache_backend import FileCache, MemoryCache, RedisCache
+from utils.idempotency import IdempotencyStore
+
+
+@pytest.fixture(scope="module")
+def kv_server():
+    server = FakeKVServer(port=0).start()
+    yield server
+    server.stop()
+
+
+@pytest.fixture(params=["memory", "file", "redis"])
+def backend(request, tmp_path, kv_server):
+    if request.param == "memory":
+        return MemoryCache(1024 * 1024)
+    if request.param == "file":
+        return FileCache(str(tmp_path), 1024 * 1024)
+    # Each test gets its own keys on the shared server
+    return RedisCache(kv_server.url, prefix=f"{uuid.uuid4().hex}:")
+
+
+def test_get_set_delete(backend):
+    assert backend.get("a") is None
+    backend.set("a", b"1")
+    assert backend.get("a") == b"1"
+    backend.set("a", b"2")
+    assert backend.get("a") == b"2"
+    backend.delete("a")
+    assert backend.get("a") is None
+    backend.delete("a")
+
+
+def test_ttl_expires(backend):
+    backend.set("a", b"1", ttl=0.05)
+    backend.set("b", b"1")
+    time.sleep(0.1)
+    assert backend.get("a") is None
+    assert backend.get("b") == b"1"
+
+
+def test_add_only_when_absent(backend):
+    assert backend.add("claim", b"mine", ttl=0.05)
+    assert not backend.add("claim", b"theirs")
+    assert backend.get("claim") == b"mine"
+    time.sleep(0.1)
+    # An expired value no longer blocks it
+    assert backend.add("claim", b"theirs")
+
+
+def test_incr(backend):
+    assert backend.incr("n") == 1
+    assert backend.incr("n", 5) == 6
+    assert backend.get("n") == b"6"
+
+
+def test_delete_if_only_deletes_the_expected_value(backend):
+    backend.set("claim", b"mine")
+    assert not backend.delete_if("claim", b"theirs")
+    assert backend.get("claim") == b"mine"
+    assert backend.delete_if("claim", b"mine")
+    assert backend.get("claim") is None
+    assert not backend.delete_if("claim", b"mine")
+
+
+def test_keys_by_prefix(backend):
+    backend.set("w1:a", b"1")
+    backend.set("w1:b", b"1")
+    backend.set("w2:a", b"1")
+    assert sorted(backend.keys("w1:")) == ["w1:a", "w1:b"]
+
+
+def test_set_stream(backend):
+    chunks = [os.urandom(1000) for _ in range(50)]
+    backend.set_stream("doc", iter(chunks), 50 * 1000)
+    assert backend.get("doc") == b"".join(chunks)
+
+
+def test_memory_cache_evicts_least_recently_used():
+    cache = MemoryCache(300)
+    for name in "abc":
+        cache.set(name, b"x" * 90)
+    cache.get("a")
+    cache.set("d", b"x" * 90)
+    assert cache.get("b") is None
+    assert cache.get("a") is not None
+
+
+def test_file_cache_evicts_down_to_budget(tmp_path):
+    cache = FileCache(str(tmp_path), 10_000)
+    for i in range(20):
+        cache.set(f"k{i}", b"x" * 1000)
+    assert cache.size() <= 10_000
+    assert cache.get("k19") is not None
+    assert cache.get("k0") is None
+
+
+def test_file_cache_is_shared_by_workers(tmp_path):
+    first, second = FileCache(str(tmp_path), 1024 * 1024), FileCache(str(tmp_path), 1024 * 1024)
+    first.set("a", b"1")
+    assert second.get("a") == b"1"
+    assert not second.add("a", b"2")
+    assert second.incr("n") == 1 and first.incr("n") == 2
+
+
+def test_large_results_do_not_evict_claims(tmp_path):
+    store = IdempotencyStore(
+        backend=FileCache(str(tmp_path / "results"), 100_000),
+        claims=FileCache(str(tmp_path / "claims"), 100_000),
+    )
+    assert store.begin("acme", "running", "fp")[0] == "run"
+    for i in range(10):
+        _, claim = store.begin("acme", f"done-{i}", "fp")
+        store.complete(claim, 200, [], io.BytesIO(b"x" * 40_000))
+    assert store.begin("acme", "running", "fp") == ("busy", None)
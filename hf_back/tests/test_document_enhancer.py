@@ -0,0 +1,80 @@
+"""
+Document Enhancer Tests
+Rewritten paragraphs keep their formatting; mixed-format ones are left alone
+
+Run (from hf_back/):
+    python -m pytest tests
+"""
+
+import io
+
+from docx import Document
+from docx.oxml import OxmlElement
+from docx.oxml.ns import qn
+
+from utils.document_enhancer import DocumentEnhancer
+
+LONG = "This paragraph is long enough for the enhancer to rewrite it, "
+
+
+class UpperCaseClient:
+    """Stands in for GeminiClient: the 'enhanced' text is upper case"""
+
+    def enhance_document_chunk(self, texts, doc_type, instructions):
+        return [text.upper() for text in texts]
+
+
+def upload(doc) -> io.BytesIO:
+    buffer = io.BytesIO()
+    doc.save(buffer)
+    buffer.seek(0)
+    return buffer
+
+
+def enhanced(doc) -> Document:
+    enhancer = DocumentEnhancer(UpperCaseClient(), max_parallel=1)
+    source = enhancer.parse(upload(doc), ".docx")
+    enhancer.enhance(source)
+    return Document(enhancer.save(source))
+
+
+def test_uniformly_formatted_paragraph_keeps_its_format():
+    doc = Document()
+    paragraph = doc.add_paragraph()
+    for text in (LONG, "written in two italic runs."):
+        paragraph.add_run(text).italic = True
+
+    result = enhanced(doc).paragraphs[0]
+    assert result.text == (LONG + "written in two italic runs.").upper()
+    assert [run.italic for run in result.runs] == [True]
+
+
+def test_mixed_format_paragraph_is_left_unchanged():
+    doc = Document()
+    paragraph = doc.add_paragraph(LONG + "with ")
+    paragraph.add_run("bold").bold = True
+    paragraph.add_run(" and ")
+    paragraph.add_run("italic").italic = True
+    paragraph.add_run(" words.")
+    doc.add_paragraph(LONG + "in plain text.")
+
+    result = enhanced(doc).paragraphs
+    assert result[0].text == LONG + "with bold and italic words."
+    assert [(run.text, run.bold, run.italic) for run in result[0].runs][1:4] == [
+        ("bold", True, None),
+        (" and ", None, None),
+        ("italic", None, True),
+    ]
+    assert result[1].text == (LONG + "in plain text.").upper()
+
+
+def test_language_tags_do_not_count_as_formatting():
+    doc = Document()
+    paragraph = doc.add_paragraph(LONG)
+    tagged = paragraph.add_run("spell-checked in another language.")
+    lang = OxmlElement("w:lang")
+    lang.set(qn("w:val"), "en-GB")
+    tagged._r.get_or_add_rPr().append(lang)
+
+    result = enhanced(doc).paragraphs[0]
+    assert result.text == (LONG + "spell-checked in another language.").upper()
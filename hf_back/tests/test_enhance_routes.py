@@ -0,0 +1,53 @@
+"""
+Enhance Route Tests
+Enhance routes answer from the rules when the AI tier misses its deadline
+
+Run (from hf_back/):
+    python -m pytest tests
+"""
+
+import os
+import threading
+
+import pytest
+
+
+@pytest.fixture
+def client(monkeypatch):
+    os.environ.setdefault("GEMINI_API_KEY", "test")
+    import app
+
+    # Every Gemini call outlives the request's deadline
+    released = threading.Event()
+
+    def stalled(*args, **kwargs):
+        released.wait(5)
+        return "late"
+
+    for method in ("generate_skills_summary", "improve_text_quality"):
+        monkeypatch.setattr(app.gemini_client, method, stalled)
+    yield app.app.test_client()
+    released.set()
+
+
+def test_skills_summary_falls_back_to_rules_at_deadline(client):
+    response = client.post(
+        "/enhance-skills-summary",
+        json={"skills": ["Python", "SQL"], "experience_years": 4, "enhancer": "ai"},
+        headers={"X-Deadline-Ms": "600"},
+    )
+    assert response.status_code == 200
+    body = response.get_json()
+    assert body["enhancer"] == "rules"
+    assert body["summary"].startswith("Skilled professional with 4+ years of experience")
+
+
+def test_description_keeps_its_text_at_deadline(client):
+    response = client.post(
+        "/enhance-description",
+        json={"text": "fixed bugs", "enhancer": "ai"},
+        headers={"X-Deadline-Ms": "600"},
+    )
+    assert response.status_code == 200
+    body = response.get_json()
+    assert (body["enhanced"], body["enhancer"]) == ("fixed bugs", "none")
@@ -0,0 +1,137 @@
+"""
+Idempotency Tests
+Each Idempotency-Key runs once; retries replay it, duplicates are turned away
+
+Run (from hf_back/):
+    python -m pytest tests
+"""
+
+import io
+import os
+import threading
+import uuid
+
+import pytest
+
+from utils.cache_backend import MemoryCache
+from utils.idempotency import IdempotencyStore
+
+INVOICE = {"items": [{"description": "Consulting", "quantity": 2, "rate": 125, "amount": 250}]}
+
+
+@pytest.fixture
+def store():
+    return IdempotencyStore(backend=MemoryCache(1024 * 1024), claims=MemoryCache(64 * 1024))
+
+
+@pytest.fixture
+def client(store, monkeypatch):
+    os.environ.setdefault("GEMINI_API_KEY", "test")
+    import app
+
+    monkeypatch.setattr(app, "idempotency_store", store)
+    return app.app.test_client()
+
+
+def post_invoice(client, key, body=INVOICE):
+    return client.post("/generate-invoice", json=body, headers={"Idempotency-Key": key})
+
+
+# ----------------------------------------------------------------------
+# Store
+# ----------------------------------------------------------------------
+
+
+def test_completed_key_replays(store):
+    outcome, claim = store.begin("acme", "k1", "fp")
+    assert outcome == "run"
+    store.complete(claim, 201, [("X-Test", "1")], io.BytesIO(b"document"))
+
+    outcome, (meta, body) = store.begin("acme", "k1", "fp")
+    assert outcome == "replay"
+    assert (meta["status"], meta["headers"], body.read()) == (201, [["X-Test", "1"]], b"document")
+
+
+def test_keys_are_per_tenant(store):
+    _, claim = store.begin("acme", "k1", "fp")
+    store.complete(claim, 200, [], io.BytesIO(b"acme's"))
+    assert store.begin("other", "k1", "fp")[0] == "run"
+
+
+def test_key_reused_for_another_request_mismatches(store):
+    _, claim = store.begin("acme", "k1", "fp")
+    store.complete(claim, 200, [], io.BytesIO(b"document"))
+    assert store.begin("acme", "k1", "other-fp") == ("mismatch", None)
+
+
+def test_abandoned_key_runs_again(store):
+    _, claim = store.begin("acme", "k1", "fp")
+    store.abandon(claim)
+    assert store.begin("acme", "k1", "fp")[0] == "run"
+
+
+def test_oversized_response_is_not_stored(store):
+    store.max_bytes = 4
+    _, claim = store.begin("acme", "k1", "fp")
+    store.complete(claim, 200, [], io.BytesIO(b"too large"))
+    assert store.begin("acme", "k1", "fp")[0] == "run"
+
+
+def test_concurrent_duplicates_run_once(store):
+    start = threading.Barrier(8)
+    outcomes = []
+
+    def attempt():
+        start.wait()
+        outcomes.append(store.begin("acme", "k1", "fp")[0])
+
+    threads = [threading.Thread(target=attempt) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert sorted(outcomes) == ["busy"] * 7 + ["run"]
+
+
+def test_expired_claim_is_not_released_by_its_old_holder(store):
+    _, stale = store.begin("acme", "k1", "fp")
+    # The claim expired and another request took the key over
+    store.claims.delete(f"claim:{stale.digest}")
+    assert store.begin("acme", "k1", "fp")[0] == "run"
+    store.abandon(stale)
+    assert store.begin("acme", "k1", "fp") == ("busy", None)
+
+
+# ----------------------------------------------------------------------
+# Routes
+# ----------------------------------------------------------------------
+
+
+def test_retry_replays_the_first_response(client):
+    key = uuid.uuid4().hex
+    first = post_invoice(client, key)
+    retry = post_invoice(client, key)
+    assert first.status_code == retry.status_code == 200
+    assert "Idempotent-Replayed" not in first.headers
+    assert retry.headers["Idempotent-Replayed"] == "true"
+    assert retry.data == first.data
+
+
+def test_key_reused_with_another_body_is_422(client):
+    key = uuid.uuid4().hex
+    assert post_invoice(client, key).status_code == 200
+    other = {"items": [{"description": "Other", "quantity": 1, "rate": 5, "amount": 5}]}
+    assert post_invoice(client, key, other).status_code == 422
+
+
+def test_duplicate_of_running_key_is_409(client, store):
+    key = uuid.uuid4().hex
+    # A request in another worker is running the key
+    store.begin("127.0.0.1", key, "fp")
+    response = post_invoice(client, key)
+    assert response.status_code == 409
+    assert int(response.headers["Retry-After"]) >= 1
+
+
+def test_invalid_key_is_400(client):
+    assert post_invoice(client, "bad key").status_code == 400
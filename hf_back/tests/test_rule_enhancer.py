@@ -0,0 +1,56 @@
+"""
+Rule Enhancer Tests
+Resume bullet rewrites must keep the bullet's meaning
+
+Run (from hf_back/):
+    python -m pytest tests
+"""
+
+import pytest
+
+from utils.rule_enhancer import RuleEnhancer
+
+
+@pytest.mark.parametrize(
+    "bullet, expected",
+    [
+        # An opening with no verb after it becomes "managed", not nothing
+        ("was responsible for the budget", "Managed the budget."),
+        ("tasked with the migration", "Managed the migration."),
+        ("I was responsible for hiring", "Managed hiring."),
+        # ...and is dropped before a verb
+        ("responsible for managing a team of 5 engineers", "Managed a team of 5 engineers."),
+        ("tasked with migrating the db", "Migrated the db."),
+        # Only the bullet's own first word is upgraded
+        ("Running tests for backend", "Ran tests for backend."),
+        ("made dashboards for the sales team", "Created dashboards for the sales team."),
+        # Statements about the writer keep their subject
+        ("I am a team player", "I am a team player."),
+        ("I'm a team player", "I'm a team player."),
+        ("I built the billing API", "Built the billing API."),
+        # A base-form verb is converted when it takes an object
+        ("Lead the payments team", "Led the payments team."),
+        ("Manage 5 engineers", "Managed 5 engineers."),
+    ],
+)
+def test_enhance_resume_description(bullet, expected):
+    assert RuleEnhancer().enhance_resume_description(bullet) == expected
+
+
+@pytest.mark.parametrize(
+    "bullet",
+    [
+        # Noun phrases whose first word can also be a verb
+        "Lead engineer on payments team",
+        "Research assistant in the NLP lab",
+        "Teaching assistant for CS101",
+        "Design system owner",
+        "Test automation with pytest",
+        "Process improvements saved 20%",
+        "Used car sales associate",
+        # No stronger claim than the bullet makes
+        "Worked on the billing API",
+    ],
+)
+def test_enhance_resume_description_keeps_noun_phrases(bullet):
+    assert RuleEnhancer().enhance_resume_description(bullet) == bullet + "."
@@ -0,0 +1,127 @@
+"""
+Tenant Quota Tests
+Who a request is accounted to, and per-window AI budgets
+
+Run (from hf_back/):
+    python -m pytest tests
+"""
+
+import time
+import uuid
+
+import pytest
+
+from utils.cache_backend import MemoryCache
+from utils.tenant_quota import QuotaExceeded, TenantQuota
+
+PROXY = "10.0.0.2"
+CLIENT = "203.0.113.7"
+
+
+@pytest.fixture
+def quota():
+    return TenantQuota(
+        backend=MemoryCache(1024 * 1024),
+        window=3600,
+        call_budget=3,
+        token_budget=0,
+        overrides={"acme": {"calls": 10}},
+        api_keys={"acme-key": "acme"},
+        trusted_proxies={PROXY},
+    )
+
+
+def test_configured_key_names_the_tenant(quota):
+    assert quota.tenant_for("acme-key", None, CLIENT) == "acme"
+    # The key wins over a header, even from a trusted proxy
+    assert quota.tenant_for("acme-key", "other", PROXY) == "acme"
+    assert quota.budget("acme")["calls"] == 10
+
+
+def test_tenant_header_only_from_trusted_proxy(quota):
+    assert quota.tenant_for(None, "other", PROXY) == "other"
+    assert quota.tenant_for(None, "other", CLIENT) == CLIENT
+    assert quota.tenant_for(None, None, None) == "anonymous"
+
+
+def test_unknown_keys_are_ignored(quota):
+    assert quota.tenant_for("made-up", None, CLIENT) == CLIENT
+    assert quota.tenant_for("made-up", "other", PROXY) == "other"
+
+
+def test_rotating_keys_does_not_reset_the_budget(quota):
+    for _ in range(3):
+        quota.record(quota.tenant_for(uuid.uuid4().hex, None, CLIENT))
+    fresh = quota.tenant_for(uuid.uuid4().hex, None, CLIENT)
+    assert quota.usage(fresh)["calls"] == 3
+    assert quota.over_budget(fresh)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Frozen time.time(), at the start of a window; advance with clock[0] += seconds"""
+    now = [3600.0 * 500000]
+    monkeypatch.setattr(time, "time", lambda: now[0])
+    return now
+
+
+def test_call_budget_is_enforced(quota, clock):
+    for _ in range(2):
+        quota.record(CLIENT)
+        quota.check(CLIENT)
+    quota.record(CLIENT)
+    with pytest.raises(QuotaExceeded):
+        quota.check(CLIENT)
+    # Other tenants keep their own budget
+    quota.check("other")
+
+
+def test_token_budget_is_enforced(clock):
+    quota = TenantQuota(
+        backend=MemoryCache(1024 * 1024),
+        window=60,
+        call_budget=0,
+        token_budget=1000,
+        api_keys={},
+        trusted_proxies=set(),
+    )
+    quota.record(CLIENT, tokens=999)
+    assert not quota.over_budget(CLIENT)
+    quota.record(CLIENT, tokens=1)
+    assert quota.over_budget(CLIENT)
+
+
+def test_override_raises_a_tenants_budget(quota, clock):
+    for _ in range(3):
+        quota.record("acme")
+    assert not quota.over_budget("acme")
+    assert quota.usage("acme")["calls"] == 3
+
+
+def test_budget_refills_in_the_next_window(quota, clock):
+    for _ in range(3):
+        quota.record(CLIENT)
+    assert quota.over_budget(CLIENT)
+    clock[0] += 3599
+    assert quota.over_budget(CLIENT)
+    assert quota.retry_after() == 2
+    clock[0] += 1
+    assert not quota.over_budget(CLIENT)
+    assert quota.usage(CLIENT) == {"calls": 0, "tokens": 0}
+
+
+def test_reset_clears_the_current_window(quota, clock):
+    for _ in range(3):
+        quota.record(CLIENT)
+    quota.reset(CLIENT)
+    assert not quota.over_budget(CLIENT)
+
+
+def test_report_lists_active_tenants(quota, clock):
+    quota.record("acme", tokens=40)
+    quota.record(CLIENT)
+    report = quota.report()["tenants"]
+    assert report["acme"]["calls"] == 1
+    assert report["acme"]["tokens"] == 40
+    assert report["acme"]["budget"] == {"calls": 10, "tokens": 0}
+    assert set(report) == {"acme", CLIENT}
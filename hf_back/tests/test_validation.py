@@ -0,0 +1,71 @@
+"""
+Validation Tests
+Malformed payloads get a 400 naming the problem, never a 500
+
+Run (from hf_back/):
+    python -m pytest tests
+"""
+
+import os
+
+import pytest
+
+JSON_ROUTES = [
+    "/generate-resume",
+    "/generate-cover-letter",
+    "/generate-proposal",
+    "/generate-invoice",
+    "/generate-contract",
+    "/generate-portfolio-pdf",
+    "/enhance-description",
+    "/enhance-skills-summary",
+]
+
+
+@pytest.fixture(scope="module")
+def client():
+    os.environ.setdefault("GEMINI_API_KEY", "test")
+    import app
+
+    return app.app.test_client()
+
+
+@pytest.mark.parametrize("route", JSON_ROUTES)
+@pytest.mark.parametrize("body", [[{"items": []}], "text", 42])
+def test_non_object_body_is_400(client, route, body):
+    response = client.post(route, json=body)
+    assert response.status_code == 400
+    assert response.get_json()["error"] == "Invalid payload: expected object"
+
+
+def test_null_optional_numbers_fall_back_to_defaults(client):
+    invoice = {
+        "items": [{"description": "Consulting", "quantity": None, "rate": 100, "amount": None}],
+        "tax_rate": None,
+        "discount": None,
+    }
+    assert client.post("/generate-invoice", json=invoice).status_code == 200
+    resume = {"personal_info": {"name": "Ada"}, "years_experience": None}
+    assert client.post("/generate-resume", json=resume).status_code == 200
+    summary = {"skills": ["Python"], "experience_years": None, "enhancer": "rules"}
+    assert client.post("/enhance-skills-summary", json=summary).status_code == 200
+
+
+def test_numbers_are_still_type_checked(client):
+    resume = {"personal_info": {"name": "Ada"}, "years_experience": "five"}
+    response = client.post("/generate-resume", json=resume)
+    assert response.status_code == 400
+    assert response.get_json()["error"] == "Invalid years_experience: expected number or null"
+
+
+@pytest.mark.parametrize(
+    "route, body, error",
+    [
+        ("/enhance-description", {"text": ""}, "Invalid text: must have at least 1 characters"),
+        ("/enhance-skills-summary", {"skills": []}, "Invalid skills: must have at least 1 entries"),
+    ],
+)
+def test_minimum_size_messages(client, route, body, error):
+    response = client.post(route, json=body)
+    assert response.status_code == 400
+    assert response.get_json()["error"] == error
@@ -0,0 +1,132 @@
+"""
+AI Jobs Utility
+Run a request's enhancement calls against its deadline and keep what finished in time
+"""
+
+import os
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional
+
+from utils.ai_scheduler import in_context
+from utils.cancellation import DeadlineExceeded, RequestCancelled, current_cancel_token
+
+# Result of a job that failed or was skipped at the deadline
+_SKIPPED = object()
+
+
+@dataclass
+class AIJob:
+    """One enhancement: target[key] = func(*args) when the call finishes in time"""
+
+    target: Any
+    key: Any
+    func: Callable
+    args: tuple = ()
+    # Called with the same args when the job is skipped or fails; its
+    # result replaces the original value unless it is None
+    fallback: Optional[Callable] = None
+
+
+class AIJobRunner:
+    """Runs enhancement jobs, concurrently when the request has an AI deadline"""
+
+    def __init__(self, max_workers: Optional[int] = None):
+        """
+        Initialize job runner
+
+        Args:
+            max_workers: Threads running deadline-bounded jobs (AI_JOB_THREADS);
+                Gemini concurrency itself is bounded by the AI scheduler
+        """
+        self.max_workers = max_workers or int(os.getenv("AI_JOB_THREADS", "16"))
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    @property
+    def pool(self) -> ThreadPoolExecutor:
+        """Job thread pool, started on first use so it is never forked"""
+        if self._pool is None:
+            with self._lock:
+                if self._pool is None:
+                    self._pool = ThreadPoolExecutor(
+                        max_workers=self.max_workers, thread_name_prefix="ai-job"
+                    )
+        return self._pool
+
+    def reset(self):
+        """Drop the pool inherited from the parent process (after fork)"""
+        self._pool = None
+
+    def run(self, jobs: List[AIJob]) -> Dict[str, int]:
+        """
+        Run jobs and write each result over its original value
+
+        Without a deadline on the current request, jobs run one after
+        another in this thread. With one, they run concurrently and the
+        wait ends at the deadline: unfinished jobs are skipped (their
+        original value or fallback is kept) and late results are discarded.
+
+        Returns:
+            Counts of items, enhanced items and skipped items
+
+        Raises:
+            RequestCancelled: If the client disconnected
+        """
+        cancel_token = current_cancel_token()
+        if cancel_token.deadline is None:
+            results = []
+            for job in jobs:
+                cancel_token.raise_if_cancelled()
+                results.append(self._call(job))
+        else:
+            futures = [self.pool.submit(in_context(self._call), job) for job in jobs]
+            wait(futures, timeout=cancel_token.remaining())
+            for future in futures:
+                # Jobs not yet started never run; running ones stop at
+                # their next Gemini call
+                future.cancel()
+            cancel_token.raise_if_cancelled()
+            results = [
+                future.result() if future.done() and not future.cancelled() else _SKIPPED
+                for future in futures
+            ]
+
+        enhanced = 0
+        for job, result in zip(jobs, results):
+            if result is not _SKIPPED:
+                job.target[job.key] = result
+                enhanced += 1
+            elif job.fallback:
+                fallback = job.fallback(*job.args)
+                if fallback is not None:
+                    job.target[job.key] = fallback
+        return {"items": len(jobs), "enhanced": enhanced, "skipped": len(jobs) - enhanced}
+
+    @staticmethod
+    def _call(job: AIJob) -> Any:
+        """Run one job; _SKIPPED if it failed or the deadline passed first"""
+        try:
+            current_cancel_token().raise_if_stopped()
+            return job.func(*job.args)
+        except RequestCancelled:
+            raise
+        except DeadlineExceeded:
+            return _SKIPPED
+        except Exception as e:
+            print(f"Enhancement failed, keeping original: {str(e)}", file=sys.stderr)
+            return _SKIPPED
+
+
+# Singleton instance
+_ai_job_runner = None
+
+
+def get_ai_job_runner() -> AIJobRunner:
+    """Get or create AIJobRunner singleton"""
+    global _ai_job_runner
+    if _ai_job_runner is None:
+        _ai_job_runner = AIJobRunner()
+    return _ai_job_runner
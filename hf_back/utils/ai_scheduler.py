@@ -0,0 +1,270 @@
+"""
+AI Scheduler Utility
+Priority and weighted fair queuing of Gemini calls across tenants and request types
+"""
+
+import contextvars
+import heapq
+import itertools
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+from utils.cancellation import CancelToken
+
+# Priority classes and their share of Gemini call slots under contention
+#   interactive - a user waiting on a button (enhance-description, skills summary)
+#   standard    - one document generated per request
+#   bulk        - many calls per request (resume bullets, document uploads)
+PRIORITY_WEIGHTS = {"interactive": 16, "standard": 4, "bulk": 1}
+DEFAULT_PRIORITY = "standard"
+
+# Priority class, tenant and request type of the calls made by this request
+_call_context: contextvars.ContextVar = contextvars.ContextVar(
+    "ai_call_context", default=(DEFAULT_PRIORITY, "anonymous", "generic")
+)
+
+
+def set_call_context(priority: str, tenant: str, request_type: str):
+    """
+    Attribute the Gemini calls made from this context
+
+    Returns:
+        Token for reset_call_context
+    """
+    return _call_context.set((priority, tenant, request_type))
+
+
+def reset_call_context(token):
+    """Restore the call context replaced by set_call_context"""
+    _call_context.reset(token)
+
+
+def current_call_context() -> Tuple[str, str, str]:
+    """(priority, tenant, request type) of the calls made from this context"""
+    return _call_context.get()
+
+
+def in_context(func: Callable) -> Callable:
+    """Wrap func to run in a copy of the caller's context, for executor threads"""
+    context = contextvars.copy_context()
+    return lambda *args, **kwargs: context.run(func, *args, **kwargs)
+
+
+class _Waiter:
+    __slots__ = ("priority", "flow", "queued_at", "granted", "dropped", "event")
+
+    def __init__(self, priority: str, flow: Tuple[str, str, str]):
+        self.priority = priority
+        self.flow = flow
+        self.queued_at = time.perf_counter()
+        self.granted = False
+        self.dropped = False
+        self.event = threading.Event()
+
+    @property
+    def waiting(self) -> bool:
+        return not (self.granted or self.dropped)
+
+
+class AIScheduler:
+    """Grant a bounded number of concurrent Gemini calls, fairest first"""
+
+    def __init__(
+        self,
+        concurrency: Optional[int] = None,
+        max_wait_ms: Optional[float] = None,
+        weights: Optional[Dict[str, int]] = None,
+    ):
+        """
+        Initialize scheduler
+
+        Args:
+            concurrency: Concurrent Gemini calls per worker (GEMINI_MAX_CONCURRENT)
+            max_wait_ms: Queue wait after which a call is served next
+                regardless of weight, so bulk work cannot starve
+                (GEMINI_SCHEDULER_MAX_WAIT_MS)
+            weights: Share of slots per priority class (PRIORITY_WEIGHTS)
+        """
+        self.concurrency = concurrency or int(os.getenv("GEMINI_MAX_CONCURRENT", "6"))
+        self.max_wait = (
+            max_wait_ms
+            if max_wait_ms is not None
+            else float(os.getenv("GEMINI_SCHEDULER_MAX_WAIT_MS", "10000"))
+        ) / 1000
+        self.weights = weights or PRIORITY_WEIGHTS
+
+        self.in_flight = 0
+        # Weighted fair queuing: each call gets a virtual finish tag one
+        # weight-scaled step after its flow's previous call (or now, if the
+        # flow was idle); the smallest tag is served first
+        self._virtual_time = 0.0
+        self._flow_finish: Dict[Tuple[str, str, str], float] = {}
+        self._heap: List[Tuple[float, int, _Waiter]] = []
+        # Arrival order, for starvation protection
+        self._arrivals: Deque[_Waiter] = deque()
+        self._seq = itertools.count()
+        self._lock = threading.Lock()
+
+        self._classes: Dict[str, Dict[str, Any]] = {}
+
+    def _class(self, priority: str) -> Dict[str, Any]:
+        stats = self._classes.get(priority)
+        if stats is None:
+            stats = self._classes[priority] = {
+                "served": 0,
+                "queued": 0,
+                "aged": 0,
+                "dropped": 0,
+                "waits": deque(maxlen=1000),
+            }
+        return stats
+
+    def acquire(self, cancel_token: Optional[CancelToken] = None) -> _Waiter:
+        """
+        Wait for a call slot on behalf of the current call context
+
+        Args:
+            cancel_token: Leave the queue if this request is cancelled or
+                its AI deadline passes
+
+        Returns:
+            Handle to pass to release()
+
+        Raises:
+            RequestCancelled: If cancelled while queued
+            DeadlineExceeded: If the deadline passed while queued
+        """
+        priority, tenant, request_type = _call_context.get()
+        if priority not in self.weights:
+            priority = DEFAULT_PRIORITY
+        waiter = _Waiter(priority, (priority, tenant, request_type))
+
+        with self._lock:
+            start = max(self._virtual_time, self._flow_finish.get(waiter.flow, 0.0))
+            finish = start + 1.0 / self.weights[priority]
+            self._flow_finish[waiter.flow] = finish
+            heapq.heappush(self._heap, (finish, next(self._seq), waiter))
+            self._arrivals.append(waiter)
+            self._dispatch()
+            if not waiter.granted:
+                self._class(priority)["queued"] += 1
+
+        if cancel_token is None:
+            waiter.event.wait()
+            return waiter
+        while not waiter.event.wait(self._poll_interval(cancel_token)):
+            if cancel_token.cancelled or cancel_token.expired:
+                with self._lock:
+                    if not waiter.granted:
+                        # Dropped calls are skipped lazily by _dispatch
+                        waiter.dropped = True
+                        self._class(priority)["dropped"] += 1
+                        cancel_token.raise_if_stopped()
+        return waiter
+
+    @staticmethod
+    def _poll_interval(cancel_token: CancelToken) -> float:
+        """Wake for the next socket probe, or at the deadline if sooner"""
+        remaining = cancel_token.remaining()
+        if remaining is None:
+            return cancel_token.probe_interval
+        return max(0.001, min(cancel_token.probe_interval, remaining))
+
+    def release(self, waiter: _Waiter):
+        """Return a slot and hand it to the next waiter, if any"""
+        with self._lock:
+            self.in_flight -= 1
+            self._dispatch()
+
+    @contextmanager
+    def slot(self, cancel_token: Optional[CancelToken] = None):
+        """Hold a call slot for the duration of a with block"""
+        waiter = self.acquire(cancel_token)
+        try:
+            yield
+        finally:
+            self.release(waiter)
+
+    def _grant(self, waiter: _Waiter, aged: bool = False):
+        """Record and wake a waiter that now holds a slot (lock held)"""
+        waiter.granted = True
+        stats = self._class(waiter.priority)
+        stats["served"] += 1
+        stats["waits"].append(time.perf_counter() - waiter.queued_at)
+        if aged:
+            stats["aged"] += 1
+        waiter.event.set()
+
+    def _dispatch(self):
+        """Fill free slots from the queues (lock held)"""
+        while self.in_flight < self.concurrency:
+            while self._arrivals and not self._arrivals[0].waiting:
+                self._arrivals.popleft()
+            while self._heap and not self._heap[0][2].waiting:
+                heapq.heappop(self._heap)
+            if not self._heap:
+                # Idle: forget per-flow history so returning flows start fresh
+                self._flow_finish.clear()
+                return
+
+            oldest = self._arrivals[0]
+            if time.perf_counter() - oldest.queued_at > self.max_wait:
+                # Starvation protection: overdue calls go first, oldest first
+                waiter, aged = self._arrivals.popleft(), True
+            else:
+                finish, _, waiter = heapq.heappop(self._heap)
+                self._virtual_time = finish
+                aged = False
+
+            self.in_flight += 1
+            self._grant(waiter, aged)
+
+    def stats(self) -> Dict[str, Any]:
+        """Queue depth and queue wait percentiles per priority class"""
+        with self._lock:
+            waiting: Dict[str, int] = {}
+            for _, _, waiter in self._heap:
+                if waiter.waiting:
+                    waiting[waiter.priority] = waiting.get(waiter.priority, 0) + 1
+            classes = {}
+            for priority, stats in self._classes.items():
+                waits = sorted(stats["waits"])
+                classes[priority] = {
+                    "weight": self.weights.get(priority),
+                    "waiting": waiting.get(priority, 0),
+                    "served": stats["served"],
+                    "queued": stats["queued"],
+                    "aged": stats["aged"],
+                    "dropped": stats["dropped"],
+                    "wait_ms_p50": _ms(waits, 0.5),
+                    "wait_ms_p95": _ms(waits, 0.95),
+                    "wait_ms_max": round(waits[-1] * 1000, 2) if waits else 0.0,
+                }
+            return {
+                "concurrency": self.concurrency,
+                "in_flight": self.in_flight,
+                "max_wait_ms": self.max_wait * 1000,
+                "classes": classes,
+            }
+
+
+def _ms(ordered: List[float], fraction: float) -> float:
+    if not ordered:
+        return 0.0
+    return round(ordered[min(len(ordered) - 1, int(len(ordered) * fraction))] * 1000, 2)
+
+
+# Singleton instance
+_ai_scheduler = None
+
+
+def get_ai_scheduler() -> AIScheduler:
+    """Get or create AIScheduler singleton"""
+    global _ai_scheduler
+    if _ai_scheduler is None:
+        _ai_scheduler = AIScheduler()
+    return _ai_scheduler
@@ -0,0 +1,146 @@
+"""
+Bulkhead Utility
+Per-endpoint-class concurrency pools so slow AI calls cannot starve renders
+"""
+
+import os
+import threading
+import time
+from collections import deque
+from typing import Any, Dict
+
+# Endpoint classes and their defaults: (concurrent, queued, queue timeout s)
+#   render   - document rendering only, never calls Gemini
+#   ai_light - a single short Gemini call (enhance-description, skills summary)
+#   ai_heavy - long or repeated Gemini calls followed by a render
+BULKHEAD_DEFAULTS = {
+    "render": (4, 4, 10.0),
+    "ai_light": (2, 2, 5.0),
+    "ai_heavy": (2, 2, 5.0),
+}
+
+
+class Bulkhead:
+    """Bounded concurrency pool with a bounded, timed wait queue"""
+
+    def __init__(self, name: str, limit: int, max_queue: int, queue_timeout: float):
+        """
+        Initialize bulkhead
+
+        Args:
+            name: Endpoint class name
+            limit: Requests allowed to run concurrently
+            max_queue: Requests allowed to wait for a slot
+            queue_timeout: Seconds a request may wait before being rejected
+        """
+        self.name = name
+        self.limit = limit
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+
+        self.in_flight = 0
+        self.waiting = 0
+        self.max_waiting = 0
+        self.admitted = 0
+        self.rejected_full = 0
+        self.rejected_timeout = 0
+        self._wait_ms = deque(maxlen=500)
+        self._cond = threading.Condition()
+
+    def acquire(self) -> bool:
+        """
+        Take a slot, waiting up to queue_timeout if the pool is busy
+
+        Returns:
+            True if admitted (caller must release()), False if rejected
+        """
+        started = time.perf_counter()
+        with self._cond:
+            if self.in_flight < self.limit:
+                self.in_flight += 1
+                self.admitted += 1
+                self._wait_ms.append(0.0)
+                return True
+
+            if self.waiting >= self.max_queue:
+                self.rejected_full += 1
+                return False
+
+            self.waiting += 1
+            self.max_waiting = max(self.max_waiting, self.waiting)
+            deadline = started + self.queue_timeout
+            try:
+                while self.in_flight >= self.limit:
+                    remaining = deadline - time.perf_counter()
+                    if remaining <= 0:
+                        self.rejected_timeout += 1
+                        return False
+                    self._cond.wait(remaining)
+
+                self.in_flight += 1
+                self.admitted += 1
+                self._wait_ms.append((time.perf_counter() - started) * 1000)
+                return True
+            finally:
+                self.waiting -= 1
+
+    def release(self):
+        """Return a slot taken by acquire()"""
+        with self._cond:
+            self.in_flight -= 1
+            self._cond.notify()
+
+    def stats(self) -> Dict[str, Any]:
+        """Current queue depth and admission counters"""
+        with self._cond:
+            waits = sorted(self._wait_ms)
+            return {
+                "limit": self.limit,
+                "max_queue": self.max_queue,
+                "in_flight": self.in_flight,
+                "queue_depth": self.waiting,
+                "max_queue_depth": self.max_waiting,
+                "admitted": self.admitted,
+                "rejected_full": self.rejected_full,
+                "rejected_timeout": self.rejected_timeout,
+                "wait_ms_p50": round(waits[len(waits) // 2], 2) if waits else 0.0,
+                "wait_ms_p99": (
+                    round(waits[int(len(waits) * 0.99)], 2) if waits else 0.0
+                ),
+            }
+
+
+def _setting(name: str, key: str, default: Any) -> Any:
+    """Read BULKHEAD_<CLASS>_<KEY> from env"""
+    return type(default)(os.getenv(f"BULKHEAD_{name.upper()}_{key}", default))
+
+
+def thread_budget() -> int:
+    """
+    Threads per worker needed so every class can hit its limit and queue
+    at the same time, leaving render capacity untouched by AI traffic
+    """
+    return sum(
+        _setting(name, "LIMIT", limit) + _setting(name, "QUEUE", queue)
+        for name, (limit, queue, _) in BULKHEAD_DEFAULTS.items()
+    )
+
+
+# Singleton instance
+_bulkheads = None
+
+
+def get_bulkheads() -> Dict[str, Bulkhead]:
+    """Get or create the per-class Bulkhead singletons"""
+    global _bulkheads
+    if _bulkheads is None:
+        _bulkheads = {
+            name: Bulkhead(
+                name,
+                _setting(name, "LIMIT", limit),
+                _setting(name, "QUEUE", queue),
+                _setting(name, "TIMEOUT", timeout),
+            )
+            for name, (limit, queue, timeout) in BULKHEAD_DEFAULTS.items()
+        }
+    return _bulkheads
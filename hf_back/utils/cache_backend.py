@@ -0,0 +1,770 @@
+"""
+Cache Backend Utility
+Pluggable byte caches: in-process LRU, file store shared by local workers, network KV
+"""
+
+import fcntl
+import hashlib
+import os
+import secrets
+import socket
+import struct
+import sys
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Tuple
+from urllib.parse import urlparse
+
+# Backend for caches created without an explicit kind: memory, file or redis
+CACHE_BACKEND = os.getenv("CACHE_BACKEND", "file")
+
+
+class CacheUnavailable(Exception):
+    """Raised when a shared backend cannot be reached for an operation that must not guess"""
+
+
+class CacheBackend:
+    """
+    Byte values by string key, with optional TTL and a size budget
+
+    get/set/delete are best effort: a backend that cannot be reached
+    counts an error and behaves like a miss. add, incr and keys back
+    claims and counters, so they raise CacheUnavailable instead;
+    delete_if, which releases claims, leaves them to expire.
+    """
+
+    kind = "base"
+
+    def __init__(self):
+        self.counters = {"hits": 0, "misses": 0, "sets": 0, "evictions": 0, "errors": 0}
+        self._counter_lock = threading.Lock()
+
+    def _count(self, key: str, amount: int = 1):
+        with self._counter_lock:
+            self.counters[key] += amount
+
+    def get(self, key: str) -> Optional[bytes]:
+        """Value for key, or None if missing or expired"""
+        raise NotImplementedError
+
+    def set(self, key: str, value: bytes, ttl: Optional[float] = None):
+        """Store value under key for ttl seconds (None: until evicted)"""
+        raise NotImplementedError
+
+    def set_stream(
+        self, key: str, chunks: Iterable[bytes], size: int, ttl: Optional[float] = None
+    ):
+        """
+        Store the concatenation of chunks (size bytes in all) under key
+
+        Backends that can write a value piece by piece never hold all of
+        it; this default joins the chunks and calls set().
+        """
+        self.set(key, b"".join(chunks), ttl)
+
+    def add(self, key: str, value: bytes, ttl: Optional[float] = None) -> bool:
+        """Store value only if key is absent; True if stored"""
+        raise NotImplementedError
+
+    def incr(self, key: str, amount: int = 1, ttl: Optional[float] = None) -> int:
+        """Add amount to an integer value (missing counts as 0); ttl applies on creation"""
+        raise NotImplementedError
+
+    def delete(self, key: str):
+        raise NotImplementedError
+
+    def delete_if(self, key: str, value: bytes) -> bool:
+        """Delete key only if it still holds value, in one atomic step; True if deleted"""
+        raise NotImplementedError
+
+    def keys(self, prefix: str = "") -> List[str]:
+        """Live keys starting with prefix (slow on large stores; for reporting)"""
+        raise NotImplementedError
+
+    def stats(self) -> Dict[str, Any]:
+        with self._counter_lock:
+            counters = dict(self.counters)
+        lookups = counters["hits"] + counters["misses"]
+        counters["hit_rate"] = round(counters["hits"] / lookups, 4) if lookups else 0.0
+        return {"kind": self.kind, **counters}
+
+
+def _expiry(ttl: Optional[float]) -> float:
+    return time.time() + ttl if ttl else 0.0
+
+
+# ============================================================================
+# IN-PROCESS LRU
+# ============================================================================
+
+
+class MemoryCache(CacheBackend):
+    """LRU dict bounded by bytes; private to one process"""
+
+    kind = "memory"
+
+    def __init__(self, max_bytes: int):
+        """
+        Initialize memory cache
+
+        Args:
+            max_bytes: Budget for keys plus values
+        """
+        super().__init__()
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._entries: "OrderedDict[str, Tuple[bytes, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _live(self, key: str) -> Optional[bytes]:
+        """Value if present and unexpired, refreshing its LRU position (lock held)"""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        value, expires_at = entry
+        if expires_at and expires_at < time.time():
+            self._remove(key)
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def _store(self, key: str, value: bytes, expires_at: float):
+        """Insert and evict down to budget (lock held)"""
+        self._remove(key)
+        size = len(key) + len(value)
+        if size > self.max_bytes:
+            return
+        self._entries[key] = (value, expires_at)
+        self.size += size
+        while self.size > self.max_bytes:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self._count("evictions")
+
+    def _remove(self, key: str):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.size -= len(key) + len(entry[0])
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            value = self._live(key)
+        self._count("hits" if value is not None else "misses")
+        return value
+
+    def set(self, key: str, value: bytes, ttl: Optional[float] = None):
+        with self._lock:
+            self._store(key, value, _expiry(ttl))
+        self._count("sets")
+
+    def add(self, key: str, value: bytes, ttl: Optional[float] = None) -> bool:
+        with self._lock:
+            if self._live(key) is not None:
+                return False
+            self._store(key, value, _expiry(ttl))
+        self._count("sets")
+        return True
+
+    def incr(self, key: str, amount: int = 1, ttl: Optional[float] = None) -> int:
+        with self._lock:
+            current = self._live(key)
+            expires_at = self._entries[key][1] if current is not None else _expiry(ttl)
+            total = int(current or 0) + amount
+            self._store(key, str(total).encode(), expires_at)
+        return total
+
+    def delete(self, key: str):
+        with self._lock:
+            self._remove(key)
+
+    def delete_if(self, key: str, value: bytes) -> bool:
+        with self._lock:
+            if self._live(key) != value:
+                return False
+            self._remove(key)
+        return True
+
+    def keys(self, prefix: str = "") -> List[str]:
+        now = time.time()
+        with self._lock:
+            return [
+                key
+                for key, (_, expires_at) in self._entries.items()
+                if key.startswith(prefix) and not (expires_at and expires_at < now)
+            ]
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            usage = {"entries": len(self._entries), "bytes": self.size}
+        return {**super().stats(), **usage, "max_bytes": self.max_bytes}
+
+
+# ============================================================================
+# FILE STORE SHARED BY LOCAL WORKERS
+# ============================================================================
+
+# Entry file: expiry (unix time, 0 = none), key length, key, value
+_ENTRY_HEADER = struct.Struct("<dH")
+_LEDGER = struct.Struct("<q")
+
+
+class FileCache(CacheBackend):
+    """
+    Cache in a directory every worker on the host can use
+
+    Layout under root:
+        ab/<sha256(key)>  one file per entry, replaced atomically
+        .locks/<0..63>    flock stripes serializing writers of a key
+        .ledger           total entry bytes, updated under its flock
+        .evict            held by the one process evicting
+
+    Readers take no lock. When the ledger exceeds max_bytes, one process
+    drops expired entries and then the least recently used (by mtime,
+    which get() refreshes) until the store is under 90% of the budget.
+    """
+
+    kind = "file"
+    STRIPES = 64
+
+    def __init__(self, root: str, max_bytes: int):
+        """
+        Initialize file cache
+
+        Args:
+            root: Store directory
+            max_bytes: Disk budget for entry files
+        """
+        super().__init__()
+        self.root = root
+        self.max_bytes = max_bytes
+        self._locks_dir = os.path.join(root, ".locks")
+        os.makedirs(self._locks_dir, exist_ok=True)
+        # flock does not exclude threads sharing a descriptor, so each
+        # stripe also has a thread lock; descriptors are reopened after fork
+        self._thread_locks = {name: threading.Lock() for name in self._lock_names()}
+        self._fds: Dict[str, int] = {}
+        self._fds_pid = os.getpid()
+
+    def _lock_names(self) -> List[str]:
+        return [str(i) for i in range(self.STRIPES)] + ["ledger", "evict"]
+
+    def _path(self, key: str) -> Tuple[str, str]:
+        digest = hashlib.sha256(key.encode()).hexdigest()
+        return os.path.join(self.root, digest[:2], digest), digest
+
+    def _fd(self, name: str) -> int:
+        if self._fds_pid != os.getpid():
+            self._fds, self._fds_pid = {}, os.getpid()
+        fd = self._fds.get(name)
+        if fd is None:
+            fd = self._fds[name] = os.open(
+                os.path.join(self._locks_dir, name), os.O_RDWR | os.O_CREAT, 0o644
+            )
+        return fd
+
+    @contextmanager
+    def _locked(self, name: str):
+        with self._thread_locks[name]:
+            fd = self._fd(name)
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            try:
+                yield fd
+            finally:
+                fcntl.flock(fd, fcntl.LOCK_UN)
+
+    def _stripe(self, digest: str) -> str:
+        return str(int(digest[:8], 16) % self.STRIPES)
+
+    @staticmethod
+    def _read(path: str, header_only: bool = False) -> Optional[Tuple[float, str, bytes]]:
+        try:
+            with open(path, "rb") as f:
+                data = f.read(_ENTRY_HEADER.size + 1024) if header_only else f.read()
+        except FileNotFoundError:
+            return None
+        if len(data) < _ENTRY_HEADER.size:
+            return None
+        expires_at, key_length = _ENTRY_HEADER.unpack_from(data)
+        start = _ENTRY_HEADER.size
+        key = data[start : start + key_length].decode()
+        return expires_at, key, data[start + key_length :]
+
+    def _write(self, path: str, key: str, chunks: Iterable[bytes], expires_at: float) -> int:
+        """Atomically replace an entry (stripe lock held); returns the change in bytes"""
+        try:
+            old = os.stat(path).st_size
+        except FileNotFoundError:
+            old = 0
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        encoded = key.encode()
+        temp_path = f"{path}.tmp-{secrets.token_hex(4)}"
+        with open(temp_path, "wb") as f:
+            f.write(_ENTRY_HEADER.pack(expires_at, len(encoded)))
+            f.write(encoded)
+            try:
+                for chunk in chunks:
+                    f.write(chunk)
+            except BaseException:
+                f.close()
+                os.unlink(temp_path)
+                raise
+            size = f.tell()
+        os.replace(temp_path, path)
+        return size - old
+
+    def get(self, key: str) -> Optional[bytes]:
+        path, _ = self._path(key)
+        entry = self._read(path)
+        if entry is None or entry[1] != key or (entry[0] and entry[0] < time.time()):
+            self._count("misses")
+            return None
+        try:
+            # Reads count as use for LRU eviction
+            os.utime(path)
+        except FileNotFoundError:
+            pass
+        self._count("hits")
+        return entry[2]
+
+    def set(self, key: str, value: bytes, ttl: Optional[float] = None):
+        self.set_stream(key, (value,), len(value), ttl)
+
+    def set_stream(
+        self, key: str, chunks: Iterable[bytes], size: int, ttl: Optional[float] = None
+    ):
+        path, digest = self._path(key)
+        try:
+            with self._locked(self._stripe(digest)):
+                delta = self._write(path, key, chunks, _expiry(ttl))
+            self._account(delta)
+        except OSError as e:
+            print(f"File cache write failed: {str(e)}", file=sys.stderr)
+            self._count("errors")
+            return
+        self._count("sets")
+
+    def add(self, key: str, value: bytes, ttl: Optional[float] = None) -> bool:
+        path, digest = self._path(key)
+        try:
+            with self._locked(self._stripe(digest)):
+                entry = self._read(path)
+                if entry is not None and not (entry[0] and entry[0] < time.time()):
+                    return False
+                delta = self._write(path, key, (value,), _expiry(ttl))
+            self._account(delta)
+        except OSError as e:
+            raise CacheUnavailable(str(e)) from e
+        self._count("sets")
+        return True
+
+    def incr(self, key: str, amount: int = 1, ttl: Optional[float] = None) -> int:
+        path, digest = self._path(key)
+        try:
+            with self._locked(self._stripe(digest)):
+                entry = self._read(path)
+                if entry is None or (entry[0] and entry[0] < time.time()):
+                    current, expires_at = 0, _expiry(ttl)
+                else:
+                    current, expires_at = int(entry[2] or 0), entry[0]
+                total = current + amount
+                delta = self._write(path, key, (str(total).encode(),), expires_at)
+            self._account(delta)
+        except (OSError, ValueError) as e:
+            raise CacheUnavailable(str(e)) from e
+        return total
+
+    def delete(self, key: str):
+        path, digest = self._path(key)
+        try:
+            with self._locked(self._stripe(digest)):
+                size = os.stat(path).st_size
+                os.unlink(path)
+            self._account(-size)
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            print(f"File cache delete failed: {str(e)}", file=sys.stderr)
+            self._count("errors")
+
+    def delete_if(self, key: str, value: bytes) -> bool:
+        path, digest = self._path(key)
+        try:
+            with self._locked(self._stripe(digest)):
+                entry = self._read(path)
+                if entry is None or entry[1] != key or entry[2] != value:
+                    return False
+                size = os.stat(path).st_size
+                os.unlink(path)
+            self._account(-size)
+        except OSError as e:
+            print(f"File cache delete failed: {str(e)}", file=sys.stderr)
+            self._count("errors")
+            return False
+        return True
+
+    def _entries(self):
+        """(path, stat) of every entry file"""
+        for shard in os.scandir(self.root):
+            if shard.name.startswith(".") or not shard.is_dir():
+                continue
+            for entry in os.scandir(shard.path):
+                if ".tmp-" in entry.name:
+                    continue
+                try:
+                    yield entry.path, entry.stat()
+                except FileNotFoundError:
+                    continue
+
+    def keys(self, prefix: str = "") -> List[str]:
+        now = time.time()
+        keys = []
+        for path, _ in self._entries():
+            entry = self._read(path, header_only=True)
+            if entry is None or (entry[0] and entry[0] < now):
+                continue
+            if entry[1].startswith(prefix):
+                keys.append(entry[1])
+        return keys
+
+    # ------------------------------------------------------------------
+    # Size accounting and eviction
+    # ------------------------------------------------------------------
+
+    def _account(self, delta: int):
+        """Apply a size change to the shared ledger; evict if over budget"""
+        if not delta:
+            return
+        with self._locked("ledger") as fd:
+            raw = os.pread(fd, _LEDGER.size, 0)
+            total = (_LEDGER.unpack(raw)[0] if len(raw) == _LEDGER.size else 0) + delta
+            os.pwrite(fd, _LEDGER.pack(max(0, total)), 0)
+        if total > self.max_bytes:
+            self.evict()
+
+    def size(self) -> int:
+        """Bytes of entries according to the ledger"""
+        raw = os.pread(self._fd("ledger"), _LEDGER.size, 0)
+        return _LEDGER.unpack(raw)[0] if len(raw) == _LEDGER.size else 0
+
+    def evict(self) -> int:
+        """
+        Drop expired, then least recently used entries until under 90%
+        of the budget; one process at a time (others return at once)
+
+        Returns:
+            Entries removed
+        """
+        with self._thread_locks["evict"]:
+            fd = self._fd("evict")
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                return 0
+            try:
+                return self._evict_locked()
+            finally:
+                fcntl.flock(fd, fcntl.LOCK_UN)
+
+    def _evict_locked(self) -> int:
+        now = time.time()
+        entries = []
+        for path, stat in self._entries():
+            entry = self._read(path, header_only=True)
+            expired = entry is None or bool(entry[0] and entry[0] < now)
+            # Expired entries sort first, then oldest use
+            entries.append((not expired, stat.st_mtime, stat.st_size, path))
+        total = sum(size for _, _, size, _ in entries)
+        target = int(self.max_bytes * 0.9)
+
+        removed = 0
+        for live, _, size, path in sorted(entries):
+            if live and total <= target:
+                break
+            digest = os.path.basename(path)
+            with self._locked(self._stripe(digest)):
+                try:
+                    os.unlink(path)
+                except FileNotFoundError:
+                    continue
+            total -= size
+            removed += 1
+
+        # Resync the ledger with what is actually on disk
+        with self._locked("ledger") as fd:
+            os.pwrite(fd, _LEDGER.pack(total), 0)
+        self._count("evictions", removed)
+        return removed
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            **super().stats(),
+            "root": self.root,
+            "bytes": self.size(),
+            "max_bytes": self.max_bytes,
+        }
+
+
+# ============================================================================
+# NETWORK KV (REDIS PROTOCOL)
+# ============================================================================
+
+
+# Compare-and-delete run on the server, so no other client's SET lands
+# between the GET and the DEL
+DELETE_IF_EQUAL_SCRIPT = (
+    "if redis.call('GET', KEYS[1]) == ARGV[1] then "
+    "return redis.call('DEL', KEYS[1]) else return 0 end"
+)
+
+
+class _Chunks(NamedTuple):
+    """A command argument sent piece by piece (see RedisCache._roundtrip)"""
+
+    size: int
+    chunks: Iterable[bytes]
+
+
+class RedisCache(CacheBackend):
+    """
+    Cache on a Redis-protocol server, shared by every replica
+
+    Speaks the handful of RESP commands it needs over one connection per
+    thread, so no client library is required; loadtest/fake_kv.py is a
+    local stand-in. Size and eviction are the server's (maxmemory).
+    """
+
+    kind = "redis"
+
+    def __init__(self, url: str, prefix: str = "", timeout: float = 1.0):
+        """
+        Initialize Redis cache
+
+        Args:
+            url: redis://[:password@]host[:port][/db]
+            prefix: Prepended to every key (namespace)
+            timeout: Socket timeout in seconds
+        """
+        super().__init__()
+        parsed = urlparse(url)
+        self.host = parsed.hostname or "127.0.0.1"
+        self.port = parsed.port or 6379
+        self.password = parsed.password
+        self.db = int(parsed.path.lstrip("/") or 0)
+        self.prefix = prefix
+        self.timeout = timeout
+        self._local = threading.local()
+
+    # ------------------------------------------------------------------
+    # Protocol
+    # ------------------------------------------------------------------
+
+    def _connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is not None and conn[0] == os.getpid():
+            return conn
+        sock = socket.create_connection((self.host, self.port), timeout=self.timeout)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        conn = self._local.conn = (os.getpid(), sock, sock.makefile("rb"))
+        if self.password:
+            self._roundtrip(conn, "AUTH", self.password)
+        if self.db:
+            self._roundtrip(conn, "SELECT", self.db)
+        return conn
+
+    def _command(self, *args) -> Any:
+        """
+        Send one command and read its reply
+
+        Raises:
+            CacheUnavailable: If the server cannot be reached or errors
+        """
+        try:
+            return self._roundtrip(self._connection(), *args)
+        except (OSError, ValueError) as e:
+            conn = getattr(self._local, "conn", None)
+            self._local.conn = None
+            if conn is not None:
+                conn[1].close()
+            raise CacheUnavailable(str(e)) from e
+
+    def _roundtrip(self, conn, *args) -> Any:
+        sock = conn[1]
+        parts = [f"*{len(args)}\r\n".encode()]
+        for arg in args:
+            if isinstance(arg, _Chunks):
+                # Bulk strings carry their length first, so the pieces can
+                # follow one at a time
+                sock.sendall(b"".join(parts) + b"$%d\r\n" % arg.size)
+                sent = 0
+                for chunk in arg.chunks:
+                    sock.sendall(chunk)
+                    sent += len(chunk)
+                if sent != arg.size:
+                    raise ValueError(f"Sent {sent} of {arg.size} bytes")
+                parts = [b"\r\n"]
+                continue
+            data = arg if isinstance(arg, bytes) else str(arg).encode()
+            parts.append(b"$%d\r\n%s\r\n" % (len(data), data))
+        sock.sendall(b"".join(parts))
+        return self._reply(conn[2])
+
+    def _reply(self, reader) -> Any:
+        line = reader.readline()
+        if not line.endswith(b"\r\n"):
+            raise ValueError("Connection closed")
+        kind, body = line[:1], line[1:-2]
+        if kind == b"+":
+            return body.decode()
+        if kind == b"-":
+            raise ValueError(body.decode())
+        if kind == b":":
+            return int(body)
+        if kind == b"$":
+            length = int(body)
+            if length < 0:
+                return None
+            data = reader.read(length + 2)
+            return data[:-2]
+        if kind == b"*":
+            count = int(body)
+            return None if count < 0 else [self._reply(reader) for _ in range(count)]
+        raise ValueError(f"Unexpected reply {line!r}")
+
+    # ------------------------------------------------------------------
+    # Operations
+    # ------------------------------------------------------------------
+
+    def get(self, key: str) -> Optional[bytes]:
+        try:
+            value = self._command("GET", self.prefix + key)
+        except CacheUnavailable:
+            self._count("errors")
+            value = None
+        self._count("hits" if value is not None else "misses")
+        return value
+
+    def set(self, key: str, value: bytes, ttl: Optional[float] = None):
+        self._set(key, value, ttl)
+
+    def set_stream(
+        self, key: str, chunks: Iterable[bytes], size: int, ttl: Optional[float] = None
+    ):
+        self._set(key, _Chunks(size, chunks), ttl)
+
+    def _set(self, key: str, value: Any, ttl: Optional[float]):
+        args = ["SET", self.prefix + key, value]
+        if ttl:
+            args += ["PX", max(1, int(ttl * 1000))]
+        try:
+            self._command(*args)
+        except CacheUnavailable:
+            self._count("errors")
+            return
+        self._count("sets")
+
+    def add(self, key: str, value: bytes, ttl: Optional[float] = None) -> bool:
+        args = ["SET", self.prefix + key, value, "NX"]
+        if ttl:
+            args += ["PX", max(1, int(ttl * 1000))]
+        stored = self._command(*args) is not None
+        if stored:
+            self._count("sets")
+        return stored
+
+    def incr(self, key: str, amount: int = 1, ttl: Optional[float] = None) -> int:
+        total = self._command("INCRBY", self.prefix + key, amount)
+        if ttl and total == amount:
+            # First increment created the key
+            self._command("PEXPIRE", self.prefix + key, max(1, int(ttl * 1000)))
+        return total
+
+    def delete(self, key: str):
+        try:
+            self._command("DEL", self.prefix + key)
+        except CacheUnavailable:
+            self._count("errors")
+
+    def delete_if(self, key: str, value: bytes) -> bool:
+        try:
+            return bool(
+                self._command("EVAL", DELETE_IF_EQUAL_SCRIPT, 1, self.prefix + key, value)
+            )
+        except CacheUnavailable:
+            self._count("errors")
+            return False
+
+    def keys(self, prefix: str = "") -> List[str]:
+        keys, cursor = [], "0"
+        while True:
+            cursor, batch = self._command(
+                "SCAN", cursor, "MATCH", f"{self.prefix}{prefix}*", "COUNT", 500
+            )
+            keys.extend(key.decode()[len(self.prefix) :] for key in batch)
+            cursor = cursor.decode() if isinstance(cursor, bytes) else cursor
+            if cursor == "0":
+                return keys
+
+    def stats(self) -> Dict[str, Any]:
+        server: Dict[str, Any] = {}
+        try:
+            info = self._command("INFO", "memory").decode()
+            for line in info.splitlines():
+                name, _, value = line.partition(":")
+                if name in ("used_memory", "maxmemory", "evicted_keys"):
+                    server[name] = int(value)
+        except (CacheUnavailable, ValueError):
+            server["unavailable"] = True
+        return {
+            **super().stats(),
+            "address": f"{self.host}:{self.port}/{self.db}",
+            "prefix": self.prefix,
+            "server": server,
+        }
+
+
+# ============================================================================
+# FACTORY
+# ============================================================================
+
+
+def create_cache_backend(
+    namespace: str, kind: Optional[str] = None, max_bytes: Optional[int] = None
+) -> CacheBackend:
+    """
+    Build a backend for one namespace from the CACHE_* settings
+
+    Args:
+        namespace: Cache name; its own directory (file), key prefix
+            (redis) or LRU (memory)
+        kind: "memory", "file" or "redis" (CACHE_BACKEND)
+        max_bytes: Size budget (CACHE_MAX_BYTES; redis uses the server's)
+    """
+    kind = kind or CACHE_BACKEND
+    max_bytes = max_bytes or int(os.getenv("CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+    if kind == "memory":
+        return MemoryCache(max_bytes)
+    if kind == "file":
+        root = os.path.join(os.getenv("CACHE_DIR", "/tmp/vero_cache"), namespace)
+        return FileCache(root, max_bytes)
+    if kind == "redis":
+        url = os.getenv("CACHE_URL", "redis://127.0.0.1:6379/0")
+        return RedisCache(url, prefix=f"{namespace}:")
+    raise ValueError(f"Unknown cache backend: {kind}")
+
+
+# Singleton instances, one per namespace
+_cache_backends: Dict[str, CacheBackend] = {}
+_cache_backends_lock = threading.Lock()
+
+
+def get_cache_backend(namespace: str) -> CacheBackend:
+    """Get or create the CacheBackend for a namespace"""
+    backend = _cache_backends.get(namespace)
+    if backend is None:
+        with _cache_backends_lock:
+            backend = _cache_backends.get(namespace)
+            if backend is None:
+                backend = _cache_backends[namespace] = create_cache_backend(namespace)
+    return backend
@@ -0,0 +1,196 @@
+"""
+Cancellation Utility
+Detect client disconnects and deadlines, and stop a request's remaining AI work
+"""
+
+import contextvars
+import os
+import socket
+import threading
+import time
+from typing import Any, Dict, Optional
+
+# Seconds between socket probes while a request is running
+CANCEL_PROBE_INTERVAL = float(os.getenv("CANCEL_PROBE_INTERVAL", "0.25"))
+
+_PEEK_FLAGS = socket.MSG_PEEK | getattr(socket, "MSG_DONTWAIT", 0)
+
+
+class RequestCancelled(Exception):
+    """Raised when the client that made the request has gone away"""
+
+
+class DeadlineExceeded(Exception):
+    """Raised when a request's AI budget has run out; the document is still rendered"""
+
+
+def socket_closed(sock: Any) -> bool:
+    """
+    True if the peer has closed the connection
+
+    A readable socket with no data is at EOF; pending bytes (a pipelined
+    request) or EAGAIN mean the client is still there.
+    """
+    try:
+        return sock.recv(1, _PEEK_FLAGS) == b""
+    except (BlockingIOError, InterruptedError):
+        return False
+    except ConnectionError:
+        return True
+    except (OSError, ValueError):
+        # TLS sockets reject recv flags; treat as undetectable
+        return False
+
+
+class CancelToken:
+    """Cancellation state of one request, shared with the threads doing its work"""
+
+    def __init__(
+        self,
+        sock: Any = None,
+        probe_interval: float = CANCEL_PROBE_INTERVAL,
+        deadline: Optional[float] = None,
+    ):
+        """
+        Initialize cancel token
+
+        Args:
+            sock: Client socket to watch for disconnects (None: never probes)
+            probe_interval: Minimum seconds between socket probes
+            deadline: time.monotonic() after which no more AI work is started
+                (None: no deadline)
+        """
+        self.sock = sock
+        self.probe_interval = probe_interval
+        self.deadline = deadline
+        self._cancelled = False
+        self._probed_at = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def cancelled(self) -> bool:
+        """Cancelled explicitly or client disconnected (probes are rate limited)"""
+        if self._cancelled or self.sock is None:
+            return self._cancelled
+        now = time.monotonic()
+        if now - self._probed_at >= self.probe_interval:
+            with self._lock:
+                if now - self._probed_at >= self.probe_interval:
+                    self._probed_at = now
+                    if socket_closed(self.sock):
+                        self._cancelled = True
+        return self._cancelled
+
+    @property
+    def expired(self) -> bool:
+        """The AI deadline has passed"""
+        return self.deadline is not None and time.monotonic() >= self.deadline
+
+    def remaining(self) -> Optional[float]:
+        """Seconds left before the AI deadline (None: no deadline)"""
+        if self.deadline is None:
+            return None
+        return max(0.0, self.deadline - time.monotonic())
+
+    def cancel(self):
+        self._cancelled = True
+
+    def raise_if_cancelled(self):
+        """
+        Raises:
+            RequestCancelled: If the request was cancelled
+        """
+        if self.cancelled:
+            raise RequestCancelled("Client disconnected")
+
+    def raise_if_stopped(self):
+        """
+        Check before starting AI work
+
+        Raises:
+            RequestCancelled: If the request was cancelled
+            DeadlineExceeded: If the AI deadline has passed
+        """
+        self.raise_if_cancelled()
+        if self.expired:
+            raise DeadlineExceeded("AI deadline reached")
+
+
+# Token of the request running in this context; copied into executor
+# threads together with the AI call context (see ai_scheduler.in_context)
+_NEVER_CANCELLED = CancelToken()
+_cancel_token: contextvars.ContextVar = contextvars.ContextVar(
+    "cancel_token", default=_NEVER_CANCELLED
+)
+
+
+def set_cancel_token(token: CancelToken):
+    """
+    Make token the current request's cancel token
+
+    Returns:
+        Token for reset_cancel_token
+    """
+    return _cancel_token.set(token)
+
+
+def reset_cancel_token(context_token):
+    """Restore the cancel token replaced by set_cancel_token"""
+    _cancel_token.reset(context_token)
+
+
+def current_cancel_token() -> CancelToken:
+    return _cancel_token.get()
+
+
+class CancellationStats:
+    """Counts of cancelled requests, deadline-bounded requests and the Gemini calls they did not make"""
+
+    def __init__(self):
+        self.requests: Dict[str, int] = {}
+        self.calls_skipped = 0
+        self.deadlines = {"requests": 0, "partial": 0, "enhanced": 0, "skipped": 0}
+        self.deadline_calls_skipped = 0
+        self._lock = threading.Lock()
+
+    def record_request(self, route: str):
+        with self._lock:
+            self.requests[route] = self.requests.get(route, 0) + 1
+
+    def record_skipped_call(self, deadline: bool = False):
+        with self._lock:
+            if deadline:
+                self.deadline_calls_skipped += 1
+            else:
+                self.calls_skipped += 1
+
+    def record_deadline(self, enhanced: int, skipped: int):
+        """Count one request that ran its AI work against a deadline"""
+        with self._lock:
+            self.deadlines["requests"] += 1
+            self.deadlines["partial"] += 1 if skipped else 0
+            self.deadlines["enhanced"] += enhanced
+            self.deadlines["skipped"] += skipped
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "requests": dict(self.requests),
+                "calls_skipped": self.calls_skipped,
+                "deadlines": {
+                    **self.deadlines,
+                    "calls_skipped": self.deadline_calls_skipped,
+                },
+            }
+
+
+# Singleton instance
+_cancellation_stats = None
+
+
+def get_cancellation_stats() -> CancellationStats:
+    """Get or create CancellationStats singleton"""
+    global _cancellation_stats
+    if _cancellation_stats is None:
+        _cancellation_stats = CancellationStats()
+    return _cancellation_stats
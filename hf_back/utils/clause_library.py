@@ -0,0 +1,245 @@
+"""
+Clause Library Utility
+Versioned standard contract clauses, matched per contract type and custom requirement
+"""
+
+import glob
+import json
+import os
+import re
+import sys
+import threading
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+from utils.token_budget import SENTENCE_BREAK
+
+# Directory of curated <type>.json clause sets, shipped with the app
+CLAUSE_LIBRARY_DIR = os.getenv(
+    "CLAUSE_LIBRARY_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "clauses"),
+)
+
+REQUIRED_FIELDS = ("id", "heading", "text", "keywords")
+
+# "- ", "• ", "1. " or "2) " at the start of a custom terms line
+LIST_MARKER = re.compile(r"^\s*(?:[-•*]|\d+[.)])\s+")
+
+
+@dataclass
+class Clause:
+    """One standard clause and the keywords that route requirements to it"""
+
+    id: str
+    heading: str
+    text: str
+    keywords: Tuple[str, ...]
+    pattern: re.Pattern = field(repr=False, default=None)
+
+    def __post_init__(self):
+        alternatives = "|".join(re.escape(k) for k in self.keywords)
+        self.pattern = re.compile(rf"\b(?:{alternatives})s?\b", re.IGNORECASE)
+
+    def score(self, requirement: str) -> int:
+        """Number of keyword hits (singular or plural) in a requirement"""
+        return len(self.pattern.findall(requirement))
+
+
+@dataclass
+class ClauseSet:
+    """All standard clauses of one contract type, in document order"""
+
+    key: str
+    contract_type: str
+    version: str
+    aliases: Tuple[str, ...]
+    clauses: List[Clause]
+
+
+class ClauseLibrary:
+    """Standard clauses loaded once at startup; AI only adapts what custom terms touch"""
+
+    def __init__(self, directory: str = CLAUSE_LIBRARY_DIR):
+        """
+        Initialize clause library
+
+        Args:
+            directory: Directory of <type>.json clause sets (CLAUSE_LIBRARY_DIR)
+        """
+        self.directory = directory
+        self.sets: Dict[str, ClauseSet] = {}
+        self._matches: Dict[str, Optional[str]] = {}
+        self._counts = {"matched": 0, "unmatched": 0, "verbatim": 0, "adapted": 0}
+        self._lock = threading.Lock()
+        self.load()
+
+    def load(self):
+        """
+        Load and validate every clause set in the directory
+
+        A malformed file is skipped with a log line, so its contract type
+        falls back to full AI generation instead of failing startup.
+        """
+        sets = {}
+        for path in sorted(glob.glob(os.path.join(self.directory, "*.json"))):
+            key = os.path.splitext(os.path.basename(path))[0]
+            try:
+                sets[key] = self._parse(key, path)
+            except (OSError, ValueError, KeyError, TypeError) as e:
+                print(f"Skipping clause set {path}: {str(e)}", file=sys.stderr)
+        self.sets = sets
+        self._matches = {}
+        print(
+            f"Clause library: {', '.join(f'{k} v{s.version}' for k, s in sets.items())}",
+            file=sys.stderr,
+        )
+
+    @staticmethod
+    def _parse(key: str, path: str) -> ClauseSet:
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        clauses = []
+        for item in data["clauses"]:
+            missing = [name for name in REQUIRED_FIELDS if not item.get(name)]
+            if missing:
+                raise ValueError(f"clause {item.get('id')!r} lacks {missing}")
+            clauses.append(
+                Clause(
+                    id=item["id"],
+                    heading=item["heading"],
+                    text=item["text"].strip(),
+                    keywords=tuple(k.lower() for k in item["keywords"]),
+                )
+            )
+        if not clauses:
+            raise ValueError("no clauses")
+        return ClauseSet(
+            key=key,
+            contract_type=data["contract_type"],
+            version=str(data["version"]),
+            aliases=tuple(a.lower() for a in data.get("aliases", [])),
+            clauses=clauses,
+        )
+
+    def match(self, contract_type: str) -> Optional[ClauseSet]:
+        """
+        Clause set for a free-text contract type
+
+        The alias found earliest in the type wins, so "Freelance Service
+        Agreement" is a freelance contract rather than a service one.
+
+        Args:
+            contract_type: Contract type as entered by the user
+
+        Returns:
+            ClauseSet, or None when the type is not in the library
+        """
+        key = self._key(contract_type)
+        with self._lock:
+            self._counts["matched" if key else "unmatched"] += 1
+        return self.sets.get(key) if key else None
+
+    def covers(self, contract_type: str) -> bool:
+        """True if the contract type renders from the library without AI"""
+        return self._key(contract_type) is not None
+
+    def _key(self, contract_type: str) -> Optional[str]:
+        name = " ".join((contract_type or "").lower().split())
+        if name in self._matches:
+            return self._matches[name]
+
+        best = None
+        for key, clause_set in self.sets.items():
+            for alias in clause_set.aliases:
+                found = re.search(rf"\b{re.escape(alias)}\b", name)
+                rank = (found.start(), -len(alias)) if found else None
+                if rank and (best is None or rank < best[0]):
+                    best = (rank, key)
+        key = best[1] if best else None
+        if len(self._matches) < 1024:
+            self._matches[name] = key
+        return key
+
+    @staticmethod
+    def requirements(custom_terms: str) -> List[str]:
+        """Split custom terms into individual requirements (lines, then sentences)"""
+        requirements = []
+        for line in (custom_terms or "").splitlines():
+            line = LIST_MARKER.sub("", line).strip()
+            requirements.extend(s.strip() for s in SENTENCE_BREAK.split(line) if s.strip())
+        return requirements
+
+    def route(
+        self, clause_set: ClauseSet, custom_terms: str
+    ) -> Tuple[Dict[str, List[str]], List[str]]:
+        """
+        Assign each custom requirement to the clause it changes
+
+        Args:
+            clause_set: Matched clause set
+            custom_terms: Free-text custom requirements
+
+        Returns:
+            ({clause id: [requirements]}, requirements no clause covers)
+        """
+        touched: Dict[str, List[str]] = {}
+        unmatched = []
+        for requirement in self.requirements(custom_terms):
+            scores = [(clause.score(requirement), clause) for clause in clause_set.clauses]
+            best_score, best = max(scores, key=lambda pair: pair[0])
+            if best_score:
+                touched.setdefault(best.id, []).append(requirement)
+            else:
+                unmatched.append(requirement)
+        return touched, unmatched
+
+    def record(self, verbatim: int, adapted: int):
+        """Count clauses spliced verbatim and clauses adapted by AI"""
+        with self._lock:
+            self._counts["verbatim"] += verbatim
+            self._counts["adapted"] += adapted
+
+    @staticmethod
+    def render(clause_set: ClauseSet, texts: Dict[str, str]) -> str:
+        """
+        Contract terms in "Heading:\\ntext" blocks, as the DOCX generator parses them
+
+        Args:
+            clause_set: Matched clause set
+            texts: Adapted text by clause id; other clauses use library text
+        """
+        return "\n\n".join(
+            f"{clause.heading}:\n{texts.get(clause.id, clause.text)}"
+            for clause in clause_set.clauses
+        )
+
+    def stats(self) -> Dict[str, Any]:
+        """Loaded versions and how much of each contract came from the library"""
+        with self._lock:
+            counts = dict(self._counts)
+        total = counts["verbatim"] + counts["adapted"]
+        return {
+            "directory": self.directory,
+            "sets": {
+                key: {
+                    "contract_type": s.contract_type,
+                    "version": s.version,
+                    "clauses": len(s.clauses),
+                }
+                for key, s in self.sets.items()
+            },
+            **counts,
+            "verbatim_rate": round(counts["verbatim"] / total, 4) if total else 0.0,
+        }
+
+
+# Singleton instance
+_clause_library = None
+
+
+def get_clause_library() -> ClauseLibrary:
+    """Get or create ClauseLibrary singleton"""
+    global _clause_library
+    if _clause_library is None:
+        _clause_library = ClauseLibrary()
+    return _clause_library
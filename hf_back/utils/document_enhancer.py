@@ -0,0 +1,314 @@
+"""
+Document Enhancer Utility
+Parse uploaded documents, enhance them in parallel chunks and rebuild a DOCX
+"""
+
+import io
+import os
+import re
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, BinaryIO, List, Optional
+
+from docx import Document
+from docx.oxml.ns import qn
+from lxml import etree
+from PyPDF2 import PdfReader
+
+from utils.ai_scheduler import in_context
+from utils.cancellation import DeadlineExceeded, current_cancel_token
+from utils.spool import new_spool
+
+# Paragraphs shorter than this (headings, labels, dates) are kept as-is
+MIN_ENHANCE_CHARS = 40
+
+# Styles whose text is structural rather than prose
+SKIP_STYLE_PREFIXES = ("Heading", "Title", "Subtitle", "Caption", "TOC")
+
+# Paragraph content that a plain-text rewrite would destroy
+PRESERVE_XPATH = "./w:hyperlink | .//m:oMath | .//w:drawing | .//w:fldSimple"
+
+# Run properties Word varies between runs without any visible difference
+INVISIBLE_RUN_PROPERTIES = {qn("w:lang"), qn("w:noProof")}
+
+# A line ending like this closes a paragraph in extracted PDF text
+SENTENCE_END = re.compile(r"[.!?:;)\"']\s*$")
+
+
+@dataclass
+class SourceDocument:
+    """Parsed upload: paragraph texts plus the DOCX to write results into"""
+
+    doc: Any
+    texts: List[str]
+    # Paragraph objects in `doc`, parallel to `texts`
+    paragraphs: List[Any] = field(default_factory=list)
+
+
+class DocumentEnhancer:
+    """Enhance uploaded .docx, .pdf and .txt documents paragraph by paragraph"""
+
+    def __init__(
+        self,
+        gemini_client: Any,
+        max_parallel: Optional[int] = None,
+        chunk_chars: Optional[int] = None,
+    ):
+        """
+        Initialize document enhancer
+
+        Args:
+            gemini_client: GeminiClient used for chunk calls
+            max_parallel: Chunk calls in flight per process, shared by all
+                requests (ENHANCE_MAX_PARALLEL)
+            chunk_chars: Target characters per chunk (ENHANCE_CHUNK_CHARS)
+        """
+        self.gemini_client = gemini_client
+        self.max_parallel = max_parallel or int(os.getenv("ENHANCE_MAX_PARALLEL", "4"))
+        self.chunk_chars = chunk_chars or int(os.getenv("ENHANCE_CHUNK_CHARS", "4000"))
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self._pool_lock = threading.Lock()
+
+    @property
+    def pool(self) -> ThreadPoolExecutor:
+        """Shared executor; created on first use so it never crosses a fork"""
+        if self._pool is None:
+            with self._pool_lock:
+                if self._pool is None:
+                    self._pool = ThreadPoolExecutor(
+                        max_workers=self.max_parallel,
+                        thread_name_prefix="enhance-chunk",
+                    )
+        return self._pool
+
+    # ------------------------------------------------------------------
+    # Parsing
+    # ------------------------------------------------------------------
+
+    def parse(self, stream: BinaryIO, extension: str) -> SourceDocument:
+        """
+        Parse an upload straight from its (spooled) stream
+
+        Args:
+            stream: Seekable upload stream
+            extension: .docx, .pdf or .txt
+
+        Returns:
+            SourceDocument with the paragraphs to enhance
+        """
+        if extension == ".docx":
+            return self._parse_docx(stream)
+        if extension == ".pdf":
+            return self._from_texts(self._pdf_paragraphs(stream))
+        return self._from_texts(self._text_paragraphs(stream))
+
+    def _parse_docx(self, stream: BinaryIO) -> SourceDocument:
+        # Edited in place, so styles, numbering, tables and images survive
+        doc = Document(stream)
+        source = SourceDocument(doc=doc, texts=[])
+        # paragraph.style rescans every style per call; resolve ids once
+        style_names = {style.style_id: style.name for style in doc.styles}
+        for paragraph in doc.paragraphs:
+            style = style_names.get(paragraph._p.style, "")
+            text = paragraph.text.strip()
+            if len(text) < MIN_ENHANCE_CHARS or style.startswith(SKIP_STYLE_PREFIXES):
+                continue
+            if paragraph._p.xpath(PRESERVE_XPATH) or self._mixed_formatting(paragraph):
+                continue
+            source.texts.append(text)
+            source.paragraphs.append(paragraph)
+        return source
+
+    @staticmethod
+    def _mixed_formatting(paragraph: Any) -> bool:
+        """
+        Whether the paragraph's text runs differ in formatting (bold,
+        italic, a character style...)
+
+        A rewrite cannot say which of its words were the bold ones, so
+        such paragraphs are left as written.
+        """
+        formats = set()
+        for r in paragraph._p.r_lst:
+            if not r.text:
+                continue
+            rPr = r.rPr
+            formats.add(
+                ()
+                if rPr is None
+                else tuple(
+                    sorted(
+                        etree.tostring(child)
+                        for child in rPr
+                        if child.tag not in INVISIBLE_RUN_PROPERTIES
+                    )
+                )
+            )
+            if len(formats) > 1:
+                return True
+        return False
+
+    def _pdf_paragraphs(self, stream: BinaryIO):
+        """Yield paragraphs page by page; pages are read lazily by PyPDF2"""
+        for page in PdfReader(stream).pages:
+            lines = (page.extract_text() or "").splitlines()
+            yield from self._join_lines(lines)
+
+    def _text_paragraphs(self, stream: BinaryIO):
+        """Yield blank-line separated paragraphs from a UTF-8 text stream"""
+        lines = io.TextIOWrapper(stream, encoding="utf-8", errors="replace")
+        try:
+            buffer = []
+            for line in lines:
+                if line.strip():
+                    buffer.append(line.strip())
+                elif buffer:
+                    yield " ".join(buffer)
+                    buffer = []
+            if buffer:
+                yield " ".join(buffer)
+        finally:
+            # Leave the upload stream open for the caller
+            lines.detach()
+
+    @staticmethod
+    def _join_lines(lines: List[str]):
+        """Rejoin wrapped PDF lines into paragraphs"""
+        buffer = []
+        for line in lines:
+            line = line.strip()
+            if not line:
+                if buffer:
+                    yield " ".join(buffer)
+                    buffer = []
+                continue
+            buffer.append(line)
+            if SENTENCE_END.search(line):
+                yield " ".join(buffer)
+                buffer = []
+        if buffer:
+            yield " ".join(buffer)
+
+    def _from_texts(self, texts) -> SourceDocument:
+        """Build a fresh DOCX for plain paragraphs (PDF and text uploads)"""
+        doc = Document()
+        source = SourceDocument(doc=doc, texts=[])
+        for text in texts:
+            paragraph = doc.add_paragraph(text)
+            if len(text) >= MIN_ENHANCE_CHARS:
+                source.texts.append(text)
+                source.paragraphs.append(paragraph)
+        return source
+
+    # ------------------------------------------------------------------
+    # Enhancement
+    # ------------------------------------------------------------------
+
+    def chunk(self, texts: List[str]) -> List[range]:
+        """
+        Group consecutive paragraphs into chunks of about chunk_chars
+
+        Returns:
+            Index ranges into `texts`; a paragraph is never split
+        """
+        chunks = []
+        start = 0
+        size = 0
+        for index, text in enumerate(texts):
+            if size and size + len(text) > self.chunk_chars:
+                chunks.append(range(start, index))
+                start, size = index, 0
+            size += len(text)
+        if start < len(texts):
+            chunks.append(range(start, len(texts)))
+        return chunks
+
+    def enhance(
+        self, source: SourceDocument, doc_type: str = "auto", instructions: str = ""
+    ) -> dict:
+        """
+        Enhance every chunk concurrently and write results into source.doc
+
+        A chunk whose call fails, or that is unfinished when the request's
+        AI deadline passes, keeps its original text.
+
+        Returns:
+            Counts of chunks and paragraphs enhanced, and chunks skipped at the deadline
+        """
+        chunks = self.chunk(source.texts)
+        futures = [
+            self.pool.submit(
+                in_context(self.gemini_client.enhance_document_chunk),
+                [source.texts[i] for i in chunk],
+                doc_type,
+                instructions,
+            )
+            for chunk in chunks
+        ]
+
+        cancel_token = current_cancel_token()
+        enhanced_chunks = 0
+        enhanced_paragraphs = 0
+        skipped_chunks = 0
+        for chunk, future in zip(chunks, futures):
+            try:
+                improved = future.result(timeout=cancel_token.remaining())
+            except (TimeoutError, DeadlineExceeded):
+                future.cancel()
+                skipped_chunks += 1
+                continue
+            except Exception as e:
+                print(f"Chunk enhancement failed: {str(e)}", file=sys.stderr)
+                continue
+            enhanced_chunks += 1
+            for index, text in zip(chunk, improved):
+                if text:
+                    self._replace_text(source.paragraphs[index], text)
+                    enhanced_paragraphs += 1
+
+        return {
+            "chunks": len(chunks),
+            "enhanced_chunks": enhanced_chunks,
+            "paragraphs": len(source.texts),
+            "enhanced_paragraphs": enhanced_paragraphs,
+            "skipped_chunks": skipped_chunks,
+        }
+
+    @staticmethod
+    def _replace_text(paragraph: Any, text: str):
+        """
+        Swap a paragraph's text, keeping its style and run format
+
+        Only called for paragraphs whose runs all share one format (see
+        _mixed_formatting), so the first run's format is every run's.
+        """
+        runs = paragraph.runs
+        if not runs:
+            paragraph.add_run(text)
+            return
+        runs[0].text = text
+        for run in runs[1:]:
+            run._element.getparent().remove(run._element)
+
+    def save(self, source: SourceDocument) -> BinaryIO:
+        """Write the enhanced DOCX to a rewound spooled file"""
+        buffer = new_spool()
+        source.doc.save(buffer)
+        buffer.seek(0)
+        return buffer
+
+
+# Singleton instance
+_document_enhancer = None
+
+
+def get_document_enhancer() -> DocumentEnhancer:
+    """Get or create DocumentEnhancer singleton"""
+    global _document_enhancer
+    if _document_enhancer is None:
+        from utils.gemini_client import get_gemini_client
+
+        _document_enhancer = DocumentEnhancer(get_gemini_client())
+    return _document_enhancer
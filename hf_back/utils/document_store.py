@@ -0,0 +1,389 @@
+"""
+Document Store Utility
+Content-addressed local store for generated documents with download tokens
+"""
+
+import fcntl
+import hashlib
+import json
+import os
+import re
+import secrets
+import sys
+import threading
+import time
+from typing import Any, BinaryIO, Dict, Optional, Tuple
+
+# Layout under the store root, shared by every worker on the host:
+#   objects/ab/<sha256>     one copy of each distinct document
+#   links/<tenant>/<token>  hardlink to an object, one per download token
+#   tokens/<token>.json     filename, mimetype, tenant and expiry
+# An object whose link count is 1 has no live tokens and is kept only as
+# a dedup target until it ages out or space is needed.
+
+TOKEN_PATTERN = re.compile(r"[A-Za-z0-9_-]{16,64}")
+
+
+class DocumentStore:
+    """Dedupe generated documents on disk and hand out short-lived tokens"""
+
+    def __init__(
+        self,
+        root: Optional[str] = None,
+        max_bytes: Optional[int] = None,
+        tenant_quota: Optional[int] = None,
+        url_ttl: Optional[float] = None,
+        retention: Optional[float] = None,
+        sweep_interval: Optional[float] = None,
+    ):
+        """
+        Initialize document store
+
+        Args:
+            root: Store directory (DOCUMENT_STORE_DIR)
+            max_bytes: Disk budget for all objects (DOCUMENT_STORE_MAX_BYTES)
+            tenant_quota: Bytes of live documents per tenant (DOCUMENT_TENANT_QUOTA)
+            url_ttl: Seconds a download token stays valid (DOCUMENT_URL_TTL)
+            retention: Seconds an unreferenced object is kept for dedup
+                (DOCUMENT_RETENTION)
+            sweep_interval: Seconds between background sweeps (DOCUMENT_SWEEP_INTERVAL)
+        """
+        self.root = root or os.getenv("DOCUMENT_STORE_DIR", "/tmp/generated_docs")
+        self.max_bytes = max_bytes or int(
+            os.getenv("DOCUMENT_STORE_MAX_BYTES", str(1024 * 1024 * 1024))
+        )
+        self.tenant_quota = tenant_quota or int(
+            os.getenv("DOCUMENT_TENANT_QUOTA", str(50 * 1024 * 1024))
+        )
+        self.url_ttl = url_ttl or float(os.getenv("DOCUMENT_URL_TTL", "600"))
+        self.retention = retention or float(os.getenv("DOCUMENT_RETENTION", "3600"))
+        self.sweep_interval = sweep_interval or float(
+            os.getenv("DOCUMENT_SWEEP_INTERVAL", "60")
+        )
+
+        self.objects_dir = os.path.join(self.root, "objects")
+        self.links_dir = os.path.join(self.root, "links")
+        self.tokens_dir = os.path.join(self.root, "tokens")
+
+        self.counters = {
+            "stored": 0,
+            "dedup_hits": 0,
+            "over_quota": 0,
+            "quota_evictions": 0,
+            "downloads": 0,
+            "expired": 0,
+        }
+        self.last_sweep: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+        self._sweeper_pid: Optional[int] = None
+
+    # ------------------------------------------------------------------
+    # Paths
+    # ------------------------------------------------------------------
+
+    def _object_path(self, digest: str) -> str:
+        return os.path.join(self.objects_dir, digest[:2], digest)
+
+    def _tenant_dir(self, tenant: str) -> str:
+        # Tenant ids come from request headers; hash them into a safe name
+        return os.path.join(
+            self.links_dir, hashlib.sha256(tenant.encode()).hexdigest()[:16]
+        )
+
+    def _token_path(self, token: str) -> str:
+        return os.path.join(self.tokens_dir, f"{token}.json")
+
+    def _count(self, key: str, amount: int = 1):
+        with self._lock:
+            self.counters[key] += amount
+
+    # ------------------------------------------------------------------
+    # Store and fetch
+    # ------------------------------------------------------------------
+
+    def put(
+        self, spool: BinaryIO, tenant: str, filename: str, mimetype: str
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Store a rendered document and issue a download token
+
+        Args:
+            spool: Rewound file returned by a generator (read to the end)
+            tenant: Tenant the token belongs to
+            filename: Attachment filename for the download
+            mimetype: Content type for the download
+
+        Returns:
+            Token metadata, or None if the document exceeds the tenant quota
+        """
+        self._ensure_sweeper()
+        digest, size = self._write_object(spool)
+
+        if size > self.tenant_quota:
+            self._count("over_quota")
+            return None
+
+        tenant_dir = self._tenant_dir(tenant)
+        os.makedirs(tenant_dir, exist_ok=True)
+        self._make_room(tenant_dir, size)
+
+        token = secrets.token_urlsafe(18)
+        try:
+            os.link(self._object_path(digest), os.path.join(tenant_dir, token))
+        except FileNotFoundError:
+            # Evicted by a concurrent sweep between write and link
+            return None
+
+        meta = {
+            "token": token,
+            "sha256": digest,
+            "size": size,
+            "filename": filename,
+            "mimetype": mimetype,
+            "tenant_dir": os.path.basename(tenant_dir),
+            "expires_at": time.time() + self.url_ttl,
+        }
+        os.makedirs(self.tokens_dir, exist_ok=True)
+        temp_path = f"{self._token_path(token)}.tmp"
+        with open(temp_path, "w") as f:
+            json.dump(meta, f)
+        os.replace(temp_path, self._token_path(token))
+        return meta
+
+    def _write_object(self, spool: BinaryIO) -> Tuple[str, int]:
+        """Copy a spool into objects/ while hashing it; reuse an existing copy"""
+        os.makedirs(self.objects_dir, exist_ok=True)
+        temp_path = os.path.join(self.objects_dir, f".tmp-{secrets.token_hex(8)}")
+        sha = hashlib.sha256()
+        size = 0
+        with open(temp_path, "wb") as f:
+            while True:
+                chunk = spool.read(64 * 1024)
+                if not chunk:
+                    break
+                sha.update(chunk)
+                f.write(chunk)
+                size += len(chunk)
+
+        digest = sha.hexdigest()
+        path = self._object_path(digest)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        if os.path.exists(path):
+            os.unlink(temp_path)
+            os.utime(path)
+            self._count("dedup_hits")
+        else:
+            os.replace(temp_path, path)
+            self._count("stored")
+        return digest, size
+
+    def _make_room(self, tenant_dir: str, size: int):
+        """Drop a tenant's oldest tokens until `size` more bytes fit its quota"""
+        entries = []
+        for entry in os.scandir(tenant_dir):
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, entry.name, stat.st_size))
+
+        used = sum(entry[2] for entry in entries)
+        for _, token, entry_size in sorted(entries):
+            if used + size <= self.tenant_quota:
+                break
+            self._remove_token(token, tenant_dir)
+            used -= entry_size
+            self._count("quota_evictions")
+
+    def open(self, token: str) -> Tuple[Optional[BinaryIO], Optional[Dict[str, Any]]]:
+        """
+        Open a stored document by download token
+
+        Returns:
+            (file, metadata); file is None if the token is unknown or
+            expired, metadata is None only if the token is unknown
+        """
+        if not TOKEN_PATTERN.fullmatch(token):
+            return None, None
+        try:
+            with open(self._token_path(token)) as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return None, None
+
+        if meta["expires_at"] < time.time():
+            return None, meta
+
+        link = os.path.join(self.links_dir, meta["tenant_dir"], token)
+        try:
+            document = open(link, "rb")
+        except FileNotFoundError:
+            return None, meta
+
+        try:
+            # Reads count as use for LRU eviction
+            os.utime(self._object_path(meta["sha256"]))
+        except FileNotFoundError:
+            # Reclaimed since the open; the open handle still reads it
+            pass
+        except BaseException:
+            document.close()
+            raise
+        self._count("downloads")
+        return document, meta
+
+    def _remove_token(self, token: str, tenant_dir: str):
+        for path in (os.path.join(tenant_dir, token), self._token_path(token)):
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass
+
+    # ------------------------------------------------------------------
+    # Eviction
+    # ------------------------------------------------------------------
+
+    def sweep(self) -> Dict[str, Any]:
+        """
+        Expire tokens, then evict objects by TTL and LRU to fit max_bytes
+
+        Only one process sweeps at a time; others return immediately.
+
+        Returns:
+            Counts from this sweep (empty if another process is sweeping)
+        """
+        os.makedirs(self.root, exist_ok=True)
+        with open(os.path.join(self.root, ".sweep.lock"), "w") as lock:
+            try:
+                fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                return {}
+            result = self._sweep_locked()
+
+        self.last_sweep = result
+        return result
+
+    def _sweep_locked(self) -> Dict[str, Any]:
+        now = time.time()
+        expired = 0
+        live_tokens = []
+        if os.path.isdir(self.tokens_dir):
+            for entry in os.scandir(self.tokens_dir):
+                if not entry.name.endswith(".json"):
+                    continue
+                try:
+                    with open(entry.path) as f:
+                        meta = json.load(f)
+                except (OSError, ValueError):
+                    continue
+                tenant_dir = os.path.join(self.links_dir, meta["tenant_dir"])
+                if meta["expires_at"] < now:
+                    self._remove_token(meta["token"], tenant_dir)
+                    expired += 1
+                else:
+                    live_tokens.append((meta["expires_at"], meta["token"], tenant_dir))
+        self._count("expired", expired)
+
+        objects = self._scan_objects()
+        total = sum(size for _, size, _, _ in objects)
+        evicted = 0
+
+        # Unreferenced objects: drop when past retention, then LRU for space
+        for mtime, size, links, path in sorted(objects):
+            if links > 1:
+                continue
+            if now - mtime > self.retention or total > self.max_bytes:
+                os.unlink(path)
+                total -= size
+                evicted += 1
+
+        # Still over budget: expire the tokens closest to expiry first
+        reclaimed = 0
+        if total > self.max_bytes:
+            for _, token, tenant_dir in sorted(live_tokens):
+                self._remove_token(token, tenant_dir)
+                reclaimed += 1
+                freed, count = self._evict_orphans()
+                total -= freed
+                evicted += count
+                if total <= self.max_bytes:
+                    break
+
+        return {
+            "expired_tokens": expired,
+            "reclaimed_tokens": reclaimed,
+            "evicted_objects": evicted,
+            "live_tokens": len(live_tokens) - reclaimed,
+            "object_bytes": total,
+            "swept_at": now,
+        }
+
+    def _scan_objects(self) -> list:
+        """(mtime, size, link count, path) for every stored object"""
+        objects = []
+        if not os.path.isdir(self.objects_dir):
+            return objects
+        for shard in os.scandir(self.objects_dir):
+            if not shard.is_dir():
+                continue
+            for entry in os.scandir(shard.path):
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                objects.append((stat.st_mtime, stat.st_size, stat.st_nlink, entry.path))
+        return objects
+
+    def _evict_orphans(self) -> Tuple[int, int]:
+        """Delete objects that just lost their last token; returns (bytes, count)"""
+        freed = count = 0
+        for _, size, links, path in self._scan_objects():
+            if links == 1:
+                os.unlink(path)
+                freed += size
+                count += 1
+        return freed, count
+
+    def _ensure_sweeper(self):
+        """Start the background sweeper once per process (again after fork)"""
+        if self._sweeper_pid == os.getpid():
+            return
+        with self._lock:
+            if self._sweeper_pid == os.getpid():
+                return
+            self._sweeper_pid = os.getpid()
+            threading.Thread(
+                target=self._sweep_forever, name="document-sweeper", daemon=True
+            ).start()
+
+    def _sweep_forever(self):
+        while True:
+            time.sleep(self.sweep_interval)
+            try:
+                self.sweep()
+            except Exception as e:
+                print(f"Document store sweep failed: {str(e)}", file=sys.stderr)
+
+    def stats(self) -> Dict[str, Any]:
+        """Counters for this process and the last sweep it ran"""
+        with self._lock:
+            return {
+                "root": self.root,
+                "max_bytes": self.max_bytes,
+                "tenant_quota": self.tenant_quota,
+                "url_ttl": self.url_ttl,
+                **self.counters,
+                "last_sweep": dict(self.last_sweep),
+            }
+
+
+# Singleton instance
+_document_store = None
+
+
+def get_document_store() -> DocumentStore:
+    """Get or create DocumentStore singleton"""
+    global _document_store
+    if _document_store is None:
+        _document_store = DocumentStore()
+    return _document_store
@@ -3,17 +3,24 @@ DOCX Generator Utility
 Handles creation of Word documents (.docx) for all template types
 """
 
-import io
 import sys
 from datetime import datetime
-from typing import Any, Dict, List, Optional
+from typing import Any, BinaryIO, Dict, Iterable, List, Optional, Union
 
 from docx import Document
 from docx.enum.text import WD_ALIGN_PARAGRAPH
-from docx.oxml import OxmlElement
 from docx.oxml.ns import qn
 from docx.shared import Inches, Pt, RGBColor
 
+from utils.cancellation import RequestCancelled
+from utils.markdown_docx import MarkdownDocxWriter
+from utils.ooxml_fragments import append_rows, append_to_body, get_fragment_cache, style_id
+from utils.spool import new_spool
+
+# Heading levels styled when a document is created (deeper ones on use)
+STYLED_HEADING_LEVELS = 3
+HEADING_COLOR = RGBColor(0, 51, 102)  # Dark blue
+
 
 class DocxGenerator:
     """Generate professional Word documents"""
@@ -22,6 +29,18 @@ class DocxGenerator:
         """Initialize DOCX generator"""
         self.default_font = "Calibri"
         self.heading_font = "Arial"
+        self.fragments = get_fragment_cache()
+
+    def _new_document(self) -> Document:
+        """Blank document with the heading styles set once, not on every heading"""
+        doc = Document()
+        for level in range(1, STYLED_HEADING_LEVELS + 1):
+            self._style_heading(doc.styles[f"Heading {level}"])
+        return doc
+
+    def _style_heading(self, style):
+        style.font.name = self.heading_font
+        style.font.color.rgb = HEADING_COLOR
 
     def _set_cell_border(self, cell, **kwargs):
         """
@@ -31,27 +50,23 @@ class DocxGenerator:
             cell: Table cell
             kwargs: Border properties (top, bottom, left, right)
         """
-        tc = cell._tc
-        tcPr = tc.get_or_add_tcPr()
-
-        tcBorders = OxmlElement("w:tcBorders")
-        for edge in ("left", "top", "right", "bottom"):
-            if edge in kwargs:
-                edge_data = kwargs.get(edge)
-                edge_el = OxmlElement(f"w:{edge}")
-                edge_el.set(qn("w:val"), "single")
-                edge_el.set(qn("w:sz"), "4")
-                edge_el.set(qn("w:space"), "0")
-                edge_el.set(qn("w:color"), edge_data.get("color", "000000"))
-                tcBorders.append(edge_el)
-
-        tcPr.append(tcBorders)
+        edges = tuple(
+            (edge, kwargs[edge].get("color", "000000"))
+            for edge in ("left", "top", "right", "bottom")
+            if edge in kwargs
+        )
+        tcPr = cell._tc.get_or_add_tcPr()
+        for existing in tcPr.findall(qn("w:tcBorders")):
+            tcPr.remove(existing)
+        tcPr.append(self.fragments.cell_borders(edges))
 
     def _add_heading(self, doc: Document, text: str, level: int = 1):
         """Add styled heading to document"""
-        heading = doc.add_heading(text, level=level)
-        heading.style.font.name = self.heading_font
-        heading.style.font.color.rgb = RGBColor(0, 51, 102)  # Dark blue
+        heading = append_to_body(
+            doc, self.fragments.paragraph(text or None, style=f"Heading{level}")
+        )
+        if level > STYLED_HEADING_LEVELS:
+            self._style_heading(heading.style)
         return heading
 
     def _add_paragraph(
@@ -63,15 +78,76 @@ class DocxGenerator:
         size: int = 11,
     ):
         """Add styled paragraph to document"""
-        para = doc.add_paragraph()
-        run = para.add_run(text)
-        run.font.name = self.default_font
-        run.font.size = Pt(size)
-        run.bold = bold
-        run.italic = italic
-        return para
-
-    def generate_resume(self, data: Dict[str, Any]) -> io.BytesIO:
+        return append_to_body(
+            doc,
+            self.fragments.paragraph(
+                text, font=self.default_font, size=size, bold=bold, italic=italic
+            ),
+        )
+
+    def _add_list_item(
+        self, doc: Document, text: Optional[str], style: str = "List Bullet", indent=None
+    ):
+        """Add a list paragraph, as doc.add_paragraph(text, style=style) would"""
+        return append_to_body(
+            doc, self.fragments.paragraph(text or None, style=style_id(style), left_indent=indent)
+        )
+
+    def _add_signature_block(self, doc: Document, label: str, name: str):
+        """Add a label, signature line and date line for one party"""
+
+        def build():
+            line = self.fragments.paragraph("_" * 50)
+            text = dict(font=self.default_font, size=11, bold=False, italic=False)
+            return [
+                self.fragments.paragraph("{label}", **{**text, "bold": True}),
+                self.fragments.paragraph(None),
+                line,
+                self.fragments.paragraph("Signature: {name}", **text),
+                self.fragments.paragraph(None),
+                line,
+                self.fragments.paragraph("Date:", **text),
+            ]
+
+        for element in self.fragments.block(
+            ("signature", self.default_font), build, label=label, name=name
+        ):
+            append_to_body(doc, element)
+
+    def _add_markdown(
+        self,
+        doc: Document,
+        content: Union[str, Iterable[str]],
+        heading_level: int = 1,
+        guess_heading_chars: int = 50,
+    ) -> bool:
+        """
+        Add AI markdown to the document as it arrives
+
+        Args:
+            doc: Document to append to
+            content: Text, or chunks of a streaming response
+            heading_level: Level of the content's top headings
+            guess_heading_chars: Plain first lines shorter than this are headings
+
+        Returns:
+            False if a stream failed; what it added was removed
+
+        Raises:
+            RequestCancelled: If the client disconnected mid-stream
+        """
+        writer = MarkdownDocxWriter(doc, self, heading_level, guess_heading_chars)
+        try:
+            writer.write(content)
+        except RequestCancelled:
+            raise
+        except Exception as e:
+            print(f"Content stream failed, dropping partial content: {str(e)}", file=sys.stderr)
+            writer.rollback()
+            return False
+        return True
+
+    def generate_resume(self, data: Dict[str, Any]) -> BinaryIO:
         """
         Generate resume document
 
@@ -86,9 +162,9 @@ class DocxGenerator:
                 - projects: List of projects (optional)
 
         Returns:
-            BytesIO buffer containing the .docx file
+            Spooled file containing the .docx file, rewound
         """
-        doc = Document()
+        doc = self._new_document()
 
         # Set margins
         sections = doc.sections
@@ -180,8 +256,7 @@ class DocxGenerator:
                 # Responsibilities/Achievements
                 if exp.get("responsibilities"):
                     for resp in exp["responsibilities"]:
-                        bullet_para = doc.add_paragraph(resp, style="List Bullet")
-                        bullet_para.paragraph_format.left_indent = Inches(0.25)
+                        self._add_list_item(doc, resp, indent=Inches(0.25))
 
                 doc.add_paragraph()  # Spacing between jobs
 
@@ -250,7 +325,7 @@ class DocxGenerator:
             self._add_heading(doc, "CERTIFICATIONS", level=1)
 
             for cert in data["certifications"]:
-                cert_para = doc.add_paragraph(style="List Bullet")
+                cert_para = self._add_list_item(doc, None)
                 cert_run = cert_para.add_run(
                     f"{cert.get('name', 'Certification')} - "
                     f"{cert.get('issuer', 'Issuer')}"
@@ -309,14 +384,14 @@ class DocxGenerator:
 
                 doc.add_paragraph()  # Spacing
 
-        # Save to BytesIO
-        buffer = io.BytesIO()
+        # Save to a spooled file (spills to disk when large)
+        buffer = new_spool()
         doc.save(buffer)
         buffer.seek(0)
 
         return buffer
 
-    def generate_cover_letter(self, data: Dict[str, Any]) -> io.BytesIO:
+    def generate_cover_letter(self, data: Dict[str, Any]) -> BinaryIO:
         """
         Generate cover letter document
 
@@ -333,9 +408,9 @@ class DocxGenerator:
                 - content: Letter content (paragraphs)
 
         Returns:
-            BytesIO buffer containing the .docx file
+            Spooled file containing the .docx file, rewound
         """
-        doc = Document()
+        doc = self._new_document()
 
         # Set margins
         sections = doc.sections
@@ -408,14 +483,14 @@ class DocxGenerator:
         doc.add_paragraph()
         self._add_paragraph(doc, data.get("name", "Your Name"), bold=True, size=11)
 
-        # Save to BytesIO
-        buffer = io.BytesIO()
+        # Save to a spooled file (spills to disk when large)
+        buffer = new_spool()
         doc.save(buffer)
         buffer.seek(0)
 
         return buffer
 
-    def generate_proposal(self, data: Dict[str, Any]) -> io.BytesIO:
+    def generate_proposal(self, data: Dict[str, Any]) -> BinaryIO:
         """
         Generate business proposal document
 
@@ -425,7 +500,8 @@ class DocxGenerator:
                 - client_name: Client name
                 - prepared_by: Your name/company
                 - date: Proposal date
-                - content: Proposal content (can be structured or plain text)
+                - content: Proposal content in markdown or plain text, or
+                  an iterable of chunks (written as they arrive)
                 - project_overview: Project description
                 - scope: Scope of work
                 - deliverables: List of deliverables
@@ -433,9 +509,9 @@ class DocxGenerator:
                 - budget: Budget information
 
         Returns:
-            BytesIO buffer containing the .docx file
+            Spooled file containing the .docx file, rewound
         """
-        doc = Document()
+        doc = self._new_document()
 
         # Set margins
         sections = doc.sections
@@ -491,25 +567,8 @@ class DocxGenerator:
         # Page Break
         doc.add_page_break()
 
-        # If structured content is provided
-        if data.get("content") and isinstance(data["content"], str):
-            # Parse and format the content
-            sections_text = data["content"].split("\n\n")
-            for section in sections_text:
-                if section.strip():
-                    lines = section.strip().split("\n")
-                    # First line as heading if it looks like a heading
-                    if len(lines[0]) < 50 and not lines[0].endswith("."):
-                        self._add_heading(doc, lines[0], level=1)
-                        for line in lines[1:]:
-                            if line.strip():
-                                self._add_paragraph(doc, line.strip())
-                    else:
-                        for line in lines:
-                            if line.strip():
-                                self._add_paragraph(doc, line.strip())
-                    doc.add_paragraph()
-        else:
+        # AI or custom content, as text or chunks of a streaming response
+        if not (data.get("content") and self._add_markdown(doc, data["content"])):
             # Manual structure
             # Executive Summary
             if data.get("executive_summary"):
@@ -533,7 +592,7 @@ class DocxGenerator:
             if data.get("deliverables"):
                 self._add_heading(doc, "Deliverables", level=1)
                 for deliverable in data["deliverables"]:
-                    doc.add_paragraph(deliverable, style="List Bullet")
+                    self._add_list_item(doc, deliverable)
                 doc.add_paragraph()
 
             # Timeline
@@ -559,16 +618,16 @@ class DocxGenerator:
                 ],
             )
             for step in next_steps:
-                doc.add_paragraph(step, style="List Number")
+                self._add_list_item(doc, step, style="List Number")
 
-        # Save to BytesIO
-        buffer = io.BytesIO()
+        # Save to a spooled file (spills to disk when large)
+        buffer = new_spool()
         doc.save(buffer)
         buffer.seek(0)
 
         return buffer
 
-    def generate_invoice(self, data: Dict[str, Any]) -> io.BytesIO:
+    def generate_invoice(self, data: Dict[str, Any]) -> BinaryIO:
         """
         Generate invoice document
 
@@ -584,9 +643,9 @@ class DocxGenerator:
                 - tax_rate: Tax percentage (optional)
 
         Returns:
-            BytesIO buffer containing the .docx file
+            Spooled file containing the .docx file, rewound
         """
-        doc = Document()
+        doc = self._new_document()
 
         # Set margins
         sections = doc.sections
@@ -650,7 +709,7 @@ class DocxGenerator:
         # Items Table
         items = data.get("items", [])
         if items:
-            items_table = doc.add_table(rows=len(items) + 1, cols=4)
+            items_table = doc.add_table(rows=1, cols=4)
             items_table.style = "Light Grid Accent 1"
 
             # Header
@@ -666,19 +725,28 @@ class DocxGenerator:
                     for run in paragraph.runs:
                         run.font.bold = True
 
-            # Items
+            # Items, as copies of one row (see utils/ooxml_fragments.py)
             subtotal = 0
-            for idx, item in enumerate(items, 1):
-                row_cells = items_table.rows[idx].cells
-                row_cells[0].text = item.get("description", "")
-                row_cells[1].text = str(item.get("quantity", 1))
-                row_cells[2].text = f"${item.get('rate', 0):.2f}"
-
-                amount = item.get(
-                    "amount", item.get("quantity", 1) * item.get("rate", 0)
+            rows = []
+            for item in items:
+                # Numbers may be null, meaning the default
+                quantity = item.get("quantity")
+                if quantity is None:
+                    quantity = 1
+                rate = item.get("rate") or 0
+                amount = item.get("amount")
+                if amount is None:
+                    amount = quantity * rate
+                rows.append(
+                    (
+                        item.get("description", ""),
+                        quantity,
+                        f"${rate:.2f}",
+                        f"${amount:.2f}",
+                    )
                 )
-                row_cells[3].text = f"${amount:.2f}"
                 subtotal += amount
+            append_rows(items_table, rows)
 
             doc.add_paragraph()
 
@@ -691,13 +759,13 @@ class DocxGenerator:
             totals_table.cell(0, 1).text = f"${subtotal:.2f}"
 
             # Tax
-            tax_rate = data.get("tax_rate", 0)
+            tax_rate = data.get("tax_rate") or 0
             tax_amount = subtotal * (tax_rate / 100) if tax_rate > 0 else 0
             totals_table.cell(1, 0).text = f"Tax ({tax_rate}%):"
             totals_table.cell(1, 1).text = f"${tax_amount:.2f}"
 
             # Discount
-            discount = data.get("discount", 0)
+            discount = data.get("discount") or 0
             totals_table.cell(2, 0).text = "Discount:"
             totals_table.cell(2, 1).text = f"-${discount:.2f}"
 
@@ -727,14 +795,14 @@ class DocxGenerator:
             self._add_heading(doc, "Payment Instructions:", level=2)
             self._add_paragraph(doc, data["payment_instructions"])
 
-        # Save to BytesIO
-        buffer = io.BytesIO()
+        # Save to a spooled file (spills to disk when large)
+        buffer = new_spool()
         doc.save(buffer)
         buffer.seek(0)
 
         return buffer
 
-    def generate_contract(self, data: Dict[str, Any]) -> io.BytesIO:
+    def generate_contract(self, data: Dict[str, Any]) -> BinaryIO:
         """
         Generate contract document
 
@@ -744,14 +812,15 @@ class DocxGenerator:
                 - date: Contract date
                 - party1: First party info (name, address)
                 - party2: Second party info (name, address)
-                - terms: Contract terms/content
+                - terms: Contract terms in markdown or plain text, or an
+                  iterable of chunks
                 - effective_date: When contract takes effect
                 - expiration_date: When contract expires (optional)
 
         Returns:
-            BytesIO buffer containing the .docx file
+            Spooled file containing the .docx file, rewound
         """
-        doc = Document()
+        doc = self._new_document()
 
         # Set margins
         sections = doc.sections
@@ -815,26 +884,7 @@ class DocxGenerator:
         terms_content = data.get("terms", "")
 
         if terms_content:
-            # Parse terms into sections
-            sections_text = terms_content.split("\n\n")
-            for section in sections_text:
-                if section.strip():
-                    lines = section.strip().split("\n")
-                    # Check if first line is a heading
-                    if len(lines[0]) < 60 and (
-                        lines[0].endswith(":") or not lines[0].endswith(".")
-                    ):
-                        self._add_heading(
-                            doc, lines[0].replace(":", "").strip(), level=2
-                        )
-                        for line in lines[1:]:
-                            if line.strip():
-                                self._add_paragraph(doc, line.strip())
-                    else:
-                        for line in lines:
-                            if line.strip():
-                                self._add_paragraph(doc, line.strip())
-                    doc.add_paragraph()
+            self._add_markdown(doc, terms_content, heading_level=2, guess_heading_chars=60)
 
         # Disclaimer
         doc.add_page_break()
@@ -855,28 +905,16 @@ class DocxGenerator:
 
         # Party 1 Signature
         doc.add_paragraph()
-        self._add_paragraph(doc, "Party 1 (Provider):", bold=True)
-        doc.add_paragraph()
-        doc.add_paragraph("_" * 50)
-        self._add_paragraph(doc, f"Signature: {party1.get('name', '')}")
-        doc.add_paragraph()
-        doc.add_paragraph("_" * 50)
-        self._add_paragraph(doc, "Date:")
+        self._add_signature_block(doc, "Party 1 (Provider):", party1.get("name", ""))
 
         doc.add_paragraph()
         doc.add_paragraph()
 
         # Party 2 Signature
-        self._add_paragraph(doc, "Party 2 (Client):", bold=True)
-        doc.add_paragraph()
-        doc.add_paragraph("_" * 50)
-        self._add_paragraph(doc, f"Signature: {party2.get('name', '')}")
-        doc.add_paragraph()
-        doc.add_paragraph("_" * 50)
-        self._add_paragraph(doc, "Date:")
+        self._add_signature_block(doc, "Party 2 (Client):", party2.get("name", ""))
 
-        # Save to BytesIO
-        buffer = io.BytesIO()
+        # Save to a spooled file (spills to disk when large)
+        buffer = new_spool()
         doc.save(buffer)
         buffer.seek(0)
 
@@ -5,10 +5,69 @@ Handles all interactions with Google's Gemini 2.5 Flash API
 
 import json
 import os
+import re
 import sys
-from typing import Any, Dict, List, Optional
-
-import google.generativeai as genai
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from utils.ai_scheduler import current_call_context, get_ai_scheduler, in_context
+from utils.cancellation import (
+    DeadlineExceeded,
+    RequestCancelled,
+    current_cancel_token,
+    get_cancellation_stats,
+)
+from utils.clause_library import get_clause_library
+from utils.output_budget import get_output_budget
+from utils.output_validation import (
+    JSON_INSTRUCTION,
+    TEXT_SCHEMA,
+    OutputRejected,
+    get_output_validator,
+)
+from utils.tenant_quota import get_tenant_quota
+from utils.token_budget import (
+    INPUT_CHUNK_TOKENS,
+    estimate_tokens,
+    join_pieces,
+    split_text_joiners,
+)
+
+# google.generativeai takes ~1s to import, so it is loaded on first use
+genai = None
+
+# "[[3]] text" markers that keep paragraphs aligned through a chunk call
+PARAGRAPH_MARKER = re.compile(r"^\[\[(\d+)\]\]\s*", re.MULTILINE)
+
+
+def _load_genai():
+    """Import the Gemini SDK on first use"""
+    global genai
+    if genai is None:
+        import google.generativeai
+
+        genai = google.generativeai
+    return genai
+
+
+_supports_response_schema = None
+
+
+def supports_response_schema() -> bool:
+    """
+    Whether the installed SDK can request schema-constrained JSON
+
+    google-generativeai 0.3.x has no response_mime_type/response_schema;
+    structured calls then rely on the JSON instruction in the prompt.
+    """
+    global _supports_response_schema
+    if _supports_response_schema is None:
+        from google.ai import generativelanguage
+
+        fields = generativelanguage.GenerationConfig.meta.fields
+        _supports_response_schema = "response_schema" in fields
+    return _supports_response_schema
 
 
 class GeminiClient:
@@ -26,11 +85,35 @@ class GeminiClient:
         if not self.api_key:
             raise ValueError("GEMINI_API_KEY not found in environment variables")
 
-        # Configure Gemini
-        genai.configure(api_key=self.api_key)
+        self.model_name = "gemini-2.0-flash-exp"
+
+        # Optional endpoint override, e.g. the local fake server used by
+        # loadtest/ (http://127.0.0.1:8765); a custom endpoint uses REST
+        self.api_endpoint = os.getenv("GEMINI_API_ENDPOINT", "")
+        self.transport = os.getenv(
+            "GEMINI_TRANSPORT", "rest" if self.api_endpoint else ""
+        )
 
-        # Initialize model (Gemini 2.5 Flash)
-        self.model = genai.GenerativeModel("gemini-2.0-flash-exp")
+        # SDK import and model construction are deferred to first use
+        self._model = None
+        self._model_lock = threading.Lock()
+
+        # Long inputs are split and the pieces sent concurrently
+        self.input_chunk_tokens = INPUT_CHUNK_TOKENS
+        self.max_parallel = int(os.getenv("GEMINI_CHUNK_PARALLEL", "4"))
+        # Ask Gemini for an exact count when the estimate is near the budget
+        self.exact_token_count = (
+            os.getenv("GEMINI_EXACT_TOKEN_COUNT", "false").lower() == "true"
+        )
+        self._pool: Optional[ThreadPoolExecutor] = None
+
+        # Per-task max_output_tokens learned from response lengths
+        self.output_budget = get_output_budget()
+        # Parsing, validation and retry budget for structured text calls
+        self.output_validator = get_output_validator()
+        # Orders calls by priority class and fair share when slots run out
+        self.scheduler = get_ai_scheduler()
+        self.tenant_quota = get_tenant_quota()
 
         # Safety settings
         self.safety_settings = [
@@ -54,8 +137,142 @@ class GeminiClient:
 
         print(f"✓ Gemini AI client initialized successfully", file=sys.stderr)
 
+    @property
+    def model(self):
+        """Gemini model, configured on first access"""
+        if self._model is None:
+            with self._model_lock:
+                if self._model is None:
+                    sdk = _load_genai()
+
+                    # Configure Gemini
+                    options = {"api_key": self.api_key}
+                    if self.transport:
+                        options["transport"] = self.transport
+                    if self.api_endpoint:
+                        options["client_options"] = {
+                            "api_endpoint": self.api_endpoint
+                        }
+                    sdk.configure(**options)
+
+                    # Initialize model (Gemini 2.5 Flash)
+                    self._model = sdk.GenerativeModel(self.model_name)
+        return self._model
+
+    def load_sdk(self):
+        """Import the Gemini SDK without opening a transport (fork-safe)"""
+        _load_genai()
+
+    def reset(self):
+        """
+        Drop the model and its transport
+
+        gRPC channels are not fork-safe, so a forked worker calls this to
+        build its own on next use. The imported SDK itself is kept.
+        """
+        self._model = None
+        self._model_lock = threading.Lock()
+        # Executor threads do not survive fork either
+        self._pool = None
+
+    @property
+    def pool(self) -> ThreadPoolExecutor:
+        """Executor for the pieces of split inputs, created on first use"""
+        if self._pool is None:
+            with self._model_lock:
+                if self._pool is None:
+                    self._pool = ThreadPoolExecutor(
+                        max_workers=self.max_parallel,
+                        thread_name_prefix="gemini-piece",
+                    )
+        return self._pool
+
+    def connect(self):
+        """
+        Import the SDK and open the transport to Gemini
+
+        Used by the worker warm-up so the first real request does not pay
+        for the SDK import, channel setup and TLS handshake. count_tokens
+        does not consume generation quota.
+        """
+        self.model.count_tokens("ping")
+
+    def count_tokens(self, text: str) -> int:
+        """
+        Token count for budgeting: the local estimate, replaced by Gemini's
+        exact count when enabled and the estimate is within 25% of the budget
+
+        Args:
+            text: Input text
+
+        Returns:
+            Token count
+        """
+        estimate = estimate_tokens(text)
+        if not self.exact_token_count:
+            return estimate
+        if abs(estimate - self.input_chunk_tokens) > self.input_chunk_tokens // 4:
+            return estimate
+        try:
+            return self.model.count_tokens(text).total_tokens
+        except Exception as e:
+            print(f"Token count failed, using estimate: {str(e)}", file=sys.stderr)
+            return estimate
+
+    def split_input(self, text: str) -> List[str]:
+        """
+        Preflight a long user input against the per-call token budget
+
+        Returns:
+            [text] if it fits, otherwise paragraph/sentence aligned pieces
+        """
+        return self.split_input_joiners(text)[0]
+
+    def split_input_joiners(self, text: str) -> Tuple[List[str], List[str]]:
+        """split_input(), plus the joiners that put the pieces back together (see join_pieces)"""
+        if self.count_tokens(text) <= self.input_chunk_tokens:
+            return [text], []
+        return split_text_joiners(text, self.input_chunk_tokens)
+
+    def submit(self, func: Callable, *args) -> Future:
+        """Run func on the piece pool, attributed to the caller's request"""
+        return self.pool.submit(in_context(func), *args)
+
+    def map_pieces(self, func: Callable[[str], str], pieces: List[str]) -> List[str]:
+        """
+        Run func on every piece concurrently, keeping input order
+
+        A piece whose call fails keeps its input text; if every call
+        fails the first error is raised. Cancellation is always raised;
+        a piece skipped at the request's AI deadline keeps its input text.
+        """
+        if len(pieces) == 1:
+            return [func(pieces[0])]
+
+        futures = [self.submit(func, piece) for piece in pieces]
+        results = []
+        errors = []
+        for piece, future in zip(pieces, futures):
+            try:
+                results.append(future.result().strip())
+            except RequestCancelled:
+                raise
+            except Exception as e:
+                print(f"Piece generation failed: {str(e)}", file=sys.stderr)
+                errors.append(e)
+                results.append(piece)
+        if len(errors) == len(pieces):
+            raise errors[0]
+        return results
+
     def generate_text(
-        self, prompt: str, temperature: float = 0.7, max_tokens: int = 2048
+        self,
+        prompt: str,
+        temperature: float = 0.7,
+        max_tokens: Optional[int] = None,
+        task: str = "generic",
+        input_tokens: int = 0,
+        response_schema: Optional[Dict[str, Any]] = None,
     ) -> str:
         """
         Generate text using Gemini
@@ -63,50 +280,216 @@ class GeminiClient:
         Args:
             prompt: Input prompt
             temperature: Creativity level (0.0 to 1.0)
-            max_tokens: Maximum response length
+            max_tokens: Maximum response length (default: the task's
+                adaptive cap, see utils/output_budget.py)
+            task: Task name the response length is recorded under
+            input_tokens: Tokens of the text being rewritten, for tasks
+                whose response length follows their input
+            response_schema: Request JSON matching this schema, when the
+                SDK supports it
 
         Returns:
             Generated text
+
+        Raises:
+            RequestCancelled: If the client disconnected before the call
+                was sent (queued calls are dropped)
+            DeadlineExceeded: If the request's AI deadline passed before
+                the call was sent
+            QuotaExceeded: If the calling tenant's AI budget is used up
         """
+        cancel_token, tenant = self._begin_call()
+        cap = max_tokens or self.output_budget.cap(task, input_tokens)
         try:
-            generation_config = {
-                "temperature": temperature,
-                "max_output_tokens": max_tokens,
-                "top_p": 0.95,
-                "top_k": 40,
-            }
-
-            response = self.model.generate_content(
-                prompt,
-                generation_config=generation_config,
-                safety_settings=self.safety_settings,
-            )
+            model = self.model
+            with self.scheduler.slot(cancel_token):
+                response = model.generate_content(
+                    prompt,
+                    generation_config=self._generation_config(
+                        temperature, cap, response_schema
+                    ),
+                    safety_settings=self.safety_settings,
+                )
+            text = self._response_text(response)
+            self._record_output(response, text, task, cap, input_tokens)
+            self._record_usage(tenant, response, prompt, text)
+            return text
+
+        except (RequestCancelled, DeadlineExceeded):
+            raise
+        except Exception as e:
+            print(f"Error generating text: {str(e)}", file=sys.stderr)
+            raise
 
-            # Handle multi-part responses
-            if hasattr(response, "text"):
-                try:
-                    return response.text
-                except ValueError:
-                    # Fallback to parts if simple text access fails
-                    pass
-
-            # Extract text from parts
-            if response.candidates and len(response.candidates) > 0:
-                candidate = response.candidates[0]
-                if candidate.content and candidate.content.parts:
-                    text_parts = []
-                    for part in candidate.content.parts:
-                        if hasattr(part, "text"):
-                            text_parts.append(part.text)
-                    return "".join(text_parts)
-
-            # If all else fails, return empty string
-            print(f"Warning: Could not extract text from response", file=sys.stderr)
-            return ""
+    def stream_text(
+        self, prompt: str, temperature: float = 0.7, task: str = "generic"
+    ) -> Iterator[str]:
+        """
+        Generate text using Gemini, yielding it as it is generated
 
+        The call keeps its scheduler slot until the stream ends or the
+        caller stops iterating; the client and deadline are checked
+        between chunks.
+
+        Args:
+            prompt: Input prompt
+            temperature: Creativity level (0.0 to 1.0)
+            task: Task name the response length is recorded under
+
+        Yields:
+            Text chunks, in order
+
+        Raises:
+            RequestCancelled: If the client disconnected
+            DeadlineExceeded: If the request's AI deadline passed
+            QuotaExceeded: If the calling tenant's AI budget is used up
+        """
+        cancel_token, tenant = self._begin_call()
+        cap = self.output_budget.cap(task)
+        parts: List[str] = []
+        response = None
+        complete = False
+        try:
+            model = self.model
+            with self.scheduler.slot(cancel_token):
+                response = model.generate_content(
+                    prompt,
+                    generation_config=self._generation_config(temperature, cap),
+                    safety_settings=self.safety_settings,
+                    stream=True,
+                )
+                for chunk in response:
+                    text = self._response_text(chunk)
+                    if text:
+                        parts.append(text)
+                        yield text
+                    cancel_token.raise_if_stopped()
+            complete = True
+            self._record_output(response, "".join(parts), task, cap, 0)
+
+        except (RequestCancelled, DeadlineExceeded):
+            raise
         except Exception as e:
-            print(f"Error generating text: {str(e)}", file=sys.stderr)
+            print(f"Error streaming text: {str(e)}", file=sys.stderr)
             raise
+        finally:
+            # A stream stopped early was still billed for what it generated
+            if response is not None:
+                final = response if complete else None
+                self._record_usage(tenant, final, prompt, "".join(parts))
+
+    def _begin_call(self):
+        """
+        Checks before a Gemini call
+
+        Returns:
+            (cancel token, tenant) of the current request
+        """
+        cancel_token = current_cancel_token()
+        if cancel_token.cancelled or cancel_token.expired:
+            get_cancellation_stats().record_skipped_call(deadline=not cancel_token.cancelled)
+            cancel_token.raise_if_stopped()
+        _, tenant, _ = current_call_context()
+        self.tenant_quota.check(tenant)
+        return cancel_token, tenant
+
+    @staticmethod
+    def _generation_config(
+        temperature: float, cap: int, response_schema: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        generation_config = {
+            "temperature": temperature,
+            "max_output_tokens": cap,
+            "top_p": 0.95,
+            "top_k": 40,
+        }
+        if response_schema and supports_response_schema():
+            generation_config["response_mime_type"] = "application/json"
+            generation_config["response_schema"] = response_schema
+        return generation_config
+
+    def _record_usage(self, tenant: str, response, prompt: str, text: str):
+        """Charge the call's tokens to the tenant (estimated without usage metadata)"""
+        usage = getattr(response, "usage_metadata", None)
+        tokens = getattr(usage, "total_token_count", 0) or (
+            estimate_tokens(prompt) + estimate_tokens(text)
+        )
+        self.tenant_quota.record(tenant, tokens=tokens)
+
+    def generate_structured_text(
+        self, prompt: str, task: str, temperature: float = 0.4
+    ) -> str:
+        """
+        Generate one validated text through a {"text": ...} JSON response
+
+        Rejected responses are retried while the retry budget allows.
+
+        Args:
+            prompt: Task prompt (the JSON instruction is appended)
+            task: Task name for output budget, validation rules and metrics
+            temperature: Creativity level (0.0 to 1.0)
+
+        Returns:
+            Accepted text
+
+        Raises:
+            OutputRejected: If no response passed validation
+        """
+        prompt = f"{prompt}\n\n{JSON_INSTRUCTION}"
+        self.output_validator.begin(task)
+        retries = 0
+        while True:
+            response = self.generate_text(
+                prompt, temperature=temperature, task=task, response_schema=TEXT_SCHEMA
+            )
+            text, reason = self.output_validator.parse(response, task)
+            self.output_validator.record(task, reason)
+            if text is not None:
+                return text
+
+            print(f"Warning: {task} output rejected ({reason})", file=sys.stderr)
+            if not self.output_validator.allow_retry(task, retries):
+                raise OutputRejected(f"AI output for {task} was rejected: {reason}")
+            retries += 1
+
+    @staticmethod
+    def _response_text(response) -> str:
+        # Handle multi-part responses
+        if hasattr(response, "text"):
+            try:
+                return response.text
+            except ValueError:
+                # Fallback to parts if simple text access fails
+                pass
+
+        # Extract text from parts
+        if response.candidates and len(response.candidates) > 0:
+            candidate = response.candidates[0]
+            if candidate.content and candidate.content.parts:
+                text_parts = []
+                for part in candidate.content.parts:
+                    if hasattr(part, "text"):
+                        text_parts.append(part.text)
+                return "".join(text_parts)
+
+        # If all else fails, return empty string
+        print(f"Warning: Could not extract text from response", file=sys.stderr)
+        return ""
+
+    def _record_output(
+        self, response, text: str, task: str, cap: int, input_tokens: int
+    ):
+        """Feed the response length and truncation into the output budget"""
+        candidate = response.candidates[0] if response.candidates else None
+        finish_reason = getattr(candidate, "finish_reason", None)
+        truncated = getattr(finish_reason, "name", str(finish_reason)) == "MAX_TOKENS"
+        output_tokens = getattr(candidate, "token_count", 0) or estimate_tokens(text)
+        if truncated:
+            print(
+                f"Warning: {task} response truncated at {cap} output tokens",
+                file=sys.stderr,
+            )
+        self.output_budget.record(task, output_tokens, truncated, cap, input_tokens)
 
     def enhance_resume_description(self, description: str, role: str = "") -> str:
         """
@@ -118,6 +501,9 @@ class GeminiClient:
 
         Returns:
             Enhanced description
+
+        Raises:
+            OutputRejected: If no response passed validation
         """
         prompt = f"""You are a professional resume writer. Enhance the following job responsibility for a resume.
 
@@ -135,17 +521,9 @@ CRITICAL INSTRUCTIONS:
 8. Do NOT fabricate numbers or achievements not in the original
 9. Write in past tense for completed roles
 
-Write the enhanced description now (ONLY the text, nothing else):"""
+Write the enhanced description now."""
 
-        enhanced = self.generate_text(prompt, temperature=0.4)
-
-        # Clean up response
-        enhanced = enhanced.strip()
-        enhanced = enhanced.replace("**", "").replace("*", "")
-        enhanced = enhanced.replace("Enhanced Description:", "").strip()
-        enhanced = enhanced.lstrip("- ").lstrip("• ")
-
-        return enhanced
+        return self.generate_structured_text(prompt, task="resume_bullet")
 
     def generate_cover_letter(self, data: Dict[str, Any]) -> str:
         """
@@ -196,7 +574,7 @@ Requirements:
 
 Cover Letter:"""
 
-        return self.generate_text(prompt, temperature=0.7, max_tokens=1500)
+        return self.generate_text(prompt, temperature=0.7, task="cover_letter")
 
     def generate_proposal(self, data: Dict[str, Any]) -> str:
         """
@@ -214,7 +592,25 @@ Cover Letter:"""
         Returns:
             Complete proposal text
         """
-        prompt = f"""Create a professional business proposal with the following details:
+        return self.generate_text(
+            self._proposal_prompt(data), temperature=0.6, task="proposal"
+        )
+
+    def stream_proposal(self, data: Dict[str, Any]) -> Iterator[str]:
+        """
+        Generate a business proposal, yielding it as it is generated
+
+        Args:
+            data: As for generate_proposal()
+
+        Yields:
+            Markdown text chunks
+        """
+        return self.stream_text(self._proposal_prompt(data), temperature=0.6, task="proposal")
+
+    @staticmethod
+    def _proposal_prompt(data: Dict[str, Any]) -> str:
+        return f"""Create a professional business proposal with the following details:
 
 Client: {data.get("client_name", "Client")}
 Project: {data.get("project_title", "Project")}
@@ -236,16 +632,22 @@ Requirements:
 - Professional and persuasive
 - Clear and specific
 - Well-structured with sections
+- Markdown: ## section headings, bullet lists, **bold** for key terms
 - Professional tone
 
 Proposal:"""
 
-        return self.generate_text(prompt, temperature=0.6, max_tokens=2048)
-
     def enhance_contract_terms(self, contract_type: str, custom_terms: str = "") -> str:
         """
         Generate or enhance contract terms
 
+        Contract types in the clause library are assembled from its
+        standard clauses, and only the clauses custom terms touch are
+        adapted by AI. Other types are generated in full; there, custom
+        terms over the token budget are drafted into clauses piece by
+        piece, concurrently with the standard terms, and appended in order
+        under "Additional Terms".
+
         Args:
             contract_type: Type of contract (freelance, service, nda, etc.)
             custom_terms: Custom requirements or terms
@@ -253,6 +655,118 @@ Proposal:"""
         Returns:
             Contract terms text
         """
+        clause_set = get_clause_library().match(contract_type)
+        if clause_set is not None:
+            return self._library_contract_terms(clause_set, contract_type, custom_terms)
+
+        pieces = self.split_input(custom_terms) if custom_terms else [""]
+        if len(pieces) == 1:
+            return self._contract_terms(contract_type, custom_terms)
+
+        print(f"Custom terms split into {len(pieces)} pieces", file=sys.stderr)
+        summary = (
+            "Detailed custom provisions are drafted separately and appended as "
+            "Additional Terms; do not restate them"
+        )
+        standard = self.submit(self._contract_terms, contract_type, summary)
+        clauses = self.map_pieces(
+            lambda piece: self._contract_clauses(contract_type, piece), pieces
+        )
+        return f"{standard.result()}\n\nAdditional Terms:\n\n" + "\n\n".join(clauses)
+
+    def _library_contract_terms(
+        self, clause_set, contract_type: str, custom_terms: str
+    ) -> str:
+        """
+        Splice library clauses, adapting the ones custom terms touch
+
+        Touched clauses are adapted concurrently; requirements no clause
+        covers are drafted as Additional Terms. A failed call keeps the
+        library text with the raw requirements appended.
+
+        Raises:
+            RequestCancelled: If the client disconnected
+            DeadlineExceeded: If the request's AI deadline passed
+        """
+        library = get_clause_library()
+        touched, unmatched = library.route(clause_set, custom_terms)
+        clauses = {clause.id: clause for clause in clause_set.clauses}
+        print(
+            f"Contract from clause library {clause_set.key} v{clause_set.version}: "
+            f"{len(touched)} clause(s) to adapt, {len(unmatched)} extra requirement(s)",
+            file=sys.stderr,
+        )
+
+        futures = {
+            clause_id: self.submit(
+                self._adapt_clause, contract_type, clauses[clause_id], requirements
+            )
+            for clause_id, requirements in touched.items()
+        }
+        extra = ""
+        if unmatched:
+            requirements = "\n".join(unmatched)
+            try:
+                extra = "\n\n".join(
+                    self.map_pieces(
+                        lambda piece: self._contract_clauses(contract_type, piece),
+                        self.split_input(requirements),
+                    )
+                )
+            except (RequestCancelled, DeadlineExceeded):
+                raise
+            except Exception as e:
+                print(f"Additional terms failed: {str(e)}", file=sys.stderr)
+                extra = requirements
+
+        texts = {}
+        adapted = 0
+        for clause_id, future in futures.items():
+            try:
+                texts[clause_id] = future.result().strip()
+                adapted += 1
+            except (RequestCancelled, DeadlineExceeded):
+                raise
+            except Exception as e:
+                print(f"Clause {clause_id} adaptation failed: {str(e)}", file=sys.stderr)
+                texts[clause_id] = " ".join(
+                    [clauses[clause_id].text, *touched[clause_id]]
+                )
+        # A failed adaptation keeps the library wording, so it counts as verbatim
+        library.record(verbatim=len(clauses) - adapted, adapted=adapted)
+
+        terms = library.render(clause_set, texts)
+        if extra:
+            terms += f"\n\nAdditional Terms:\n{extra}"
+        return terms
+
+    def _adapt_clause(self, contract_type: str, clause, requirements: List[str]) -> str:
+        """Rewrite one standard clause to include the custom requirements for it"""
+        listed = "\n".join(f"- {requirement}" for requirement in requirements)
+        prompt = f"""Adapt this standard "{clause.heading}" clause of a {contract_type} agreement to the custom requirements.
+
+Standard clause:
+{clause.text}
+
+Custom requirements:
+{listed}
+
+Rules:
+- Keep the standard wording wherever the requirements do not change it
+- Cover every requirement and add nothing else
+- Professional legal language, one paragraph, no heading
+- Plain text, no markdown formatting
+
+Clause:"""
+
+        return self.generate_text(
+            prompt,
+            temperature=0.3,
+            task="contract_clause",
+            input_tokens=estimate_tokens(clause.text) + estimate_tokens(listed),
+        )
+
+    def _contract_terms(self, contract_type: str, custom_terms: str) -> str:
         prompt = f"""Generate professional contract terms for a {contract_type} agreement.
 
 Custom Requirements: {custom_terms if custom_terms else "Standard terms"}
@@ -275,7 +789,29 @@ Requirements:
 
 Contract Terms:"""
 
-        return self.generate_text(prompt, temperature=0.4, max_tokens=2048)
+        return self.generate_text(prompt, temperature=0.4, task="contract")
+
+    def _contract_clauses(self, contract_type: str, requirements: str) -> str:
+        """Draft one piece of long custom requirements into contract clauses"""
+        prompt = f"""Rewrite these custom requirements for a {contract_type} agreement as contract clauses.
+
+Requirements:
+{requirements}
+
+Rules:
+- Professional legal language
+- Cover every requirement, in the order given, and add nothing else
+- No headings for standard sections, no preamble and no disclaimer
+- Plain text, no markdown formatting
+
+Clauses:"""
+
+        return self.generate_text(
+            prompt,
+            temperature=0.4,
+            task="contract_clauses",
+            input_tokens=estimate_tokens(requirements),
+        )
 
     def enhance_portfolio_description(self, project_data: Dict[str, Any]) -> str:
         """
@@ -290,6 +826,9 @@ Contract Terms:"""
 
         Returns:
             Enhanced project description
+
+        Raises:
+            OutputRejected: If no response passed validation
         """
         # Handle both 'name' and 'title' field names
         project_name = project_data.get("name") or project_data.get("title", "Project")
@@ -329,55 +868,9 @@ CRITICAL INSTRUCTIONS:
 9. Base it ONLY on information provided - do NOT invent features
 10. Write in past tense if project is complete, present tense if ongoing
 
-Write the enhanced description now (ONLY the description, nothing else):"""
+Write the enhanced description now."""
 
-        enhanced = self.generate_text(prompt, temperature=0.4)
-
-        # Clean up the response - remove any unwanted formatting
-        enhanced = enhanced.strip()
-
-        # Remove common AI response patterns
-        unwanted_patterns = [
-            "Here are",
-            "Here's",
-            "Option 1",
-            "Option 2",
-            "Option 3",
-            "**Option",
-            "Choose one",
-            "Enhanced Description:",
-            "Final Description:",
-        ]
-
-        # If response contains multiple options, take only the first paragraph
-        if any(pattern.lower() in enhanced.lower() for pattern in unwanted_patterns):
-            print(
-                f"Warning: AI returned multiple options, extracting first valid description",
-                file=sys.stderr,
-            )
-            # Split by double newline or numbered list patterns
-            paragraphs = enhanced.split("\n\n")
-            for para in paragraphs:
-                # Skip headers and option labels
-                if not any(p.lower() in para.lower() for p in unwanted_patterns):
-                    if len(para.strip()) > 50:  # Must be substantial
-                        enhanced = para.strip()
-                        break
-
-        # Remove markdown formatting
-        enhanced = enhanced.replace("**", "").replace("*", "")
-        enhanced = enhanced.replace("> ", "")
-
-        # Remove option prefixes
-        import re
-
-        enhanced = re.sub(
-            r"^\*\*Option \d+.*?\*\*\s*", "", enhanced, flags=re.MULTILINE
-        )
-        enhanced = re.sub(r"^Option \d+.*?:\s*", "", enhanced, flags=re.MULTILINE)
-        enhanced = re.sub(r"^\d+\.\s*", "", enhanced)
-
-        return enhanced.strip()
+        return self.generate_structured_text(prompt, task="portfolio")
 
     def generate_skills_summary(
         self, skills: List[str], experience_years: int = 0
@@ -391,6 +884,9 @@ Write the enhanced description now (ONLY the description, nothing else):"""
 
         Returns:
             Skills summary paragraph
+
+        Raises:
+            OutputRejected: If no response passed validation
         """
         prompt = f"""You are a professional resume writer. Create a compelling professional summary.
 
@@ -407,22 +903,19 @@ CRITICAL INSTRUCTIONS:
 7. Do NOT exaggerate or fabricate experience
 8. Write in third person or first person as appropriate for resume
 
-Write the professional summary now (ONLY the summary text, nothing else):"""
-
-        summary = self.generate_text(prompt, temperature=0.5, max_tokens=300)
-
-        # Clean up response
-        summary = summary.strip()
-        summary = summary.replace("**", "").replace("*", "")
-        summary = summary.replace("Professional Summary:", "").strip()
-        summary = summary.replace("Summary:", "").strip()
+Write the professional summary now."""
 
-        return summary
+        return self.generate_structured_text(
+            prompt, task="skills_summary", temperature=0.5
+        )
 
     def improve_text_quality(self, text: str, style: str = "professional") -> str:
         """
         General purpose text improvement
 
+        Text over the token budget is split on paragraph or sentence
+        boundaries, improved concurrently and stitched back in order.
+
         Args:
             text: Text to improve
             style: Desired style (professional, casual, technical, creative)
@@ -430,6 +923,16 @@ Write the professional summary now (ONLY the summary text, nothing else):"""
         Returns:
             Improved text
         """
+        pieces, joiners = self.split_input_joiners(text)
+        if len(pieces) > 1:
+            print(f"Text split into {len(pieces)} pieces", file=sys.stderr)
+        # Pieces split mid-paragraph are rejoined with a space, not a blank line
+        return join_pieces(
+            self.map_pieces(lambda piece: self._improve_piece(piece, style), pieces),
+            joiners,
+        )
+
+    def _improve_piece(self, text: str, style: str) -> str:
         prompt = f"""Improve the following text in a {style} style:
 
 Original: {text}
@@ -443,7 +946,61 @@ Requirements:
 
 Improved Text:"""
 
-        return self.generate_text(prompt, temperature=0.5)
+        return self.generate_text(
+            prompt, temperature=0.5, task="improve", input_tokens=estimate_tokens(text)
+        )
+
+    def enhance_document_chunk(
+        self, paragraphs: List[str], doc_type: str = "auto", instructions: str = ""
+    ) -> List[Optional[str]]:
+        """
+        Improve consecutive document paragraphs in a single call
+
+        Args:
+            paragraphs: Paragraph texts in document order
+            doc_type: Document type (auto, academic, technical, business)
+            instructions: Optional user instructions
+
+        Returns:
+            Improved text per paragraph, None where the response dropped one
+        """
+        numbered = "\n".join(
+            f"[[{i}]] {text}" for i, text in enumerate(paragraphs, 1)
+        )
+        kind = "" if doc_type in ("", "auto") else f"{doc_type} "
+        extra = f"\nUser Instructions: {instructions}\n" if instructions else ""
+
+        prompt = f"""Improve each paragraph of this {kind}document excerpt.
+{extra}
+Requirements:
+- Fix grammar, spelling and awkward phrasing
+- Improve clarity and flow while keeping the original meaning and tone
+- Keep every paragraph separate and about the same length
+- Keep technical terms, names, numbers and equations unchanged
+- Return every paragraph, prefixed with its [[n]] marker, in the same order
+- No commentary and no markdown formatting
+
+Paragraphs:
+{numbered}
+
+Improved Paragraphs:"""
+
+        response = self.generate_text(
+            prompt,
+            temperature=0.4,
+            task="document_chunk",
+            input_tokens=estimate_tokens(numbered),
+        )
+
+        improved: List[Optional[str]] = [None] * len(paragraphs)
+        parts = PARAGRAPH_MARKER.split(response)
+        # parts = [preamble, "1", text, "2", text, ...]
+        for number, text in zip(parts[1::2], parts[2::2]):
+            index = int(number) - 1
+            text = text.strip().replace("**", "")
+            if 0 <= index < len(paragraphs) and text:
+                improved[index] = text
+        return improved
 
     def generate_json_structured(
         self, prompt: str, schema: Dict[str, Any]
@@ -465,7 +1022,7 @@ Respond with valid JSON matching this structure:
 
 JSON Response:"""
 
-        response_text = self.generate_text(full_prompt, temperature=0.5)
+        response_text = self.generate_text(full_prompt, temperature=0.5, task="json")
 
         try:
             # Extract JSON from response
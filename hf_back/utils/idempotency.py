@@ -0,0 +1,245 @@
+"""
+Idempotency Utility
+Run each Idempotency-Key once and replay its stored response to retries, across workers
+"""
+
+import hashlib
+import io
+import itertools
+import json
+import os
+import re
+import secrets
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, BinaryIO, Dict, List, Optional, Tuple
+
+from utils.cache_backend import CacheBackend, get_cache_backend
+from utils.spool import STREAM_CHUNK_SIZE, spool_size
+
+# Keys in the "idempotency" and "idempotency_claims" cache namespaces (see
+# utils/cache_backend.py), shared by every worker, or every replica with
+# the redis backend:
+#   result:<digest>  JSON metadata line, then the response body
+#   claim:<digest>   held by the request running the key, until it
+#                    finishes or CLAIM_TTL passes (the worker died); in
+#                    its own namespace so large results never evict it
+# digest = sha256(tenant, key), so tenants cannot replay each other's keys.
+# Expiry is the backend's TTL.
+
+KEY_PATTERN = re.compile(r"[\x21-\x7e]{1,255}")
+
+
+@dataclass
+class IdempotencyClaim:
+    """Exclusive right to run one key, held until complete() or abandon()"""
+
+    digest: str
+    fingerprint: str
+    token: bytes
+
+
+class IdempotencyStore:
+    """Shared store of responses by idempotency key"""
+
+    HEADER = "Idempotency-Key"
+    REPLAY_HEADER = "Idempotent-Replayed"
+
+    def __init__(
+        self,
+        backend: Optional[CacheBackend] = None,
+        claims: Optional[CacheBackend] = None,
+        ttl: Optional[float] = None,
+        max_bytes: Optional[int] = None,
+        claim_ttl: Optional[float] = None,
+    ):
+        """
+        Initialize idempotency store
+
+        Args:
+            backend: Shared cache for responses (CACHE_BACKEND, namespace
+                "idempotency")
+            claims: Shared cache for claims (CACHE_BACKEND, namespace
+                "idempotency_claims")
+            ttl: Seconds a stored response is replayed (IDEMPOTENCY_TTL)
+            max_bytes: Largest response body stored (IDEMPOTENCY_MAX_BYTES)
+            claim_ttl: Seconds a claim outlives a worker that died while
+                running its key (IDEMPOTENCY_CLAIM_TTL)
+        """
+        self.backend = backend or get_cache_backend("idempotency")
+        self.claims = claims or get_cache_backend("idempotency_claims")
+        self.ttl = ttl or float(os.getenv("IDEMPOTENCY_TTL", "3600"))
+        self.max_bytes = max_bytes or int(
+            os.getenv("IDEMPOTENCY_MAX_BYTES", str(20 * 1024 * 1024))
+        )
+        self.claim_ttl = claim_ttl or float(os.getenv("IDEMPOTENCY_CLAIM_TTL", "300"))
+
+        self.counters = {
+            "claimed": 0,
+            "stored": 0,
+            "replayed": 0,
+            "mismatched": 0,
+            "busy": 0,
+            "abandoned": 0,
+        }
+        self._lock = threading.Lock()
+
+    # ------------------------------------------------------------------
+    # Keys
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def valid_key(key: str) -> bool:
+        """Printable ASCII, at most 255 characters"""
+        return bool(KEY_PATTERN.fullmatch(key))
+
+    @staticmethod
+    def fingerprint(method: str, path: str, body: bytes) -> str:
+        """Hash of the request a key was first used for"""
+        sha = hashlib.sha256(f"{method} {path}\n".encode())
+        sha.update(body)
+        return sha.hexdigest()
+
+    @staticmethod
+    def _digest(tenant: str, key: str) -> str:
+        return hashlib.sha256(f"{tenant}\0{key}".encode()).hexdigest()
+
+    def _count(self, key: str, amount: int = 1):
+        with self._lock:
+            self.counters[key] += amount
+
+    # ------------------------------------------------------------------
+    # Claim, complete and replay
+    # ------------------------------------------------------------------
+
+    def begin(self, tenant: str, key: str, fingerprint: str) -> Tuple[str, Any]:
+        """
+        Claim a key, or find the response stored for it
+
+        A request that finds the key running in another thread or worker
+        gets "busy" straight away rather than holding its thread while it
+        waits; the client retries and then gets the stored response.
+
+        Returns:
+            ("run", IdempotencyClaim) - caller does the work, then
+                calls complete() or abandon()
+            ("replay", (metadata, body file)) - stored response
+            ("mismatch", None) - key was used for a different request
+            ("busy", None) - another request is running the key
+
+        Raises:
+            CacheUnavailable: If the shared backend cannot be reached
+        """
+        digest = self._digest(tenant, key)
+        token = secrets.token_hex(8).encode()
+
+        stored = self._load(digest)
+        if stored is None:
+            if self.claims.add(f"claim:{digest}", token, self.claim_ttl):
+                # The holder may have stored its result just before releasing
+                stored = self._load(digest)
+                if stored is None:
+                    self._count("claimed")
+                    return "run", IdempotencyClaim(digest, fingerprint, token)
+                self.claims.delete_if(f"claim:{digest}", token)
+            else:
+                # ...or just after this request looked
+                stored = self._load(digest)
+                if stored is None:
+                    self._count("busy")
+                    return "busy", None
+
+        meta, body = stored
+        if meta["fingerprint"] != fingerprint:
+            self._count("mismatched")
+            return "mismatch", None
+        self._count("replayed")
+        return "replay", stored
+
+    def complete(
+        self,
+        claim: IdempotencyClaim,
+        status: int,
+        headers: List[Tuple[str, str]],
+        body: BinaryIO,
+        ttl: Optional[float] = None,
+    ):
+        """
+        Store the response for a claimed key and release it
+
+        Args:
+            claim: Claim returned by begin()
+            status: HTTP status
+            headers: Response headers to replay
+            body: Rewound response body (read to the end if stored)
+            ttl: Seconds to replay it, if shorter than the store's TTL
+        """
+        try:
+            size = spool_size(body)
+            if size > self.max_bytes:
+                self._count("abandoned")
+                return
+            meta = {
+                "fingerprint": claim.fingerprint,
+                "status": status,
+                "headers": headers,
+                "size": size,
+                "created_at": time.time(),
+            }
+            header = json.dumps(meta).encode() + b"\n"
+            # Copied into the backend a chunk at a time, never whole
+            chunks = itertools.chain(
+                (header,), iter(lambda: body.read(STREAM_CHUNK_SIZE), b"")
+            )
+            self.backend.set_stream(
+                f"result:{claim.digest}",
+                chunks,
+                len(header) + size,
+                min(ttl or self.ttl, self.ttl),
+            )
+            self._count("stored")
+        finally:
+            self._release(claim)
+
+    def abandon(self, claim: IdempotencyClaim):
+        """Release a claimed key without storing a response; a retry runs it again"""
+        self._count("abandoned")
+        self._release(claim)
+
+    def _load(self, digest: str) -> Optional[Tuple[Dict[str, Any], BinaryIO]]:
+        """Stored (metadata, body) for a digest, unless missing or expired"""
+        record = self.backend.get(f"result:{digest}")
+        if record is None:
+            return None
+        body = io.BytesIO(record)
+        try:
+            meta = json.loads(body.readline())
+        except ValueError:
+            return None
+        # The body is read from where the header ends, without a copy
+        return meta, body
+
+    def _release(self, claim: IdempotencyClaim):
+        # Only drop the claim if it is still ours (it may have expired
+        # and been taken by another request); one step, so a takeover
+        # cannot land between the check and the delete
+        self.claims.delete_if(f"claim:{claim.digest}", claim.token)
+
+    def stats(self) -> Dict[str, Any]:
+        """Counters for this process"""
+        with self._lock:
+            counters = dict(self.counters)
+        return {"backend": self.backend.kind, "ttl": self.ttl, **counters}
+
+
+# Singleton instance
+_idempotency_store = None
+
+
+def get_idempotency_store() -> IdempotencyStore:
+    """Get or create IdempotencyStore singleton"""
+    global _idempotency_store
+    if _idempotency_store is None:
+        _idempotency_store = IdempotencyStore()
+    return _idempotency_store
@@ -0,0 +1,134 @@
+"""
+Load Shedder Utility
+Rejects or degrades requests whose expected queue wait exceeds the SLO
+"""
+
+import math
+import os
+import threading
+from typing import Any, Dict, Optional
+
+
+class LoadShedder:
+    """Estimate queue wait from recent latency and decide admission"""
+
+    def __init__(
+        self,
+        max_wait_ms: Optional[float] = None,
+        degrade_ai: Optional[bool] = None,
+        alpha: float = 0.2,
+    ):
+        """
+        Initialize load shedder
+
+        Args:
+            max_wait_ms: Longest expected queue wait to admit (LOAD_SHED_MAX_WAIT_MS)
+            degrade_ai: Serve AI requests without AI before rejecting them
+                (LOAD_SHED_DEGRADE_AI)
+            alpha: Weight of the newest sample in the latency moving averages
+        """
+        self.max_wait = (
+            max_wait_ms
+            if max_wait_ms is not None
+            else float(os.getenv("LOAD_SHED_MAX_WAIT_MS", "3000"))
+        ) / 1000
+        self.degrade_ai = (
+            degrade_ai
+            if degrade_ai is not None
+            else os.getenv("LOAD_SHED_DEGRADE_AI", "true").lower() == "true"
+        )
+        self.alpha = alpha
+
+        self.route_latency: Dict[str, float] = {}
+        self.class_latency: Dict[str, float] = {}
+        self.shed: Dict[str, int] = {}
+        self.degraded: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def _ewma(self, table: Dict[str, float], key: str, value: float):
+        previous = table.get(key)
+        table[key] = (
+            value
+            if previous is None
+            else self.alpha * value + (1 - self.alpha) * previous
+        )
+
+    @staticmethod
+    def _route_key(route: str, endpoint_class: str) -> str:
+        # A route served in two classes (AI, or degraded to a render) has
+        # very different latencies in each
+        return f"{endpoint_class} {route}"
+
+    def observe(self, route: str, endpoint_class: str, seconds: float):
+        """Record how long an admitted request took to serve"""
+        with self._lock:
+            self._ewma(self.route_latency, self._route_key(route, endpoint_class), seconds)
+            self._ewma(self.class_latency, endpoint_class, seconds)
+
+    def expected_wait(
+        self, endpoint_class: str, bulkhead: Any, route: Optional[str] = None
+    ) -> float:
+        """
+        Expected seconds a new request would queue in a bulkhead
+
+        Every request ahead (queued plus the new one) needs a free slot; with
+        `limit` slots turning over once per average service time, that is
+        ceil(ahead / limit) service times. The service time is the route's
+        recent latency in this class, or the class's until the route has one,
+        so one slow route does not set the estimate for the rest of its class.
+        """
+        if bulkhead.in_flight < bulkhead.limit:
+            return 0.0
+        ahead = bulkhead.waiting + 1
+        latency = None
+        if route is not None:
+            latency = self.route_latency.get(self._route_key(route, endpoint_class))
+        if latency is None:
+            latency = self.class_latency.get(endpoint_class, 0.0)
+        return math.ceil(ahead / bulkhead.limit) * latency
+
+    def over_slo(self, expected_wait: float) -> bool:
+        return expected_wait > self.max_wait
+
+    def retry_after(self, endpoint_class: str, expected_wait: float = 0.0) -> int:
+        """Seconds for the Retry-After header"""
+        wait = expected_wait or self.class_latency.get(endpoint_class, 1.0)
+        return max(1, math.ceil(wait))
+
+    def record_shed(self, endpoint_class: str):
+        with self._lock:
+            self.shed[endpoint_class] = self.shed.get(endpoint_class, 0) + 1
+
+    def record_degraded(self, route: str):
+        with self._lock:
+            self.degraded[route] = self.degraded.get(route, 0) + 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Shedding counters and latency averages"""
+        with self._lock:
+            return {
+                "max_wait_ms": self.max_wait * 1000,
+                "degrade_ai": self.degrade_ai,
+                "shed": dict(self.shed),
+                "degraded": dict(self.degraded),
+                "route_latency_ms": {
+                    route: round(seconds * 1000, 1)
+                    for route, seconds in self.route_latency.items()
+                },
+                "class_latency_ms": {
+                    name: round(seconds * 1000, 1)
+                    for name, seconds in self.class_latency.items()
+                },
+            }
+
+
+# Singleton instance
+_load_shedder = None
+
+
+def get_load_shedder() -> LoadShedder:
+    """Get or create LoadShedder singleton"""
+    global _load_shedder
+    if _load_shedder is None:
+        _load_shedder = LoadShedder()
+    return _load_shedder
@@ -0,0 +1,300 @@
+"""
+Markdown DOCX Utility
+Incremental markdown-to-DOCX writer for AI-generated document text
+"""
+
+import re
+from typing import Iterable, List, Optional, Union
+
+from docx.oxml.ns import qn
+from docx.shared import Inches, RGBColor
+
+from utils.ooxml_fragments import append_to_body, style_id
+
+HEADING = re.compile(r"^(#{1,6})\s+(.*?)\s*#*\s*$")
+BOLD_LINE = re.compile(r"^(\*\*|__)(.+?)\1:?$")
+BULLET = re.compile(r"^(\s*)[-*+•]\s+(.*)$")
+NUMBERED = re.compile(r"^(\s*)\d+[.)]\s+(.*)$")
+RULE = re.compile(r"^\s*([-*_])(\s*\1){2,}\s*$")
+TABLE_ROW = re.compile(r"^\s*\|(.*)\|?\s*$")
+TABLE_SEPARATOR = re.compile(r"^\s*\|?\s*:?-{2,}:?\s*(\|\s*:?-{2,}:?\s*)*\|?\s*$")
+FENCE = re.compile(r"^\s*(```|~~~)")
+
+# Bold-italic, bold, italic, inline code and links, in that order
+INLINE = re.compile(
+    r"\*\*\*(?P<bold_italic>.+?)\*\*\*"
+    r"|(?P<bold_marker>\*\*|__)(?P<bold>.+?)(?P=bold_marker)"
+    r"|\*(?P<italic>[^\s*](?:.*?[^\s*])?)\*"
+    r"|(?<!\w)_(?P<underscore>[^\s_](?:.*?[^\s_])?)_(?!\w)"
+    r"|`(?P<code>[^`]+)`"
+    r"|\[(?P<link>[^\]]+)\]\((?P<url>[^)\s]+)\)"
+)
+
+CODE_FONT = "Courier New"
+LINK_COLOR = str(RGBColor(0, 102, 204))
+
+
+def strip_inline(text: str) -> str:
+    """Text with inline markdown markers removed"""
+    return INLINE.sub(
+        lambda m: next(g for g in m.groups() if g and g not in ("**", "__")), text
+    )
+
+
+class MarkdownDocxWriter:
+    """
+    Append markdown to a python-docx Document as it arrives
+
+    Text is fed in chunks of any size (a streaming AI response) and each
+    complete line is written at once, so the document is ready to save
+    as soon as close() has flushed the last line. Supports ATX headings,
+    bold-only lines as headings, bullet and numbered lists (two levels),
+    pipe tables, code fences, quotes and inline bold, italic, code and
+    links. Plain-text responses keep the old heuristic: the first line
+    of a block, if short and not ending a sentence, is a heading.
+    """
+
+    def __init__(
+        self,
+        doc,
+        generator,
+        heading_level: int = 1,
+        guess_heading_chars: int = 50,
+        size: int = 11,
+    ):
+        """
+        Initialize writer
+
+        Args:
+            doc: Document to append to
+            generator: DocxGenerator, for fonts and heading style
+            heading_level: DOCX level of the response's top headings
+            guess_heading_chars: Plain first lines shorter than this are
+                headings (0 disables the guess)
+            size: Body font size in points
+        """
+        self.doc = doc
+        self.generator = generator
+        self.heading_level = heading_level
+        self.guess_heading_chars = guess_heading_chars
+        self.size = size
+
+        self._pending = ""
+        self._block_start = True
+        self._spaced = True
+        self._code = False
+        self._top_markdown_level: Optional[int] = None
+        # Bold-line and guessed headings are siblings of the last heading
+        self._section_level = heading_level
+        self._table = None
+        self._table_rows = 0
+        self._body = doc.element.body
+        self._start = len(self._content_elements())
+
+    # ------------------------------------------------------------------
+    # Input
+    # ------------------------------------------------------------------
+
+    def feed(self, chunk: str):
+        """Write every line completed by this chunk"""
+        if "\n" not in chunk:
+            self._pending += chunk
+            return
+        lines = (self._pending + chunk).split("\n")
+        self._pending = lines.pop()
+        for line in lines:
+            self._line(line.rstrip("\r"))
+
+    def close(self):
+        """Write the last line and end any open table or block"""
+        if self._pending:
+            self._line(self._pending.rstrip("\r"))
+            self._pending = ""
+        self._end_table()
+
+    def write(self, text: Union[str, Iterable[str]]):
+        """Feed a whole text or an iterable of chunks, then close()"""
+        for chunk in [text] if isinstance(text, str) else text:
+            self.feed(chunk)
+        self.close()
+
+    def rollback(self):
+        """Remove everything this writer added (e.g. when a stream fails midway)"""
+        for element in self._content_elements()[self._start :]:
+            self._body.remove(element)
+        self._pending = ""
+        self._table = None
+
+    def _content_elements(self) -> List:
+        return [el for el in self._body.iterchildren() if el.tag != qn("w:sectPr")]
+
+    # ------------------------------------------------------------------
+    # Blocks
+    # ------------------------------------------------------------------
+
+    def _line(self, line: str):
+        if FENCE.match(line):
+            self._end_table()
+            self._code = not self._code
+            self._block_start = False
+            return
+        if self._code:
+            self._paragraph(line, font=CODE_FONT, size=self.size - 1)
+            return
+
+        stripped = line.strip()
+        if not stripped:
+            self._end_block()
+            return
+
+        if TABLE_ROW.match(line) or (self._table is not None and TABLE_SEPARATOR.match(line)):
+            self._table_line(stripped)
+            return
+        self._end_table()
+
+        if RULE.match(line):
+            self._end_block()
+            return
+
+        match = HEADING.match(stripped)
+        if match:
+            self._section_level = self._markdown_level(len(match.group(1)))
+            self._heading(strip_inline(match.group(2)), self._section_level)
+            return
+        match = BOLD_LINE.match(stripped)
+        if match and not match.group(2).rstrip(":").endswith("."):
+            self._heading(strip_inline(match.group(2)).rstrip(":"), self._section_level)
+            return
+
+        match = BULLET.match(line)
+        if match:
+            style = "List Bullet 2" if len(match.group(1)) >= 2 else "List Bullet"
+            self._paragraph(match.group(2), style=style)
+            return
+        match = NUMBERED.match(line)
+        if match:
+            style = "List Number 2" if len(match.group(1)) >= 2 else "List Number"
+            self._paragraph(match.group(2), style=style)
+            return
+
+        if stripped.startswith(">"):
+            self._paragraph(stripped.lstrip("> "), left_indent=Inches(0.25), italic=True)
+            return
+
+        if (
+            self._block_start
+            and len(stripped) < self.guess_heading_chars
+            and not stripped.endswith(".")
+        ):
+            self._heading(strip_inline(stripped).rstrip(":").strip(), self._section_level)
+            return
+        self._paragraph(stripped)
+
+    def _markdown_level(self, level: int) -> int:
+        """DOCX level for a markdown level, relative to the first one seen"""
+        if self._top_markdown_level is None:
+            self._top_markdown_level = level
+        return min(9, self.heading_level + max(0, level - self._top_markdown_level))
+
+    def _end_block(self):
+        """Blank line: one spacing paragraph between blocks, like the manual sections"""
+        self._end_table()
+        if not self._spaced:
+            self.doc.add_paragraph()
+            self._spaced = True
+        self._block_start = True
+
+    def _heading(self, text: str, level: int):
+        if text:
+            self.generator._add_heading(self.doc, text, level=level)
+            self._spaced = False
+        self._block_start = False
+
+    def _paragraph(
+        self, text: str, style: Optional[str] = None, left_indent=None, **formatting
+    ):
+        p = self.generator.fragments.paragraph(
+            None, style=style_id(style) if style else None, left_indent=left_indent
+        )
+        para = append_to_body(self.doc, p)
+        self._runs(para, text, **formatting)
+        self._spaced = False
+        self._block_start = False
+        return para
+
+    def _runs(
+        self,
+        para,
+        text: str,
+        italic: bool = False,
+        font: Optional[str] = None,
+        size: Optional[int] = None,
+        bold: bool = False,
+    ):
+        """Add text to a paragraph as runs, one per inline format"""
+        position = 0
+        for match in INLINE.finditer(text):
+            if match.start() > position:
+                self._run(para, text[position : match.start()], bold, italic, font, size)
+            groups = match.groupdict()
+            if groups["bold_italic"]:
+                self._run(para, groups["bold_italic"], True, True, font, size)
+            elif groups["bold"]:
+                self._run(para, groups["bold"], True, italic, font, size)
+            elif groups["italic"] or groups["underscore"]:
+                inner = groups["italic"] or groups["underscore"]
+                self._run(para, inner, bold, True, font, size)
+            elif groups["code"]:
+                self._run(para, groups["code"], bold, italic, CODE_FONT, size)
+            else:
+                self._run(para, groups["link"], bold, italic, font, size, LINK_COLOR)
+            position = match.end()
+        if position < len(text):
+            self._run(para, text[position:], bold, italic, font, size)
+
+    def _run(self, para, text: str, bold: bool, italic: bool, font, size, color=None):
+        para._p.append(
+            self.generator.fragments.run(
+                text,
+                font=font or self.generator.default_font,
+                size=size or self.size,
+                bold=bold or None,
+                italic=italic or None,
+                color=color,
+            )
+        )
+
+    # ------------------------------------------------------------------
+    # Tables
+    # ------------------------------------------------------------------
+
+    def _table_line(self, line: str):
+        if TABLE_SEPARATOR.match(line):
+            # The row above it was the header
+            if self._table is not None and self._table_rows == 1:
+                for cell in self._table.rows[0].cells:
+                    for para in cell.paragraphs:
+                        for run in para.runs:
+                            run.bold = True
+            return
+
+        cells = [cell.strip() for cell in line.strip().strip("|").split("|")]
+        if self._table is None:
+            self._table = self.doc.add_table(rows=0, cols=len(cells))
+            self._table.style = "Table Grid"
+            self._table_rows = 0
+        columns = len(self._table.columns)
+        # Fold extra cells into the last column, pad short rows
+        if len(cells) > columns:
+            cells = cells[: columns - 1] + [" | ".join(cells[columns - 1 :])]
+        row = self._table.add_row()
+        for cell, text in zip(row.cells, cells):
+            self._runs(cell.paragraphs[0], text, size=self.size - 1)
+        self._table_rows += 1
+        self._spaced = False
+        self._block_start = False
+
+    def _end_table(self):
+        """Stop adding rows; the blank line after a table adds its spacing"""
+        self._table = None
+        self._table_rows = 0
@@ -0,0 +1,255 @@
+"""
+OOXML Fragments Utility
+Pre-built WordprocessingML elements, copied and filled in instead of styled through python-docx
+"""
+
+import copy
+import re
+from typing import Any, Callable, Dict, Hashable, Iterable, List, Optional, Sequence, Tuple
+from xml.sax.saxutils import quoteattr
+
+from docx.oxml import parse_xml
+from docx.oxml.ns import nsdecls, qn
+from docx.shared import Length
+from docx.text.paragraph import Paragraph
+
+SECT_PR = qn("w:sectPr")
+TEXT = qn("w:t")
+RUN = qn("w:r")
+PLACEHOLDER = re.compile(r"\{(\w+)\}")
+
+
+def style_id(name: str) -> str:
+    """Id of a built-in style in python-docx's default template, e.g. ListBullet"""
+    return name.replace(" ", "")
+
+
+def set_run_text(r, text: str):
+    """Replace a w:r's text, with the same XML python-docx's run.text writes"""
+    t = r.find(TEXT)
+    if t is None or not text or "\t" in text or "\n" in text or "\r" in text:
+        # Tabs and line breaks become w:tab and w:br elements
+        r.text = text
+        return
+    t.text = text
+    if len(text.strip()) < len(text):
+        t.set(qn("xml:space"), "preserve")
+    else:
+        t.attrib.pop(qn("xml:space"), None)
+
+
+def append_to_body(doc, element) -> Paragraph:
+    """
+    Append an element to the end of the document body (before its sectPr)
+
+    Returns:
+        The element as a python-docx Paragraph (only meaningful for a w:p)
+    """
+    body = doc.element.body
+    # sectPr is always the body's last child; python-docx searches for it
+    try:
+        last = body[-1]
+    except IndexError:
+        last = None
+    if last is not None and last.tag == SECT_PR:
+        last.addprevious(element)
+    else:
+        body.append(element)
+    return Paragraph(element, doc._body)
+
+
+def append_rows(table, rows: Iterable[Sequence[Any]]):
+    """
+    Append rows of cell text to a table
+
+    The first row is built by python-docx (table.add_row() and cell.text)
+    and every row is a copy of it with the text replaced, so the result
+    matches adding each row through the proxies.
+    """
+    tbl = table._tbl
+    prototype = None
+    for values in rows:
+        if prototype is None:
+            row = table.add_row()
+            for cell in row.cells:
+                cell.text = "-"
+            prototype = row._tr
+            tbl.remove(prototype)
+        tr = copy.deepcopy(prototype)
+        for r, text in zip(list(tr.iter(RUN)), values):
+            set_run_text(r, str(text))
+        tbl.append(tr)
+
+
+def _run_properties(
+    font: Optional[str],
+    size: Optional[float],
+    bold: Optional[bool],
+    italic: Optional[bool],
+    color: Optional[str],
+) -> str:
+    # Children in schema order; None leaves a property inherited,
+    # False writes it explicitly off as python-docx does
+    parts = []
+    if font:
+        parts.append(f"<w:rFonts w:ascii={quoteattr(font)} w:hAnsi={quoteattr(font)}/>")
+    for tag, value in (("b", bold), ("i", italic)):
+        if value is not None:
+            parts.append(f"<w:{tag}/>" if value else f'<w:{tag} w:val="0"/>')
+    if color:
+        parts.append(f'<w:color w:val="{color}"/>')
+    if size:
+        parts.append(f'<w:sz w:val="{int(round(size * 2))}"/>')
+    return f"<w:rPr>{''.join(parts)}</w:rPr>" if parts else ""
+
+
+class FragmentCache:
+    """
+    Prototype elements keyed by their formatting, deep-copied on use
+
+    Styling through python-docx proxies resolves style names and builds
+    property elements one attribute at a time, on every call. Here each
+    distinct fragment (a styled paragraph or run, a list item, a set of
+    cell borders, a signature block) is built once per process and each
+    use copies it and fills in the text. Prototypes are never handed
+    out, so callers may change their copies freely.
+    """
+
+    def __init__(self):
+        """Initialize fragment cache"""
+        self._prototypes: Dict[Hashable, Any] = {}
+
+    def _prototype(self, key: Hashable, build: Callable[[], Any]) -> Any:
+        prototype = self._prototypes.get(key)
+        if prototype is None:
+            # Two threads may both build it; either copy is the same
+            prototype = self._prototypes.setdefault(key, build())
+        return prototype
+
+    # ------------------------------------------------------------------
+    # Fragments
+    # ------------------------------------------------------------------
+
+    def run(
+        self,
+        text: str,
+        font: Optional[str] = None,
+        size: Optional[float] = None,
+        bold: Optional[bool] = None,
+        italic: Optional[bool] = None,
+        color: Optional[str] = None,
+    ):
+        """
+        A w:r with the given formatting and text
+
+        Args:
+            text: Run text (tabs and newlines as in python-docx)
+            font: Font name
+            size: Size in points
+            bold: True, False (explicitly off) or None (inherited)
+            italic: True, False (explicitly off) or None (inherited)
+            color: Hex RGB, e.g. "003366"
+        """
+        key = ("run", font, size, bold, italic, color)
+        r = copy.deepcopy(
+            self._prototype(
+                key,
+                lambda: parse_xml(
+                    f"<w:r {nsdecls('w')}>"
+                    f"{_run_properties(font, size, bold, italic, color)}<w:t/></w:r>"
+                ),
+            )
+        )
+        set_run_text(r, text)
+        return r
+
+    def paragraph(
+        self,
+        text: Optional[str],
+        style: Optional[str] = None,
+        left_indent: Optional[Length] = None,
+        **run_format,
+    ):
+        """
+        A w:p with an optional style and indent, holding one formatted run
+
+        Args:
+            text: Run text; None for a paragraph without a run
+            style: Paragraph style id (see style_id())
+            left_indent: Left indent
+            run_format: font, size, bold, italic and color, as for run()
+        """
+        indent = left_indent.twips if left_indent is not None else None
+        key = ("paragraph", style, indent, text is None, tuple(sorted(run_format.items())))
+
+        def build():
+            properties = ""
+            if style or indent is not None:
+                properties = (
+                    "<w:pPr>"
+                    + (f"<w:pStyle w:val={quoteattr(style)}/>" if style else "")
+                    + (f'<w:ind w:left="{indent}"/>' if indent is not None else "")
+                    + "</w:pPr>"
+                )
+            p = parse_xml(f"<w:p {nsdecls('w')}>{properties}</w:p>")
+            if text is not None:
+                p.append(self.run("-", **run_format))
+            return p
+
+        p = copy.deepcopy(self._prototype(key, build))
+        if text is not None:
+            set_run_text(p[-1], text)
+        return p
+
+    def cell_borders(self, edges: Tuple[Tuple[str, str], ...]):
+        """
+        A w:tcBorders with a single 1/2 pt line on each edge
+
+        Args:
+            edges: (edge, hex color) pairs, edge one of left, top, right, bottom
+        """
+
+        def build():
+            lines = "".join(
+                f'<w:{edge} w:val="single" w:sz="4" w:space="0" w:color="{color}"/>'
+                for edge, color in edges
+            )
+            return parse_xml(f"<w:tcBorders {nsdecls('w')}>{lines}</w:tcBorders>")
+
+        return copy.deepcopy(self._prototype(("cell_borders", edges), build))
+
+    def block(self, key: Hashable, build: Callable[[], List[Any]], **values: str) -> List[Any]:
+        """
+        Copies of a list of elements, with {name} placeholders in their text filled
+
+        Args:
+            key: Identifies the block; build() must always return the same for it
+            build: Builds the elements, with placeholders like "{name}" in run text
+            values: Text for each placeholder
+        """
+        elements = [copy.deepcopy(el) for el in self._prototype(("block", key), build)]
+        for element in elements:
+            for r in element.iter(RUN):
+                t = r.find(TEXT)
+                if t is not None and t.text and "{" in t.text:
+                    set_run_text(
+                        r,
+                        PLACEHOLDER.sub(lambda m: values.get(m.group(1), m.group(0)), t.text),
+                    )
+        return elements
+
+    def stats(self) -> Dict[str, Any]:
+        """Number of prototypes built"""
+        return {"prototypes": len(self._prototypes)}
+
+
+# Singleton instance
+_fragment_cache = None
+
+
+def get_fragment_cache() -> FragmentCache:
+    """Get or create FragmentCache singleton"""
+    global _fragment_cache
+    if _fragment_cache is None:
+        _fragment_cache = FragmentCache()
+    return _fragment_cache
@@ -0,0 +1,201 @@
+"""
+Output Budget Utility
+Per-task response length statistics and adaptive max_output_tokens caps
+"""
+
+import math
+import os
+import threading
+from collections import deque
+from typing import Any, Dict
+
+# Recent responses kept per task, and how many before caps adapt
+OUTPUT_STATS_WINDOW = int(os.getenv("OUTPUT_STATS_WINDOW", "200"))
+OUTPUT_MIN_SAMPLES = int(os.getenv("OUTPUT_MIN_SAMPLES", "20"))
+
+# Cap = this percentile of observed lengths plus headroom
+OUTPUT_CAP_PERCENTILE = float(os.getenv("OUTPUT_CAP_PERCENTILE", "95"))
+OUTPUT_CAP_HEADROOM = float(os.getenv("OUTPUT_CAP_HEADROOM", "0.25"))
+
+MIN_OUTPUT_TOKENS = 64
+MAX_OUTPUT_TOKENS = 8192
+
+# Caps used until a task has OUTPUT_MIN_SAMPLES responses
+DEFAULT_CAPS = {
+    "resume_bullet": 2048,
+    "cover_letter": 1500,
+    "proposal": 2048,
+    "contract": 2048,
+    "portfolio": 2048,
+    "skills_summary": 300,
+    "json": 2048,
+    "generic": 2048,
+    # Scaled tasks: minimum cap before learning
+    "improve": 2048,
+    "contract_clauses": 2048,
+    "contract_clause": 512,
+    "document_chunk": 512,
+}
+
+# Rewrites whose response length follows the input; their statistics are
+# output/input token ratios and the cap scales with the input
+SCALED_TASKS = {"improve", "contract_clauses", "contract_clause", "document_chunk"}
+DEFAULT_OUTPUT_RATIO = 2.0
+
+
+def _percentile(ordered: list, percent: float) -> float:
+    """Nearest-rank percentile of a sorted, non-empty list"""
+    return ordered[max(0, math.ceil(percent / 100 * len(ordered)) - 1)]
+
+
+class TaskStats:
+    """Sliding window of response lengths (or ratios) for one task"""
+
+    def __init__(self, window: int):
+        self.samples: deque = deque(maxlen=window)
+        self.calls = 0
+        self.truncations = 0
+        self.output_tokens = 0
+
+    def percentile(self, percent: float) -> float:
+        return _percentile(sorted(self.samples), percent)
+
+
+class OutputBudget:
+    """Learn per-task max_output_tokens from observed response lengths"""
+
+    def __init__(
+        self,
+        window: int = OUTPUT_STATS_WINDOW,
+        min_samples: int = OUTPUT_MIN_SAMPLES,
+        percentile: float = OUTPUT_CAP_PERCENTILE,
+        headroom: float = OUTPUT_CAP_HEADROOM,
+    ):
+        """
+        Initialize output budget
+
+        Args:
+            window: Responses kept per task (OUTPUT_STATS_WINDOW)
+            min_samples: Responses needed before a task's cap adapts
+                (OUTPUT_MIN_SAMPLES)
+            percentile: Percentile of observed lengths the cap covers
+                (OUTPUT_CAP_PERCENTILE)
+            headroom: Fraction added on top of the percentile (OUTPUT_CAP_HEADROOM)
+        """
+        self.window = window
+        self.min_samples = min_samples
+        self.percentile = percentile
+        self.headroom = headroom
+        self._tasks: Dict[str, TaskStats] = {}
+        self._lock = threading.Lock()
+
+    def _task(self, task: str) -> TaskStats:
+        stats = self._tasks.get(task)
+        if stats is None:
+            stats = self._tasks[task] = TaskStats(self.window)
+        return stats
+
+    def cap(self, task: str, input_tokens: int = 0) -> int:
+        """
+        max_output_tokens for the next call of a task
+
+        Args:
+            task: Task name (see DEFAULT_CAPS)
+            input_tokens: Estimated tokens of the text being rewritten,
+                for tasks in SCALED_TASKS
+
+        Returns:
+            Token cap, clamped to [MIN_OUTPUT_TOKENS, MAX_OUTPUT_TOKENS]
+        """
+        default = DEFAULT_CAPS.get(task, DEFAULT_CAPS["generic"])
+        with self._lock:
+            stats = self._tasks.get(task)
+            learned = stats is not None and len(stats.samples) >= self.min_samples
+            observed = stats.percentile(self.percentile) if learned else None
+
+        if task in SCALED_TASKS:
+            if observed is None:
+                cap = max(default, input_tokens * DEFAULT_OUTPUT_RATIO)
+            else:
+                cap = max(input_tokens, 1) * observed * (1 + self.headroom)
+        else:
+            cap = default if observed is None else observed * (1 + self.headroom)
+        return int(min(MAX_OUTPUT_TOKENS, max(MIN_OUTPUT_TOKENS, cap)))
+
+    def record(
+        self,
+        task: str,
+        output_tokens: int,
+        truncated: bool,
+        cap: int,
+        input_tokens: int = 0,
+    ):
+        """
+        Record one response
+
+        A truncated response only shows its length is at least `cap`, so
+        it is recorded as twice the cap to push the percentile up quickly.
+        """
+        length = cap * 2 if truncated else output_tokens
+        sample = length / max(input_tokens, 1) if task in SCALED_TASKS else length
+        with self._lock:
+            stats = self._task(task)
+            stats.samples.append(sample)
+            stats.calls += 1
+            stats.output_tokens += output_tokens
+            if truncated:
+                stats.truncations += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Per-task counts, length percentiles and the current cap"""
+        with self._lock:
+            snapshot = {
+                task: (
+                    stats.calls,
+                    stats.truncations,
+                    stats.output_tokens,
+                    sorted(stats.samples),
+                )
+                for task, stats in self._tasks.items()
+            }
+
+        tasks = {}
+        for task, (calls, truncations, output_tokens, samples) in snapshot.items():
+            tasks[task] = {
+                "calls": calls,
+                "truncations": truncations,
+                "truncation_rate": round(truncations / calls, 4) if calls else 0.0,
+                "mean_output_tokens": round(output_tokens / calls, 1) if calls else 0.0,
+                "unit": "output/input ratio" if task in SCALED_TASKS else "tokens",
+                "samples": len(samples),
+                "p50": round(_percentile(samples, 50), 2) if samples else None,
+                "p95": round(_percentile(samples, 95), 2) if samples else None,
+                "max": round(samples[-1], 2) if samples else None,
+                "adaptive": len(samples) >= self.min_samples,
+                "default_cap": DEFAULT_CAPS.get(task, DEFAULT_CAPS["generic"]),
+                "cap": None if task in SCALED_TASKS else self.cap(task),
+            }
+        return {
+            "window": self.window,
+            "min_samples": self.min_samples,
+            "percentile": self.percentile,
+            "headroom": self.headroom,
+            "tasks": tasks,
+        }
+
+    def reset(self):
+        """Forget all statistics (caps return to their defaults)"""
+        with self._lock:
+            self._tasks.clear()
+
+
+# Singleton instance
+_output_budget = None
+
+
+def get_output_budget() -> OutputBudget:
+    """Get or create OutputBudget singleton"""
+    global _output_budget
+    if _output_budget is None:
+        _output_budget = OutputBudget()
+    return _output_budget
@@ -0,0 +1,182 @@
+"""
+Output Validation Utility
+Parse structured {"text": ...} AI responses, validate them and meter retries
+"""
+
+import json
+import os
+import re
+import threading
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, Tuple
+
+# Retries may use at most this fraction of first attempts, process-wide
+STRUCTURED_RETRY_RATIO = float(os.getenv("STRUCTURED_RETRY_RATIO", "0.2"))
+# Retries per call when the budget allows
+STRUCTURED_MAX_RETRIES = int(os.getenv("STRUCTURED_MAX_RETRIES", "1"))
+
+# Response schema for enhancement calls: a single text field
+TEXT_SCHEMA = {
+    "type": "OBJECT",
+    "properties": {"text": {"type": "STRING"}},
+    "required": ["text"],
+}
+
+JSON_INSTRUCTION = (
+    'Respond with JSON only, exactly {"text": "<your final text>"}, '
+    "with no markdown and no other keys."
+)
+
+# Signs the model answered with a menu of alternatives or commentary
+CHATTER = re.compile(
+    r"\b(option \d|here (?:are|is|'s)|choose one|alternatively|as an ai)\b",
+    re.IGNORECASE,
+)
+CODE_FENCE = re.compile(r"^```(?:json)?\s*|\s*```$")
+
+
+@dataclass
+class TextRules:
+    """Acceptance rules for one task's text"""
+
+    min_chars: int = 10
+    max_paragraphs: int = 1
+
+
+TASK_RULES = {
+    "resume_bullet": TextRules(min_chars=10, max_paragraphs=1),
+    "skills_summary": TextRules(min_chars=20, max_paragraphs=1),
+    "portfolio": TextRules(min_chars=20, max_paragraphs=2),
+}
+
+
+class OutputRejected(Exception):
+    """Raised when no acceptable output was produced within the retry budget"""
+
+
+class OutputValidator:
+    """Centralized parsing and validation of structured text responses"""
+
+    def __init__(
+        self,
+        retry_ratio: float = STRUCTURED_RETRY_RATIO,
+        max_retries: int = STRUCTURED_MAX_RETRIES,
+    ):
+        """
+        Initialize output validator
+
+        Args:
+            retry_ratio: Retries allowed per first attempt, process-wide
+                (STRUCTURED_RETRY_RATIO)
+            max_retries: Retries per call (STRUCTURED_MAX_RETRIES)
+        """
+        self.retry_ratio = retry_ratio
+        self.max_retries = max_retries
+        # Token bucket: each first attempt deposits retry_ratio, a retry
+        # withdraws one; capped so a quiet period cannot bank a storm
+        self._retry_tokens = 1.0
+        self._tasks: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def _task(self, task: str) -> Dict[str, Any]:
+        stats = self._tasks.get(task)
+        if stats is None:
+            stats = self._tasks[task] = {
+                "calls": 0,
+                "attempts": 0,
+                "accepted": 0,
+                "rejected": 0,
+                "retries": 0,
+                "retries_denied": 0,
+                "gave_up": 0,
+                "reasons": {},
+            }
+        return stats
+
+    def parse(self, response: str, task: str) -> Tuple[Optional[str], Optional[str]]:
+        """
+        Extract and validate the text of one structured response
+
+        Returns:
+            (text, None) when accepted, (None, reason) when rejected
+        """
+        body = CODE_FENCE.sub("", response.strip())
+        try:
+            text = json.loads(body)["text"]
+        except (ValueError, TypeError, KeyError):
+            return None, "invalid_json"
+        if not isinstance(text, str):
+            return None, "invalid_json"
+
+        text = text.replace("**", "").strip().lstrip("-• ").strip()
+        rules = TASK_RULES.get(task, TextRules())
+        if len(text) < rules.min_chars:
+            return None, "too_short"
+        if CHATTER.search(text):
+            return None, "options_or_commentary"
+        if text.count("\n\n") + 1 > rules.max_paragraphs:
+            return None, "too_many_paragraphs"
+        return text, None
+
+    def begin(self, task: str):
+        """Count a new call and deposit its share of the retry budget"""
+        with self._lock:
+            self._task(task)["calls"] += 1
+            self._retry_tokens = min(10.0, self._retry_tokens + self.retry_ratio)
+
+    def record(self, task: str, reason: Optional[str]):
+        """Count one attempt and its outcome"""
+        with self._lock:
+            stats = self._task(task)
+            stats["attempts"] += 1
+            if reason is None:
+                stats["accepted"] += 1
+            else:
+                stats["rejected"] += 1
+                stats["reasons"][reason] = stats["reasons"].get(reason, 0) + 1
+
+    def allow_retry(self, task: str, retries: int) -> bool:
+        """Take one retry from the budget, if this call and the process have any"""
+        with self._lock:
+            stats = self._task(task)
+            if retries < self.max_retries:
+                if self._retry_tokens >= 1.0:
+                    self._retry_tokens -= 1.0
+                    stats["retries"] += 1
+                    return True
+                # Rejections are widespread; retrying would only add load
+                stats["retries_denied"] += 1
+            stats["gave_up"] += 1
+            return False
+
+    def stats(self) -> Dict[str, Any]:
+        """Per-task rejection counts and the wasted-call rate"""
+        with self._lock:
+            tasks = {}
+            for task, stats in self._tasks.items():
+                attempts = stats["attempts"]
+                tasks[task] = {
+                    **stats,
+                    "reasons": dict(stats["reasons"]),
+                    "rejection_rate": round(stats["rejected"] / attempts, 4)
+                    if attempts
+                    else 0.0,
+                }
+            return {
+                "retry_ratio": self.retry_ratio,
+                "max_retries": self.max_retries,
+                "retry_tokens": round(self._retry_tokens, 2),
+                "tasks": tasks,
+            }
+
+
+# Singleton instance
+_output_validator = None
+
+
+def get_output_validator() -> OutputValidator:
+    """Get or create OutputValidator singleton"""
+    global _output_validator
+    if _output_validator is None:
+        _output_validator = OutputValidator()
+    return _output_validator
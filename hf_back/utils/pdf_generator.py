@@ -3,10 +3,9 @@ PDF Generator Utility
 Handles creation of PDF documents for portfolio exports
 """
 
-import io
 import sys
 from datetime import datetime
-from typing import Any, Dict, List, Optional
+from typing import Any, BinaryIO, Dict, List, Optional
 
 from reportlab.lib import colors
 from reportlab.lib.enums import TA_CENTER, TA_JUSTIFY, TA_LEFT, TA_RIGHT
@@ -24,6 +23,8 @@ from reportlab.platypus import (
     TableStyle,
 )
 
+from utils.spool import new_spool
+
 
 class PDFGenerator:
     """Generate professional PDF documents"""
@@ -103,7 +104,7 @@ class PDFGenerator:
             )
         )
 
-    def generate_portfolio_pdf(self, data: Dict[str, Any]) -> io.BytesIO:
+    def generate_portfolio_pdf(self, data: Dict[str, Any]) -> BinaryIO:
         """
         Generate portfolio PDF
 
@@ -120,9 +121,9 @@ class PDFGenerator:
                 - certifications: List of certifications (optional)
 
         Returns:
-            BytesIO buffer containing the PDF file
+            Spooled file containing the PDF file, rewound
         """
-        buffer = io.BytesIO()
+        buffer = new_spool()
         doc = SimpleDocTemplate(
             buffer,
             pagesize=self.page_size,
@@ -310,7 +311,7 @@ class PDFGenerator:
 
         return buffer
 
-    def generate_simple_pdf(self, content: str, title: str = "Document") -> io.BytesIO:
+    def generate_simple_pdf(self, content: str, title: str = "Document") -> BinaryIO:
         """
         Generate a simple PDF from text content
 
@@ -319,9 +320,9 @@ class PDFGenerator:
             title: Document title
 
         Returns:
-            BytesIO buffer containing the PDF file
+            Spooled file containing the PDF file, rewound
         """
-        buffer = io.BytesIO()
+        buffer = new_spool()
         doc = SimpleDocTemplate(
             buffer,
             pagesize=self.page_size,
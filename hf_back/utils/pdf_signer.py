@@ -0,0 +1,547 @@
+"""
+PDF Signer Utility
+Stamp signature images onto PDFs with an append-only incremental update
+"""
+
+import base64
+import binascii
+import hashlib
+import io
+import os
+import re
+import shutil
+import threading
+import zlib
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, BinaryIO, Dict, List, Optional, Tuple
+
+from PyPDF2 import PdfReader
+from PyPDF2.generic import ArrayObject, DictionaryObject, IndirectObject, NameObject
+
+from utils.spool import STREAM_CHUNK_SIZE, new_spool
+
+POSITIONS = ("bottom-right", "bottom-left", "top-right", "top-left", "center")
+
+# Signature box on the page, in points
+SIGNATURE_WIDTH_PT = 150.0
+SIGNATURE_MAX_HEIGHT_PT = 60.0
+MARGIN_PT = 36.0
+
+DATA_URL_PREFIX = re.compile(r"^data:image/[a-zA-Z0-9.+-]+;base64,")
+
+
+@dataclass
+class PreparedSignature:
+    """A decoded, scaled signature ready to embed"""
+
+    width: int = 0
+    height: int = 0
+    # zlib-compressed 8-bit RGB and alpha planes (alpha None if opaque)
+    rgb: bytes = b""
+    alpha: Optional[bytes] = None
+    # PNG of the scaled image, for DOCX documents
+    png: bytes = b""
+    # Typed signature when no image was sent
+    text: str = ""
+
+
+class SignatureCache:
+    """LRU of prepared signatures, keyed per user and signature content"""
+
+    def __init__(self, max_entries: Optional[int] = None, max_px: Optional[int] = None):
+        """
+        Initialize signature cache
+
+        Args:
+            max_entries: Cached signatures across all users (SIGNATURE_CACHE_SIZE)
+            max_px: Longest side of a scaled signature image (SIGNATURE_MAX_PX)
+        """
+        self.max_entries = max_entries or int(os.getenv("SIGNATURE_CACHE_SIZE", "256"))
+        self.max_px = max_px or int(os.getenv("SIGNATURE_MAX_PX", "600"))
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[Tuple[str, str], PreparedSignature]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, user: str, signature: str) -> PreparedSignature:
+        """
+        Prepared signature for a user's signature data, decoding on a miss
+
+        Args:
+            user: User or tenant the signature belongs to
+            signature: Base64 image (optionally a data URL) or typed text
+
+        Raises:
+            ValueError: If the data claims to be an image but cannot be decoded
+        """
+        key = (user, hashlib.sha256(signature.encode()).hexdigest())
+        with self._lock:
+            prepared = self._entries.get(key)
+            if prepared is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return prepared
+            self.misses += 1
+
+        prepared = self._prepare(signature)
+        with self._lock:
+            self._entries[key] = prepared
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return prepared
+
+    def _prepare(self, signature: str) -> PreparedSignature:
+        is_data_url = bool(DATA_URL_PREFIX.match(signature))
+        try:
+            raw = base64.b64decode(DATA_URL_PREFIX.sub("", signature), validate=True)
+        except (binascii.Error, ValueError):
+            raw = None
+
+        if raw:
+            from PIL import Image, UnidentifiedImageError
+
+            try:
+                image = Image.open(io.BytesIO(raw))
+                image.load()
+            except (UnidentifiedImageError, OSError):
+                image = None
+            if image is not None:
+                return self._prepare_image(image)
+
+        if is_data_url:
+            raise ValueError("Invalid signature image")
+        return PreparedSignature(text=signature.strip()[:100])
+
+    def _prepare_image(self, image: Any) -> PreparedSignature:
+        image = image.convert("RGBA")
+        image.thumbnail((self.max_px, self.max_px))
+
+        alpha = image.getchannel("A")
+        opaque = alpha.getextrema() == (255, 255)
+        png = io.BytesIO()
+        image.save(png, format="PNG")
+
+        return PreparedSignature(
+            width=image.width,
+            height=image.height,
+            rgb=zlib.compress(image.convert("RGB").tobytes()),
+            alpha=None if opaque else zlib.compress(alpha.tobytes()),
+            png=png.getvalue(),
+        )
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+
+def parse_pages(spec: str, page_count: int) -> List[int]:
+    """
+    Turn a page selection into zero-based page indexes
+
+    Args:
+        spec: 'last' (default), 'first', 'all', or e.g. '1,3,5-7' (one-based)
+        page_count: Pages in the document
+
+    Raises:
+        ValueError: If the selection is malformed or out of range
+    """
+    spec = (spec or "last").strip().lower()
+    if spec == "last":
+        return [page_count - 1]
+    if spec == "first":
+        return [0]
+    if spec == "all":
+        return list(range(page_count))
+
+    pages = set()
+    for part in spec.split(","):
+        start, _, end = part.strip().partition("-")
+        try:
+            first, last = int(start), int(end or start)
+        except ValueError:
+            raise ValueError(f"Invalid page selection '{part}'") from None
+        if not 1 <= first <= last <= page_count:
+            raise ValueError(f"Page selection '{part}' is outside 1-{page_count}")
+        pages.update(range(first - 1, last))
+    return sorted(pages)
+
+
+def _pdf_string(text: str) -> bytes:
+    """Literal PDF string in WinAnsi-compatible bytes"""
+    raw = text.encode("latin-1", "replace")
+    for char in (b"\\", b"(", b")"):
+        raw = raw.replace(char, b"\\" + char)
+    return b"(" + raw + b")"
+
+
+class IncrementalStamper:
+    """Append signature overlays to a PDF without rewriting existing bytes"""
+
+    def __init__(self, source: BinaryIO):
+        """
+        Open a PDF for stamping
+
+        Only the cross-reference data, the page tree branch of each stamped
+        page and its inherited attributes are read, so the cost does not
+        grow with the number of pages.
+
+        Args:
+            source: Seekable PDF stream
+
+        Raises:
+            ValueError: If the PDF is encrypted or has no startxref
+        """
+        self.source = source
+        self.reader = PdfReader(source)
+        if self.reader.is_encrypted:
+            raise ValueError("Encrypted PDFs cannot be signed")
+
+        self.trailer = self.reader.trailer
+        self.prev_xref, self.uses_xref_stream = self._last_xref()
+        self.next_number = self._size()
+        self.objects: Dict[int, bytes] = {}
+
+    @property
+    def page_count(self) -> int:
+        return int(self._pages_root()["/Count"])
+
+    def _pages_root(self) -> DictionaryObject:
+        return self.trailer["/Root"].get_object()["/Pages"].get_object()
+
+    def _last_xref(self) -> Tuple[int, bool]:
+        """Offset of the final xref section and whether it is a stream"""
+        self.source.seek(0, os.SEEK_END)
+        size = self.source.tell()
+        self.source.seek(max(0, size - 1024))
+        tail = self.source.read()
+        match = re.search(rb"startxref\s+(\d+)", tail[tail.rfind(b"startxref"):])
+        if not match:
+            raise ValueError("PDF has no startxref")
+        offset = int(match.group(1))
+        self.source.seek(offset)
+        return offset, not self.source.read(4).startswith(b"xref")
+
+    def _size(self) -> int:
+        """Trailer /Size; PyPDF2 drops it when reading xref streams"""
+        if "/Size" in self.trailer:
+            return int(self.trailer["/Size"])
+        numbers = [n for entries in self.reader.xref.values() for n in entries]
+        return max([*numbers, *self.reader.xref_objStm]) + 1
+
+    def _find_page(self, index: int) -> IndirectObject:
+        """Descend the page tree to one page, reading only that branch"""
+        node = self._pages_root()
+        while True:
+            kids = node["/Kids"]
+            # Balanced writers put leaves directly under nodes like this
+            if int(node["/Count"]) == len(kids):
+                candidate = kids[index]
+                if candidate.get_object().get("/Type") == "/Page":
+                    return candidate
+            for kid in kids:
+                kid_object = kid.get_object()
+                is_node = kid_object.get("/Type") == "/Pages"
+                count = int(kid_object["/Count"]) if is_node else 1
+                if index < count:
+                    if not is_node:
+                        return kid
+                    node = kid_object
+                    break
+                index -= count
+            else:
+                raise ValueError("Page index out of range")
+
+    @staticmethod
+    def _inherited(page: DictionaryObject, key: str) -> Any:
+        node = page
+        while node is not None:
+            if key in node:
+                return node[key]
+            parent = node.get("/Parent")
+            node = parent.get_object() if parent is not None else None
+        return None
+
+    def _add_object(self, body: bytes) -> IndirectObject:
+        number = self.next_number
+        self.next_number += 1
+        self.objects[number] = body
+        return IndirectObject(number, 0, self.reader)
+
+    def _add_stream(self, header: bytes, data: bytes) -> IndirectObject:
+        return self._add_object(
+            b"<< " + header + b" /Length %d >>\nstream\n" % len(data)
+            + data + b"\nendstream"
+        )
+
+    def _embed(
+        self, signature: PreparedSignature
+    ) -> Tuple[Optional[IndirectObject], IndirectObject]:
+        """Write the image (if any) and font objects once per document"""
+        font = self._add_object(
+            b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica-Oblique"
+            b" /Encoding /WinAnsiEncoding >>"
+        )
+        if not signature.rgb:
+            return None, font
+
+        header = (
+            b"/Type /XObject /Subtype /Image /Width %d /Height %d"
+            b" /BitsPerComponent 8 /Filter /FlateDecode"
+            % (signature.width, signature.height)
+        )
+        smask = b""
+        if signature.alpha is not None:
+            mask = self._add_stream(header + b" /ColorSpace /DeviceGray", signature.alpha)
+            smask = b" /SMask %d 0 R" % mask.idnum
+        image = self._add_stream(header + b" /ColorSpace /DeviceRGB" + smask, signature.rgb)
+        return image, font
+
+    def stamp(
+        self,
+        signature: PreparedSignature,
+        pages: List[int],
+        position: str = "bottom-right",
+        signer_name: str = "",
+    ):
+        """
+        Overlay a signature on the given zero-based pages
+
+        Page rotation is not compensated; the box is placed in unrotated
+        page space.
+        """
+        image, font = self._embed(signature)
+        caption = ""
+        if signer_name:
+            caption = f"Signed by {signer_name} on {datetime.now().strftime('%B %d, %Y')}"
+        # Restores the page's own graphics state before our overlay draws
+        save_state = self._add_stream(b"", b"q")
+
+        for index in pages:
+            page_ref = self._find_page(index)
+            page = page_ref.get_object()
+            box = [float(v) for v in (
+                self._inherited(page, "/CropBox") or self._inherited(page, "/MediaBox")
+            )]
+
+            if image is not None:
+                width = SIGNATURE_WIDTH_PT
+                height = width * signature.height / signature.width
+                if height > SIGNATURE_MAX_HEIGHT_PT:
+                    width *= SIGNATURE_MAX_HEIGHT_PT / height
+                    height = SIGNATURE_MAX_HEIGHT_PT
+            else:
+                width, height = SIGNATURE_WIDTH_PT, 24.0
+            x, y = self._place(box, position, width, height)
+
+            ops = [b"Q", b"q"]
+            if image is not None:
+                ops.append(b"%.2f 0 0 %.2f %.2f %.2f cm /VeroSig Do" % (width, height, x, y))
+                ops.append(b"Q q")
+            else:
+                ops.append(
+                    b"BT /VeroSigF 20 Tf %.2f %.2f Td %s Tj ET"
+                    % (x, y + 4, _pdf_string(signature.text))
+                )
+            if caption:
+                ops.append(
+                    b"BT /VeroSigF 8 Tf %.2f %.2f Td %s Tj ET"
+                    % (x, y - 10, _pdf_string(caption))
+                )
+            ops.append(b"Q")
+            overlay = self._add_stream(b"", b"\n".join(ops))
+
+            self._rewrite_page(page_ref, page, save_state, overlay, image, font)
+
+    @staticmethod
+    def _place(
+        box: List[float], position: str, width: float, height: float
+    ) -> Tuple[float, float]:
+        left, bottom, right, top = box
+        if position == "center":
+            return (left + right - width) / 2, (bottom + top - height) / 2
+        x = left + MARGIN_PT if position.endswith("left") else right - MARGIN_PT - width
+        y = top - MARGIN_PT - height if position.startswith("top") else bottom + MARGIN_PT
+        return x, y
+
+    def _rewrite_page(self, page_ref, page, save_state, overlay, image, font):
+        """Append a new revision of the page object with the overlay added"""
+        updated = DictionaryObject(page)
+
+        # dict.get keeps indirect references, which the new array must hold
+        contents = page.get("/Contents")
+        if contents is None:
+            existing = []
+        elif isinstance(contents.get_object(), ArrayObject):
+            existing = list(contents.get_object())
+        else:
+            existing = [contents]
+        updated[NameObject("/Contents")] = ArrayObject([save_state, *existing, overlay])
+
+        # Copy, never mutate, resources that other pages may share
+        resources = self._inherited(page, "/Resources")
+        resources = DictionaryObject(resources.get_object() if resources else {})
+        if image is not None:
+            xobjects = resources.get("/XObject")
+            xobjects = DictionaryObject(xobjects.get_object() if xobjects else {})
+            xobjects[NameObject("/VeroSig")] = image
+            resources[NameObject("/XObject")] = xobjects
+        fonts = resources.get("/Font")
+        fonts = DictionaryObject(fonts.get_object() if fonts else {})
+        fonts[NameObject("/VeroSigF")] = font
+        resources[NameObject("/Font")] = fonts
+        updated[NameObject("/Resources")] = resources
+
+        for key in ("/MediaBox", "/CropBox", "/Rotate"):
+            if key not in updated and self._inherited(page, key) is not None:
+                updated[NameObject(key)] = self._inherited(page, key)
+
+        body = io.BytesIO()
+        updated.write_to_stream(body, None)
+        self.objects[page_ref.idnum] = body.getvalue()
+
+    def write(self, output: BinaryIO):
+        """
+        Copy the original bytes to `output` and append the update section
+
+        The original file is left byte-for-byte intact at the start of
+        the output, so existing signatures and viewers' caches stay valid.
+        """
+        self.source.seek(0)
+        shutil.copyfileobj(self.source, output, STREAM_CHUNK_SIZE)
+        self.source.seek(-1, os.SEEK_END)
+        newline = self.source.read(1) in (b"\n", b"\r")
+        output.write(self.update_section(output.tell(), newline))
+
+    def update_section(self, start: int, newline: bool = True) -> bytes:
+        """Objects plus a matching xref section, for appending at `start`"""
+        section = io.BytesIO()
+        if not newline:
+            section.write(b"\n")
+
+        offsets = {}
+        for number in sorted(self.objects):
+            offsets[number] = start + section.tell()
+            section.write(b"%d 0 obj\n" % number + self.objects[number] + b"\nendobj\n")
+
+        trailer = b"/Size %d /Root %d 0 R /Prev %d" % (
+            self.next_number + (1 if self.uses_xref_stream else 0),
+            self.trailer.raw_get("/Root").idnum,
+            self.prev_xref,
+        )
+        if "/Info" in self.trailer:
+            trailer += b" /Info %d 0 R" % self.trailer.raw_get("/Info").idnum
+        if "/ID" in self.trailer:
+            ids = io.BytesIO()
+            self.trailer["/ID"].write_to_stream(ids, None)
+            trailer += b" /ID " + ids.getvalue()
+
+        xref_offset = start + section.tell()
+        if self.uses_xref_stream:
+            # Originals with xref streams get an xref stream update
+            number = self.next_number
+            offsets[number] = xref_offset
+            subsections = self._subsections(offsets)
+            rows = b"".join(
+                b"\x01" + offsets[n].to_bytes(4, "big") + b"\x00\x00"
+                for first, count in subsections
+                for n in range(first, first + count)
+            )
+            index = b" ".join(b"%d %d" % pair for pair in subsections)
+            section.write(
+                b"%d 0 obj\n<< /Type /XRef %s /Index [%s] /W [1 4 2] /Length %d >>\n"
+                b"stream\n" % (number, trailer, index, len(rows))
+                + rows + b"\nendstream\nendobj\n"
+            )
+        else:
+            section.write(b"xref\n")
+            for first, count in self._subsections(offsets):
+                section.write(b"%d %d\n" % (first, count))
+                for n in range(first, first + count):
+                    section.write(b"%010d 00000 n \n" % offsets[n])
+            section.write(b"trailer\n<< " + trailer + b" >>\n")
+
+        section.write(b"startxref\n%d\n%%%%EOF\n" % xref_offset)
+        return section.getvalue()
+
+    @staticmethod
+    def _subsections(offsets: Dict[int, int]) -> List[Tuple[int, int]]:
+        """Runs of consecutive object numbers as (first, count)"""
+        runs = []
+        for number in sorted(offsets):
+            if runs and runs[-1][0] + runs[-1][1] == number:
+                runs[-1] = (runs[-1][0], runs[-1][1] + 1)
+            else:
+                runs.append((number, 1))
+        return runs
+
+
+def sign_docx(
+    source: BinaryIO,
+    signature: PreparedSignature,
+    position: str = "bottom-right",
+    signer_name: str = "",
+) -> BinaryIO:
+    """
+    Append a signature block to the end of a DOCX
+
+    Word documents have no fixed pages, so the block always goes at the
+    end; `position` only picks its alignment.
+
+    Returns:
+        Rewound spooled file with the signed document
+    """
+    from docx import Document
+    from docx.enum.text import WD_ALIGN_PARAGRAPH
+    from docx.shared import Pt
+
+    if position == "center":
+        alignment = WD_ALIGN_PARAGRAPH.CENTER
+    elif position.endswith("left"):
+        alignment = WD_ALIGN_PARAGRAPH.LEFT
+    else:
+        alignment = WD_ALIGN_PARAGRAPH.RIGHT
+
+    doc = Document(source)
+    paragraph = doc.add_paragraph()
+    paragraph.alignment = alignment
+    if signature.png:
+        width = SIGNATURE_WIDTH_PT
+        if width * signature.height / signature.width > SIGNATURE_MAX_HEIGHT_PT:
+            width = SIGNATURE_MAX_HEIGHT_PT * signature.width / signature.height
+        paragraph.add_run().add_picture(io.BytesIO(signature.png), width=Pt(width))
+    else:
+        run = paragraph.add_run(signature.text)
+        run.italic = True
+        run.font.size = Pt(20)
+
+    if signer_name:
+        caption = doc.add_paragraph()
+        caption.alignment = alignment
+        run = caption.add_run(
+            f"Signed by {signer_name} on {datetime.now().strftime('%B %d, %Y')}"
+        )
+        run.font.size = Pt(8)
+
+    buffer = new_spool()
+    doc.save(buffer)
+    buffer.seek(0)
+    return buffer
+
+
+# Singleton instance
+_signature_cache = None
+
+
+def get_signature_cache() -> SignatureCache:
+    """Get or create SignatureCache singleton"""
+    global _signature_cache
+    if _signature_cache is None:
+        _signature_cache = SignatureCache()
+    return _signature_cache
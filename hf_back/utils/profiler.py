@@ -0,0 +1,218 @@
+"""
+Request Profiler Utility
+Header-gated, on-demand profiling of individual requests in production
+"""
+
+import cProfile
+import hmac
+import json
+import os
+import pstats
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+
+class _StackSampler:
+    """Sample the stack of a single thread at a fixed interval"""
+
+    def __init__(self, thread_id: int, interval: float):
+        """
+        Initialize sampler
+
+        Args:
+            thread_id: Ident of the thread to sample
+            interval: Seconds between samples
+        """
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(
+            target=self._run, name="request-profiler", daemon=True
+        )
+
+    def _run(self):
+        """Collect folded stacks until stopped"""
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            names = []
+            while frame is not None:
+                code = frame.f_code
+                names.append(
+                    f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+                )
+                frame = frame.f_back
+            self.stacks[";".join(reversed(names))] += 1
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+
+class RequestProfiler:
+    """Profile single requests when asked to with a shared secret"""
+
+    HEADER = "X-Profile"
+    MODE_HEADER = "X-Profile-Mode"
+    ID_HEADER = "X-Profile-Id"
+
+    def __init__(
+        self,
+        secret: Optional[str] = None,
+        output_dir: Optional[str] = None,
+        interval: Optional[float] = None,
+    ):
+        """
+        Initialize request profiler
+
+        Args:
+            secret: Shared secret expected in the X-Profile header
+                (reads PROFILE_SECRET from env if not provided; disabled if empty)
+            output_dir: Directory where profiles are written
+            interval: Sampling interval in seconds for sampling mode
+        """
+        self.secret = secret or os.getenv("PROFILE_SECRET", "")
+        self.output_dir = output_dir or os.getenv(
+            "PROFILE_DIR", "/tmp/generated_docs/profiles"
+        )
+        self.interval = interval or float(os.getenv("PROFILE_INTERVAL_MS", "5")) / 1000
+
+        # Only one profile per process at a time keeps overhead bounded
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.secret)
+
+    def is_authorized(self, header_value: Optional[str]) -> bool:
+        """Check a request header against the shared secret"""
+        if not self.enabled or not header_value:
+            return False
+        return hmac.compare_digest(header_value.encode(), self.secret.encode())
+
+    def start(self, mode: str = "sampling") -> Optional[Dict[str, Any]]:
+        """
+        Start profiling the calling thread
+
+        Args:
+            mode: 'sampling' (low overhead) or 'deterministic' (cProfile)
+
+        Returns:
+            Session dictionary to pass to stop(), or None if a profile
+            is already running in this process
+        """
+        if not self._lock.acquire(blocking=False):
+            print("Profiler busy, request runs unprofiled", file=sys.stderr)
+            return None
+
+        session = {
+            "id": f"{datetime.now().strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:8]}",
+            "mode": "deterministic" if mode == "deterministic" else "sampling",
+            "started": time.perf_counter(),
+        }
+
+        if session["mode"] == "deterministic":
+            session["profiler"] = cProfile.Profile()
+            session["profiler"].enable()
+        else:
+            session["sampler"] = _StackSampler(threading.get_ident(), self.interval)
+            session["sampler"].start()
+
+        return session
+
+    def stop(self, session: Dict[str, Any], meta: Optional[Dict[str, Any]] = None):
+        """
+        Stop a profiling session and write its output files
+
+        Files written to the output directory:
+            <id>.folded  collapsed stacks (flamegraph.pl / speedscope)
+            <id>.prof    pstats dump (deterministic mode only)
+            <id>.txt     top functions by cumulative time (deterministic mode only)
+            <id>.json    request metadata and wall time
+
+        Args:
+            session: Session returned by start()
+            meta: Extra request metadata to store alongside the profile
+        """
+        try:
+            elapsed = time.perf_counter() - session["started"]
+            base = os.path.join(self.output_dir, session["id"])
+            os.makedirs(self.output_dir, exist_ok=True)
+
+            if session["mode"] == "deterministic":
+                profiler = session["profiler"]
+                profiler.disable()
+                profiler.dump_stats(f"{base}.prof")
+                stats = pstats.Stats(profiler)
+                with open(f"{base}.txt", "w") as f:
+                    stats.stream = f
+                    stats.sort_stats("cumulative").print_stats(50)
+                self._write_folded_from_stats(stats, f"{base}.folded")
+            else:
+                sampler = session["sampler"]
+                sampler.stop()
+                with open(f"{base}.folded", "w") as f:
+                    for stack, count in sampler.stacks.most_common():
+                        f.write(f"{stack} {count}\n")
+
+            with open(f"{base}.json", "w") as f:
+                json.dump(
+                    {
+                        "id": session["id"],
+                        "mode": session["mode"],
+                        "wall_time_ms": round(elapsed * 1000, 2),
+                        **(meta or {}),
+                    },
+                    f,
+                    indent=2,
+                )
+
+            print(
+                f"✓ Profile {session['id']} written to {self.output_dir}",
+                file=sys.stderr,
+            )
+        except Exception as e:
+            print(f"Error writing profile: {str(e)}", file=sys.stderr)
+        finally:
+            self._lock.release()
+
+    def _write_folded_from_stats(self, stats: pstats.Stats, path: str):
+        """
+        Write caller;callee pairs from cProfile stats as folded stacks
+
+        cProfile only records one level of call edges, so this is a
+        two-frame approximation weighted by microseconds of total time.
+        """
+        with open(path, "w") as f:
+            for func, (_, _, tottime, _, callers) in stats.stats.items():
+                callee = f"{func[2]} ({os.path.basename(func[0])}:{func[1]})"
+                if not callers:
+                    f.write(f"{callee} {int(tottime * 1e6)}\n")
+                    continue
+                for caller, caller_stats in callers.items():
+                    weight = int(caller_stats[2] * 1e6)
+                    if weight:
+                        name = f"{caller[2]} ({os.path.basename(caller[0])}:{caller[1]})"
+                        f.write(f"{name};{callee} {weight}\n")
+
+
+# Singleton instance
+_request_profiler = None
+
+
+def get_request_profiler() -> RequestProfiler:
+    """Get or create RequestProfiler singleton"""
+    global _request_profiler
+    if _request_profiler is None:
+        _request_profiler = RequestProfiler()
+    return _request_profiler
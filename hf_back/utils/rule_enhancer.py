@@ -0,0 +1,384 @@
+"""
+Rule Enhancer Utility
+Deterministic, offline text enhancement used when AI is skipped or fails
+"""
+
+import re
+import threading
+import time
+from typing import Any, Dict, List
+
+# Weak openings and what replaces them. None drops the opening when a
+# verb clearly follows ("responsible for managing ..." -> "managed ...")
+# and otherwise means "managed" ("responsible for the budget").
+WEAK_OPENINGS = [
+    (re.compile(r"^(?:i\s+)?(?:(?:was|am|were)\s+)?responsible\s+for\s+", re.I), None),
+    (re.compile(r"^(?:i\s+)?(?:was\s+)?in\s+charge\s+of\s+", re.I), "managed "),
+    (re.compile(r"^(?:i\s+)?(?:was\s+)?tasked\s+with\s+", re.I), None),
+    (re.compile(r"^duties\s+included\s+", re.I), None),
+    (re.compile(r"^(?:i\s+)?(?:was\s+)?involved\s+in\s+", re.I), "contributed to "),
+    (re.compile(r"^(?:i\s+)?participated\s+in\s+", re.I), "contributed to "),
+    (re.compile(r"^(?:i\s+)?helped\s+(?:to\s+|with\s+)?", re.I), "supported "),
+    # "I am a team player" is not a bullet to rewrite; keep its subject
+    (re.compile(r"^i\s+(?!(?:am|was|were|have|had)\b)", re.I), ""),
+]
+
+# Weak verbs (in the past tense) upgraded to stronger action verbs; only
+# applied to the bullet's own first word, never to a converted one
+# ("used" and "fixed" also open noun phrases: "Used car sales ...")
+STRONGER_VERBS = {
+    "did": "executed",
+    "made": "created",
+    "handled": "managed",
+    "got": "secured",
+}
+
+# Action verbs recognised at the start of a bullet, in base form
+ACTION_VERBS = {
+    "achieve", "administer", "analyze", "architect", "assist", "audit",
+    "automate", "build", "coach", "collaborate", "configure", "conduct",
+    "consolidate", "contribute", "coordinate", "create", "cut", "debug",
+    "decrease", "define", "deliver", "deploy", "design", "develop", "direct",
+    "document", "drive", "establish", "evaluate", "execute", "expand",
+    "facilitate", "fix", "grow", "guide", "handle", "help", "identify",
+    "implement", "improve", "increase", "integrate", "launch", "lead",
+    "maintain", "make", "manage", "mentor", "migrate", "monitor", "negotiate",
+    "optimize", "organize", "oversee", "own", "perform", "plan", "prepare",
+    "present", "process", "produce", "program", "provide", "publish",
+    "reduce", "refactor", "research", "resolve", "review", "run", "scale",
+    "secure", "streamline", "supervise", "support", "teach", "test", "train",
+    "troubleshoot", "update", "use", "win", "write",
+}
+
+IRREGULAR_PAST = {
+    "build": "built",
+    "cut": "cut",
+    "drive": "drove",
+    "grow": "grew",
+    "lead": "led",
+    "make": "made",
+    "oversee": "oversaw",
+    "run": "ran",
+    "teach": "taught",
+    "win": "won",
+    "write": "wrote",
+}
+
+# Words after a base-form verb that show it takes an object ("Lead the
+# team"); without one, "Lead engineer" or "Design system owner" is a
+# noun phrase and is left as written
+DETERMINERS = {
+    "a", "an", "the", "my", "our", "your", "his", "her", "its", "their",
+    "this", "that", "these", "those", "all", "each", "every", "both",
+    "several", "multiple", "many", "over",
+}
+
+# Job titles; a verb-looking word before one names a role, not an action
+# ("Teaching assistant", "Lead engineer")
+ROLE_NOUNS = {
+    "administrator", "analyst", "architect", "assistant", "associate",
+    "consultant", "coordinator", "designer", "developer", "director",
+    "engineer", "fellow", "instructor", "intern", "lead", "manager",
+    "member", "officer", "owner", "representative", "researcher",
+    "scientist", "specialist", "technician", "tutor", "volunteer",
+}
+
+# Past forms of verbs whose final consonant doubles ("plan" -> "planned")
+DOUBLED_FINAL = {"plan", "program", "control", "commit", "debug", "ship", "scan"}
+
+LEADING_MARKER = re.compile(r"^\s*(?:[-•*▪●◦]+|\d+[.)])\s*")
+SPACE_BEFORE_PUNCTUATION = re.compile(r"\s+([,.;:!?])")
+REPEATED_PUNCTUATION = re.compile(r"([,.;:!?])\1+")
+
+SENIORITY = [(10, "Senior"), (5, "Experienced"), (2, "Skilled"), (0, "Motivated")]
+
+
+def clean_text(text: str) -> str:
+    """
+    Whitespace, punctuation and capitalization cleanup
+
+    Args:
+        text: Any user text; paragraph breaks are kept
+
+    Returns:
+        Cleaned text
+    """
+    paragraphs = []
+    for paragraph in re.split(r"\n\s*\n", text or ""):
+        paragraph = " ".join(paragraph.split())
+        if not paragraph:
+            continue
+        paragraph = SPACE_BEFORE_PUNCTUATION.sub(r"\1", paragraph)
+        paragraph = REPEATED_PUNCTUATION.sub(r"\1", paragraph)
+        paragraphs.append(paragraph[0].upper() + paragraph[1:])
+    return "\n\n".join(paragraphs)
+
+
+def _base_form(word: str) -> str:
+    """Base form of a known verb in base, -s or -ing form, or "" if unknown"""
+    if word in ACTION_VERBS:
+        return word
+    candidates = []
+    if word.endswith("ing"):
+        stem = word[:-3]
+        candidates += [stem, stem + "e", stem[:-1]]
+    elif word.endswith("ies"):
+        candidates.append(word[:-3] + "y")
+    elif word.endswith("es"):
+        candidates += [word[:-2], word[:-1]]
+    elif word.endswith("s"):
+        candidates.append(word[:-1])
+    for candidate in candidates:
+        if candidate in ACTION_VERBS:
+            return candidate
+    return ""
+
+
+def _verb_opening(text: str) -> str:
+    """
+    Base form of the first word of text if it is clearly a verb, else ""
+
+    -ing and -s forms of known verbs count; a bare base form only counts
+    when a determiner or number follows it, since most base forms are
+    also nouns ("Research assistant", "Test automation").
+    """
+    words = [w.strip(",.;:!?").lower() for w in text.split(None, 2)[:2]]
+    if not words:
+        return ""
+    word = words[0]
+    follows = words[1] if len(words) > 1 else ""
+    if follows in ROLE_NOUNS or (follows.endswith("s") and follows[:-1] in ROLE_NOUNS):
+        return ""
+    base = _base_form(word)
+    if not base or base != word:
+        return base
+    if follows in DETERMINERS or follows[:1].isdigit():
+        return base
+    return ""
+
+
+def past_tense(verb: str) -> str:
+    """Past tense of a base-form verb"""
+    if verb in IRREGULAR_PAST:
+        return IRREGULAR_PAST[verb]
+    if verb in DOUBLED_FINAL:
+        return verb + verb[-1] + "ed"
+    if verb.endswith("e"):
+        return verb + "d"
+    if verb.endswith("y") and verb[-2:-1] not in "aeiou":
+        return verb[:-1] + "ied"
+    return verb + "ed"
+
+
+class RuleEnhancer:
+    """Local stand-in for the AI enhancement calls, with matching signatures"""
+
+    def __init__(self):
+        self._counts: Dict[str, int] = {}
+        self._seconds: Dict[str, float] = {}
+        self._fallbacks: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def _record(self, task: str, started: float):
+        with self._lock:
+            self._counts[task] = self._counts.get(task, 0) + 1
+            self._seconds[task] = (
+                self._seconds.get(task, 0.0) + time.perf_counter() - started
+            )
+
+    def enhance_resume_description(self, description: str, role: str = "") -> str:
+        """
+        Normalize one resume bullet, putting a leading verb in the past tense
+
+        Openings that are not clearly verbs ("Lead engineer on ...",
+        "Test automation with ...") are left as written.
+
+        Args:
+            description: Original description
+            role: Job role/title (unused; kept for parity with GeminiClient)
+
+        Returns:
+            Enhanced description
+        """
+        started = time.perf_counter()
+        text = clean_text(LEADING_MARKER.sub("", description or "")).replace(
+            "\n\n", " "
+        )
+        for pattern, replacement in WEAK_OPENINGS:
+            match = pattern.match(text)
+            if match:
+                rest = text[match.end() :]
+                if replacement is None:
+                    replacement = "" if _verb_opening(rest) else "managed "
+                text = replacement + rest
+                break
+
+        if text:
+            first, _, rest = text.partition(" ")
+            word = first.lower()
+            if word in STRONGER_VERBS:
+                word = STRONGER_VERBS[word]
+            else:
+                base = _verb_opening(text)
+                if base:
+                    word = past_tense(base)
+            if word != first.lower():
+                first = word
+            text = f"{first[0].upper()}{first[1:]} {rest}".strip()
+            if text[-1] not in ".!?":
+                text += "."
+
+        self._record("resume_bullet", started)
+        return text
+
+    def generate_skills_summary(
+        self, skills: List[str], experience_years: int = 0
+    ) -> str:
+        """
+        Templated professional summary from a skill list
+
+        Args:
+            skills: List of skills, most important first
+            experience_years: Years of experience
+
+        Returns:
+            Skills summary paragraph
+        """
+        started = time.perf_counter()
+        skills = list(dict.fromkeys(s.strip() for s in skills if s and s.strip()))
+        try:
+            years = int(experience_years or 0)
+        except (TypeError, ValueError):
+            years = 0
+
+        if years > 0:
+            seniority = next(label for floor, label in SENIORITY if years >= floor)
+            plural = "s" if years != 1 else ""
+            opening = f"{seniority} professional with {years}+ year{plural} of experience"
+        else:
+            opening = "Motivated entry-level professional"
+
+        if not skills:
+            summary = (
+                f"{opening}, focused on delivering reliable, high-quality work "
+                "and learning quickly in collaborative teams."
+            )
+        else:
+            summary = f"{opening} in {_join(skills[:3])}."
+            if len(skills) > 3:
+                summary += (
+                    f" Also brings hands-on expertise in {_join(skills[3:6])}, "
+                    "with a focus on delivering reliable, high-quality results."
+                )
+            else:
+                summary += (
+                    " Focused on delivering reliable, high-quality results "
+                    "and collaborating effectively across teams."
+                )
+
+        self._record("skills_summary", started)
+        return summary
+
+    def enhance_portfolio_description(self, project_data: Dict[str, Any]) -> str:
+        """
+        Clean up a project description
+
+        Args:
+            project_data: Project dictionary with a description
+
+        Returns:
+            Cleaned description
+        """
+        started = time.perf_counter()
+        text = clean_text(project_data.get("description", ""))
+        self._record("portfolio", started)
+        return text
+
+    def improve_text_quality(self, text: str, style: str = "professional") -> str:
+        """
+        Clean up free text
+
+        Args:
+            text: Text to improve
+            style: Writing style (unused; kept for parity with GeminiClient)
+
+        Returns:
+            Cleaned text
+        """
+        started = time.perf_counter()
+        text = clean_text(text)
+        self._record("improve", started)
+        return text
+
+    def generate_cover_letter(self, data: Dict[str, Any]) -> str:
+        """
+        Templated cover letter body from the request fields
+
+        Args:
+            data: Cover letter request (company, position, skills, experience)
+
+        Returns:
+            Cover letter text in paragraphs
+        """
+        started = time.perf_counter()
+        company = data.get("company") or "your company"
+        position = data.get("position") or "the open position"
+        skills = [s.strip() for s in data.get("skills", []) if s and s.strip()]
+        experience = clean_text(data.get("experience", "")).rstrip(".")
+
+        paragraphs = [
+            f"I am writing to apply for the {position} role at {company}. "
+            "I would welcome the opportunity to contribute to your team."
+        ]
+        body = []
+        if experience:
+            body.append(f"My background includes {experience[0].lower()}{experience[1:]}.")
+        if skills:
+            body.append(f"I bring hands-on experience with {_join(skills[:5])}.")
+        if body:
+            paragraphs.append(" ".join(body))
+        paragraphs.append(
+            "Thank you for your time and consideration. I look forward to "
+            "discussing how I can support your goals."
+        )
+
+        self._record("cover_letter", started)
+        return "\n\n".join(paragraphs)
+
+    def record_fallback(self, task: str):
+        """Count a call served here because the AI call failed"""
+        with self._lock:
+            self._fallbacks[task] = self._fallbacks.get(task, 0) + 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Calls and mean latency per task, and AI failures served here"""
+        with self._lock:
+            return {
+                "tasks": {
+                    task: {
+                        "calls": calls,
+                        "mean_us": round(self._seconds[task] / calls * 1e6, 1),
+                    }
+                    for task, calls in self._counts.items()
+                },
+                "fallbacks": dict(self._fallbacks),
+            }
+
+
+def _join(items: List[str]) -> str:
+    """Comma-separated list with a final 'and'"""
+    if len(items) < 2:
+        return "".join(items)
+    return f"{', '.join(items[:-1])} and {items[-1]}"
+
+
+# Singleton instance
+_rule_enhancer = None
+
+
+def get_rule_enhancer() -> RuleEnhancer:
+    """Get or create RuleEnhancer singleton"""
+    global _rule_enhancer
+    if _rule_enhancer is None:
+        _rule_enhancer = RuleEnhancer()
+    return _rule_enhancer
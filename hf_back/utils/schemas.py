@@ -0,0 +1,462 @@
+"""
+Request Schemas
+JSON schemas for every endpoint payload, compiled once at import time
+"""
+
+import os
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from jsonschema import Draft7Validator
+
+# Size limits (overridable via environment)
+MAX_SHORT_TEXT = int(os.getenv("SCHEMA_MAX_SHORT_TEXT", "500"))
+MAX_LONG_TEXT = int(os.getenv("SCHEMA_MAX_LONG_TEXT", "20000"))
+MAX_CONTENT_TEXT = int(os.getenv("SCHEMA_MAX_CONTENT_TEXT", "200000"))
+MAX_LIST_ITEMS = int(os.getenv("SCHEMA_MAX_LIST_ITEMS", "100"))
+MAX_SKILLS = int(os.getenv("SCHEMA_MAX_SKILLS", "300"))
+MAX_INVOICE_ITEMS = int(os.getenv("SCHEMA_MAX_INVOICE_ITEMS", "10000"))
+
+# Size keywords come first in every schema: checks run in dict order and
+# stop at the first error, so an oversized array or string is rejected
+# before any of its elements are visited.
+
+
+def _text(max_length: int = MAX_SHORT_TEXT) -> Dict[str, Any]:
+    """Optional text field (null allowed, generators fall back to defaults)"""
+    return {"maxLength": max_length, "type": ["string", "null"]}
+
+
+def _scalar(max_length: int = MAX_SHORT_TEXT) -> Dict[str, Any]:
+    """Optional text or number field, e.g. GPA or dates typed as numbers"""
+    return {"maxLength": max_length, "type": ["string", "number", "null"]}
+
+
+def _string_list(max_items: int = MAX_LIST_ITEMS) -> Dict[str, Any]:
+    return {
+        "maxItems": max_items,
+        "type": "array",
+        "items": _text(),
+    }
+
+
+def _object_list(properties: Dict[str, Any], max_items: int = MAX_LIST_ITEMS):
+    return {
+        "maxItems": max_items,
+        "type": "array",
+        "items": {"type": "object", "properties": properties},
+    }
+
+
+# Optional number (null allowed, generators fall back to defaults)
+_NUMBER = {"type": ["number", "null"]}
+_BOOLEAN = {"type": ["boolean", "null"]}
+# Enhancement tier: Gemini with rule fallback, Gemini only, or rules only
+_ENHANCER = {"enum": ["auto", "ai", "rules", None]}
+# Latency budget for the AI work (see X-Deadline-Ms in app.py)
+_DEADLINE_MS = {"type": ["number", "null"]}
+
+# Flat list or {"category": [skills]}; one schema rather than anyOf so a
+# failure reports the specific violation
+_SKILLS = {
+    "maxItems": MAX_SKILLS,
+    "maxProperties": MAX_LIST_ITEMS,
+    "type": ["array", "object"],
+    "items": _text(),
+    "additionalProperties": _string_list(MAX_SKILLS),
+}
+
+_EXPERIENCE = _object_list(
+    {
+        "title": _text(),
+        "company": _text(),
+        "location": _text(),
+        "start_date": _scalar(),
+        "end_date": _scalar(),
+        "responsibilities": {
+            "maxItems": MAX_LIST_ITEMS,
+            "type": "array",
+            "items": _text(MAX_LONG_TEXT),
+        },
+    }
+)
+
+_EDUCATION = _object_list(
+    {
+        "degree": _text(),
+        "field": _text(),
+        "school": _text(),
+        "graduation_date": _scalar(),
+        "gpa": _scalar(),
+        "honors": _text(),
+    }
+)
+
+_CERTIFICATIONS = _object_list(
+    {"name": _text(), "issuer": _text(), "date": _scalar()}
+)
+
+_PROJECTS = _object_list(
+    {
+        "name": _text(),
+        "title": _text(),
+        "description": _text(MAX_LONG_TEXT),
+        "technologies": _string_list(),
+        "tech": _string_list(),
+        "url": _text(),
+        "liveUrl": _text(),
+        "githubUrl": _text(),
+    }
+)
+
+_PARTY = {
+    "type": "object",
+    "properties": {
+        "name": _text(),
+        "address": _text(),
+        "email": _text(),
+        "phone": _text(),
+    },
+}
+
+SCHEMAS: Dict[str, Dict[str, Any]] = {
+    "resume": {
+        "type": "object",
+        "properties": {
+            "personal_info": {
+                "type": "object",
+                "properties": {
+                    "name": _text(),
+                    "email": _text(),
+                    "phone": _text(),
+                    "location": _text(),
+                    "linkedin": _text(),
+                    "website": _text(),
+                },
+            },
+            "summary": _text(MAX_LONG_TEXT),
+            "experience": _EXPERIENCE,
+            "education": _EDUCATION,
+            "skills": _SKILLS,
+            "certifications": _CERTIFICATIONS,
+            "projects": _PROJECTS,
+            "years_experience": _NUMBER,
+            "enhance_with_ai": _BOOLEAN,
+            "deadline_ms": _DEADLINE_MS,
+            "enhancer": _ENHANCER,
+        },
+    },
+    "cover_letter": {
+        "type": "object",
+        "properties": {
+            "name": _text(),
+            "address": _text(),
+            "email": _text(),
+            "phone": _text(),
+            "date": _text(),
+            "company": _text(),
+            "hiring_manager": _text(),
+            "position": _text(),
+            "skills": {
+                "maxItems": MAX_SKILLS,
+                "maxLength": MAX_LONG_TEXT,
+                "type": ["array", "string", "null"],
+                "items": _text(),
+            },
+            "experience": _text(MAX_LONG_TEXT),
+            "tone": _text(),
+            "custom_content": _text(MAX_CONTENT_TEXT),
+            "generate_with_ai": _BOOLEAN,
+            "deadline_ms": _DEADLINE_MS,
+        },
+    },
+    "proposal": {
+        "type": "object",
+        "properties": {
+            "title": _text(),
+            "client_name": _text(),
+            "prepared_by": _text(),
+            "date": _text(),
+            "project_title": _text(),
+            "scope": _text(MAX_LONG_TEXT),
+            "deliverables": _string_list(),
+            "timeline": _text(MAX_LONG_TEXT),
+            "budget": _scalar(),
+            "generate_with_ai": _BOOLEAN,
+            "deadline_ms": _DEADLINE_MS,
+            "custom_content": _text(MAX_CONTENT_TEXT),
+        },
+    },
+    "invoice": {
+        "type": "object",
+        "required": ["items"],
+        "properties": {
+            "invoice_number": _text(),
+            "invoice_date": _text(),
+            "due_date": _text(),
+            "from_info": _PARTY,
+            "to_info": _PARTY,
+            "items": {
+                "maxItems": MAX_INVOICE_ITEMS,
+                "minItems": 1,
+                "type": "array",
+                "items": {
+                    "type": "object",
+                    "properties": {
+                        "description": _text(MAX_LONG_TEXT),
+                        "quantity": _NUMBER,
+                        "rate": _NUMBER,
+                        "amount": _NUMBER,
+                    },
+                },
+            },
+            "tax_rate": _NUMBER,
+            "discount": _NUMBER,
+            "notes": _text(MAX_LONG_TEXT),
+            "payment_instructions": _text(MAX_LONG_TEXT),
+        },
+    },
+    "contract": {
+        "type": "object",
+        "properties": {
+            "contract_type": _text(),
+            "date": _text(),
+            "party1": _PARTY,
+            "party2": _PARTY,
+            "effective_date": _text(),
+            "expiration_date": _text(),
+            "custom_terms": _text(MAX_LONG_TEXT),
+            "generate_with_ai": _BOOLEAN,
+            "deadline_ms": _DEADLINE_MS,
+            "custom_content": _text(MAX_CONTENT_TEXT),
+        },
+    },
+    "portfolio": {
+        "type": "object",
+        "properties": {
+            "name": _text(),
+            "title": _text(),
+            "bio": _text(MAX_LONG_TEXT),
+            "contact": {
+                "type": "object",
+                "properties": {
+                    "email": _text(),
+                    "phone": _text(),
+                    "website": _text(),
+                    "linkedin": _text(),
+                },
+            },
+            "skills": _SKILLS,
+            "experience": _EXPERIENCE,
+            "education": _EDUCATION,
+            "projects": _PROJECTS,
+            "certifications": _CERTIFICATIONS,
+            "enhance_with_ai": _BOOLEAN,
+            "deadline_ms": _DEADLINE_MS,
+        },
+    },
+    "enhance_description": {
+        "type": "object",
+        "required": ["text"],
+        "properties": {
+            "text": {"maxLength": MAX_LONG_TEXT, "minLength": 1, "type": "string"},
+            "context": _text(),
+            "role": _text(),
+            "your_role": _text(),
+            "technologies": _string_list(),
+            "enhancer": _ENHANCER,
+            "deadline_ms": _DEADLINE_MS,
+        },
+    },
+    "skills_summary": {
+        "type": "object",
+        "required": ["skills"],
+        "properties": {
+            "skills": {
+                "maxItems": MAX_SKILLS,
+                "minItems": 1,
+                "type": "array",
+                "items": _text(),
+            },
+            "experience_years": _NUMBER,
+            "enhancer": _ENHANCER,
+            "deadline_ms": _DEADLINE_MS,
+        },
+    },
+    # Form fields of the multipart /enhance upload
+    "enhance_document": {
+        "type": "object",
+        "properties": {
+            "prompt": _text(MAX_LONG_TEXT),
+            "doc_type": _text(),
+            "deadline_ms": _text(),
+        },
+    },
+    # Form fields of the multipart /add-signature upload
+    "add_signature": {
+        "type": "object",
+        "required": ["signature"],
+        "properties": {
+            # Base64 image data URL, or the typed signature
+            "signature": {"maxLength": MAX_CONTENT_TEXT, "minLength": 1, "type": "string"},
+            "position": _text(),
+            "signer_name": _text(),
+            "pages": _text(),
+        },
+    },
+}
+
+
+# Compiled checks
+#
+# jsonschema's generic validator costs ~60µs per invoice line item, so the
+# subset of keywords used above is compiled into plain closures instead.
+# jsonschema still checks that every schema is well formed at import time.
+
+_PY_TYPES = {
+    "string": (str,),
+    "number": (int, float),
+    "integer": (int,),
+    "boolean": (bool,),
+    "array": (list,),
+    "object": (dict,),
+    "null": (type(None),),
+}
+
+_Check = Callable[[Any], Optional[Tuple[List[Any], str]]]
+
+
+def _compile(schema: Dict[str, Any]) -> _Check:
+    """
+    Compile a schema into a function returning (reversed path, message)
+    for the first violation, or None
+
+    Keywords run in dict order, so size limits placed first reject an
+    oversized value before its elements are visited.
+    """
+    checks: List[_Check] = []
+
+    for keyword, value in schema.items():
+        if keyword == "type":
+            names = value if isinstance(value, list) else [value]
+            py_types = tuple(t for name in names for t in _PY_TYPES[name])
+            allow_bool = "boolean" in names
+            message = f"expected {' or '.join(names)}"
+
+            def check(v, py_types=py_types, allow_bool=allow_bool, message=message):
+                if not isinstance(v, py_types) or (
+                    not allow_bool and isinstance(v, bool)
+                ):
+                    return [], message
+
+        elif keyword in ("maxItems", "maxLength", "maxProperties"):
+            kind = {"maxItems": list, "maxLength": str, "maxProperties": dict}[keyword]
+            unit = {"maxItems": "items", "maxLength": "characters"}.get(
+                keyword, "keys"
+            )
+
+            def check(v, kind=kind, limit=value, unit=unit):
+                if isinstance(v, kind) and len(v) > limit:
+                    return [], f"has {len(v)} {unit}, maximum is {limit}"
+
+        elif keyword in ("minItems", "minLength"):
+            kind = list if keyword == "minItems" else str
+            unit = "entries" if keyword == "minItems" else "characters"
+
+            def check(v, kind=kind, limit=value, unit=unit):
+                if isinstance(v, kind) and len(v) < limit:
+                    return [], f"must have at least {limit} {unit}"
+
+        elif keyword == "enum":
+            allowed = tuple(value)
+            message = f"must be one of {', '.join(str(a) for a in allowed if a is not None)}"
+
+            def check(v, allowed=allowed, message=message):
+                if v not in allowed:
+                    return [], message
+
+        elif keyword == "required":
+
+            def check(v, required=tuple(value)):
+                if isinstance(v, dict):
+                    for key in required:
+                        if key not in v:
+                            return [], f"'{key}' is required"
+
+        elif keyword == "properties":
+            compiled = [(key, _compile(sub)) for key, sub in value.items()]
+
+            def check(v, compiled=compiled):
+                if isinstance(v, dict):
+                    for key, sub_check in compiled:
+                        if key in v:
+                            error = sub_check(v[key])
+                            if error:
+                                error[0].append(key)
+                                return error
+
+        elif keyword == "items":
+            sub_check = _compile(value)
+
+            def check(v, sub_check=sub_check):
+                if isinstance(v, list):
+                    for index, item in enumerate(v):
+                        error = sub_check(item)
+                        if error:
+                            error[0].append(index)
+                            return error
+
+        elif keyword == "additionalProperties":
+            sub_check = _compile(value)
+            known = frozenset(schema.get("properties", ()))
+
+            def check(v, sub_check=sub_check, known=known):
+                if isinstance(v, dict):
+                    for key, item in v.items():
+                        if key not in known:
+                            error = sub_check(item)
+                            if error:
+                                error[0].append(key)
+                                return error
+
+        else:
+            raise ValueError(f"Unsupported schema keyword: {keyword}")
+
+        checks.append(check)
+
+    def run(v):
+        for check in checks:
+            error = check(v)
+            if error:
+                return error
+        return None
+
+    return run
+
+
+for _schema in SCHEMAS.values():
+    Draft7Validator.check_schema(_schema)
+
+# Compiled validators, built once per process
+VALIDATORS: Dict[str, _Check] = {
+    name: _compile(schema) for name, schema in SCHEMAS.items()
+}
+
+
+def validate_payload(schema_name: str, data: Any) -> Optional[str]:
+    """
+    Validate a request payload against its endpoint schema
+
+    Args:
+        schema_name: Key into SCHEMAS
+        data: Parsed JSON payload
+
+    Returns:
+        Error message for the first violation, or None if the payload is valid
+    """
+    error = VALIDATORS[schema_name](data)
+    if error is None:
+        return None
+
+    path, message = error
+    location = ".".join(str(p) for p in reversed(path)) or "payload"
+    return f"Invalid {location}: {message}"
@@ -0,0 +1,36 @@
+"""
+Spool Utility
+Spooled temporary files for rendered documents, spilling to disk when large
+"""
+
+import os
+import tempfile
+from typing import BinaryIO
+
+# Documents up to this size stay in memory; larger ones spill to SPOOL_DIR
+SPOOL_MAX_MEMORY = int(os.getenv("SPOOL_MAX_MEMORY", str(1024 * 1024)))
+SPOOL_DIR = os.getenv("SPOOL_DIR") or None
+
+# Bytes per chunk when streaming a spooled document to the client
+STREAM_CHUNK_SIZE = int(os.getenv("STREAM_CHUNK_SIZE", str(64 * 1024)))
+
+
+def new_spool() -> BinaryIO:
+    """
+    Create an output file for a renderer
+
+    Returns:
+        SpooledTemporaryFile that moves to disk above SPOOL_MAX_MEMORY
+        and is deleted when closed
+    """
+    return tempfile.SpooledTemporaryFile(
+        max_size=SPOOL_MAX_MEMORY, mode="w+b", dir=SPOOL_DIR
+    )
+
+
+def spool_size(spool: BinaryIO) -> int:
+    """Total size of a spooled file in bytes, leaving it rewound"""
+    spool.seek(0, os.SEEK_END)
+    size = spool.tell()
+    spool.seek(0)
+    return size
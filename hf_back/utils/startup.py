@@ -0,0 +1,201 @@
+"""
+Startup Utility
+Lazy service loading and the post-fork warm-up that gates worker readiness
+"""
+
+import os
+import sys
+import threading
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, Optional
+
+# Milliseconds spent on each startup step in this process
+STARTUP_TIMINGS: Dict[str, float] = {}
+
+# Sample payloads rendered once per worker during warm-up
+WARMUP_PAYLOADS: Dict[str, Dict[str, Any]] = {
+    "resume": {
+        "personal_info": {"name": "Warm Up", "email": "warmup@example.com"},
+        "summary": "Warm-up render.",
+        "experience": [
+            {"title": "Engineer", "company": "Vero", "responsibilities": ["Warm"]}
+        ],
+        "education": [{"degree": "BSc", "field": "CS", "school": "Vero"}],
+        "skills": {"Languages": ["Python"]},
+        "certifications": [{"name": "Cert", "issuer": "Vero", "date": "2024"}],
+        "projects": [{"name": "Vero", "description": "Warm", "technologies": ["x"]}],
+    },
+    "cover_letter": {"name": "Warm Up", "company": "Vero", "content": "Hi\n\nThanks"},
+    "proposal": {"client_name": "Vero", "content": "Overview\nWarm-up render."},
+    "invoice": {"items": [{"description": "Warm-up", "quantity": 1, "rate": 1.0}]},
+    "contract": {"terms": "Scope:\nWarm-up render."},
+    "portfolio": {
+        "name": "Warm Up",
+        "bio": "Warm-up render.",
+        "skills": ["Python"],
+        "projects": [{"name": "Vero", "description": "Warm"}],
+    },
+}
+
+
+class LazyService:
+    """Proxy that imports and builds a service on first attribute access"""
+
+    def __init__(self, name: str, factory: Callable[[], Any]):
+        """
+        Initialize lazy service
+
+        Args:
+            name: Service name used in timings
+            factory: Zero-argument callable that imports and returns the service
+        """
+        self._name = name
+        self._factory = factory
+        self._instance = None
+        self._lock = threading.Lock()
+
+    @property
+    def loaded(self) -> bool:
+        return self._instance is not None
+
+    def load(self) -> Any:
+        """Build the service if needed and return it"""
+        if self._instance is None:
+            with self._lock:
+                if self._instance is None:
+                    started = time.perf_counter()
+                    self._instance = self._factory()
+                    elapsed = (time.perf_counter() - started) * 1000
+                    STARTUP_TIMINGS[f"load_{self._name}_ms"] = round(elapsed, 1)
+        return self._instance
+
+    def __getattr__(self, attr: str) -> Any:
+        return getattr(self.load(), attr)
+
+
+class Warmup:
+    """Run one-time warm-up work and track worker readiness"""
+
+    def __init__(self):
+        """Initialize warm-up state"""
+        self.state = "cold"
+        self.started_at: Optional[str] = None
+        self.finished_at: Optional[str] = None
+        self.errors: Dict[str, str] = {}
+        self.gemini_connected = False
+        self.renders_done = False
+        self.preloaded = False
+        self._lock = threading.Lock()
+
+    @property
+    def ready(self) -> bool:
+        return self.state in ("ready", "degraded")
+
+    def run(self, docx_generator: Any, pdf_generator: Any, gemini_client: Any):
+        """
+        Render every document type once and connect to Gemini
+
+        The Gemini connection is opened on a background thread while the
+        renders run, and both must finish before the worker reports ready.
+        A failed step marks the worker 'degraded' rather than blocking it.
+
+        Args:
+            docx_generator: DocxGenerator (or LazyService wrapping one)
+            pdf_generator: PDFGenerator (or LazyService wrapping one)
+            gemini_client: GeminiClient
+        """
+        with self._lock:
+            if self.state != "cold":
+                return
+            self.state = "warming"
+
+        self.started_at = datetime.now().isoformat()
+        started = time.perf_counter()
+
+        gemini_thread = threading.Thread(
+            target=self._step,
+            args=("gemini_connect", gemini_client.connect),
+            name="warmup-gemini",
+            daemon=True,
+        )
+        gemini_thread.start()
+
+        # Skipped when the master already rendered before forking
+        if not self.renders_done:
+            self.render_all(docx_generator, pdf_generator)
+
+        gemini_thread.join(float(os.getenv("WARMUP_GEMINI_TIMEOUT", "15")))
+        self.gemini_connected = "gemini_connect_ms" in STARTUP_TIMINGS
+        if not self.gemini_connected and "gemini_connect" not in self.errors:
+            self.errors["gemini_connect"] = "timed out"
+
+        STARTUP_TIMINGS["warmup_total_ms"] = round(
+            (time.perf_counter() - started) * 1000, 1
+        )
+        self.finished_at = datetime.now().isoformat()
+        self.state = "degraded" if self.errors else "ready"
+
+        print(
+            f"✓ Warm-up {self.state} in {STARTUP_TIMINGS['warmup_total_ms']} ms "
+            f"(pid {os.getpid()})",
+            file=sys.stderr,
+        )
+
+    def render_all(self, docx_generator: Any, pdf_generator: Any):
+        """
+        Load both generators and render every document type once
+
+        Safe to call in a gunicorn master before fork: it opens no sockets
+        and starts no threads.
+        """
+        for service in (docx_generator, pdf_generator):
+            if isinstance(service, LazyService):
+                self._step(f"load_{service._name}", service.load)
+
+        for doc_type, payload in WARMUP_PAYLOADS.items():
+            if doc_type == "portfolio":
+                render = pdf_generator.generate_portfolio_pdf
+            else:
+                render = getattr(docx_generator, f"generate_{doc_type}")
+            self._step(f"render_{doc_type}", render, dict(payload))
+
+        self.renders_done = True
+
+    def _step(self, name: str, func: Callable, *args):
+        """Run and time one warm-up step, recording failures"""
+        started = time.perf_counter()
+        try:
+            func(*args)
+            STARTUP_TIMINGS[f"{name}_ms"] = round(
+                (time.perf_counter() - started) * 1000, 1
+            )
+        except Exception as e:
+            print(f"Warm-up step {name} failed: {str(e)}", file=sys.stderr)
+            self.errors[name] = str(e)
+
+    def status(self) -> Dict[str, Any]:
+        """Readiness details for /health"""
+        return {
+            "ready": self.ready,
+            "state": self.state,
+            "pid": os.getpid(),
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "gemini_connected": self.gemini_connected,
+            "preloaded": self.preloaded,
+            "errors": self.errors,
+            "timings_ms": STARTUP_TIMINGS,
+        }
+
+
+# Singleton instance
+_warmup = None
+
+
+def get_warmup() -> Warmup:
+    """Get or create Warmup singleton"""
+    global _warmup
+    if _warmup is None:
+        _warmup = Warmup()
+    return _warmup
@@ -0,0 +1,263 @@
+"""
+Tenant Quota Utility
+Per-tenant Gemini call and token budgets per time window, shared across workers
+"""
+
+import hashlib
+import json
+import os
+import sys
+import threading
+import time
+from typing import Any, Dict, Optional, Set
+
+from utils.cache_backend import CacheBackend, CacheUnavailable, get_cache_backend
+
+# Keys in the "tenant_quota" cache namespace (see utils/cache_backend.py),
+# shared by every worker, or every replica with the redis backend:
+#   <window>:<sha256(tenant)[:16]>:calls   counter
+#   <window>:<sha256(tenant)[:16]>:tokens  counter
+#   <window>:<sha256(tenant)[:16]>:tenant  tenant id, for reports
+# <window> is the index of the fixed window (unix time // window seconds);
+# keys expire two windows after they are created.
+
+
+class QuotaExceeded(Exception):
+    """Raised when a tenant has used up its AI budget for the current window"""
+
+
+class TenantQuota:
+    """Count each tenant's Gemini calls and tokens against a per-window budget"""
+
+    def __init__(
+        self,
+        backend: Optional[CacheBackend] = None,
+        window: Optional[float] = None,
+        call_budget: Optional[int] = None,
+        token_budget: Optional[int] = None,
+        overrides: Optional[Dict[str, Dict[str, int]]] = None,
+        api_keys: Optional[Dict[str, str]] = None,
+        trusted_proxies: Optional[Set[str]] = None,
+    ):
+        """
+        Initialize tenant quota
+
+        Args:
+            backend: Shared counters (CACHE_BACKEND, namespace "tenant_quota")
+            window: Budget window in seconds (TENANT_QUOTA_WINDOW)
+            call_budget: Gemini calls per tenant per window, 0 for no
+                limit (TENANT_AI_CALL_BUDGET)
+            token_budget: Prompt plus response tokens per tenant per
+                window, 0 for no limit (TENANT_AI_TOKEN_BUDGET)
+            overrides: Budgets for specific tenants, e.g.
+                {"acme": {"calls": 5000, "tokens": 0}} (TENANT_AI_BUDGETS, JSON)
+            api_keys: X-API-Key values and the tenant each belongs to, e.g.
+                {"<key>": "acme"} (TENANT_API_KEYS, JSON)
+            trusted_proxies: Addresses whose X-Tenant-Id header is believed
+                (TRUSTED_PROXIES, comma-separated)
+        """
+        self.backend = backend or get_cache_backend("tenant_quota")
+        self.window = window or float(os.getenv("TENANT_QUOTA_WINDOW", "3600"))
+        self.call_budget = (
+            call_budget
+            if call_budget is not None
+            else int(os.getenv("TENANT_AI_CALL_BUDGET", "1000"))
+        )
+        self.token_budget = (
+            token_budget
+            if token_budget is not None
+            else int(os.getenv("TENANT_AI_TOKEN_BUDGET", "2000000"))
+        )
+        if overrides is None:
+            try:
+                overrides = json.loads(os.getenv("TENANT_AI_BUDGETS", "{}"))
+            except ValueError:
+                print("Warning: TENANT_AI_BUDGETS is not valid JSON, ignoring", file=sys.stderr)
+                overrides = {}
+        self.overrides = overrides
+        if api_keys is None:
+            try:
+                api_keys = json.loads(os.getenv("TENANT_API_KEYS", "{}"))
+            except ValueError:
+                print("Warning: TENANT_API_KEYS is not valid JSON, ignoring", file=sys.stderr)
+                api_keys = {}
+        self.api_keys = api_keys
+        if trusted_proxies is None:
+            trusted_proxies = {
+                address.strip()
+                for address in os.getenv("TRUSTED_PROXIES", "").split(",")
+                if address.strip()
+            }
+        self.trusted_proxies = trusted_proxies
+
+        self.counters = {"recorded_calls": 0, "rejected_calls": 0, "over_budget_requests": 0}
+        self._lock = threading.Lock()
+
+    # ------------------------------------------------------------------
+    # Windows and keys
+    # ------------------------------------------------------------------
+
+    def _window_index(self) -> int:
+        return int(time.time() // self.window)
+
+    def retry_after(self) -> int:
+        """Seconds until the current window ends and budgets refill"""
+        return max(1, int(self.window - time.time() % self.window) + 1)
+
+    def _key(self, tenant: str, window: int, field: str) -> str:
+        # Tenant ids come from request headers; hash them into a safe name
+        name = hashlib.sha256(tenant.encode()).hexdigest()[:16]
+        return f"{window}:{name}:{field}"
+
+    def _count(self, key: str, amount: int = 1):
+        with self._lock:
+            self.counters[key] += amount
+
+    def tenant_for(
+        self,
+        api_key: Optional[str],
+        tenant_header: Optional[str],
+        remote_addr: Optional[str],
+    ) -> str:
+        """
+        Tenant a request is accounted to: the tenant of a configured
+        X-API-Key, else X-Tenant-Id from a trusted proxy, else client address
+
+        Unknown keys are ignored, so sending a new key on every request
+        does not start a fresh budget; nor does a different X-Tenant-Id
+        from anyone but a trusted proxy.
+
+        Args:
+            api_key: X-API-Key header
+            tenant_header: X-Tenant-Id header
+            remote_addr: Client address
+        """
+        if api_key:
+            tenant = self.api_keys.get(api_key)
+            if tenant:
+                return tenant
+        if tenant_header and remote_addr in self.trusted_proxies:
+            return tenant_header
+        return remote_addr or "anonymous"
+
+    # ------------------------------------------------------------------
+    # Budgets and usage
+    # ------------------------------------------------------------------
+
+    def budget(self, tenant: str) -> Dict[str, int]:
+        """Calls and tokens the tenant may use per window (0: no limit)"""
+        override = self.overrides.get(tenant, {})
+        return {
+            "calls": override.get("calls", self.call_budget),
+            "tokens": override.get("tokens", self.token_budget),
+        }
+
+    def usage(self, tenant: str) -> Dict[str, int]:
+        """Calls and tokens the tenant has used in the current window"""
+        window = self._window_index()
+        usage = {}
+        for name in ("calls", "tokens"):
+            value = self.backend.get(self._key(tenant, window, name))
+            usage[name] = int(value) if value else 0
+        return usage
+
+    def over_budget(self, tenant: str) -> bool:
+        budget = self.budget(tenant)
+        if not (budget["calls"] or budget["tokens"]):
+            return False
+        usage = self.usage(tenant)
+        return any(
+            budget[name] and usage[name] >= budget[name] for name in ("calls", "tokens")
+        )
+
+    def check(self, tenant: str):
+        """
+        Raises:
+            QuotaExceeded: If the tenant's budget for this window is used up
+        """
+        if self.over_budget(tenant):
+            self._count("rejected_calls")
+            raise QuotaExceeded("AI quota exhausted for this window")
+
+    def record_over_budget(self):
+        """Count a request turned away or degraded at admission"""
+        self._count("over_budget_requests")
+
+    def record(self, tenant: str, calls: int = 1, tokens: int = 0):
+        """Add a tenant's Gemini usage to the shared counters"""
+        window = self._window_index()
+        ttl = self.window * 2
+        try:
+            if calls:
+                self.backend.incr(self._key(tenant, window, "calls"), calls, ttl)
+            if tokens:
+                self.backend.incr(self._key(tenant, window, "tokens"), tokens, ttl)
+            self.backend.add(self._key(tenant, window, "tenant"), tenant.encode(), ttl)
+        except CacheUnavailable as e:
+            # The call already happened; losing its count beats failing it
+            print(f"Tenant quota update failed: {str(e)}", file=sys.stderr)
+            return
+        self._count("recorded_calls", calls)
+
+    def reset(self, tenant: str):
+        """Forget a tenant's usage in the current window"""
+        window = self._window_index()
+        for name in ("calls", "tokens"):
+            self.backend.delete(self._key(tenant, window, name))
+
+    # ------------------------------------------------------------------
+    # Reporting
+    # ------------------------------------------------------------------
+
+    def report(self) -> Dict[str, Any]:
+        """Usage and budget of every tenant active in the current window (all workers)"""
+        window = self._window_index()
+        tenants = {}
+        for key in self.backend.keys(f"{window}:"):
+            if not key.endswith(":tenant"):
+                continue
+            value = self.backend.get(key)
+            if value is None:
+                continue
+            tenant = value.decode()
+            usage = self.usage(tenant)
+            budget = self.budget(tenant)
+            tenants[tenant] = {
+                **usage,
+                "budget": budget,
+                "over_budget": any(
+                    budget[name] and usage[name] >= budget[name]
+                    for name in ("calls", "tokens")
+                ),
+            }
+        return {
+            "window_seconds": self.window,
+            "window_started_at": window * self.window,
+            "resets_in": self.retry_after(),
+            "tenants": tenants,
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        """Budgets and counters for this process"""
+        with self._lock:
+            return {
+                "backend": self.backend.kind,
+                "window_seconds": self.window,
+                "call_budget": self.call_budget,
+                "token_budget": self.token_budget,
+                "overrides": len(self.overrides),
+                "api_keys": len(self.api_keys),
+                **self.counters,
+            }
+
+
+# Singleton instance
+_tenant_quota = None
+
+
+def get_tenant_quota() -> TenantQuota:
+    """Get or create TenantQuota singleton"""
+    global _tenant_quota
+    if _tenant_quota is None:
+        _tenant_quota = TenantQuota()
+    return _tenant_quota
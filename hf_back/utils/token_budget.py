@@ -0,0 +1,125 @@
+"""
+Token Budget Utility
+Estimate prompt tokens locally and split long inputs on natural boundaries
+"""
+
+import os
+import re
+from typing import List, Optional, Tuple
+
+# Inputs above this many estimated tokens are split into parallel calls
+INPUT_CHUNK_TOKENS = int(os.getenv("GEMINI_INPUT_CHUNK_TOKENS", "1500"))
+
+# Gemini's tokenizer averages ~4 characters per token on English prose;
+# other scripts are closer to one token per character
+ASCII_CHARS_PER_TOKEN = 4
+
+PARAGRAPH_BREAK = re.compile(r"\n\s*\n")
+SENTENCE_BREAK = re.compile(r"(?<=[.!?;:])\s+")
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Fast local token estimate, biased slightly high
+
+    Args:
+        text: Prompt or input text
+
+    Returns:
+        Estimated token count
+    """
+    if not text:
+        return 0
+    ascii_chars = len(text.encode("ascii", "ignore"))
+    return -(-ascii_chars // ASCII_CHARS_PER_TOKEN) + len(text) - ascii_chars
+
+
+def split_text(text: str, max_tokens: int = INPUT_CHUNK_TOKENS) -> List[str]:
+    """
+    Split text into pieces of at most about max_tokens each
+
+    Pieces are sized evenly below max_tokens. Paragraphs are packed
+    together while they fit; an oversized paragraph is split between
+    sentences, and an oversized sentence between words.
+
+    Args:
+        text: Input text
+        max_tokens: Estimated token budget per piece
+
+    Returns:
+        Pieces in order (see split_text_joiners() to put them back together)
+    """
+    return split_text_joiners(text, max_tokens)[0]
+
+
+def split_text_joiners(
+    text: str, max_tokens: int = INPUT_CHUNK_TOKENS
+) -> Tuple[List[str], List[str]]:
+    """
+    split_text(), plus what separated each pair of adjacent pieces
+
+    Returns:
+        (pieces, joiners): joiners[i] goes between pieces[i] and
+        pieces[i + 1], a blank line at a paragraph break and a space where
+        a paragraph was split; join_pieces() restores the structure
+    """
+    total = estimate_tokens(text)
+    if total <= max_tokens:
+        return [text], []
+    # Even pieces: the slowest piece sets the latency of the whole call
+    max_tokens = -(-total // -(-total // max_tokens))
+
+    pieces: List[str] = []
+    joiners: List[str] = []
+    for paragraph in PARAGRAPH_BREAK.split(text.strip()):
+        units = [paragraph]
+        if estimate_tokens(paragraph) > max_tokens:
+            units = _split_sentences(paragraph, max_tokens)
+        _pack(pieces, units, max_tokens, joiners)
+    return pieces, joiners
+
+
+def join_pieces(pieces: List[str], joiners: List[str]) -> str:
+    """Join (processed) pieces with the joiners split_text_joiners() returned"""
+    text = pieces[0] if pieces else ""
+    for joiner, piece in zip(joiners, pieces[1:]):
+        text += joiner + piece
+    return text
+
+
+def _split_sentences(text: str, max_tokens: int) -> List[str]:
+    units = []
+    for sentence in SENTENCE_BREAK.split(text):
+        if estimate_tokens(sentence) <= max_tokens:
+            units.append(sentence)
+            continue
+        # A run-on sentence: fall back to words
+        words: List[str] = []
+        _pack(words, sentence.split(" "), max_tokens)
+        units.extend(words)
+    return units
+
+
+def _pack(
+    pieces: List[str],
+    units: List[str],
+    max_tokens: int,
+    joiners: Optional[List[str]] = None,
+):
+    """
+    Append one paragraph's units to pieces, joining onto the last piece
+    while it fits: the first unit after a blank line, the rest after a
+    space. A unit that starts a new piece records its joiner in joiners.
+    """
+    first = True
+    for unit in units:
+        if not unit.strip():
+            continue
+        joiner = "\n\n" if first else " "
+        if pieces and estimate_tokens(pieces[-1] + joiner + unit) <= max_tokens:
+            pieces[-1] += joiner + unit
+        else:
+            if pieces and joiners is not None:
+                joiners.append(joiner)
+            pieces.append(unit)
+        first = False